@@ -1,8 +1,9 @@
 """
 app.py - Punto de entrada de la aplicacion Flask.
 
-Crea la aplicacion, registra los Blueprints (uno por tabla)
-e inicia el servidor de desarrollo en el puerto 5100.
+crear_app() crea la aplicacion y registra los Blueprints (uno por tabla).
+Ejecutado directamente inicia el servidor de desarrollo en el puerto 5100;
+en produccion se sirve con gunicorn (ver wsgi.py y gunicorn.conf.py).
 """
 
 # Flask: clase principal del framework web para crear la aplicacion
@@ -13,20 +14,7 @@ from config import SECRET_KEY
 
 
 # ══════════════════════════════════════════════
-# CREAR LA APLICACION FLASK
-# ══════════════════════════════════════════════
-
-# Flask(__name__) crea la instancia de la aplicacion.
-# __name__ le indica a Flask en que modulo esta corriendo (necesario para encontrar templates y static).
-app = Flask(__name__)
-
-# La clave secreta es necesaria para los mensajes flash (alertas).
-# Flask la usa internamente para firmar las cookies de sesion.
-app.secret_key = SECRET_KEY
-
-
-# ══════════════════════════════════════════════
-# REGISTRAR BLUEPRINTS
+# IMPORTAR LOS BLUEPRINTS
 # Cada Blueprint agrupa las rutas de una tabla.
 # Es el equivalente a tener una pagina separada por tabla.
 # ══════════════════════════════════════════════
@@ -44,19 +32,100 @@ from routes.usuario import bp as usuario_bp    # Blueprint CRUD de usuario
 from routes.cliente import bp as cliente_bp    # Blueprint CRUD de cliente (FK persona, empresa)
 from routes.vendedor import bp as vendedor_bp  # Blueprint CRUD de vendedor (FK persona)
 from routes.factura import bp as factura_bp    # Blueprint CRUD de facturas (SPs)
+from routes.estado import bp as estado_bp      # Blueprint de introspeccion (JSON)
+from routes.exportar import bp as exportar_bp  # Blueprint de exportacion a CSV
+from routes.buscar import bp as buscar_bp      # Blueprint de busqueda (typeahead)
+from routes.metricas import bp as metricas_bp  # Blueprint de metricas (Prometheus)
+
+# jsonify y el filtro tojson deben aceptar los listados compactos de ApiService
+# (Tabla y Fila, ver services/filas.py) ademas de listas y diccionarios.
+from services.filas import ProveedorJson
+
+# Monitor de salud de la API: hilo de fondo que consulta /api/diagnostico/conexion
+# cada pocos segundos. La pagina de inicio lee su ultimo resultado y ApiService
+# lo usa para no esperar el timeout cuando la API esta caida.
+from services.monitor_salud import monitor
+
+# Traza por peticion: llamadas a la API y render de los templates de las
+# peticiones muestreadas, en el encabezado Server-Timing y en el log.
+from services.traza import registrar_traza
+
+# Metricas del proceso en GET /metrics: peticiones por endpoint, llamadas a
+# la API, cache, pool y peticiones en curso.
+from services.metricas import registrar_metricas
+
+
+# ══════════════════════════════════════════════
+# CREAR LA APLICACION FLASK (application factory)
+# ══════════════════════════════════════════════
+
+def _iniciar_monitor():
+    """
+    Arranca el monitor de salud con la primera peticion del proceso.
+
+    No se arranca al importar: con gunicorn --preload el modulo se importa
+    en el proceso maestro y los hilos no sobreviven al fork de los workers.
+    iniciar() no crea otro hilo si ya esta corriendo.
+    """
+    if not monitor.activo():
+        monitor.iniciar()
+
+
+def crear_app(configuracion=None):
+    """
+    Crea y configura una aplicacion Flask con todos los Blueprints.
+
+    Los servicios (pool, caches, indices) son del proceso y se comparten
+    entre todas las aplicaciones creadas.
+
+    Args:
+        configuracion: diccionario opcional que se agrega a app.config
+                       (ej: {'TESTING': True})
+
+    Returns:
+        La aplicacion Flask lista para servir.
+
+    Ejemplo:
+        gunicorn -c gunicorn.conf.py wsgi:app   (ver wsgi.py)
+    """
+    # Flask(__name__) crea la instancia de la aplicacion.
+    # __name__ le indica a Flask en que modulo esta corriendo (necesario para encontrar templates y static).
+    app = Flask(__name__)
+
+    # La clave secreta es necesaria para los mensajes flash (alertas).
+    # Flask la usa internamente para firmar las cookies de sesion.
+    app.secret_key = SECRET_KEY
+    if configuracion:
+        app.config.update(configuracion)
+
+    app.json = ProveedorJson(app)
+
+    # register_blueprint() conecta las rutas del Blueprint a la aplicacion Flask.
+    # Sin esto, las URLs definidas en cada Blueprint no funcionarian.
+    app.register_blueprint(home_bp)      # Registra GET /
+    app.register_blueprint(empresa_bp)   # Registra /empresa, /empresa/crear, etc.
+    app.register_blueprint(persona_bp)   # Registra /persona, /persona/crear, etc.
+    app.register_blueprint(producto_bp)  # Registra /producto, /producto/crear, etc.
+    app.register_blueprint(rol_bp)       # Registra /rol, /rol/crear, etc.
+    app.register_blueprint(ruta_bp)      # Registra /ruta, /ruta/crear, etc.
+    app.register_blueprint(usuario_bp)   # Registra /usuario, /usuario/crear, etc.
+    app.register_blueprint(cliente_bp)   # Registra /cliente, /cliente/crear, etc.
+    app.register_blueprint(vendedor_bp)  # Registra /vendedor, /vendedor/crear, etc.
+    app.register_blueprint(factura_bp)   # Registra /factura, /factura/crear, etc. (usa SPs)
+    app.register_blueprint(estado_bp)    # Registra /estado y /estado/circuitos
+    app.register_blueprint(exportar_bp)  # Registra /exportar/<tabla>.csv
+    app.register_blueprint(buscar_bp)    # Registra /buscar/<tabla>?q=
+    app.register_blueprint(metricas_bp)  # Registra /metrics
+
+    # Primero: la duracion y las peticiones en curso incluyen los demas hooks
+    registrar_metricas(app)
+    app.before_request(_iniciar_monitor)
+    registrar_traza(app)
+    return app
+
 
-# register_blueprint() conecta las rutas del Blueprint a la aplicacion Flask.
-# Sin esto, las URLs definidas en cada Blueprint no funcionarian.
-app.register_blueprint(home_bp)      # Registra GET /
-app.register_blueprint(empresa_bp)   # Registra /empresa, /empresa/crear, etc.
-app.register_blueprint(persona_bp)   # Registra /persona, /persona/crear, etc.
-app.register_blueprint(producto_bp)  # Registra /producto, /producto/crear, etc.
-app.register_blueprint(rol_bp)       # Registra /rol, /rol/crear, etc.
-app.register_blueprint(ruta_bp)      # Registra /ruta, /ruta/crear, etc.
-app.register_blueprint(usuario_bp)   # Registra /usuario, /usuario/crear, etc.
-app.register_blueprint(cliente_bp)   # Registra /cliente, /cliente/crear, etc.
-app.register_blueprint(vendedor_bp)  # Registra /vendedor, /vendedor/crear, etc.
-app.register_blueprint(factura_bp)   # Registra /factura, /factura/crear, etc. (usa SPs)
+# Instancia del modulo: la usan "python app.py", "flask --app app run" y wsgi.py
+app = crear_app()
 
 
 # ══════════════════════════════════════════════
@@ -0,0 +1,6 @@
+"""
+benchmarks - Mediciones de rendimiento del frontend (no son pruebas).
+
+Se ejecutan desde la raiz del proyecto, por ejemplo:
+    python -m benchmarks.memoria_filas
+"""
@@ -0,0 +1,1157 @@
+"""
+api_simulada.py - Imitacion local de la API generica en C# para medir el frontend.
+
+Sin la API y su base de datos no se puede medir ni someter a carga el
+frontend. Este servidor (solo libreria estandar) implementa lo que usa
+ApiService:
+
+    GET    /api/{tabla}?limite=N                 → {"datos": [...], "mensaje": ...}
+    GET    /api/{tabla}/{campo}/{valor}          → registros con ese valor (404 si no hay)
+    POST   /api/{tabla}?camposEncriptar=campo    → crea (SERIAL autoincremental)
+    PUT    /api/{tabla}/{clave}/{valor}?camposEncriptar=campo
+    DELETE /api/{tabla}/{clave}/{valor}          → respeta las claves foraneas
+    POST   /api/procedimientos/ejecutarsp        → los 6 SP de factura, con
+                                                   p_resultado como texto JSON
+    GET    /api/diagnostico/conexion             → datos del "servidor"
+
+Las tablas, claves y datos iniciales se leen de
+scripts_bds/bdfacturas_postgres_local.sql (CREATE TABLE e INSERT). Con
+--filas se agregan filas generadas con las mismas columnas y claves
+foraneas validas (ej: producto=100000), con una semilla fija para que
+cada corrida sea igual.
+
+Lo que cuesta la API tambien se configura: latencia base, variacion,
+costo por fila entregada, fraccion de errores HTTP y de conexiones
+cortadas. Los mismos valores se cambian en caliente y se leen las
+estadisticas por endpoint:
+
+    GET  /simulada/estadisticas            (?reiniciar=1 pone los contadores en cero)
+    GET  /simulada/configuracion
+    POST /simulada/configuracion           {"latencia_ms": 50, "errores": 0.1, "caida": true}
+    POST /simulada/reiniciar               vuelve a los datos iniciales
+
+Uso (desde la raiz del proyecto; por defecto escucha en el puerto de API_BASE_URL):
+    python -m benchmarks.api_simulada
+    python -m benchmarks.api_simulada --filas producto=100000 persona=20000 --latencia 20
+
+Desde otro script (benchmarks, generador de carga):
+    servidor = iniciar(puerto=0, filas={'producto': 10000})
+    ... servidor.url ...
+    servidor.detener()
+"""
+
+# argparse: opciones de la linea de comandos
+import argparse
+
+# hashlib: "encriptar" los campos de camposEncriptar (no es bcrypt, solo lo imita)
+import hashlib
+
+# json: cuerpos de peticion y respuesta
+import json
+
+# os: ruta del script SQL relativa al proyecto
+import os
+
+# random: datos generados, latencia variable y errores (con semilla fija)
+import random
+
+# re: leer el script SQL
+import re
+
+# threading: el servidor atiende cada conexion en un hilo
+import threading
+
+# time: latencia simulada y tiempos de las estadisticas
+import time
+
+# datetime: fecha de las facturas nuevas
+from datetime import datetime, timedelta
+
+# http.server: servidor HTTP/1.1 de la libreria estandar (keep-alive)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# urllib.parse: separar ruta y query string, decodificar la clave de la URL
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from config import API_BASE_URL
+
+
+# Script con el esquema y los datos de ejemplo
+SQL_POR_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'scripts_bds', 'bdfacturas_postgres_local.sql')
+
+# Mensajes de la API real (ver GUIA_USO_ENTIDADES.md y GUIA_USO_PROCEDIMIENTOS.md)
+MENSAJE_LISTAR = "Registros obtenidos exitosamente."
+MENSAJE_CREAR = "Registro creado exitosamente."
+MENSAJE_ACTUALIZAR = "Registro actualizado exitosamente."
+MENSAJE_ELIMINAR = "Registro eliminado exitosamente."
+MENSAJE_SP = "Procedimiento ejecutado correctamente"
+MENSAJE_ERROR_SP = "Error interno del servidor al ejecutar procedimiento almacenado."
+
+
+class ErrorApi(Exception):
+    """Error que la API responde con un codigo HTTP y un mensaje."""
+
+    def __init__(self, estado, mensaje, detalle=None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+        self.detalle = detalle
+
+
+class ErrorSp(Exception):
+    """RAISE EXCEPTION dentro de un SP (la API lo responde como 500)."""
+
+
+# ══════════════════════════════════════════════
+# LECTURA DEL SCRIPT SQL
+# ══════════════════════════════════════════════
+
+class Columna:
+    """Columna de una tabla: nombre, tipo ('varchar', 'integer', ...), largo y default."""
+
+    __slots__ = ('nombre', 'tipo', 'largo', 'serial', 'defecto')
+
+    def __init__(self, nombre, tipo, largo=None, serial=False, defecto=None):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.largo = largo
+        self.serial = serial
+        self.defecto = defecto
+
+
+class Tabla:
+    """
+    Definicion y filas de una tabla.
+
+    Las filas son diccionarios en el orden de insercion (el de la base de
+    datos sin ORDER BY). Los indices por campo y el JSON del listado se
+    arman la primera vez que se piden y se descartan en cada escritura.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.columnas = []
+        self.clave = ()
+        # columna → (tabla, columna referenciada, borrar en cascada)
+        self.foraneas = {}
+        self.filas = []
+        self.siguiente_id = 1
+        self.version = 0
+        self._indices = {}
+        self._listados = {}
+
+    def columna(self, nombre):
+        """Columna con ese nombre, o None."""
+        for columna in self.columnas:
+            if columna.nombre == nombre:
+                return columna
+        return None
+
+    def cambio(self):
+        """Descarta los indices y listados armados (despues de una escritura)."""
+        self.version += 1
+        self._indices.clear()
+        self._listados.clear()
+
+    def por_campo(self, campo, valor):
+        """Filas cuyo campo vale 'valor' (comparado como texto, igual que en la URL)."""
+        indice = self._indices.get(campo)
+        if indice is None:
+            indice = {}
+            for fila in self.filas:
+                indice.setdefault(str(fila.get(campo)), []).append(fila)
+            self._indices[campo] = indice
+        return indice.get(str(valor), [])
+
+    def listado(self, limite):
+        """Cuerpo JSON (bytes) de GET /api/{tabla}, guardado hasta la proxima escritura."""
+        cuerpo = self._listados.get(limite)
+        if cuerpo is None:
+            filas = self.filas[:limite] if limite else self.filas
+            cuerpo = _json({'datos': filas, 'mensaje': MENSAJE_LISTAR})
+            self._listados[limite] = cuerpo
+        return cuerpo
+
+
+def _valores_sql(texto):
+    """
+    Valores de una lista SQL: "'E001', 'Comercial', 17, 2500000, NULL".
+
+    Retorna una lista de valores Python (str, int, float o None).
+    """
+    valores = []
+    i, n = 0, len(texto)
+    while i < n:
+        caracter = texto[i]
+        if caracter in ' \t\r\n,':
+            i += 1
+        elif caracter == "'":
+            # Texto entre comillas; '' dentro del texto es una comilla
+            partes = []
+            i += 1
+            while i < n:
+                if texto[i] == "'":
+                    if i + 1 < n and texto[i + 1] == "'":
+                        partes.append("'")
+                        i += 2
+                        continue
+                    break
+                partes.append(texto[i])
+                i += 1
+            valores.append(''.join(partes))
+            i += 1
+        else:
+            fin = i
+            while fin < n and texto[fin] != ',':
+                fin += 1
+            literal = texto[i:fin].strip()
+            if literal.upper() == 'NULL':
+                valores.append(None)
+            elif re.fullmatch(r'-?\d+', literal):
+                valores.append(int(literal))
+            else:
+                valores.append(float(literal))
+            i = fin
+    return valores
+
+
+def _tuplas_sql(texto):
+    """Parte "(...), (...)" en el contenido de cada parentesis (respetando comillas)."""
+    tuplas = []
+    profundidad, inicio, en_texto = 0, None, False
+    for i, caracter in enumerate(texto):
+        if caracter == "'":
+            en_texto = not en_texto
+        elif en_texto:
+            continue
+        elif caracter == '(':
+            if profundidad == 0:
+                inicio = i + 1
+            profundidad += 1
+        elif caracter == ')':
+            profundidad -= 1
+            if profundidad == 0:
+                tuplas.append(texto[inicio:i])
+    return tuplas
+
+
+_CREATE = re.compile(r'CREATE TABLE (\w+) \((.*?)\n\);', re.S)
+_INSERT = re.compile(r'INSERT INTO (\w+) \(([^)]*)\) VALUES(.*?);\n', re.S)
+_COLUMNA = re.compile(r'(\w+) (VARCHAR|INTEGER|NUMERIC|SERIAL|TIMESTAMP)(?:\((\d+)\))?(.*)', re.I)
+_DEFAULT = re.compile(r"DEFAULT ('[^']*'|[\w.]+)", re.I)
+
+
+def leer_sql(ruta=SQL_POR_DEFECTO):
+    """
+    Lee las tablas (CREATE TABLE) y sus datos (INSERT INTO) del script.
+
+    Returns:
+        Diccionario {nombre: Tabla} en el orden del script (las tablas
+        referenciadas van antes que las que las referencian).
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        sql = archivo.read()
+
+    tablas = {}
+    for nombre, cuerpo in _CREATE.findall(sql):
+        tabla = Tabla(nombre)
+        for linea in cuerpo.split('\n'):
+            linea = linea.strip().rstrip(',')
+            restriccion = re.match(r'CONSTRAINT \w+ (PRIMARY KEY|FOREIGN KEY) \(([^)]*)\)(.*)', linea)
+            if restriccion:
+                tipo, campos, resto = restriccion.groups()
+                campos = tuple(c.strip() for c in campos.split(','))
+                if tipo == 'PRIMARY KEY':
+                    tabla.clave = campos
+                else:
+                    destino, columna = re.search(r'REFERENCES (\w+)\((\w+)\)', resto).groups()
+                    tabla.foraneas[campos[0]] = (destino, columna, 'ON DELETE CASCADE' in resto)
+                continue
+            definicion = _COLUMNA.match(linea)
+            if definicion:
+                columna, tipo, largo, resto = definicion.groups()
+                defecto = _DEFAULT.search(resto)
+                defecto = defecto.group(1) if defecto else None
+                if defecto is not None and re.fullmatch(r'-?\d+', defecto):
+                    defecto = int(defecto)
+                tabla.columnas.append(Columna(columna, tipo.lower(), int(largo) if largo else None,
+                                              tipo.upper() == 'SERIAL', defecto))
+        tablas[nombre] = tabla
+
+    for nombre, columnas, valores in _INSERT.findall(sql):
+        tabla = tablas[nombre]
+        columnas = [c.strip() for c in columnas.split(',')]
+        for tupla in _tuplas_sql(valores):
+            fila = _fila_completa(tabla, dict(zip(columnas, _valores_sql(tupla))))
+            tabla.filas.append(fila)
+
+    for tabla in tablas.values():
+        _ajustar_serial(tabla)
+    return tablas
+
+
+def _fila_completa(tabla, datos):
+    """Fila con todas las columnas de la tabla, en su orden, con los DEFAULT aplicados."""
+    fila = {}
+    for columna in tabla.columnas:
+        valor = datos.get(columna.nombre)
+        if valor is None and columna.defecto is not None:
+            valor = _fecha_actual() if columna.defecto == 'CURRENT_TIMESTAMP' else columna.defecto
+        if columna.tipo == 'timestamp' and isinstance(valor, str):
+            # PostgreSQL → JSON de la API: '2025-12-03 12:57:19' → '2025-12-03T12:57:19'
+            valor = valor.replace(' ', 'T', 1)
+        fila[columna.nombre] = valor
+    return fila
+
+
+def _ajustar_serial(tabla):
+    """Como setval(): el siguiente SERIAL es el maximo actual + 1."""
+    for columna in tabla.columnas:
+        if columna.serial:
+            tabla.siguiente_id = max((f[columna.nombre] or 0 for f in tabla.filas), default=0) + 1
+
+
+def _convertir_valor(columna, valor):
+    """Convierte el texto de un formulario al tipo de la columna ('17' → 17), como la API."""
+    if not isinstance(valor, str) or columna.tipo not in ('integer', 'serial', 'numeric'):
+        return valor
+    try:
+        numero = float(valor)
+    except ValueError:
+        raise ErrorApi(400, f"Error: valor invalido para la columna '{columna.nombre}': {valor!r}.")
+    return int(numero) if numero.is_integer() else numero
+
+
+def _fecha_actual():
+    return datetime.now().isoformat()
+
+
+def _json(objeto):
+    """Serializa a bytes UTF-8 (sin escapar tildes, como la API)."""
+    return json.dumps(objeto, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# ══════════════════════════════════════════════
+# DATOS GENERADOS (--filas)
+# ══════════════════════════════════════════════
+
+def _prefijo(valor):
+    """'PR001' → 'PR', 'E001' → 'E', '/home' → '/home-'."""
+    base = re.match(r'(.*?)\d*$', str(valor)).group(1)
+    return base if base != str(valor) else base + '-'
+
+
+def generar_filas(tablas, cantidades, azar):
+    """
+    Agrega filas generadas a las tablas.
+
+    Los textos toman un valor real de la misma columna mas un numero
+    (asi la busqueda encuentra palabras reales), los numeros quedan en el
+    rango de los datos reales y las claves foraneas apuntan a filas que
+    existen. Despues se recalculan los totales de las facturas.
+
+    Args:
+        tablas:     diccionario {nombre: Tabla} (se modifica)
+        cantidades: {tabla: filas a agregar}
+        azar:       random.Random con la semilla de la corrida
+    """
+    for nombre, tabla in tablas.items():
+        cantidad = cantidades.get(nombre, 0)
+        if not cantidad:
+            continue
+        muestras = {c.nombre: [f[c.nombre] for f in tabla.filas if f[c.nombre] is not None]
+                    for c in tabla.columnas}
+        claves_padre = {
+            columna: [f[destino_col] for f in tablas[destino].filas]
+            for columna, (destino, destino_col, _cascada) in tabla.foraneas.items()
+        }
+        existentes = {tuple(f[c] for c in tabla.clave) for f in tabla.filas}
+        inicio = len(tabla.filas) + 1
+
+        agregadas = intentos = 0
+        while agregadas < cantidad and intentos < cantidad * 3:
+            intentos += 1
+            numero = inicio + agregadas
+            fila = {}
+            for columna in tabla.columnas:
+                fila[columna.nombre] = _valor_generado(tabla, columna, numero, muestras,
+                                                       claves_padre, azar)
+            clave = tuple(fila[c] for c in tabla.clave)
+            if clave in existentes:
+                continue
+            existentes.add(clave)
+            tabla.filas.append(fila)
+            agregadas += 1
+        _ajustar_serial(tabla)
+        tabla.cambio()
+
+    _recalcular_facturas(tablas)
+
+
+def _valor_generado(tabla, columna, numero, muestras, claves_padre, azar):
+    """Valor de una columna para la fila generada numero 'numero'."""
+    nombre = columna.nombre
+    if nombre in claves_padre:
+        return azar.choice(claves_padre[nombre]) if claves_padre[nombre] else None
+    if columna.serial:
+        tabla.siguiente_id += 1
+        return tabla.siguiente_id - 1
+    muestra = muestras.get(nombre) or []
+    if 'email' in nombre:
+        return f"{tabla.nombre}{numero}@correo.com"
+    if nombre in tabla.clave and columna.tipo == 'varchar':
+        prefijo = _prefijo(muestra[0]) if muestra else tabla.nombre[:2].upper()
+        return f"{prefijo}{numero:06d}"[:columna.largo]
+    if columna.tipo == 'varchar':
+        if nombre == 'telefono':
+            return f"3{azar.randrange(10 ** 9):09d}"
+        base = azar.choice(muestra) if muestra else nombre
+        sufijo = f" {numero}"
+        return base[:columna.largo - len(sufijo)] + sufijo
+    if columna.tipo == 'integer':
+        bajo, alto = (min(muestra), max(muestra)) if muestra else (1, 100)
+        # Stock alto: las facturas de las pruebas de carga no deben fallar por stock
+        return azar.randint(bajo, alto * (50 if nombre == 'stock' else 1))
+    if columna.tipo == 'numeric':
+        bajo, alto = (min(muestra), max(muestra)) if muestra else (0, 1000)
+        return azar.randint(int(bajo), int(alto))
+    if columna.tipo == 'timestamp':
+        fecha = datetime(2025, 1, 1) + timedelta(seconds=azar.randrange(365 * 24 * 3600))
+        return fecha.isoformat()
+    return None
+
+
+def _recalcular_facturas(tablas):
+    """Subtotales y totales como los deja el trigger actualizar_totales_y_stock()."""
+    if 'factura' not in tablas or 'productosporfactura' not in tablas:
+        return
+    productos = {p['codigo']: p for p in tablas['producto'].filas}
+    totales = {}
+    for linea in tablas['productosporfactura'].filas:
+        producto = productos.get(linea['fkcodproducto'])
+        if producto is not None:
+            linea['subtotal'] = linea['cantidad'] * producto['valorunitario']
+        totales[linea['fknumfactura']] = totales.get(linea['fknumfactura'], 0) + linea['subtotal']
+    for factura in tablas['factura'].filas:
+        factura['total'] = totales.get(factura['numero'], 0)
+    tablas['factura'].cambio()
+    tablas['productosporfactura'].cambio()
+
+
+# ══════════════════════════════════════════════
+# LA API: DATOS Y OPERACIONES
+# ══════════════════════════════════════════════
+
+class ApiSimulada:
+    """
+    Estado de la API simulada: tablas, configuracion y estadisticas.
+
+    Metodos:
+        listar(tabla, limite)                   → bytes del cuerpo JSON
+        filtrar(tabla, campo, valor)            → lista de filas
+        crear / actualizar / eliminar           → mensaje (lanza ErrorApi)
+        ejecutar_sp(cuerpo)                     → dict con resultados (lanza ErrorSp)
+        configurar(**cambios)                   → configuracion vigente
+        estadisticas(reiniciar=False)           → dict por endpoint
+        reiniciar()                             → vuelve a los datos iniciales
+    """
+
+    def __init__(self, sql=SQL_POR_DEFECTO, filas=None, semilla=1, latencia_ms=0.0,
+                 variacion_ms=0.0, fila_us=0.0, errores=0.0, codigo_error=500, cortes=0.0):
+        self._sql = sql
+        self._filas = dict(filas or {})
+        self._semilla = semilla
+        # Un solo lock: las escrituras cambian varias tablas (SP + trigger)
+        self._lock = threading.RLock()
+        self._azar = random.Random(semilla)
+        self.configuracion = {
+            'latencia_ms': latencia_ms,     # espera base de cada peticion
+            'variacion_ms': variacion_ms,   # +/- espera aleatoria uniforme
+            'fila_us': fila_us,             # espera extra por cada fila entregada
+            'errores': errores,             # fraccion de respuestas con codigo_error
+            'codigo_error': codigo_error,
+            'cortes': cortes,               # fraccion de conexiones cerradas sin responder
+            'caida': False,                 # True: todas las peticiones se cortan
+        }
+        self._lock_estadisticas = threading.Lock()
+        self._en_curso = 0
+        self._cargar()
+        self.estadisticas(reiniciar=True)
+
+    def _cargar(self):
+        tablas = leer_sql(self._sql)
+        generar_filas(tablas, self._filas, random.Random(self._semilla))
+        self.tablas = tablas
+
+    def reiniciar(self):
+        """Vuelve a los datos iniciales (misma semilla) y pone las estadisticas en cero."""
+        with self._lock:
+            self._cargar()
+        self.estadisticas(reiniciar=True)
+
+    def configurar(self, **cambios):
+        """Cambia la latencia o los errores en caliente. Retorna la configuracion vigente."""
+        desconocidas = set(cambios) - set(self.configuracion)
+        if desconocidas:
+            raise ErrorApi(400, f"Opciones desconocidas: {', '.join(sorted(desconocidas))}")
+        self.configuracion.update(cambios)
+        return dict(self.configuracion)
+
+    # ──────────────────────────────────────────────
+    # ESTADISTICAS
+    # ──────────────────────────────────────────────
+    def registrar(self, endpoint, estado, bytes_enviados, segundos, espera):
+        """Suma una peticion atendida a las estadisticas de su endpoint."""
+        with self._lock_estadisticas:
+            datos = self._por_endpoint.setdefault(endpoint, {
+                'peticiones': 0, 'errores': 0, 'bytes': 0, 'segundos': 0.0, 'espera': 0.0,
+            })
+            datos['peticiones'] += 1
+            datos['errores'] += estado >= 400
+            datos['bytes'] += bytes_enviados
+            datos['segundos'] += segundos
+            datos['espera'] += espera
+
+    def entrar(self):
+        """Marca una peticion en curso (para la concurrencia maxima)."""
+        with self._lock_estadisticas:
+            self._en_curso += 1
+            self._en_curso_maximo = max(self._en_curso_maximo, self._en_curso)
+
+    def salir(self, corte=False):
+        with self._lock_estadisticas:
+            self._en_curso -= 1
+            self._cortes += corte
+
+    def estadisticas(self, reiniciar=False):
+        """
+        Peticiones, errores, bytes y tiempos por endpoint.
+
+        'segundos' incluye la latencia simulada ('espera'); la diferencia es
+        lo que tardo la API simulada en armar la respuesta.
+        """
+        with self._lock_estadisticas:
+            if reiniciar:
+                self._por_endpoint = {}
+                self._en_curso_maximo = self._en_curso
+                self._cortes = 0
+                self._desde = time.time()
+            endpoints = {
+                endpoint: {**datos,
+                           'promedio_ms': round(datos['segundos'] / datos['peticiones'] * 1000, 3),
+                           'segundos': round(datos['segundos'], 3),
+                           'espera': round(datos['espera'], 3)}
+                for endpoint, datos in sorted(self._por_endpoint.items())
+            }
+            return {
+                'desde': self._desde,
+                'peticiones': sum(d['peticiones'] for d in endpoints.values()),
+                'errores': sum(d['errores'] for d in endpoints.values()),
+                'cortes': self._cortes,
+                'en_curso': self._en_curso,
+                'en_curso_maximo': self._en_curso_maximo,
+                'endpoints': endpoints,
+                'filas': {nombre: len(tabla.filas) for nombre, tabla in self.tablas.items()},
+            }
+
+    # ──────────────────────────────────────────────
+    # TABLAS
+    # ──────────────────────────────────────────────
+    def _tabla(self, nombre):
+        tabla = self.tablas.get(nombre.lower())
+        if tabla is None:
+            raise ErrorApi(404, f"Error: La tabla '{nombre}' no fue encontrada.")
+        return tabla
+
+    def listar(self, nombre, limite=None):
+        """Cuerpo JSON de GET /api/{tabla} y cantidad de filas."""
+        with self._lock:
+            tabla = self._tabla(nombre)
+            cantidad = min(limite, len(tabla.filas)) if limite else len(tabla.filas)
+            return tabla.listado(limite), cantidad
+
+    def filtrar(self, nombre, campo, valor):
+        """Filas de GET /api/{tabla}/{campo}/{valor}."""
+        with self._lock:
+            tabla = self._tabla(nombre)
+            if tabla.columna(campo) is None:
+                raise ErrorApi(400, f"Error: La columna '{campo}' no existe en la tabla '{nombre}'.")
+            filas = list(tabla.por_campo(campo, valor))
+        if not filas:
+            raise ErrorApi(404, f"No se encontraron registros con {campo} = {valor}.")
+        return filas
+
+    def _convertir(self, tabla, datos, encriptar):
+        """Valida las columnas del cuerpo y encripta las de camposEncriptar."""
+        convertidos = {}
+        for campo, valor in datos.items():
+            if tabla.columna(campo) is None:
+                raise ErrorApi(400, f"Error: La columna '{campo}' no existe en la tabla '{tabla.nombre}'.")
+            if campo in encriptar and valor is not None:
+                valor = '$2a$11$' + hashlib.sha256(str(valor).encode()).hexdigest()[:53]
+            convertidos[campo] = _convertir_valor(tabla.columna(campo), valor)
+        return convertidos
+
+    def _validar_foraneas(self, tabla, fila):
+        for campo, (destino, columna, _cascada) in tabla.foraneas.items():
+            valor = fila.get(campo)
+            if valor is not None and not self.tablas[destino].por_campo(columna, valor):
+                raise ErrorApi(500, f"Error: inserción o actualización en la tabla «{tabla.nombre}» "
+                                    f"viola la llave foránea: {campo}={valor} no existe en {destino}.")
+
+    def crear(self, nombre, datos, encriptar=()):
+        with self._lock:
+            tabla = self._tabla(nombre)
+            fila = self._convertir(tabla, datos, encriptar)
+            for columna in tabla.columnas:
+                if columna.serial and fila.get(columna.nombre) is None:
+                    fila[columna.nombre] = tabla.siguiente_id
+            fila = _fila_completa(tabla, fila)
+            for columna in tabla.columnas:
+                if columna.serial:
+                    tabla.siguiente_id = max(tabla.siguiente_id, (fila[columna.nombre] or 0) + 1)
+            clave = tuple(fila[c] for c in tabla.clave)
+            if any(tuple(f[c] for c in tabla.clave) == clave for f in self._coincidencias(tabla, fila)):
+                raise ErrorApi(500, f"Error: llave duplicada viola restricción de unicidad «pk_{tabla.nombre}».")
+            self._validar_foraneas(tabla, fila)
+            tabla.filas.append(fila)
+            tabla.cambio()
+        return MENSAJE_CREAR
+
+    def _coincidencias(self, tabla, fila):
+        """Filas con el mismo primer campo de la clave (candidatas a duplicado)."""
+        return tabla.por_campo(tabla.clave[0], fila[tabla.clave[0]])
+
+    def actualizar(self, nombre, campo, valor, datos, encriptar=()):
+        with self._lock:
+            tabla = self._tabla(nombre)
+            cambios = self._convertir(tabla, datos, encriptar)
+            filas = tabla.por_campo(campo, valor)
+            if not filas:
+                raise ErrorApi(404, f"No se encontró el registro con {campo} = {valor}.")
+            for fila in filas:
+                self._validar_foraneas(tabla, {**fila, **cambios})
+            for fila in filas:
+                fila.update(cambios)
+            tabla.cambio()
+        return MENSAJE_ACTUALIZAR
+
+    def eliminar(self, nombre, campo, valor):
+        with self._lock:
+            tabla = self._tabla(nombre)
+            filas = tabla.por_campo(campo, valor)
+            if not filas:
+                raise ErrorApi(404, f"No se encontró el registro con {campo} = {valor}.")
+            # Claves foraneas de otras tablas que apuntan a estas filas
+            for otra in self.tablas.values():
+                for foranea, (destino, columna, cascada) in otra.foraneas.items():
+                    if destino != tabla.nombre or cascada:
+                        continue
+                    for fila in filas:
+                        if otra.por_campo(foranea, fila[columna]):
+                            raise ErrorApi(500, f"Error: eliminar en la tabla «{tabla.nombre}» viola la "
+                                                f"llave foránea de la tabla «{otra.nombre}».")
+            quitar = {id(f) for f in filas}
+            tabla.filas = [f for f in tabla.filas if id(f) not in quitar]
+            tabla.cambio()
+        return MENSAJE_ELIMINAR
+
+    # ──────────────────────────────────────────────
+    # PROCEDIMIENTOS ALMACENADOS
+    # Misma logica que los SP y el trigger del script de PostgreSQL.
+    # ──────────────────────────────────────────────
+    def ejecutar_sp(self, cuerpo):
+        """
+        POST /api/procedimientos/ejecutarsp.
+
+        Returns:
+            Diccionario de la respuesta, con p_resultado como texto JSON
+            (como lo entrega la API con PostgreSQL).
+        """
+        parametros = dict(cuerpo)
+        nombre_sp = parametros.pop('nombreSP', None)
+        procedimiento = self._procedimientos().get(nombre_sp)
+        if procedimiento is None:
+            raise ErrorApi(400, "Parametros de entrada invalidos.",
+                           f"El procedimiento '{nombre_sp}' no existe.")
+        parametros.pop('p_resultado', None)
+        with self._lock:
+            resultado = procedimiento(**parametros)
+        return {
+            'procedimiento': nombre_sp,
+            'resultados': [{'p_resultado': json.dumps(resultado, ensure_ascii=False)}],
+            'total': 1,
+            'mensaje': MENSAJE_SP,
+        }
+
+    def _procedimientos(self):
+        return {
+            'sp_insertar_factura_y_productosporfactura': self._sp_insertar,
+            'sp_consultar_factura_y_productosporfactura': self._sp_consultar,
+            'sp_listar_facturas_y_productosporfactura': self._sp_listar,
+            'sp_listar_facturas_pagina': self._sp_listar_pagina,
+            'sp_actualizar_factura_y_productosporfactura': self._sp_actualizar,
+            'sp_borrar_factura_y_productosporfactura': self._sp_borrar,
+        }
+
+    def _factura(self, numero):
+        filas = self.tablas['factura'].por_campo('numero', numero)
+        if not filas:
+            raise ErrorSp(f"Factura {numero} no existe")
+        return filas[0]
+
+    def _detalle(self, numero):
+        """Productos de la factura con nombre y valor unitario."""
+        productos = self.tablas['producto']
+        detalle = []
+        for linea in self.tablas['productosporfactura'].por_campo('fknumfactura', numero):
+            producto = productos.por_campo('codigo', linea['fkcodproducto'])[0]
+            detalle.append({
+                'codigo_producto': linea['fkcodproducto'],
+                'nombre_producto': producto['nombre'],
+                'cantidad': linea['cantidad'],
+                'valorunitario': producto['valorunitario'],
+                'subtotal': linea['subtotal'],
+            })
+        return detalle or None
+
+    def _nombre_persona(self, tabla, id_):
+        registro = self.tablas[tabla].por_campo('id', id_)
+        if not registro:
+            return None
+        persona = self.tablas['persona'].por_campo('codigo', registro[0]['fkcodpersona'])
+        return persona[0]['nombre'] if persona else None
+
+    def _lineas(self, p_productos, p_minimo_detalle):
+        """Valida p_productos (texto JSON o lista) y el minimo de productos."""
+        if isinstance(p_productos, str):
+            p_productos = json.loads(p_productos)
+        minimo = p_minimo_detalle or 1
+        if not p_productos or len(p_productos) < minimo:
+            raise ErrorSp(f"La factura requiere minimo {minimo} producto(s).")
+        return [(item['codigo'], int(item['cantidad'])) for item in p_productos]
+
+    def _insertar_lineas(self, numero, lineas):
+        """INSERT en productosporfactura con el trigger: valida stock, subtotal, total."""
+        productos = self.tablas['producto']
+        detalle = self.tablas['productosporfactura']
+        # Validar todo antes de escribir: el SP corre en una transaccion
+        pedido = {}
+        for codigo, cantidad in lineas:
+            if codigo in pedido:
+                raise ErrorSp("llave duplicada viola restricción de unicidad «pk_productosporfactura»")
+            pedido[codigo] = cantidad
+            encontrado = productos.por_campo('codigo', codigo)
+            if not encontrado:
+                raise ErrorSp(f"inserción en «productosporfactura» viola la llave foránea: {codigo} no existe")
+            if encontrado[0]['stock'] < cantidad:
+                raise ErrorSp(f"Stock insuficiente para producto {codigo}. Stock disponible: "
+                              f"{encontrado[0]['stock']}, cantidad solicitada: {cantidad}")
+        total = 0
+        for codigo, cantidad in lineas:
+            producto = productos.por_campo('codigo', codigo)[0]
+            subtotal = cantidad * producto['valorunitario']
+            producto['stock'] -= cantidad
+            detalle.filas.append({'fknumfactura': numero, 'fkcodproducto': codigo,
+                                  'cantidad': cantidad, 'subtotal': subtotal})
+            total += subtotal
+        productos.cambio()
+        detalle.cambio()
+        return total
+
+    def _borrar_lineas(self, numero):
+        """DELETE de las lineas de la factura con el trigger: devuelve el stock."""
+        productos = self.tablas['producto']
+        detalle = self.tablas['productosporfactura']
+        lineas = detalle.por_campo('fknumfactura', numero)
+        for linea in lineas:
+            producto = productos.por_campo('codigo', linea['fkcodproducto'])
+            if producto:
+                producto[0]['stock'] += linea['cantidad']
+        quitar = {id(l) for l in lineas}
+        detalle.filas = [l for l in detalle.filas if id(l) not in quitar]
+        productos.cambio()
+        detalle.cambio()
+        return len(lineas)
+
+    def _validar_partes(self, p_fkidcliente, p_fkidvendedor):
+        if not self.tablas['cliente'].por_campo('id', p_fkidcliente):
+            raise ErrorSp(f"inserción en «factura» viola la llave foránea «fk_factura_cliente»: {p_fkidcliente}")
+        if not self.tablas['vendedor'].por_campo('id', p_fkidvendedor):
+            raise ErrorSp(f"inserción en «factura» viola la llave foránea «fk_factura_vendedor»: {p_fkidvendedor}")
+
+    def _resumen(self, factura):
+        """{factura, productos} como lo arman los SP de insertar y actualizar."""
+        return {
+            'factura': {campo: factura[campo]
+                        for campo in ('numero', 'fecha', 'total', 'fkidcliente', 'fkidvendedor')},
+            'productos': self._detalle(factura['numero']),
+        }
+
+    def _sp_insertar(self, p_fkidcliente, p_fkidvendedor, p_productos, p_minimo_detalle=1):
+        lineas = self._lineas(p_productos, p_minimo_detalle)
+        self._validar_partes(p_fkidcliente, p_fkidvendedor)
+        facturas = self.tablas['factura']
+        numero = facturas.siguiente_id
+        factura = {'numero': numero, 'fecha': _fecha_actual(), 'total': 0,
+                   'fkidcliente': p_fkidcliente, 'fkidvendedor': p_fkidvendedor}
+        factura['total'] = self._insertar_lineas(numero, lineas)
+        facturas.filas.append(factura)
+        facturas.siguiente_id += 1
+        facturas.cambio()
+        return self._resumen(factura)
+
+    def _sp_consultar(self, p_numero):
+        factura = self._factura(p_numero)
+        return {
+            'factura': {
+                'numero': factura['numero'],
+                'fecha': factura['fecha'],
+                'total': factura['total'],
+                'fkidcliente': factura['fkidcliente'],
+                'nombre_cliente': self._nombre_persona('cliente', factura['fkidcliente']),
+                'fkidvendedor': factura['fkidvendedor'],
+                'nombre_vendedor': self._nombre_persona('vendedor', factura['fkidvendedor']),
+            },
+            'productos': self._detalle(factura['numero']),
+        }
+
+    def _sp_listar(self):
+        facturas = []
+        for factura in sorted(self.tablas['factura'].filas, key=lambda f: f['numero']):
+            consulta = self._sp_consultar(factura['numero'])
+            facturas.append({**consulta['factura'], 'productos': consulta['productos']})
+        # json_agg sin filas retorna NULL
+        return facturas or None
+
+    def _sp_listar_pagina(self, p_desde=None, p_hasta=None, p_cliente=None,
+                          p_vendedor=None, p_despues=None, p_antes=None, p_limite=26):
+        # Como en el SP, 0 o '' equivalen a no pasar el parametro
+        desde, hasta = (p_desde or '')[:10], (p_hasta or '')[:10]
+        limite = min(p_limite or 26, 1000)
+        facturas = self.tablas['factura'].filas
+        if p_cliente:
+            facturas = self.tablas['factura'].por_campo('fkidcliente', p_cliente)
+        elif p_vendedor:
+            facturas = self.tablas['factura'].por_campo('fkidvendedor', p_vendedor)
+        seleccion = [
+            f for f in facturas
+            if (not desde or str(f['fecha'])[:10] >= desde)
+            and (not hasta or str(f['fecha'])[:10] <= hasta)
+            and (not p_cliente or f['fkidcliente'] == p_cliente)
+            and (not p_vendedor or f['fkidvendedor'] == p_vendedor)
+            and (not p_despues or f['numero'] < p_despues)
+            and (not p_antes or f['numero'] > p_antes)
+        ]
+        # Pagina anterior: las mas cercanas por encima del cursor
+        seleccion.sort(key=lambda f: f['numero'], reverse=not p_antes)
+        pagina = sorted(seleccion[:limite], key=lambda f: f['numero'], reverse=True)
+        lineas = self.tablas['productosporfactura']
+        campos = ('numero', 'fecha', 'total', 'fkidcliente', 'fkidvendedor')
+        return [{**{campo: f[campo] for campo in campos},
+                 'lineas': len(lineas.por_campo('fknumfactura', f['numero']))}
+                for f in pagina]
+
+    def _sp_actualizar(self, p_numero, p_fkidcliente, p_fkidvendedor, p_productos, p_minimo_detalle=1):
+        factura = self._factura(p_numero)
+        lineas = self._lineas(p_productos, p_minimo_detalle)
+        self._validar_partes(p_fkidcliente, p_fkidvendedor)
+        anteriores = [(l['fkcodproducto'], l['cantidad'])
+                      for l in self.tablas['productosporfactura'].por_campo('fknumfactura', p_numero)]
+        self._borrar_lineas(p_numero)
+        try:
+            factura['total'] = self._insertar_lineas(p_numero, lineas)
+        except ErrorSp:
+            # ROLLBACK: volver a poner las lineas anteriores
+            self._insertar_lineas(p_numero, anteriores)
+            raise
+        factura['fkidcliente'] = p_fkidcliente
+        factura['fkidvendedor'] = p_fkidvendedor
+        self.tablas['factura'].cambio()
+        return self._resumen(factura)
+
+    def _sp_borrar(self, p_numero):
+        factura = self._factura(p_numero)
+        cantidad = self._borrar_lineas(p_numero)
+        facturas = self.tablas['factura']
+        facturas.filas = [f for f in facturas.filas if f is not factura]
+        facturas.cambio()
+        return {
+            'mensaje': 'Factura eliminada exitosamente',
+            'numero_eliminado': p_numero,
+            'total_eliminado': factura['total'],
+            'productos_eliminados': cantidad,
+        }
+
+    # ──────────────────────────────────────────────
+    # DIAGNOSTICO
+    # ──────────────────────────────────────────────
+    def diagnostico(self, puerto):
+        return {
+            'estado': 'conectado',
+            'mensaje': 'Conexion exitosa (API simulada).',
+            'servidor': {
+                'proveedor': 'API simulada (benchmarks/api_simulada.py)',
+                'baseDatos': os.path.splitext(os.path.basename(self._sql))[0],
+                'version': f'PostgreSQL simulado, {sum(len(t.filas) for t in self.tablas.values())} filas',
+                'direccionIP': '127.0.0.1',
+                'puerto': puerto,
+                'usuarioConectado': 'simulado',
+            },
+        }
+
+
+# ══════════════════════════════════════════════
+# SERVIDOR HTTP
+# ══════════════════════════════════════════════
+
+class _Conexion(Exception):
+    """Cortar la conexion sin responder (error de red simulado)."""
+
+
+class ManejadorApi(BaseHTTPRequestHandler):
+    """Atiende una peticion HTTP y la traduce a un metodo de ApiSimulada."""
+
+    # HTTP/1.1: conexiones keep-alive, como la API real detras de Kestrel
+    protocol_version = 'HTTP/1.1'
+    # Sin Nagle: los encabezados y el cuerpo salen sin esperar el ACK (evita 40 ms extra)
+    disable_nagle_algorithm = True
+
+    def log_message(self, formato, *args):
+        # Sin una linea por peticion: con carga alta el log cuesta mas que la respuesta
+        pass
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def do_PUT(self):
+        self._atender('PUT')
+
+    def do_DELETE(self):
+        self._atender('DELETE')
+
+    def _cuerpo(self):
+        largo = int(self.headers.get('Content-Length') or 0)
+        if not largo:
+            return {}
+        try:
+            return json.loads(self.rfile.read(largo))
+        except ValueError as ex:
+            raise ErrorApi(400, "Parametros de entrada invalidos.", str(ex))
+
+    def _atender(self, metodo):
+        api = self.server.api
+        inicio = time.perf_counter()
+        partes = urlsplit(self.path)
+        # Como ASP.NET Core: se decodifica cada segmento menos %2F, que llega
+        # tal cual a la API (una clave '/home' enviada como %2Fhome no se encuentra)
+        ruta = [unquote(re.sub('%2[Ff]', '%252F', p)) for p in partes.path.strip('/').split('/')]
+        query = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+        # El cuerpo se lee siempre: si queda en el socket se mezcla con la proxima peticion
+        try:
+            cuerpo = self._cuerpo()
+        except ErrorApi as ex:
+            cuerpo, error_cuerpo = {}, ex
+        else:
+            error_cuerpo = None
+
+        api.entrar()
+        espera = 0.0
+        endpoint = f"{metodo} /{'/'.join(ruta[:2])}"
+        try:
+            if ruta[0] == 'simulada':
+                estado, respuesta, filas = self._simulada(api, metodo, ruta, query, cuerpo)
+            else:
+                if error_cuerpo is not None:
+                    raise error_cuerpo
+                self._fallas(api, ruta)
+                estado, respuesta, filas = self._api(api, metodo, ruta, query, cuerpo)
+                espera = self._esperar(api, filas)
+        except _Conexion:
+            api.salir(corte=True)
+            self.close_connection = True
+            return
+        except ErrorApi as ex:
+            estado, respuesta = ex.estado, {'datos': None, 'mensaje': ex.mensaje}
+            if ex.detalle:
+                respuesta = {'estado': ex.estado, 'mensaje': ex.mensaje, 'detalle': ex.detalle}
+        except ErrorSp as ex:
+            estado, respuesta = 500, {
+                'estado': 500,
+                'mensaje': MENSAJE_ERROR_SP,
+                'tipoError': 'PostgresException',
+                'detalle': f"P0001: {ex}",
+            }
+
+        cuerpo_respuesta = respuesta if isinstance(respuesta, bytes) else _json(respuesta)
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo_respuesta)))
+        self.end_headers()
+        self.wfile.write(cuerpo_respuesta)
+        api.salir()
+        api.registrar(endpoint, estado, len(cuerpo_respuesta), time.perf_counter() - inicio, espera)
+
+    def _fallas(self, api, ruta):
+        """Errores configurados (el diagnostico solo falla con 'caida')."""
+        configuracion = api.configuracion
+        if configuracion['caida']:
+            raise _Conexion()
+        if ruta[:2] == ['api', 'diagnostico']:
+            return
+        if configuracion['cortes'] and random.random() < configuracion['cortes']:
+            raise _Conexion()
+        if configuracion['errores'] and random.random() < configuracion['errores']:
+            raise ErrorApi(configuracion['codigo_error'], "Error simulado por la API simulada.")
+
+    def _esperar(self, api, filas):
+        """Duerme la latencia configurada (base + variacion + costo por fila)."""
+        configuracion = api.configuracion
+        espera = configuracion['latencia_ms'] / 1000
+        if configuracion['variacion_ms']:
+            espera += random.uniform(-1, 1) * configuracion['variacion_ms'] / 1000
+        espera += filas * configuracion['fila_us'] / 1_000_000
+        if espera > 0:
+            time.sleep(espera)
+        return max(espera, 0.0)
+
+    def _api(self, api, metodo, ruta, query, cuerpo):
+        """Rutas /api/... Retorna (estado HTTP, respuesta, filas entregadas)."""
+        if ruta[0] != 'api' or len(ruta) < 2:
+            raise ErrorApi(404, f"Ruta no encontrada: {self.path}")
+        encriptar = {c.strip() for c in query.get('camposEncriptar', '').split(',') if c.strip()}
+
+        if ruta[1] == 'diagnostico' and metodo == 'GET':
+            return 200, api.diagnostico(self.server.server_address[1]), 0
+
+        if ruta[1] == 'procedimientos' and metodo == 'POST':
+            return 200, api.ejecutar_sp(cuerpo), 0
+
+        tabla = ruta[1]
+        if len(ruta) == 2:
+            if metodo == 'GET':
+                limite = int(query['limite']) if query.get('limite', '').isdigit() else None
+                listado, filas = api.listar(tabla, limite)
+                return 200, listado, filas
+            if metodo == 'POST':
+                return 200, {'datos': None, 'mensaje': api.crear(tabla, cuerpo, encriptar)}, 0
+        elif len(ruta) == 4:
+            campo, valor = ruta[2], ruta[3]
+            if metodo == 'GET':
+                filas = api.filtrar(tabla, campo, valor)
+                return 200, {'datos': filas, 'mensaje': MENSAJE_LISTAR}, len(filas)
+            if metodo == 'PUT':
+                return 200, {'datos': None,
+                             'mensaje': api.actualizar(tabla, campo, valor, cuerpo, encriptar)}, 0
+            if metodo == 'DELETE':
+                return 200, {'datos': None, 'mensaje': api.eliminar(tabla, campo, valor)}, 0
+        raise ErrorApi(405, f"Metodo {metodo} no permitido en {self.path}")
+
+    def _simulada(self, api, metodo, ruta, query, cuerpo):
+        """Rutas /simulada/... (estadisticas y configuracion)."""
+        accion = ruta[1] if len(ruta) > 1 else ''
+        if accion == 'estadisticas' and metodo == 'GET':
+            return 200, api.estadisticas(reiniciar=query.get('reiniciar') == '1'), 0
+        if accion == 'configuracion':
+            if metodo == 'POST':
+                return 200, api.configurar(**cuerpo), 0
+            return 200, dict(api.configuracion), 0
+        if accion == 'reiniciar' and metodo == 'POST':
+            api.reiniciar()
+            return 200, {'mensaje': 'Datos reiniciados.'}, 0
+        raise ErrorApi(404, f"Ruta no encontrada: {self.path}")
+
+
+class ServidorSimulado(ThreadingHTTPServer):
+    """ThreadingHTTPServer con la ApiSimulada y una cola de conexiones amplia."""
+
+    daemon_threads = True
+    # Conexiones pendientes de aceptar: el generador de carga abre muchas a la vez
+    request_queue_size = 256
+
+    def __init__(self, direccion, api):
+        super().__init__(direccion, ManejadorApi)
+        self.api = api
+        self._hilo = None
+
+    @property
+    def url(self):
+        """URL base para ApiService (ej: http://127.0.0.1:5035)."""
+        host, puerto = self.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def detener(self):
+        """Deja de atender y cierra el socket."""
+        self.shutdown()
+        self.server_close()
+
+
+def iniciar(host='127.0.0.1', puerto=0, **opciones):
+    """
+    Inicia la API simulada en un hilo de fondo.
+
+    Args:
+        host, puerto: direccion (puerto 0 = uno libre)
+        opciones:     argumentos de ApiSimulada (filas, latencia_ms, errores, ...)
+
+    Returns:
+        ServidorSimulado (servidor.url, servidor.api, servidor.detener()).
+    """
+    servidor = ServidorSimulado((host, puerto), ApiSimulada(**opciones))
+    servidor._hilo = threading.Thread(target=servidor.serve_forever, name='api-simulada', daemon=True)
+    servidor._hilo.start()
+    return servidor
+
+
+def _cantidades(valores):
+    """['producto=100000', 'persona=5000'] → {'producto': 100000, 'persona': 5000}."""
+    cantidades = {}
+    for valor in valores:
+        tabla, _, cantidad = valor.partition('=')
+        if not cantidad.isdigit():
+            raise argparse.ArgumentTypeError(f"Use tabla=cantidad, no {valor!r}")
+        cantidades[tabla] = int(cantidad)
+    return cantidades
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=urlsplit(API_BASE_URL).port or 5035,
+                        help='puerto (por defecto el de API_BASE_URL)')
+    parser.add_argument('--sql', default=SQL_POR_DEFECTO, help='script con el esquema y los datos')
+    parser.add_argument('--filas', nargs='*', default=[], metavar='TABLA=N',
+                        help='filas generadas a agregar por tabla (ej: producto=100000)')
+    parser.add_argument('--semilla', type=int, default=1, help='semilla de los datos generados')
+    parser.add_argument('--latencia', type=float, default=0.0, help='latencia base en ms')
+    parser.add_argument('--variacion', type=float, default=0.0, help='variacion +/- de la latencia en ms')
+    parser.add_argument('--fila-us', type=float, default=0.0,
+                        help='latencia extra por fila entregada, en microsegundos')
+    parser.add_argument('--errores', type=float, default=0.0, help='fraccion de respuestas con error (0-1)')
+    parser.add_argument('--codigo-error', type=int, default=500, help='codigo HTTP de los errores')
+    parser.add_argument('--cortes', type=float, default=0.0,
+                        help='fraccion de conexiones cortadas sin responder (0-1)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    api = ApiSimulada(sql=args.sql, filas=_cantidades(args.filas), semilla=args.semilla,
+                      latencia_ms=args.latencia, variacion_ms=args.variacion, fila_us=args.fila_us,
+                      errores=args.errores, codigo_error=args.codigo_error, cortes=args.cortes)
+    servidor = ServidorSimulado((args.host, args.puerto), api)
+    filas = ', '.join(f"{nombre}={len(tabla.filas)}" for nombre, tabla in api.tablas.items())
+    print(f"API simulada en {servidor.url} ({time.perf_counter() - inicio:.1f} s para cargar)")
+    print(f"Filas: {filas}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,545 @@
+"""
+carga.py - Generador de carga con escenarios de uso (flujo de facturas).
+
+Simula usuarios que navegan el frontend por HTTP, como en produccion:
+cada usuario virtual es un hilo con su propia sesion (cookies, keep-alive)
+que repite flujos de pasos con pausas entre ellos. Sirve para dimensionar
+workers e hilos de gunicorn antes de una temporada alta.
+
+Un escenario define:
+
+    etapas:  rampa de concurrencia [{segundos, usuarios}, ...]; los usuarios
+             suben o bajan en linea recta hasta el valor de cada etapa
+    pausa:   [minimo, maximo] segundos que "piensa" el usuario entre pasos
+    flujos:  {nombre: {peso, pasos}}; cada vuelta el usuario elige un flujo
+             segun los pesos (mezcla de rutas ponderada)
+
+Cada paso es una ruta ("GET /factura/ver/{numero}") con opciones:
+
+    probabilidad:  fraccion de las vueltas en que se ejecuta (0-1)
+    pasos:         sub-pasos que se ejecutan juntos (en vez de 'ruta')
+    datos:         generador del formulario (GENERADORES: 'factura', ...)
+    seguir:        seguir la redireccion del POST (se mide como otra peticion)
+    capturar:      {variable: regex}; guarda un valor de la pagina para los
+                   pasos siguientes (ej: un numero de factura del listado)
+
+Los formularios de factura (prod_codigo[] / prod_cantidad[]) se arman con
+clientes, vendedores y productos con stock descargados de la API al empezar.
+
+Por escenario reporta histograma de latencia y percentiles por ruta, tasa
+de errores (HTTP, red y alertas "danger" en la pagina), el resultado de
+cada etapa de la rampa y, si --api es la API simulada, cuantas peticiones
+recibio la API y su concurrencia maxima.
+
+Uso (desde la raiz del proyecto, con el frontend y la API ya levantados):
+    python -m benchmarks.carga
+    python -m benchmarks.carga --escenario facturacion catalogo --url http://127.0.0.1:5100
+    python -m benchmarks.carga --escenarios mis_escenarios.json --escenario temporada
+    python -m benchmarks.carga --escala 4 --salida pico.json       (4 veces los usuarios)
+"""
+
+# argparse: opciones de la linea de comandos
+import argparse
+
+# json: escenarios desde archivo y resultados
+import json
+
+# random: eleccion de flujos, pausas y formularios (con semilla)
+import random
+
+# re: capturar valores de las paginas
+import re
+
+# sys: salir con error si no se puede armar el catalogo
+import sys
+
+# threading: un hilo por usuario virtual
+import threading
+
+# time: reloj de las etapas y de cada peticion
+import time
+
+# datetime: fecha de la corrida
+from datetime import datetime
+
+# urlsplit: ruta de la redireccion de un POST
+from urllib.parse import urlsplit
+
+# requests: sesion HTTP de cada usuario virtual
+import requests
+
+from benchmarks.rutas import percentil
+
+from config import API_BASE_URL
+
+
+# ══════════════════════════════════════════════
+# ESCENARIOS
+# ══════════════════════════════════════════════
+
+# Regex de los numeros de factura en los enlaces del listado
+ENLACE_FACTURA = r'/factura/ver/(\d+)'
+
+ESCENARIOS = {
+    # Trafico de produccion: sobre todo crear facturas, a veces verlas o editarlas
+    'facturacion': {
+        'descripcion': 'Nueva factura → crear → listado, a veces ver o editar',
+        'etapas': [{'segundos': 20, 'usuarios': 10}, {'segundos': 60, 'usuarios': 10},
+                   {'segundos': 20, 'usuarios': 30}, {'segundos': 60, 'usuarios': 30},
+                   {'segundos': 10, 'usuarios': 0}],
+        'pausa': [1.0, 4.0],
+        'flujos': {
+            'crear': {'peso': 70, 'pasos': [
+                {'ruta': 'GET /factura/nueva'},
+                {'ruta': 'POST /factura/crear', 'datos': 'factura', 'seguir': True,
+                 'capturar': {'numero': ENLACE_FACTURA}},
+                {'ruta': 'GET /factura/ver/{numero}', 'probabilidad': 0.3},
+                {'probabilidad': 0.1, 'pasos': [
+                    {'ruta': 'GET /factura/editar/{numero}'},
+                    {'ruta': 'POST /factura/actualizar', 'datos': 'factura_editar', 'seguir': True},
+                ]},
+            ]},
+            'consultar': {'peso': 30, 'pasos': [
+                {'ruta': 'GET /factura', 'capturar': {'numero': ENLACE_FACTURA}},
+                {'ruta': 'GET /factura/ver/{numero}'},
+                {'ruta': 'GET /factura/ver/{numero}', 'probabilidad': 0.5},
+            ]},
+        },
+    },
+    # Navegacion de tablas: listados y busquedas de las paginas CRUD
+    'catalogo': {
+        'descripcion': 'Listados y busquedas de las tablas CRUD',
+        'etapas': [{'segundos': 10, 'usuarios': 10}, {'segundos': 50, 'usuarios': 10},
+                   {'segundos': 10, 'usuarios': 0}],
+        'pausa': [0.5, 2.0],
+        'flujos': {
+            'productos': {'peso': 40, 'pasos': [
+                {'ruta': 'GET /producto'},
+                {'ruta': 'GET /producto?q=laptop', 'probabilidad': 0.5},
+            ]},
+            'clientes': {'peso': 30, 'pasos': [{'ruta': 'GET /cliente'}, {'ruta': 'GET /persona'}]},
+            'vendedores': {'peso': 20, 'pasos': [{'ruta': 'GET /vendedor'}]},
+            'inicio': {'peso': 10, 'pasos': [{'ruta': 'GET /'}]},
+        },
+    },
+    # Pico sin pausas: cuantas facturas por segundo aguanta el despliegue
+    'pico': {
+        'descripcion': 'Facturas sin pausas, rampa hasta 50 usuarios',
+        'etapas': [{'segundos': 60, 'usuarios': 50}, {'segundos': 30, 'usuarios': 50}],
+        'pausa': [0.0, 0.0],
+        'flujos': {
+            'crear': {'peso': 1, 'pasos': [
+                {'ruta': 'GET /factura/nueva'},
+                {'ruta': 'POST /factura/crear', 'datos': 'factura', 'seguir': True},
+            ]},
+        },
+    },
+}
+
+
+# ══════════════════════════════════════════════
+# FORMULARIOS
+# Cada generador recibe (catalogo, azar, variables del usuario, paso)
+# y retorna el formulario. El paso puede traer 'lineas' y 'cantidad'
+# como rangos [minimo, maximo].
+# ══════════════════════════════════════════════
+
+def _factura(catalogo, azar, variables, paso):
+    """Formulario de factura nueva con 1 a 3 productos distintos (por defecto)."""
+    lineas = azar.randint(*paso.get('lineas', [1, 3]))
+    codigos = azar.sample(catalogo['productos'], min(lineas, len(catalogo['productos'])))
+    return {
+        'fkidcliente': str(azar.choice(catalogo['clientes'])),
+        'fkidvendedor': str(azar.choice(catalogo['vendedores'])),
+        'prod_codigo[]': codigos,
+        'prod_cantidad[]': [str(azar.randint(*paso.get('cantidad', [1, 2]))) for _ in codigos],
+    }
+
+
+def _factura_editar(catalogo, azar, variables, paso):
+    """Formulario de actualizar la factura capturada en 'numero'."""
+    return {**_factura(catalogo, azar, variables, paso), 'numero': variables['numero']}
+
+
+GENERADORES = {
+    'factura': _factura,
+    'factura_editar': _factura_editar,
+}
+
+
+def cargar_catalogo(api_url):
+    """
+    Clientes, vendedores y productos con stock, para los formularios de factura.
+
+    Returns:
+        {'clientes': [id, ...], 'vendedores': [id, ...], 'productos': [codigo, ...]}
+    """
+    def listar(tabla):
+        respuesta = requests.get(f"{api_url}/api/{tabla}", timeout=60)
+        respuesta.raise_for_status()
+        return respuesta.json().get('datos') or []
+
+    return {
+        'clientes': [fila['id'] for fila in listar('cliente')],
+        'vendedores': [fila['id'] for fila in listar('vendedor')],
+        'productos': [fila['codigo'] for fila in listar('producto') if (fila.get('stock') or 0) > 0],
+    }
+
+
+# ══════════════════════════════════════════════
+# REGISTRO DE MEDICIONES
+# ══════════════════════════════════════════════
+
+# Limites de los tramos del histograma (ms); el ultimo tramo es "mas de 10000"
+TRAMOS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+def histograma(latencias):
+    """Cantidad de peticiones por tramo de latencia: {'<=5': n, ..., '>10000': n}."""
+    tramos = {f"<={limite}": 0 for limite in TRAMOS_MS}
+    tramos[f">{TRAMOS_MS[-1]}"] = 0
+    for ms in latencias:
+        for limite in TRAMOS_MS:
+            if ms <= limite:
+                tramos[f"<={limite}"] += 1
+                break
+        else:
+            tramos[f">{TRAMOS_MS[-1]}"] += 1
+    return tramos
+
+
+class Registro:
+    """Muestras de todos los usuarios: (instante, ruta, ms, bytes, error)."""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self.muestras = []
+        self.omitidos = {}
+
+    def agregar(self, ruta, ms, tamano, error):
+        muestra = (time.monotonic(), ruta, ms, tamano, error)
+        with self._candado:
+            self.muestras.append(muestra)
+
+    def omitir(self, ruta):
+        """Paso sin ejecutar porque falta una variable (ej: no se capturo 'numero')."""
+        with self._candado:
+            self.omitidos[ruta] = self.omitidos.get(ruta, 0) + 1
+
+
+# ══════════════════════════════════════════════
+# USUARIO VIRTUAL
+# ══════════════════════════════════════════════
+
+class Usuario(threading.Thread):
+    """Un usuario que repite flujos del escenario hasta que se le pide parar."""
+
+    def __init__(self, numero, escenario, url, catalogo, registro, semilla):
+        super().__init__(name=f"usuario-{numero}", daemon=True)
+        self.escenario = escenario
+        self.url = url
+        self.catalogo = catalogo
+        self.registro = registro
+        self.azar = random.Random(semilla * 100003 + numero)
+        self.detener = threading.Event()
+        self.sesion = requests.Session()
+        self.variables = {}
+
+    def run(self):
+        flujos = list(self.escenario['flujos'].values())
+        pesos = [flujo.get('peso', 1) for flujo in flujos]
+        try:
+            while not self.detener.is_set():
+                flujo = self.azar.choices(flujos, weights=pesos)[0]
+                self.variables = {}
+                self._pasos(flujo['pasos'])
+        finally:
+            self.sesion.close()
+
+    def _pasos(self, pasos):
+        for paso in pasos:
+            if self.detener.is_set():
+                return
+            if 'probabilidad' in paso and self.azar.random() >= paso['probabilidad']:
+                continue
+            if 'pasos' in paso:
+                self._pasos(paso['pasos'])
+            else:
+                self._paso(paso)
+
+    def _paso(self, paso):
+        metodo, plantilla = paso['ruta'].split(' ', 1)
+        try:
+            url = plantilla.format(**self.variables)
+        except KeyError:
+            self.registro.omitir(paso['ruta'])
+            return
+        datos = None
+        if 'datos' in paso:
+            datos = GENERADORES[paso['datos']](self.catalogo, self.azar, self.variables, paso)
+
+        respuesta = self._pedir(paso['ruta'], metodo, url, datos)
+        if respuesta is not None and paso.get('seguir') and respuesta.is_redirect:
+            destino = urlsplit(respuesta.headers['Location']).path
+            respuesta = self._pedir(f"GET {destino}", 'GET', destino)
+
+        if respuesta is not None:
+            for variable, patron in paso.get('capturar', {}).items():
+                encontrados = re.findall(patron, respuesta.text)
+                if encontrados:
+                    self.variables[variable] = self.azar.choice(encontrados)
+
+        minimo, maximo = self.escenario.get('pausa', [0, 0])
+        if maximo:
+            self.detener.wait(self.azar.uniform(minimo, maximo))
+
+    def _pedir(self, ruta, metodo, url, datos=None):
+        """Hace y registra una peticion. Retorna la respuesta, o None si fallo la red."""
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.sesion.request(metodo, self.url + url, data=datos,
+                                            allow_redirects=False, timeout=60)
+            contenido = respuesta.content
+        except requests.RequestException:
+            self.registro.agregar(ruta, (time.perf_counter() - inicio) * 1000, 0, 'red')
+            return None
+        ms = (time.perf_counter() - inicio) * 1000
+
+        error = None
+        if respuesta.status_code >= 400:
+            error = f"http {respuesta.status_code}"
+        elif b'alert alert-danger' in contenido:
+            # El frontend muestra los errores de la API como alerta y responde 200
+            error = 'alerta'
+        self.registro.agregar(ruta, ms, len(contenido), error)
+        return respuesta
+
+
+# ══════════════════════════════════════════════
+# EJECUCION DE UN ESCENARIO
+# ══════════════════════════════════════════════
+
+def usuarios_objetivo(etapas, segundos):
+    """Usuarios que deben estar activos a los 'segundos' de empezar (rampa lineal)."""
+    anterior = 0
+    for etapa in etapas:
+        if segundos < etapa['segundos']:
+            fraccion = segundos / etapa['segundos']
+            return round(anterior + (etapa['usuarios'] - anterior) * fraccion)
+        segundos -= etapa['segundos']
+        anterior = etapa['usuarios']
+    return anterior
+
+
+def _estadisticas_api(api_url, reiniciar=False):
+    """Estadisticas de la API simulada, o None si --api no es la API simulada."""
+    try:
+        respuesta = requests.get(f"{api_url}/simulada/estadisticas",
+                                 params={'reiniciar': 1} if reiniciar else None, timeout=5)
+        return respuesta.json() if respuesta.ok else None
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def correr_escenario(nombre, escenario, opciones, catalogo):
+    """
+    Ejecuta un escenario completo con su rampa de usuarios.
+
+    Returns:
+        Diccionario con el resumen por ruta, por etapa y de la API.
+    """
+    etapas = [{**etapa, 'usuarios': round(etapa['usuarios'] * opciones.escala)}
+              for etapa in escenario['etapas']]
+    duracion = sum(etapa['segundos'] for etapa in etapas)
+    registro = Registro()
+    # Contadores de la API simulada en cero: en_curso_maximo es el de este escenario
+    _estadisticas_api(opciones.api, reiniciar=True)
+
+    activos = []
+    creados = 0
+    inicio = time.monotonic()
+    print(f"[{nombre}] {escenario.get('descripcion', '')} ({duracion} s)", file=sys.stderr)
+    while True:
+        transcurrido = time.monotonic() - inicio
+        if transcurrido >= duracion:
+            break
+        objetivo = usuarios_objetivo(etapas, transcurrido)
+        while len(activos) < objetivo:
+            usuario = Usuario(creados, escenario, opciones.url, catalogo, registro, opciones.semilla)
+            usuario.start()
+            activos.append(usuario)
+            creados += 1
+        while len(activos) > objetivo:
+            # Terminan el paso en curso y salen
+            activos.pop().detener.set()
+        time.sleep(0.1)
+
+    for usuario in activos:
+        usuario.detener.set()
+    for usuario in activos:
+        usuario.join(timeout=65)
+
+    api_despues = _estadisticas_api(opciones.api)
+    return resumir(registro, etapas, inicio, api_despues)
+
+
+def _resumen_latencias(muestras, segundos):
+    """Peticiones, errores, rps y percentiles de una lista de muestras."""
+    latencias = sorted(m[2] for m in muestras)
+    errores = sum(1 for m in muestras if m[4])
+    redondear = lambda valor: round(valor, 2) if valor is not None else None
+    return {
+        'peticiones': len(muestras),
+        'errores': errores,
+        'tasa_errores': round(errores / len(muestras), 4) if muestras else 0,
+        'rps': round(len(muestras) / segundos, 2) if segundos else None,
+        'p50_ms': redondear(percentil(latencias, 50)),
+        'p90_ms': redondear(percentil(latencias, 90)),
+        'p99_ms': redondear(percentil(latencias, 99)),
+        'maximo_ms': redondear(latencias[-1]) if latencias else None,
+    }
+
+
+def resumir(registro, etapas, inicio, api):
+    """Resumen total, por ruta y por etapa de las muestras de un escenario."""
+    muestras = registro.muestras
+    duracion = sum(etapa['segundos'] for etapa in etapas)
+    resultado = {'total': _resumen_latencias(muestras, duracion)}
+    resultado['total']['histograma'] = histograma(m[2] for m in muestras)
+
+    rutas = {}
+    for muestra in muestras:
+        rutas.setdefault(muestra[1], []).append(muestra)
+    resultado['rutas'] = {}
+    for ruta, propias in sorted(rutas.items()):
+        datos = _resumen_latencias(propias, duracion)
+        datos['bytes_promedio'] = round(sum(m[3] for m in propias) / len(propias))
+        tipos = {}
+        for muestra in propias:
+            if muestra[4]:
+                tipos[muestra[4]] = tipos.get(muestra[4], 0) + 1
+        datos['tipos_error'] = tipos
+        datos['histograma'] = histograma(m[2] for m in propias)
+        resultado['rutas'][ruta] = datos
+    resultado['omitidos'] = dict(registro.omitidos)
+
+    resultado['etapas'] = []
+    desde = inicio
+    for etapa in etapas:
+        hasta = desde + etapa['segundos']
+        propias = [m for m in muestras if desde <= m[0] < hasta]
+        resultado['etapas'].append({'usuarios': etapa['usuarios'], 'segundos': etapa['segundos'],
+                                    **_resumen_latencias(propias, etapa['segundos'])})
+        desde = hasta
+
+    if api is not None:
+        endpoints = {clave: valores for clave, valores in api['endpoints'].items()
+                     if ' /api/' in clave}
+        llamadas = sum(valores['peticiones'] for valores in endpoints.values())
+        resultado['api'] = {
+            'llamadas': llamadas,
+            'por_peticion': round(llamadas / len(muestras), 2) if muestras else None,
+            'errores': sum(valores['errores'] for valores in endpoints.values()),
+            'en_curso_maximo': api.get('en_curso_maximo'),
+            'endpoints': {clave: valores['peticiones'] for clave, valores in
+                          sorted(endpoints.items(), key=lambda par: -par[1]['peticiones'])},
+        }
+    return resultado
+
+
+# ══════════════════════════════════════════════
+# REPORTE
+# ══════════════════════════════════════════════
+
+def imprimir(nombre, resultado):
+    """Reporte de texto de un escenario."""
+    total = resultado['total']
+    print(f"\n═══ {nombre}: {total['peticiones']} peticiones, {total['rps']} rps, "
+          f"errores {total['tasa_errores']:.2%}")
+
+    print(f"\n{'etapa':<6} {'usuarios':>8} {'seg':>5} {'rps':>8} {'p50':>8} {'p90':>8} "
+          f"{'p99':>8} {'errores':>8}")
+    for numero, etapa in enumerate(resultado['etapas'], 1):
+        print(f"{numero:<6} {etapa['usuarios']:>8} {etapa['segundos']:>5} {etapa['rps'] or 0:>8.1f} "
+              f"{etapa['p50_ms'] or 0:>8.1f} {etapa['p90_ms'] or 0:>8.1f} {etapa['p99_ms'] or 0:>8.1f} "
+              f"{etapa['tasa_errores']:>8.2%}")
+
+    print(f"\n{'ruta':<34} {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'errores':>8}")
+    for ruta, datos in resultado['rutas'].items():
+        print(f"{ruta:<34} {datos['peticiones']:>6} {datos['p50_ms']:>8.1f} {datos['p90_ms']:>8.1f} "
+              f"{datos['p99_ms']:>8.1f} {datos['maximo_ms']:>8.1f} {datos['tasa_errores']:>8.2%}")
+    if resultado['omitidos']:
+        print(f"Pasos omitidos (sin variable capturada): {resultado['omitidos']}")
+
+    print("\nLatencia (ms)")
+    mayor = max(total['histograma'].values()) or 1
+    for tramo, cantidad in total['histograma'].items():
+        print(f"{tramo:>8} {cantidad:>7} {'█' * round(40 * cantidad / mayor)}")
+
+    if 'api' in resultado:
+        api = resultado['api']
+        print(f"\nAPI: {api['llamadas']} llamadas ({api['por_peticion']} por peticion), "
+              f"{api['errores']} errores, concurrencia maxima {api['en_curso_maximo']}")
+        for endpoint, cantidad in list(api['endpoints'].items())[:8]:
+            print(f"    {endpoint:<40} {cantidad:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5100', help='URL del frontend')
+    parser.add_argument('--api', default=API_BASE_URL,
+                        help='URL de la API (catalogo de los formularios y estadisticas)')
+    parser.add_argument('--escenario', nargs='+', default=['facturacion'],
+                        help='escenarios a correr, uno detras de otro')
+    parser.add_argument('--escenarios', help='archivo JSON con escenarios propios (se suman a los incluidos)')
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help='multiplica los usuarios de todas las etapas')
+    parser.add_argument('--semilla', type=int, default=1, help='semilla de flujos, pausas y formularios')
+    parser.add_argument('--listar', action='store_true', help='mostrar los escenarios disponibles')
+    parser.add_argument('--salida', help='archivo JSON de resultados')
+    opciones = parser.parse_args()
+
+    escenarios = dict(ESCENARIOS)
+    if opciones.escenarios:
+        with open(opciones.escenarios, encoding='utf-8') as archivo:
+            escenarios.update(json.load(archivo))
+
+    if opciones.listar:
+        for nombre, escenario in escenarios.items():
+            duracion = sum(etapa['segundos'] for etapa in escenario['etapas'])
+            maximo = max(etapa['usuarios'] for etapa in escenario['etapas'])
+            print(f"{nombre:<14} {duracion:>5} s  hasta {maximo:>3} usuarios  "
+                  f"{escenario.get('descripcion', '')}")
+        return
+
+    faltantes = [nombre for nombre in opciones.escenario if nombre not in escenarios]
+    if faltantes:
+        parser.error(f"escenarios desconocidos: {', '.join(faltantes)}")
+
+    try:
+        catalogo = cargar_catalogo(opciones.api)
+    except (requests.RequestException, ValueError) as ex:
+        sys.exit(f"No se pudo descargar el catalogo de {opciones.api}: {ex}")
+    if not all(catalogo.values()):
+        sys.exit(f"La API no tiene clientes, vendedores o productos con stock: "
+                 f"{ {clave: len(valores) for clave, valores in catalogo.items()} }")
+
+    corrida = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'url': opciones.url,
+        'escala': opciones.escala,
+        'semilla': opciones.semilla,
+        'escenarios': {},
+    }
+    for nombre in opciones.escenario:
+        resultado = correr_escenario(nombre, escenarios[nombre], opciones, catalogo)
+        corrida['escenarios'][nombre] = resultado
+        imprimir(nombre, resultado)
+
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(corrida, archivo, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+memoria_filas.py - Memoria de un listado: lista de diccionarios vs Tabla compacta.
+
+Genera respuestas con la forma de GET /api/{tabla} ({"datos": [...]}),
+las decodifica y mide con tracemalloc cuanta memoria queda retenida:
+
+    - dicts: la lista de diccionarios que retorna el decodificador JSON
+    - tabla: el mismo listado despues de compactar() (services/filas.py)
+
+Tambien mide el tiempo de recorrer el listado leyendo una columna,
+porque la Tabla crea una vista Fila por cada fila que se lee.
+
+Uso (desde la raiz del proyecto):
+    python -m benchmarks.memoria_filas
+    python -m benchmarks.memoria_filas --filas 1000 50000 --tabla cliente
+"""
+
+# argparse: opciones de la linea de comandos
+import argparse
+
+# gc: recolectar basura antes de cada medicion
+import gc
+
+# json: generar y decodificar las respuestas de prueba
+import json
+
+# time.perf_counter(): reloj de alta resolucion para el recorrido
+import time
+
+# tracemalloc: memoria asignada por Python en cada paso
+import tracemalloc
+
+from services.filas import compactar
+
+
+# Filas de ejemplo con las columnas reales de cada tabla (ver scripts_bds)
+GENERADORES = {
+    'producto': lambda i: {
+        'codigo': f'PR{i:06d}', 'nombre': f'Producto {i}',
+        'stock': i % 500, 'valorunitario': round(1000 + i * 0.37, 2),
+    },
+    'persona': lambda i: {
+        'codigo': f'P{i:06d}', 'nombre': f'Persona numero {i}',
+        'email': f'persona{i}@correo.com', 'telefono': f'300{i:07d}',
+    },
+    'cliente': lambda i: {
+        'id': i, 'credito': float(i % 1000) * 10, 'fkcodpersona': f'P{i:06d}',
+        'fkcodempresa': f'E{i % 50:03d}',
+    },
+}
+
+
+def _respuesta(tabla, cantidad):
+    """Cuerpo JSON (bytes) de un listado de 'cantidad' filas."""
+    generar = GENERADORES[tabla]
+    datos = [generar(i) for i in range(cantidad)]
+    return json.dumps({'datos': datos, 'mensaje': 'ok'}).encode()
+
+
+def _retenido(construir):
+    """Bytes que siguen asignados despues de construir() (el resultado se conserva)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inicio, _ = tracemalloc.get_traced_memory()
+        resultado = construir()
+        gc.collect()
+        actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, actual - inicio, pico - inicio
+
+
+def _recorrer(registros, columna):
+    """Milisegundos en leer 'columna' de todas las filas con registro[columna]."""
+    inicio = time.perf_counter()
+    for registro in registros:
+        registro[columna]
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir(tabla, cantidad):
+    """Mide un tamano de listado. Retorna un diccionario con los resultados."""
+    cuerpo = _respuesta(tabla, cantidad)
+    columna = next(iter(GENERADORES[tabla](0)))
+
+    dicts, bytes_dicts, pico_dicts = _retenido(lambda: json.loads(cuerpo)['datos'])
+    tabla_compacta, bytes_tabla, pico_tabla = _retenido(
+        lambda: compactar(json.loads(cuerpo)['datos'])
+    )
+
+    return {
+        'tabla': tabla,
+        'filas': cantidad,
+        'json_bytes': len(cuerpo),
+        'dicts_bytes': bytes_dicts,
+        'tabla_bytes': bytes_tabla,
+        'ahorro': round(1 - bytes_tabla / bytes_dicts, 3) if bytes_dicts else None,
+        'dicts_pico': pico_dicts,
+        'tabla_pico': pico_tabla,
+        'dicts_recorrer_ms': round(_recorrer(dicts, columna), 3),
+        'tabla_recorrer_ms': round(_recorrer(tabla_compacta, columna), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help='tamanos de listado a medir')
+    parser.add_argument('--tabla', choices=sorted(GENERADORES), default='producto',
+                        help='forma de las filas')
+    parser.add_argument('--json', action='store_true',
+                        help='imprimir los resultados en JSON')
+    args = parser.parse_args()
+
+    resultados = [medir(args.tabla, cantidad) for cantidad in args.filas]
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+
+    print(f"Tabla: {args.tabla}")
+    print(f"{'filas':>8} {'json KB':>9} {'dicts KB':>10} {'tabla KB':>10} {'ahorro':>7} "
+          f"{'dicts ms':>9} {'tabla ms':>9}")
+    for r in resultados:
+        print(f"{r['filas']:>8} {r['json_bytes'] / 1024:>9.1f} {r['dicts_bytes'] / 1024:>10.1f} "
+              f"{r['tabla_bytes'] / 1024:>10.1f} {r['ahorro']:>7.0%} "
+              f"{r['dicts_recorrer_ms']:>9.2f} {r['tabla_recorrer_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,567 @@
+"""
+rutas.py - Latencia, rendimiento y memoria de cada ruta del frontend.
+
+Levanta la API simulada (benchmarks/api_simulada.py) en otro proceso con
+N filas por tabla y recorre todas las rutas de la aplicacion:
+
+    GET  /                                     pagina de inicio
+    GET  /{tabla}                              listado de cada tabla CRUD
+    POST /{tabla}/crear, /actualizar, /eliminar   (ciclos sobre registros nuevos)
+    GET  /factura, /factura/ver/N, /factura/nueva, /factura/editar/N
+    POST /factura/crear, /factura/actualizar, /factura/eliminar
+
+De cada ruta se mide:
+
+    - primera_ms:           la primera peticion (caches e indices vacios)
+    - p50/p95/p99_ms:       percentiles de las siguientes --repeticiones
+    - rps:                  peticiones por segundo una detras de otra
+    - rps_concurrente:      con --concurrencia hilos a la vez (solo GET)
+    - asignado_kb:          pico de memoria asignada durante una peticion (tracemalloc)
+    - retenido_kb:          memoria que queda asignada despues de la peticion
+                            (solo con el test client: con --wsgi tracemalloc sumaria
+                            los buferes de lectura del cliente HTTP, de ~10 MB)
+    - llamadas_api:         peticiones que recibio la API por cada peticion a la ruta
+    - errores_api:          respuestas 4xx/5xx de la API (los 404 "sin registros" cuentan)
+
+Cada tamano corre en un proceso nuevo del frontend (caches vacios) contra
+una API simulada nueva. Los resultados se guardan en JSON con el commit
+actual, para comparar dos corridas:
+
+Uso (desde la raiz del proyecto):
+    python -m benchmarks.rutas --filas 10 1000 --salida antes.json
+    python -m benchmarks.rutas --filas 10 1000 100000 --rutas producto factura
+    python -m benchmarks.rutas --wsgi --concurrencia 8          (servidor HTTP real)
+    python -m benchmarks.rutas --comparar antes.json despues.json
+"""
+
+# argparse: opciones de la linea de comandos
+import argparse
+
+# json: resultados y estadisticas de la API simulada
+import json
+
+# sys: lanzar los procesos hijos con el mismo interprete
+import sys
+
+# socket: buscar un puerto libre para la API simulada
+import socket
+
+# subprocess: la API simulada y cada medicion corren en su propio proceso
+import subprocess
+
+# threading: servidor WSGI en un hilo (modo --wsgi)
+import threading
+
+# time: reloj de alta resolucion
+import time
+
+# tracemalloc: memoria asignada por peticion
+import tracemalloc
+
+# datetime: fecha de la corrida
+from datetime import datetime
+
+# ThreadPoolExecutor: peticiones concurrentes para el rendimiento
+from concurrent.futures import ThreadPoolExecutor
+
+# requests: consultar la API simulada y el servidor WSGI
+import requests
+
+
+# Tablas CRUD y el multiplicador de filas de cada una (N filas por tabla)
+TABLAS_DATOS = {
+    'empresa': 1, 'persona': 1, 'producto': 1, 'rol': 1, 'ruta': 1, 'usuario': 1,
+    'cliente': 1, 'vendedor': 1, 'factura': 1, 'productosporfactura': 3,
+}
+
+
+# ══════════════════════════════════════════════
+# FORMULARIOS DE ESCRITURA
+# Cada ciclo i crea un registro nuevo, lo actualiza y lo elimina, asi las
+# escrituras se pueden repetir sin chocar con los datos de la API.
+# ══════════════════════════════════════════════
+
+# tabla → (campo clave, crear(i) → formulario, campo unico para encontrar el id SERIAL)
+FORMULARIOS = {
+    'empresa': ('codigo', lambda i: {'codigo': f'BE{i:06d}', 'nombre': f'Empresa bench {i}'}, None),
+    'persona': ('codigo', lambda i: {'codigo': f'BP{i:06d}', 'nombre': f'Persona bench {i}',
+                                     'email': f'bench{i}@correo.com', 'telefono': '3000000000'}, None),
+    'producto': ('codigo', lambda i: {'codigo': f'BR{i:06d}', 'nombre': f'Producto bench {i}',
+                                      'stock': '10', 'valorunitario': '1000'}, None),
+    'rol': ('id', lambda i: {'id': str(900000 + i), 'nombre': f'Rol bench {i}'}, None),
+    # Sin '/' en la clave: la API (y la simulada) no recibe '/' dentro de {valor}
+    # (ver API_CLAVE_BARRA_CODIFICADA en config.py)
+    'ruta': ('ruta', lambda i: {'ruta': f'bench-{i}', 'descripcion': f'Ruta bench {i}'}, None),
+    'usuario': ('email', lambda i: {'email': f'usuario{i}@bench.com', 'contrasena': 'bench123',
+                                    'encriptar': 'si'}, None),
+    'cliente': ('id', lambda i: {'credito': str(7000000 + i), 'fkcodpersona': 'P001',
+                                 'fkcodempresa': 'E001'}, 'credito'),
+    'vendedor': ('id', lambda i: {'carnet': str(900000 + i), 'direccion': f'Calle bench {i}',
+                                  'fkcodpersona': 'P002'}, 'carnet'),
+}
+
+# Campo que cambia actualizar() (ademas de la clave)
+CAMPO_ACTUALIZAR = {
+    'empresa': 'nombre', 'persona': 'nombre', 'producto': 'nombre', 'rol': 'nombre',
+    'ruta': 'descripcion', 'usuario': 'contrasena', 'cliente': 'credito', 'vendedor': 'direccion',
+}
+
+
+def _formulario_factura(numero=None):
+    """Factura con un producto del script (PR003 tiene stock para muchos ciclos)."""
+    datos = {'fkidcliente': '1', 'fkidvendedor': '1',
+             'prod_codigo[]': ['PR003'], 'prod_cantidad[]': ['1']}
+    if numero is not None:
+        datos['numero'] = str(numero)
+    return datos
+
+
+# ══════════════════════════════════════════════
+# CLIENTES: test client de Flask o HTTP contra un servidor WSGI
+# ══════════════════════════════════════════════
+
+class ClienteFlask:
+    """Peticiones por el test client (sin red: mide solo la aplicacion)."""
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def pedir(self, metodo, url, datos=None):
+        """Hace la peticion y lee toda la respuesta. Retorna (codigo, bytes)."""
+        respuesta = self._cliente.open(url, method=metodo, data=datos)
+        # get_data() consume tambien las respuestas por partes (stream_template)
+        return respuesta.status_code, len(respuesta.get_data())
+
+
+class ClienteHttp:
+    """Peticiones HTTP reales (keep-alive) contra el servidor WSGI."""
+
+    def __init__(self, base_url):
+        self._base_url = base_url
+        self._sesion = requests.Session()
+
+    def pedir(self, metodo, url, datos=None):
+        respuesta = self._sesion.request(metodo, self._base_url + url, data=datos,
+                                         allow_redirects=False)
+        return respuesta.status_code, len(respuesta.content)
+
+
+def _servidor_wsgi(app):
+    """Servidor WSGI multihilo de werkzeug en un hilo. Retorna su URL base."""
+    from werkzeug.serving import make_server
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name='wsgi-bench', daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}"
+
+
+# ══════════════════════════════════════════════
+# ESTADISTICAS
+# ══════════════════════════════════════════════
+
+def percentil(valores, p):
+    """Percentil p (0-100) por rango mas cercano; valores ya ordenados."""
+    if not valores:
+        return None
+    posicion = max(int(round(p / 100 * len(valores) + 0.5)) - 1, 0)
+    return valores[min(posicion, len(valores) - 1)]
+
+
+def _resumen(tiempos):
+    """p50/p95/p99, promedio, maximo y rps de una lista de segundos."""
+    ordenados = sorted(tiempos)
+    total = sum(ordenados)
+    ms = lambda s: round(s * 1000, 3) if s is not None else None
+    return {
+        'p50_ms': ms(percentil(ordenados, 50)),
+        'p95_ms': ms(percentil(ordenados, 95)),
+        'p99_ms': ms(percentil(ordenados, 99)),
+        'promedio_ms': ms(total / len(ordenados)) if ordenados else None,
+        'maximo_ms': ms(ordenados[-1]) if ordenados else None,
+        'rps': round(len(ordenados) / total, 1) if total else None,
+    }
+
+
+class ApiRemota:
+    """Consultas a la API simulada que no forman parte de la medicion."""
+
+    def __init__(self, url):
+        self.url = url
+        self._sesion = requests.Session()
+        # Peticiones a /api/* hechas por buscar(): no se cuentan como llamadas del frontend
+        self.consultas = 0
+
+    def llamadas(self):
+        """(peticiones, errores) a /api/* recibidas hasta ahora, sin las de buscar()."""
+        datos = self._sesion.get(f"{self.url}/simulada/estadisticas").json()
+        peticiones = errores = 0
+        for endpoint, valores in datos['endpoints'].items():
+            if ' /api/' in endpoint:
+                peticiones += valores['peticiones']
+                errores += valores['errores']
+        return peticiones - self.consultas, errores
+
+    def buscar(self, tabla, campo, valor):
+        """Registros de la tabla con ese valor (para encontrar el id SERIAL de un registro nuevo)."""
+        self.consultas += 1
+        respuesta = self._sesion.get(f"{self.url}/api/{tabla}/{campo}/{valor}")
+        return respuesta.json().get('datos') or [] if respuesta.ok else []
+
+
+# ══════════════════════════════════════════════
+# MEDICION DE UNA RUTA
+# ══════════════════════════════════════════════
+
+def _memoria(hacer, muestras):
+    """Mediana de memoria asignada (pico) y retenida por peticion, en KB."""
+    asignado, retenido = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(muestras):
+            tracemalloc.reset_peak()
+            antes = tracemalloc.get_traced_memory()[0]
+            hacer()
+            actual, pico = tracemalloc.get_traced_memory()
+            asignado.append(pico - antes)
+            retenido.append(actual - antes)
+    finally:
+        tracemalloc.stop()
+    asignado.sort()
+    retenido.sort()
+    return {'asignado_kb': round(percentil(asignado, 50) / 1024, 1),
+            'retenido_kb': round(percentil(retenido, 50) / 1024, 1)}
+
+
+def medir_lectura(nuevo_cliente, api, url, opciones):
+    """
+    Mide una ruta GET.
+
+    Returns:
+        Diccionario con los tiempos, bytes, memoria y llamadas a la API.
+    """
+    cliente = nuevo_cliente()
+    errores = 0
+    llamadas_antes, errores_api_antes = api.llamadas()
+
+    inicio = time.perf_counter()
+    codigo, tamano = cliente.pedir('GET', url)
+    primera = time.perf_counter() - inicio
+    errores += codigo >= 400
+
+    tiempos = []
+    for _ in range(opciones.repeticiones):
+        inicio = time.perf_counter()
+        codigo, tamano = cliente.pedir('GET', url)
+        tiempos.append(time.perf_counter() - inicio)
+        errores += codigo >= 400
+
+    llamadas, errores_api = api.llamadas()
+    resultado = {
+        'peticiones': opciones.repeticiones + 1,
+        'errores': errores,
+        'codigo': codigo,
+        'bytes': tamano,
+        'primera_ms': round(primera * 1000, 3),
+        **_resumen(tiempos),
+        'llamadas_api': round((llamadas - llamadas_antes) / (opciones.repeticiones + 1), 2),
+        'errores_api': errores_api - errores_api_antes,
+    }
+
+    if opciones.concurrencia > 1:
+        # Un cliente por hilo: el test client guarda cookies y no se comparte
+        clientes = [nuevo_cliente() for _ in range(opciones.concurrencia)]
+        por_hilo = max(opciones.repeticiones // opciones.concurrencia, 1)
+
+        def rafaga(cliente_hilo):
+            for _ in range(por_hilo):
+                cliente_hilo.pedir('GET', url)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opciones.concurrencia) as hilos:
+            list(hilos.map(rafaga, clientes))
+        resultado['rps_concurrente'] = round(por_hilo * opciones.concurrencia
+                                             / (time.perf_counter() - inicio), 1)
+
+    if not opciones.wsgi:
+        resultado.update(_memoria(lambda: cliente.pedir('GET', url), opciones.muestras_memoria))
+    return resultado
+
+
+def medir_escrituras(nuevo_cliente, api, tabla, opciones):
+    """
+    Mide crear, actualizar y eliminar de una tabla con ciclos sobre registros nuevos.
+
+    Returns:
+        {'POST /tabla/crear': {...}, 'POST /tabla/actualizar': {...}, 'POST /tabla/eliminar': {...}}
+    """
+    cliente = nuevo_cliente()
+    tiempos = {'crear': [], 'actualizar': [], 'eliminar': []}
+    errores = {'crear': 0, 'actualizar': 0, 'eliminar': 0}
+
+    def pedir(accion, datos):
+        inicio = time.perf_counter()
+        codigo, _tamano = cliente.pedir('POST', f"/{tabla}/{accion}", datos)
+        tiempos[accion].append(time.perf_counter() - inicio)
+        # Las escrituras siempre redirigen (302); un 4xx/5xx es un error del frontend
+        errores[accion] += codigo >= 400
+
+    def ciclo(i):
+        if tabla == 'factura':
+            pedir('crear', _formulario_factura())
+            facturas = api.buscar('factura', 'fkidvendedor', 1)
+            numero = max(f['numero'] for f in facturas)
+            pedir('actualizar', _formulario_factura(numero))
+            pedir('eliminar', {'numero': str(numero)})
+            return
+
+        clave, crear, campo_unico = FORMULARIOS[tabla]
+        datos = crear(i)
+        pedir('crear', datos)
+        if campo_unico:
+            # Clave SERIAL: se busca el id que le asigno la API (fuera de la medicion)
+            registros = api.buscar(tabla, campo_unico, datos[campo_unico])
+            datos[clave] = str(registros[-1][clave]) if registros else '0'
+        campo = CAMPO_ACTUALIZAR[tabla]
+        pedir('actualizar', {**datos, campo: f"{datos[campo]}9"})
+        pedir('eliminar', {clave: datos[clave]})
+
+    llamadas_antes, errores_api_antes = api.llamadas()
+    for i in range(opciones.repeticiones):
+        ciclo(i)
+    llamadas, errores_api = api.llamadas()
+
+    # Memoria: ciclos adicionales con tracemalloc (mas lentos, fuera de los tiempos)
+    memoria = {}
+    if not opciones.wsgi:
+        guardados = {accion: list(valores) for accion, valores in tiempos.items()}
+        siguiente = [opciones.repeticiones]
+
+        def ciclo_memoria():
+            ciclo(siguiente[0])
+            siguiente[0] += 1
+        memoria = _memoria(ciclo_memoria, opciones.muestras_memoria)
+        tiempos.update(guardados)
+
+    resultados = {}
+    for accion, valores in tiempos.items():
+        resultados[f"POST /{tabla}/{accion}"] = {
+            'peticiones': len(valores),
+            'errores': errores[accion],
+            'primera_ms': round(valores[0] * 1000, 3),
+            **_resumen(valores[1:] or valores),
+            'llamadas_api': round((llamadas - llamadas_antes) / (3 * len(valores)), 2),
+            'errores_api': errores_api - errores_api_antes,
+            # Memoria de un ciclo completo (crear + actualizar + eliminar)
+            **{f"ciclo_{clave}": valor for clave, valor in memoria.items()},
+        }
+    return resultados
+
+
+# ══════════════════════════════════════════════
+# UN TAMANO (proceso hijo)
+# ══════════════════════════════════════════════
+
+def medir_tamano(opciones):
+    """
+    Mide todas las rutas contra la API simulada de --api.
+
+    Corre en un proceso propio: la URL de la API se fija en config antes de
+    importar la aplicacion, y los caches empiezan vacios.
+    """
+    import config
+    config.API_BASE_URL = opciones.api
+
+    from app import crear_app
+
+    app = crear_app({'TESTING': True})
+    if opciones.wsgi:
+        base_url = _servidor_wsgi(app)
+        nuevo_cliente = lambda: ClienteHttp(base_url)
+    else:
+        nuevo_cliente = lambda: ClienteFlask(app)
+
+    api = ApiRemota(opciones.api)
+    elegidas = set(opciones.rutas or [])
+    incluir = lambda nombre: not elegidas or nombre in elegidas
+
+    lecturas = []
+    if incluir('home'):
+        lecturas.append('/')
+    lecturas += [f"/{tabla}" for tabla in FORMULARIOS if incluir(tabla)]
+    if incluir('factura'):
+        lecturas += ['/factura', '/factura/ver/1', '/factura/nueva', '/factura/editar/1']
+
+    rutas = {}
+    for url in lecturas:
+        print(f"  [{opciones.medir} filas] GET {url}", file=sys.stderr)
+        rutas[f"GET {url}"] = medir_lectura(nuevo_cliente, api, url, opciones)
+
+    for tabla in [*FORMULARIOS, 'factura']:
+        if incluir(tabla):
+            print(f"  [{opciones.medir} filas] POST /{tabla}/*", file=sys.stderr)
+            rutas.update(medir_escrituras(nuevo_cliente, api, tabla, opciones))
+
+    return {'filas': opciones.medir, 'rutas': rutas}
+
+
+# ══════════════════════════════════════════════
+# CORRIDA COMPLETA (proceso padre)
+# ══════════════════════════════════════════════
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _iniciar_api(filas, opciones):
+    """Lanza la API simulada con N filas por tabla y espera a que responda."""
+    puerto = _puerto_libre()
+    cantidades = [f"{tabla}={filas * factor}" for tabla, factor in TABLAS_DATOS.items()]
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.api_simulada', '--puerto', str(puerto),
+         '--latencia', str(opciones.latencia), '--filas', *cantidades],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 300
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"La API simulada termino con codigo {proceso.returncode}")
+        try:
+            requests.get(f"{url}/api/diagnostico/conexion", timeout=1)
+            return proceso, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proceso.kill()
+    raise RuntimeError("La API simulada no respondio en 300 s")
+
+
+def _commit():
+    """Commit actual (corto), o None si no es un repositorio git."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def correr(opciones):
+    """Mide cada tamano en un proceso nuevo y junta los resultados."""
+    resultados = []
+    for filas in opciones.filas:
+        proceso_api, url = _iniciar_api(filas, opciones)
+        try:
+            argumentos = [sys.executable, '-m', 'benchmarks.rutas', '--medir', str(filas),
+                          '--api', url, '--repeticiones', str(opciones.repeticiones),
+                          '--concurrencia', str(opciones.concurrencia),
+                          '--muestras-memoria', str(opciones.muestras_memoria)]
+            if opciones.wsgi:
+                argumentos.append('--wsgi')
+            if opciones.rutas:
+                argumentos += ['--rutas', *opciones.rutas]
+            hijo = subprocess.run(argumentos, stdout=subprocess.PIPE, text=True, check=True)
+            resultados.append(json.loads(hijo.stdout.strip().splitlines()[-1]))
+        finally:
+            proceso_api.terminate()
+            proceso_api.wait()
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': sys.version.split()[0],
+        'modo': 'wsgi' if opciones.wsgi else 'test_client',
+        'repeticiones': opciones.repeticiones,
+        'concurrencia': opciones.concurrencia,
+        'latencia_api_ms': opciones.latencia,
+        'resultados': resultados,
+    }
+
+
+def imprimir(corrida):
+    """Tabla de texto con los percentiles de cada ruta."""
+    for resultado in corrida['resultados']:
+        print(f"\nFilas por tabla: {resultado['filas']}  (commit {corrida['commit']}, {corrida['modo']})")
+        print(f"{'ruta':<32} {'primera':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>7} "
+              f"{'KB':>8} {'api':>5} {'err':>4}")
+        for ruta, datos in resultado['rutas'].items():
+            kb = datos.get('asignado_kb', datos.get('ciclo_asignado_kb', 0))
+            print(f"{ruta:<32} {datos['primera_ms']:>9.2f} {datos['p50_ms']:>8.2f} "
+                  f"{datos['p95_ms']:>8.2f} {datos['p99_ms']:>8.2f} {datos['rps'] or 0:>7.1f} "
+                  f"{kb:>8.0f} {datos['llamadas_api']:>5} {datos['errores']:>4}")
+
+
+def comparar(antes, despues, umbral):
+    """
+    Compara dos corridas ruta por ruta (p50 y p95).
+
+    Returns:
+        Cantidad de rutas que empeoraron mas que el umbral.
+    """
+    peores = 0
+    anteriores = {(r['filas'], ruta): datos
+                  for r in antes['resultados'] for ruta, datos in r['rutas'].items()}
+    print(f"{antes['commit']} → {despues['commit']}  (umbral {umbral:.0%})")
+    print(f"{'filas':>7} {'ruta':<32} {'p50 antes':>10} {'p50':>9} {'cambio':>8} {'p95 cambio':>11}")
+    for resultado in despues['resultados']:
+        for ruta, datos in resultado['rutas'].items():
+            anterior = anteriores.get((resultado['filas'], ruta))
+            if anterior is None or not anterior['p50_ms'] or not anterior['p95_ms']:
+                continue
+            cambio = datos['p50_ms'] / anterior['p50_ms'] - 1
+            cambio_p95 = datos['p95_ms'] / anterior['p95_ms'] - 1
+            marca = '  ← peor' if cambio > umbral else ''
+            peores += cambio > umbral
+            print(f"{resultado['filas']:>7} {ruta:<32} {anterior['p50_ms']:>10.2f} "
+                  f"{datos['p50_ms']:>9.2f} {cambio:>+8.0%} {cambio_p95:>+11.0%}{marca}")
+    return peores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[10, 1000, 10000],
+                        help='filas por tabla de cada medicion (de 10 a 100000)')
+    parser.add_argument('--repeticiones', type=int, default=30,
+                        help='peticiones (o ciclos de escritura) por ruta')
+    parser.add_argument('--concurrencia', type=int, default=1,
+                        help='hilos para medir el rendimiento concurrente de las rutas GET')
+    parser.add_argument('--muestras-memoria', type=int, default=3,
+                        help='peticiones medidas con tracemalloc por ruta')
+    parser.add_argument('--latencia', type=float, default=0.0, help='latencia de la API simulada (ms)')
+    parser.add_argument('--rutas', nargs='+', metavar='TABLA',
+                        help="solo estas tablas ('home', 'factura', 'producto', ...)")
+    parser.add_argument('--wsgi', action='store_true',
+                        help='medir por HTTP contra un servidor WSGI multihilo (no el test client)')
+    parser.add_argument('--salida', help='archivo JSON de resultados')
+    parser.add_argument('--json', action='store_true', help='imprimir los resultados en JSON')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DESPUES'),
+                        help='comparar dos archivos de resultados')
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help='empeoramiento del p50 que se marca al comparar (0.10 = 10%%)')
+    # Uso interno: medir un tamano en el proceso hijo
+    parser.add_argument('--medir', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--api', help=argparse.SUPPRESS)
+    opciones = parser.parse_args()
+
+    if opciones.comparar:
+        with open(opciones.comparar[0], encoding='utf-8') as a, \
+                open(opciones.comparar[1], encoding='utf-8') as b:
+            peores = comparar(json.load(a), json.load(b), opciones.umbral)
+        sys.exit(1 if peores else 0)
+
+    if opciones.medir is not None:
+        print(json.dumps(medir_tamano(opciones)))
+        return
+
+    corrida = correr(opciones)
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(corrida, archivo, indent=2)
+    if opciones.json:
+        print(json.dumps(corrida, indent=2))
+    else:
+        imprimir(corrida)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,20 @@ la URL de la API y la clave secreta para sesiones/flash.
 # ──────────────────────────────────────────────
 API_BASE_URL = "http://localhost:5035"
 
+# ──────────────────────────────────────────────
+# Como viaja el valor de una clave en la URL (GET/PUT/DELETE /api/{tabla}/{clave}/{valor}).
+# Los caracteres especiales (espacios, '?', '#', '%', tildes) se codifican
+# siempre: ASP.NET Core los decodifica antes de entregar el valor a la API.
+# La barra es distinta: ASP.NET Core NO decodifica %2F en los valores de la
+# ruta, asi una clave '/home' (tabla ruta) le llegaria a la API como '%2Fhome'.
+#
+# API_CLAVE_BARRA_CODIFICADA: False (por defecto) envia '/' tal cual, como
+#     siempre lo hizo el frontend; la API necesita una ruta catch-all
+#     ({*valor}) para recibir claves con barra. True la envia como %2F, solo
+#     si la API decodifica el valor (Uri.UnescapeDataString).
+# ──────────────────────────────────────────────
+API_CLAVE_BARRA_CODIFICADA = False
+
 # ──────────────────────────────────────────────
 # Clave secreta para el manejo de sesiones y mensajes flash.
 # Flask la necesita para firmar las cookies de sesion de forma segura.
@@ -20,3 +34,405 @@ API_BASE_URL = "http://localhost:5035"
 # En produccion deberia ser un valor aleatorio largo guardado en variable de entorno.
 # ──────────────────────────────────────────────
 SECRET_KEY = "clave-secreta-flask-frontend-2024"
+
+# ──────────────────────────────────────────────
+# Pool de conexiones HTTP hacia la API (ver services/http_pool.py).
+# Todas las instancias de ApiService comparten el mismo pool, asi las
+# conexiones TCP se reutilizan (keep-alive) en lugar de abrir una por peticion.
+#
+# HTTP_POOL_HOSTS:          cantidad de hosts distintos que se mantienen en el pool
+# HTTP_POOL_TAMANO:         conexiones abiertas que se conservan por host
+# HTTP_POOL_TAMANO_POR_HOST: tamano especifico para algun host (sobrescribe el anterior)
+#                           Ejemplo: {"http://localhost:5035": 20}
+# HTTP_POOL_BLOQUEAR:       True = si el pool esta lleno, esperar una conexion libre
+#                           False = abrir una conexion extra y descartarla al terminar
+# ──────────────────────────────────────────────
+HTTP_POOL_HOSTS = 4
+HTTP_POOL_TAMANO = 10
+HTTP_POOL_TAMANO_POR_HOST = {}
+HTTP_POOL_BLOQUEAR = False
+
+# ──────────────────────────────────────────────
+# Cliente HTTP asincrono de AsyncApiService (ver services/api_async.py).
+# Requiere httpx (pip install httpx) y las vistas async def requieren
+# flask[async]; sin ellos AsyncApiService usa ApiService en hilos.
+#
+# HTTP_ASYNC_CONEXIONES: conexiones simultaneas maximas hacia la API
+# HTTP_ASYNC_LIBRES:     conexiones abiertas que se conservan sin uso (keep-alive)
+# ──────────────────────────────────────────────
+HTTP_ASYNC_CONEXIONES = 100
+HTTP_ASYNC_LIBRES = 20
+
+# ──────────────────────────────────────────────
+# Cantidad maxima de hilos para llamadas concurrentes a la API
+# (ver services/concurrencia.py y ApiService.listar_many).
+# Las vistas que necesitan varias tablas las piden al mismo tiempo,
+# asi la pagina tarda lo que tarde la llamada mas lenta, no la suma de todas.
+# ──────────────────────────────────────────────
+MAX_HILOS_API = 8
+
+# ──────────────────────────────────────────────
+# Cache de listados (ver services/cache.py).
+#
+# CACHE_TTL_TABLAS:  segundos que se guarda el listado de cada tabla.
+#                    Las tablas de referencia, que cambian poco y se descargan
+#                    completas para llenar selects y mapas de nombres, y las
+#                    paginas CRUD con busqueda ?q= (BUSQUEDA_LISTADOS), que
+#                    buscan en el listado del cache. factura y sus lineas no
+#                    se guardan: se leen por pagina o con sus SP.
+# CACHE_TTL_DEFECTO: TTL de las tablas que no estan en el diccionario (0 = sin cache)
+# CACHE_MAX_BYTES:   memoria maxima del cache (bytes de las respuestas JSON).
+#                    Al superarla se descartan los listados usados hace mas tiempo.
+#
+# Cualquier crear/actualizar/eliminar exitoso sobre una tabla borra su cache.
+# ──────────────────────────────────────────────
+CACHE_TTL_TABLAS = {
+    'persona': 60,
+    'empresa': 300,
+    'producto': 30,
+    'rol': 300,
+    'ruta': 300,
+    'usuario': 60,
+    'cliente': 60,
+    'vendedor': 60,
+}
+CACHE_TTL_DEFECTO = 0
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# ──────────────────────────────────────────────
+# Tablas que modifica cada stored procedure de escritura.
+# Cuando el SP termina con exito se invalida el cache de esas tablas.
+# Ejemplo: los SP de factura descuentan o devuelven stock de producto (trigger).
+# ──────────────────────────────────────────────
+SP_TABLAS_AFECTADAS = {
+    'sp_insertar_factura_y_productosporfactura': ('factura', 'productosporfactura', 'producto'),
+    'sp_actualizar_factura_y_productosporfactura': ('factura', 'productosporfactura', 'producto'),
+    'sp_borrar_factura_y_productosporfactura': ('factura', 'productosporfactura', 'producto'),
+}
+
+# ──────────────────────────────────────────────
+# Paginacion de los listados (ver services/paginacion.py).
+# PAGINA_TAMANO:         registros por pagina si la URL no indica ?tamano=N
+# PAGINA_TAMANO_MAXIMO:  tope de ?tamano=N para que el HTML no crezca sin limite
+# PAGINA_FILAS_MAXIMAS:  en las tablas sin cache, filas que se pueden recorrer
+#                        para llegar a una pagina: ?pagina=N mas profunda se
+#                        lleva a la ultima permitida (la API no tiene offset,
+#                        cada pagina lee todas las anteriores).
+#
+# Solo las tablas con cache (CACHE_TTL_TABLAS) se ordenan con ?orden=: las
+# demas tendrian que descargarse completas para ordenarlas.
+# ──────────────────────────────────────────────
+PAGINA_TAMANO = 25
+PAGINA_TAMANO_MAXIMO = 200
+PAGINA_FILAS_MAXIMAS = 10000
+
+# ──────────────────────────────────────────────
+# Renderizado por partes (streaming) de las paginas de listado
+# (ver routes/renderizado.py).
+#
+# STREAMING_BLUEPRINTS:   nombres de los Blueprints que envian el HTML por partes.
+#                         El encabezado y el menu llegan al navegador de inmediato
+#                         y las filas de la tabla se envian en bloques, sin armar
+#                         toda la pagina en memoria. Ejemplo: {'producto', 'persona'}
+# STREAMING_TAMANO_BLOQUE: bytes minimos de cada bloque enviado al navegador
+# ──────────────────────────────────────────────
+STREAMING_BLUEPRINTS = set()
+STREAMING_TAMANO_BLOQUE = 16 * 1024
+
+# ──────────────────────────────────────────────
+# Stale-while-revalidate y ultimo dato bueno (ver services/cache.py).
+#
+# CACHE_SWR_SEGUNDOS:      despues del TTL, segundos durante los que el listado
+#                          viejo se sigue sirviendo mientras se refresca en segundo plano
+# CACHE_RESPALDO_SEGUNDOS: edad maxima del ultimo listado exitoso que se muestra
+#                          cuando la API no responde (con aviso en la pagina)
+# CACHE_RESPALDO_TODAS:    True = guardar respaldo tambien de tablas sin TTL
+# ──────────────────────────────────────────────
+CACHE_SWR_SEGUNDOS = 120
+CACHE_RESPALDO_SEGUNDOS = 6 * 60 * 60
+CACHE_RESPALDO_TODAS = True
+
+# ──────────────────────────────────────────────
+# Monitor de salud de la API (ver services/monitor_salud.py).
+# Un hilo de fondo consulta /api/diagnostico/conexion; la pagina de inicio
+# lee el ultimo resultado sin esperar a la API.
+#
+# SALUD_INTERVALO:       segundos entre sondas cuando la API responde
+# SALUD_INTERVALO_CAIDA: segundos entre sondas mientras la API esta caida
+# SALUD_TIMEOUT:         segundos maximos de espera de cada sonda
+# SALUD_HISTORIAL:       cuantas latencias recientes se guardan
+# SALUD_FALLOS_CAIDA:    sondas fallidas seguidas para considerar la API caida.
+#                        Mientras esta caida, ApiService no espera el timeout:
+#                        falla de inmediato y sirve el respaldo del cache.
+# ──────────────────────────────────────────────
+SALUD_INTERVALO = 15
+SALUD_INTERVALO_CAIDA = 3
+SALUD_TIMEOUT = 3
+SALUD_HISTORIAL = 60
+SALUD_FALLOS_CAIDA = 2
+
+# ──────────────────────────────────────────────
+# Timeouts, reintentos y circuit breaker (ver services/resiliencia.py).
+#
+# API_TIMEOUTS:          (conexion, lectura) en segundos por tipo de operacion.
+#                        Sin timeout, una API colgada bloquea el hilo para siempre.
+# API_REINTENTOS:        reintentos de las lecturas (GET y SP de solo lectura)
+#                        ante errores de red o respuestas 5xx. Las escrituras
+#                        nunca se reintentan (podrian duplicarse).
+# API_REINTENTO_BASE:    espera base entre reintentos; crece al doble en cada
+#                        intento y se elige al azar entre 0 y ese valor (jitter)
+# API_REINTENTO_MAXIMO:  tope de la espera entre reintentos
+# CIRCUITO_FALLOS:       fallos seguidos de un endpoint que abren su circuito
+# CIRCUITO_ESPERA:       segundos que el circuito queda abierto antes de probar
+# SP_LECTURA_PREFIJOS:   prefijos de los stored procedures que solo leen datos
+# ──────────────────────────────────────────────
+API_TIMEOUTS = {
+    'listar': (3.05, 15),
+    'obtener': (3.05, 5),
+    'escribir': (3.05, 15),
+    'sp': (3.05, 20),
+}
+API_REINTENTOS = 2
+API_REINTENTO_BASE = 0.2
+API_REINTENTO_MAXIMO = 2.0
+CIRCUITO_FALLOS = 5
+CIRCUITO_ESPERA = 30
+SP_LECTURA_PREFIJOS = ('sp_listar_', 'sp_consultar_')
+
+# ──────────────────────────────────────────────
+# Cache de stored procedures de solo lectura (ver CacheProcedimientos en
+# services/cache.py). Un SP es de lectura si su nombre empieza con uno de
+# SP_LECTURA_PREFIJOS; los demas son de escritura.
+#
+# CACHE_TTL_SP:          segundos que se guarda el resultado de cada SP de lectura,
+#                        por (SP, parametros). Los SP que no estan no se guardan.
+# CACHE_SP_MAX_ENTRADAS: resultados guardados como maximo (descarta el menos usado)
+# SP_INVALIDA:           SP de lectura que invalida cada SP de escritura al terminar
+#                        con exito. Solo se descartan las entradas cuyos parametros
+#                        coinciden (ej: p_numero), asi actualizar la factura 5 no
+#                        descarta la consulta guardada de la factura 6. Los filtros
+#                        de sp_listar_facturas_pagina (p_cliente, p_vendedor) no
+#                        se llaman como los de escritura: se descartan todas sus paginas.
+# SP_TABLAS_LEIDAS:      tablas que lee cada SP de lectura. Un crear/actualizar/
+#                        eliminar sobre esas tablas descarta su resultado guardado.
+# ──────────────────────────────────────────────
+CACHE_TTL_SP = {
+    'sp_listar_facturas_y_productosporfactura': 30,
+    'sp_listar_facturas_pagina': 30,
+    'sp_consultar_factura_y_productosporfactura': 60,
+}
+CACHE_SP_MAX_ENTRADAS = 512
+SP_INVALIDA = {
+    'sp_insertar_factura_y_productosporfactura': (
+        'sp_listar_facturas_y_productosporfactura',
+        'sp_listar_facturas_pagina',
+    ),
+    'sp_actualizar_factura_y_productosporfactura': (
+        'sp_listar_facturas_y_productosporfactura',
+        'sp_listar_facturas_pagina',
+        'sp_consultar_factura_y_productosporfactura',
+    ),
+    'sp_borrar_factura_y_productosporfactura': (
+        'sp_listar_facturas_y_productosporfactura',
+        'sp_listar_facturas_pagina',
+        'sp_consultar_factura_y_productosporfactura',
+    ),
+}
+SP_TABLAS_LEIDAS = {
+    'sp_listar_facturas_y_productosporfactura': (
+        'factura', 'productosporfactura', 'producto', 'cliente', 'vendedor', 'persona',
+    ),
+    'sp_listar_facturas_pagina': ('factura', 'productosporfactura'),
+    'sp_consultar_factura_y_productosporfactura': (
+        'factura', 'productosporfactura', 'producto', 'cliente', 'vendedor', 'persona',
+    ),
+}
+
+# ──────────────────────────────────────────────
+# Decodificacion JSON de las respuestas de la API (ver services/json_rapido.py).
+#
+# JSON_DECODIFICADOR: 'auto'   → orjson si esta instalado, si no json estandar
+#                     'orjson' → forzar orjson (cae a json si no esta instalado)
+#                     'json'   → siempre la libreria estandar
+# JSON_HISTORIAL:     cuantas mediciones recientes (bytes, ms) se guardan
+# ──────────────────────────────────────────────
+JSON_DECODIFICADOR = 'auto'
+JSON_HISTORIAL = 50
+
+# ──────────────────────────────────────────────
+# Lectura por partes de respuestas grandes (ver services/json_flujo.py).
+#
+# FLUJO_TAMANO_TROZO:  bytes que se leen del socket en cada paso
+# FLUJO_DESDE_FILAS:   las paginas que necesitan pedir mas filas que esto
+#                      a la API (paginas profundas sin cache) se leen por
+#                      partes: solo las filas de la pagina quedan en memoria
+# EXPORTAR_TABLAS:     tablas que se pueden descargar en CSV (/exportar/<tabla>.csv).
+#                      'usuario' no esta porque incluye la contrasena encriptada.
+# ──────────────────────────────────────────────
+FLUJO_TAMANO_TROZO = 64 * 1024
+FLUJO_DESDE_FILAS = 1000
+EXPORTAR_TABLAS = (
+    'empresa', 'persona', 'producto', 'rol', 'ruta',
+    'cliente', 'vendedor', 'factura', 'productosporfactura',
+)
+
+# ──────────────────────────────────────────────
+# Indices clave → nombre para mostrar (ver services/indices.py).
+# Las vistas muestran el nombre de la persona, empresa, cliente... a partir
+# de la clave foranea sin descargar ni recorrer la tabla en cada peticion.
+#
+# INDICES_NOMBRES: tabla → (campo clave, campo con el nombre, tabla 'via').
+#                  Con 'via', el campo es una clave foranea y el nombre se
+#                  toma del indice de esa tabla (cliente → persona).
+# INDICES_TTL:     segundos despues de los que el indice se reconstruye en
+#                  segundo plano (cambios hechos por otros clientes de la API).
+#                  Las escrituras hechas desde este frontend lo actualizan al instante.
+# INDICES_REINTENTO: segundos que se espera despues de una carga fallida (API
+#                  caida) antes de volver a intentarla, en segundo plano. Mientras
+#                  tanto los nombres se muestran como 'Sin nombre' sin esperar.
+# ──────────────────────────────────────────────
+INDICES_NOMBRES = {
+    'persona': ('codigo', 'nombre', None),
+    'empresa': ('codigo', 'nombre', None),
+    'producto': ('codigo', 'nombre', None),
+    'cliente': ('id', 'fkcodpersona', 'persona'),
+    'vendedor': ('id', 'fkcodpersona', 'persona'),
+}
+INDICES_TTL = 600
+INDICES_REINTENTO = 15
+
+# ──────────────────────────────────────────────
+# Busqueda mientras se escribe (typeahead) en los formularios
+# (ver services/sugerencias.py y routes/buscar.py).
+# Los formularios ya no incluyen todas las filas de la tabla como <option>:
+# piden a GET /buscar/<tabla>?q=... solo las que coinciden con lo escrito.
+#
+# BUSQUEDA_TABLAS: tabla → (campo clave, campos donde se busca, texto a mostrar).
+#                  El texto usa los nombres de las columnas: '{codigo} - {nombre}'.
+#                  Solo tablas con cache (CACHE_TTL_TABLAS) o con indice de
+#                  nombres (INDICES_NOMBRES): se busca en memoria. Las tablas
+#                  con 'via' en INDICES_NOMBRES se buscan en su indice de
+#                  nombres, con las columnas de la clave y 'nombre' (ej:
+#                  cliente → persona).
+# BUSQUEDA_LIMITE: sugerencias maximas por consulta
+# ──────────────────────────────────────────────
+BUSQUEDA_TABLAS = {
+    'producto': ('codigo', ('codigo', 'nombre'), '{codigo} - {nombre} (Stock: {stock})'),
+    'persona': ('codigo', ('codigo', 'nombre', 'email'), '{nombre} ({codigo})'),
+    'empresa': ('codigo', ('codigo', 'nombre'), '{nombre} ({codigo})'),
+    'cliente': ('id', ('id', 'nombre'), '{nombre} (ID: {id})'),
+    'vendedor': ('id', ('id', 'nombre'), '{nombre} (ID: {id})'),
+}
+BUSQUEDA_LIMITE = 15
+
+# ──────────────────────────────────────────────
+# Busqueda en las paginas de listado: /producto?q=lap (ver services/busqueda.py).
+# Cada tabla tiene un indice invertido en memoria (palabra → filas) que se
+# arma con el listado del cache y que las escrituras de este frontend
+# actualizan al instante. Cuando el cache entrega un listado nuevo (vencio su
+# TTL) se rearma una vez en segundo plano. Las filas que se muestran salen de
+# ese mismo listado, nunca de una copia guardada aparte.
+#
+# BUSQUEDA_LISTADOS: tabla → (campo clave, columnas excluidas, claves foraneas).
+#                    Las columnas excluidas no se indexan.
+#                    Las claves foraneas {campo: tabla} agregan el nombre del
+#                    registro al que apuntan (ver INDICES_NOMBRES): el cliente
+#                    se encuentra por el nombre de su persona.
+#                    Solo tablas con cache (CACHE_TTL_TABLAS): las demas se
+#                    ignoran, porque cada busqueda descargaria la tabla completa.
+# ──────────────────────────────────────────────
+BUSQUEDA_LISTADOS = {
+    'empresa': ('codigo', (), {}),
+    'persona': ('codigo', (), {}),
+    'producto': ('codigo', (), {}),
+    'rol': ('id', (), {}),
+    'ruta': ('ruta', (), {}),
+    'usuario': ('email', ('contrasena',), {}),
+    'cliente': ('id', (), {'fkcodpersona': 'persona', 'fkcodempresa': 'empresa'}),
+    'vendedor': ('id', (), {'fkcodpersona': 'persona'}),
+}
+
+# ──────────────────────────────────────────────
+# Arranque y apagado en produccion (ver services/arranque.py y gunicorn.conf.py).
+# Antes de que un worker reciba trafico se calientan los caches y el pool;
+# al apagarlo se espera a que terminen las peticiones a la API en curso.
+#
+# CALENTAR_TABLAS:     listados que se descargan al arrancar (quedan en el
+#                      cache) y cuyos indices de nombres y de busqueda se arman.
+# CALENTAR_CONEXIONES: conexiones keep-alive que cada worker abre a la API
+#                      antes de recibir trafico (no mas que HTTP_POOL_TAMANO).
+# DRENAR_ESPERA:       segundos maximos esperando las peticiones en curso al
+#                      apagar. Debe ser menor que graceful_timeout de gunicorn.
+# ──────────────────────────────────────────────
+CALENTAR_TABLAS = ('persona', 'empresa', 'producto', 'cliente', 'vendedor')
+CALENTAR_CONEXIONES = 4
+DRENAR_ESPERA = 10
+
+# ──────────────────────────────────────────────
+# Traza de cada peticion (ver services/traza.py).
+# Registra las llamadas a la API de una peticion (tabla o SP, codigo,
+# bytes, tiempos de conexion / primer byte / total), los aciertos del
+# cache y el tiempo de los templates. La envia en el encabezado
+# Server-Timing y en una linea JSON del logger 'traza'.
+#
+# TRAZA_MUESTREO:      fraccion de las peticiones que se trazan (0 = ninguna,
+#                      1 = todas). Las demas solo leen una ContextVar por llamada.
+#                      Las muestreadas solo van al log (nunca Server-Timing).
+# TRAZA_FORZAR:        encabezado que traza una peticion aunque no salga en el
+#                      muestreo. None = desactivado (por defecto).
+# TRAZA_CLAVE:         valor que debe traer TRAZA_FORZAR; sin clave no se puede
+#                      forzar. Server-Timing muestra tablas, SP y errores
+#                      internos: solo lo recibe quien conoce la clave.
+#                      Ej: TRAZA_FORZAR = 'X-Traza', TRAZA_CLAVE = 'larga-y-aleatoria'
+#                      y curl -H 'X-Traza: larga-y-aleatoria' ...
+# TRAZA_SERVER_TIMING: agregar Server-Timing a las respuestas forzadas
+# TRAZA_LOG:           escribir la linea JSON de las peticiones trazadas
+# TRAZA_LOG_DESDE_MS:  muestreadas: solo las que tardaron al menos estos
+#                      milisegundos (las forzadas se escriben siempre)
+# TRAZA_DETALLE:       llamadas a la API detalladas en Server-Timing (las mas lentas)
+# ──────────────────────────────────────────────
+TRAZA_MUESTREO = 0.01
+TRAZA_FORZAR = None
+TRAZA_CLAVE = None
+TRAZA_SERVER_TIMING = True
+TRAZA_LOG = True
+TRAZA_LOG_DESDE_MS = 500
+TRAZA_DETALLE = 10
+
+# ──────────────────────────────────────────────
+# Metricas en formato Prometheus en GET /metrics (ver services/metricas.py).
+# Peticiones y duracion por endpoint de Flask, llamadas y errores de la
+# API por tabla o SP, aciertos del cache, uso del pool y peticiones en curso.
+#
+# METRICAS_TRAMOS:     limites (segundos) de los histogramas de duracion
+# METRICAS_DIRECTORIO: carpeta donde cada worker de gunicorn escribe sus
+#                      metricas para que /metrics responda la suma de todos
+#                      (ej: '/tmp/front_metricas'). None = solo el proceso que
+#                      atiende la peticion. gunicorn la vacia al arrancar.
+# METRICAS_INTERVALO:  segundos entre escrituras de cada worker en la carpeta
+# ──────────────────────────────────────────────
+METRICAS_TRAMOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICAS_DIRECTORIO = None
+METRICAS_INTERVALO = 5
+
+# ──────────────────────────────────────────────
+# Acceso a las rutas internas: /estado, /estado/circuitos y /metrics
+# (ver routes/acceso.py). Muestran tablas, SP, endpoints de la API y
+# errores internos: igual que Server-Timing (TRAZA_CLAVE), no las ve
+# cualquiera. Una peticion entra si:
+#     1. trae la clave: 'Authorization: Bearer <clave>' o 'X-Interno-Clave: <clave>'
+#     2. llega directo (sin encabezados de proxy) desde INTERNO_REDES
+#     3. INTERNO_LIBRE es True
+# Si no, la respuesta es 404 (no se revela que la ruta existe).
+#
+# INTERNO_CLAVE: clave larga y aleatoria. None = no se entra con clave.
+# INTERNO_REDES: direcciones o redes (CIDR) que entran sin clave. Por defecto
+#                solo la misma maquina. Detras de un proxy (nginx) todas las
+#                peticiones llegan desde el proxy: esas traen X-Forwarded-For
+#                y necesitan la clave. Si el proxy no agrega ese encabezado,
+#                use INTERNO_REDES = () (solo con clave).
+# INTERNO_LIBRE: True = sin restriccion (solo en desarrollo)
+# ──────────────────────────────────────────────
+INTERNO_CLAVE = None
+INTERNO_REDES = ('127.0.0.0/8', '::1')
+INTERNO_LIBRE = False
@@ -0,0 +1,141 @@
+"""
+gunicorn.conf.py - Configuracion de gunicorn para produccion.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+El frontend casi no usa CPU: cada peticion pasa la mayor parte del tiempo
+esperando a la API. Por eso conviene pocos procesos con mucha concurrencia
+dentro de cada uno (cada proceso tiene sus propios caches e indices, asi que
+mas procesos = mas memoria y mas descargas de los mismos listados).
+
+Modos (variable de entorno FRONT_MODO):
+
+    hilos  (por defecto) worker 'gthread': FRONT_HILOS hilos por proceso.
+           Funciona con todo: vistas async, en_paralelo(), hilos de fondo.
+           FRONT_HILOS por defecto = HTTP_POOL_TAMANO, asi cada hilo
+           conserva su conexion keep-alive con la API.
+
+    verde  worker 'gevent': FRONT_CONEXIONES peticiones simultaneas por
+           proceso en green threads. Para muchas peticiones lentas a la
+           vez (la API tarda). Requiere "pip install gevent"; conviene
+           subir HTTP_POOL_TAMANO hasta cerca de FRONT_CONEXIONES para que
+           las conexiones a la API se reutilicen.
+
+Otras variables: FRONT_BIND (0.0.0.0:5100), FRONT_WORKERS (nucleos, max 4),
+FRONT_TIMEOUT (30 s).
+
+Ciclo de vida de un worker:
+    when_ready        (maestro, modo hilos) calienta caches e indices antes
+                      del fork; los workers los heredan ya armados.
+    post_worker_init  (worker) calienta lo que falte y abre las conexiones
+                      con la API, luego empieza a aceptar trafico.
+    worker_exit       (worker) al apagar, gunicorn ya espero las peticiones
+                      del navegador (graceful_timeout); drenar() espera las
+                      peticiones a la API en curso y cierra conexiones.
+                      Con METRICAS_DIRECTORIO guarda sus ultimas metricas.
+
+Al arrancar (on_starting, maestro) se vacia METRICAS_DIRECTORIO: las
+metricas de los workers de una ejecucion anterior no se suman.
+"""
+
+# os: leer las variables de entorno FRONT_*
+import os
+
+# multiprocessing.cpu_count(): cantidad de workers por defecto
+import multiprocessing
+
+from config import HTTP_POOL_TAMANO, DRENAR_ESPERA, METRICAS_DIRECTORIO
+
+
+# ══════════════════════════════════════════════
+# MODELO DE WORKERS
+# ══════════════════════════════════════════════
+
+modo = os.environ.get('FRONT_MODO', 'hilos')
+
+bind = os.environ.get('FRONT_BIND', '0.0.0.0:5100')
+workers = int(os.environ.get('FRONT_WORKERS', min(multiprocessing.cpu_count(), 4)))
+
+if modo == 'verde':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('FRONT_CONEXIONES', 200))
+    # gevent debe parchear la libreria estandar ANTES de importar requests y
+    # threading; con preload el maestro los importaria sin parchear.
+    preload_app = False
+elif modo == 'hilos':
+    worker_class = 'gthread'
+    threads = int(os.environ.get('FRONT_HILOS', HTTP_POOL_TAMANO))
+    # La aplicacion se importa (y se calienta) una vez en el maestro
+    preload_app = True
+else:
+    raise ValueError(f"FRONT_MODO debe ser 'hilos' o 'verde', no {modo!r}")
+
+# Segundos sin responder antes de reiniciar un worker colgado
+timeout = int(os.environ.get('FRONT_TIMEOUT', 30))
+
+# Al apagar: tiempo para terminar las peticiones en curso y drenar las de la API
+graceful_timeout = DRENAR_ESPERA + 20
+
+# Conexiones keep-alive con el proxy o navegador
+keepalive = 5
+
+# Reiniciar cada worker despues de N peticiones (limita la memoria que crece
+# con el tiempo); el jitter evita que se reinicien todos a la vez
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+
+
+# ══════════════════════════════════════════════
+# HOOKS DEL CICLO DE VIDA
+# Los servicios se importan dentro de cada hook: este archivo lo lee
+# gunicorn antes de cargar la aplicacion (y antes del parche de gevent).
+# ══════════════════════════════════════════════
+
+def on_starting(server):
+    """Maestro, al arrancar: descarta las metricas de los workers anteriores."""
+    if not METRICAS_DIRECTORIO or not os.path.isdir(METRICAS_DIRECTORIO):
+        return
+    for archivo in os.listdir(METRICAS_DIRECTORIO):
+        if archivo.endswith(('.json', '.json.tmp')):
+            os.remove(os.path.join(METRICAS_DIRECTORIO, archivo))
+
+
+def when_ready(server):
+    """Maestro, despues de cargar la aplicacion y antes del fork (solo con preload)."""
+    if not preload_app:
+        return
+    from services.arranque import calentar
+    from services.http_pool import pool
+
+    # Sin hilos ni conexiones: el fork copiaria sockets compartidos
+    resumen = calentar(conexiones=0, paralelo=False)
+    pool.cerrar()
+    server.log.info("Caches calentados en el maestro: %s", resumen)
+
+
+def post_worker_init(worker):
+    """Worker, antes de aceptar trafico."""
+    from services.arranque import calentar
+    from services.monitor_salud import monitor
+
+    resumen = calentar()
+    monitor.iniciar()
+    worker.log.info("Worker %s listo: %s", worker.pid, resumen)
+
+
+def worker_exit(server, worker):
+    """Worker, al apagarse (despues de terminar las peticiones del navegador)."""
+    from services.arranque import drenar
+    from services.metricas import metricas
+
+    try:
+        metricas.guardar()
+    except OSError as ex:
+        worker.log.warning("Worker %s no pudo guardar sus metricas: %s", worker.pid, ex)
+    if drenar():
+        worker.log.info("Worker %s apagado sin peticiones pendientes", worker.pid)
+    else:
+        worker.log.warning("Worker %s apagado con peticiones a la API sin terminar", worker.pid)
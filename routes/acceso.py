@@ -0,0 +1,74 @@
+"""
+acceso.py - Acceso a las rutas internas del frontend (/estado y /metrics).
+
+Las rutas internas muestran el estado de la API, sus endpoints, tablas y
+errores. No son para los usuarios de las paginas CRUD: solo responden si
+la peticion trae la clave INTERNO_CLAVE, si llega directo desde una
+direccion de INTERNO_REDES (por defecto, la misma maquina) o si
+INTERNO_LIBRE es True. Si no, responden 404.
+
+Uso en un Blueprint:
+    bp.before_request(solo_interno)
+"""
+
+# hmac.compare_digest: comparar la clave sin revelar por el tiempo cuantos caracteres coinciden
+import hmac
+
+# ipaddress: verificar si la direccion del cliente esta en INTERNO_REDES
+import ipaddress
+
+# abort: responder 404 a las peticiones sin acceso
+# request: encabezados y direccion de la peticion actual
+from flask import abort, request
+
+from config import INTERNO_CLAVE, INTERNO_REDES, INTERNO_LIBRE
+
+
+# Encabezado alternativo a 'Authorization: Bearer <clave>'
+ENCABEZADO_CLAVE = 'X-Interno-Clave'
+
+# Encabezados que agrega un proxy: la direccion de la peticion es la del
+# proxy, no la del cliente, asi que no basta para entrar sin clave
+_ENCABEZADOS_PROXY = ('X-Forwarded-For', 'Forwarded', 'X-Real-IP')
+
+
+def _clave_recibida():
+    """Clave de la peticion (Authorization: Bearer o ENCABEZADO_CLAVE), o None."""
+    autorizacion = request.headers.get('Authorization', '')
+    tipo, _, valor = autorizacion.partition(' ')
+    if tipo.lower() == 'bearer' and valor.strip():
+        return valor.strip()
+    return request.headers.get(ENCABEZADO_CLAVE)
+
+
+def con_clave():
+    """True si la peticion trae la clave INTERNO_CLAVE."""
+    if not INTERNO_CLAVE:
+        return False
+    valor = _clave_recibida()
+    return valor is not None and hmac.compare_digest(valor.encode(), INTERNO_CLAVE.encode())
+
+
+def desde_red_interna():
+    """True si la peticion llega directo (sin proxy) desde una direccion de INTERNO_REDES."""
+    if not INTERNO_REDES or any(encabezado in request.headers for encabezado in _ENCABEZADOS_PROXY):
+        return False
+    try:
+        direccion = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    # IPv4 dentro de una direccion IPv6 (::ffff:127.0.0.1)
+    if direccion.version == 6 and direccion.ipv4_mapped:
+        direccion = direccion.ipv4_mapped
+    return any(direccion in ipaddress.ip_network(red, strict=False) for red in INTERNO_REDES)
+
+
+def permitido():
+    """True si la peticion actual puede ver las rutas internas."""
+    return INTERNO_LIBRE or con_clave() or desde_red_interna()
+
+
+def solo_interno():
+    """before_request de los Blueprints internos: 404 si la peticion no tiene acceso."""
+    if not permitido():
+        abort(404)
@@ -0,0 +1,45 @@
+"""
+buscar.py - Blueprint con la busqueda de opciones para los campos typeahead.
+
+Los formularios (factura, cliente, vendedor) ya no envian todas las filas de
+producto, persona y empresa como <option>, ni el filtro del listado de
+facturas las de cliente y vendedor: static/js/busqueda.js pide a esta ruta
+solo las opciones que coinciden con lo que el usuario escribe.
+
+Rutas:
+    GET /buscar/<tabla>?q=texto&limite=N  →  JSON {"resultados": [{"valor", "texto"}, ...]}
+                                             (solo tablas de BUSQUEDA_TABLAS)
+"""
+
+# Blueprint: agrupa rutas en un modulo independiente
+# request: lee q y limite del query string
+# jsonify: convierte la respuesta en JSON
+# abort: 404 si la tabla no tiene busqueda
+from flask import Blueprint, request, jsonify, abort
+
+# ApiService: busca en el listado guardado en el cache (o en el indice de nombres)
+from services.api_service import ApiService
+
+
+# ══════════════════════════════════════════════
+# CONFIGURACION DEL BLUEPRINT
+# ══════════════════════════════════════════════
+
+bp = Blueprint('buscar', __name__)
+
+api = ApiService()
+
+
+# ══════════════════════════════════════════════
+# RUTAS
+# ══════════════════════════════════════════════
+
+@bp.route('/buscar/<tabla>')
+def buscar(tabla):
+    """Opciones de la tabla que coinciden con ?q= (vacio si q no tiene texto)."""
+    if tabla not in api.sugerencias.tablas():
+        abort(404)
+    consulta = request.args.get('q', '').strip()
+    limite = request.args.get('limite', type=int)
+    resultados = api.buscar(tabla, consulta, limite) if consulta else []
+    return jsonify({'resultados': resultados})
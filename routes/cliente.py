@@ -14,8 +14,11 @@ Rutas:
     POST /cliente/eliminar     →  Eliminar un registro
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, request, redirect, url_for, flash
 from services.api_service import ApiService
+from services.api_async import AsyncApiService, vista_async
+from routes.renderizado import renderizar
+from services.paginacion import parametros_pagina
 
 
 # ══════════════════════════════════════════════
@@ -24,6 +27,8 @@ from services.api_service import ApiService
 
 bp = Blueprint('cliente', __name__)
 api = ApiService()
+# Variante asincrona para el listado (varias consultas a la vez sin ocupar hilos)
+api_async = AsyncApiService()
 TABLA = 'cliente'
 CLAVE = 'id'
 
@@ -33,38 +38,40 @@ CLAVE = 'id'
 # ══════════════════════════════════════════════
 
 @bp.route('/cliente')
-def index():
+@vista_async
+async def index():
     """Muestra la tabla de clientes con selects de persona y empresa."""
     limite = request.args.get('limite', type=int)
     accion = request.args.get('accion', '')
     valor_clave = request.args.get('clave', '')
 
-    registros = api.listar(TABLA, limite)
-    personas = api.listar('persona')
-    empresas = api.listar('empresa')
-
     mostrar_formulario = accion in ('nuevo', 'editar')
     editando = accion == 'editar'
 
-    registro = None
-    if editando and valor_clave:
-        registro = next(
-            (r for r in registros if str(r.get(CLAVE)) == valor_clave),
-            None
-        )
+    # Solo la pagina de clientes: persona y empresa se buscan mientras se
+    # escribe en el formulario (GET /buscar/<tabla>), no se envian completas.
+    # La pagina, el registro a editar (o tomarlo del cache) y los indices de
+    # nombres se piden al mismo tiempo.
+    parametros = parametros_pagina(request.args)
+    pagina, registro, _ = await api_async.en_paralelo(
+        api_async.listar_pagina(TABLA, CLAVE, limite=limite, **parametros),
+        api_async.obtener(TABLA, CLAVE, valor_clave) if editando and valor_clave else None,
+        api_async.preparar_nombres('persona', 'empresa')
+    )
+    registros = pagina.registros
 
-    # Mapa persona codigo -> nombre para mostrar en la tabla
-    mapa_personas = {str(p.get('codigo', '')): p.get('nombre', 'Sin nombre') for p in personas}
-    mapa_empresas = {str(e.get('codigo', '')): e.get('nombre', 'Sin nombre') for e in empresas}
+    # Mapas codigo -> nombre para mostrar en la tabla (indices compartidos,
+    # no se descarga persona ni empresa en cada peticion)
+    mapa_personas = api_async.mapa_nombres('persona')
+    mapa_empresas = api_async.mapa_nombres('empresa')
 
-    return render_template('pages/cliente.html',
+    return renderizar('pages/cliente.html',
         registros=registros,
         mostrar_formulario=mostrar_formulario,
         editando=editando,
         registro=registro,
         limite=limite,
-        personas=personas,
-        empresas=empresas,
+        pagina=pagina,
         mapa_personas=mapa_personas,
         mapa_empresas=mapa_empresas
     )
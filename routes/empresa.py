@@ -13,16 +13,21 @@ Rutas:
 """
 
 # Blueprint: agrupa rutas en un modulo independiente
-# render_template: renderiza un archivo HTML Jinja2
 # request: objeto que contiene los datos de la peticion HTTP (parametros URL, formulario)
 # redirect: redirige el navegador a otra URL (codigo 302)
 # url_for: genera una URL a partir del nombre del Blueprint y la funcion
 # flash: guarda un mensaje temporal en la sesion para mostrarlo despues del redirect
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, request, redirect, url_for, flash
 
 # ApiService: clase que contiene los metodos CRUD para comunicarse con la API REST
 from services.api_service import ApiService
 
+# renderizar: igual que render_template, pero puede enviar el HTML por partes
+from routes.renderizado import renderizar
+
+# parametros_pagina: lee pagina, tamano, orden y cursores del query string
+from services.paginacion import parametros_pagina
+
 
 # ══════════════════════════════════════════════
 # CONFIGURACION DEL BLUEPRINT
@@ -67,8 +72,12 @@ def index():
     # Leer el valor de la clave primaria del registro a editar (solo si accion='editar')
     valor_clave = request.args.get('clave', '')
 
-    # Llamar a la API para obtener la lista de registros de la tabla empresa
-    registros = api.listar(TABLA, limite)
+    # Pedir solo la pagina actual de registros (ordenada si la URL trae ?orden=).
+    # parametros_pagina() lee ?pagina, ?tamano, ?orden, ?dir y los cursores.
+    # Retorna un objeto Pagina: .registros es la lista a mostrar y el resto
+    # de atributos sirve para construir los enlaces Anterior / Siguiente.
+    pagina = api.listar_pagina(TABLA, CLAVE, limite=limite, **parametros_pagina(request.args))
+    registros = pagina.registros
 
     # Determinar si hay que mostrar el formulario (True si accion es 'nuevo' o 'editar')
     mostrar_formulario = accion in ('nuevo', 'editar')
@@ -76,25 +85,25 @@ def index():
     # Determinar si estamos en modo edicion (True solo si accion es 'editar')
     editando = accion == 'editar'
 
-    # Si estamos editando, buscar el registro con la clave indicada en la lista
+    # Si estamos editando, obtener el registro con la clave indicada
     registro = None
     if editando and valor_clave:
-        # next() con generador: busca el primer registro cuyo 'codigo' coincida.
-        # str() convierte ambos valores a texto para comparar de forma segura.
-        # Si no encuentra ninguno, retorna None (segundo argumento de next).
-        registro = next(
-            (r for r in registros if str(r.get(CLAVE)) == valor_clave),
-            None
-        )
-
-    # render_template() genera el HTML final a partir del template Jinja2.
+        # api.obtener() pide solo ese registro a la API: GET /api/empresa/codigo/{valor}.
+        # No depende de 'limite' (el registro puede no estar en la lista mostrada)
+        # y, si el listado completo esta en el cache, lo busca ahi en O(1).
+        # Si no existe, retorna None.
+        registro = api.obtener(TABLA, CLAVE, valor_clave)
+
+    # renderizar() genera el HTML final a partir del template Jinja2
+    # (completo, o por partes si el Blueprint esta en STREAMING_BLUEPRINTS).
     # Pasa las variables que el template necesita para renderizar la pagina.
-    return render_template('pages/empresa.html',
+    return renderizar('pages/empresa.html',
         registros=registros,                  # Lista de registros para la tabla HTML
         mostrar_formulario=mostrar_formulario, # Bool: muestra u oculta el formulario
         editando=editando,                     # Bool: modo crear vs modo editar
         registro=registro,                     # Diccionario del registro a editar (o None)
-        limite=limite                          # Valor del campo limite (para mantenerlo visible)
+        limite=limite,                         # Valor del campo limite (para mantenerlo visible)
+        pagina=pagina                          # Datos para los enlaces de paginacion y orden
     )
 
 
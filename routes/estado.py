@@ -0,0 +1,63 @@
+"""
+estado.py - Blueprint de introspeccion: estado interno del frontend en JSON.
+
+Rutas:
+    GET /estado             →  Resumen: salud de la API, circuitos, pool, cache, single-flight, indices, busqueda y cliente async
+    GET /estado/circuitos   →  Estado del circuit breaker de cada endpoint
+
+Ninguna de estas rutas hace peticiones a la API: solo leen el estado
+que guardan los servicios compartidos. Solo responden con la clave
+INTERNO_CLAVE o desde INTERNO_REDES (ver routes/acceso.py); si no, 404.
+"""
+
+# Blueprint: agrupa rutas en un modulo independiente
+# jsonify: convierte un diccionario en una respuesta JSON
+from flask import Blueprint, jsonify
+
+# ApiService: da acceso al monitor de salud, los circuitos, el pool y el cache compartidos
+from services.api_service import ApiService
+
+# AsyncApiService: estado del bucle y del cliente HTTP asincrono compartido
+from services.api_async import AsyncApiService
+
+# solo_interno: 404 a las peticiones sin clave que no llegan desde INTERNO_REDES
+from routes.acceso import solo_interno
+
+
+# ══════════════════════════════════════════════
+# CONFIGURACION DEL BLUEPRINT
+# ══════════════════════════════════════════════
+
+bp = Blueprint('estado', __name__)
+# Todas las rutas del Blueprint son internas
+bp.before_request(solo_interno)
+
+api = ApiService()
+api_async = AsyncApiService()
+
+
+# ══════════════════════════════════════════════
+# RUTAS
+# ══════════════════════════════════════════════
+
+@bp.route('/estado')
+def index():
+    """Resumen del estado de la API y de los servicios compartidos."""
+    return jsonify({
+        'salud': api.estado_salud(),
+        'circuitos': api.estado_circuitos(),
+        'pool': api.estadisticas_pool(),
+        'cache': api.estadisticas_cache(),
+        'cache_sp': api.estadisticas_cache_sp(),
+        'json': api.estadisticas_json(),
+        'single_flight': api.single_flight.estadisticas(),
+        'indices': api.estadisticas_indices(),
+        'busqueda': api.estadisticas_busqueda(),
+        'async': api_async.estadisticas_async(),
+    })
+
+
+@bp.route('/estado/circuitos')
+def circuitos():
+    """Estado de cada circuit breaker: cerrado, abierto o semiabierto."""
+    return jsonify(api.estado_circuitos())
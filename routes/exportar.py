@@ -0,0 +1,148 @@
+"""
+exportar.py - Blueprint para descargar tablas completas en CSV.
+
+Las filas se leen de la API por partes (ApiService.listar_flujo) y se
+envian al navegador a medida que llegan: ni la respuesta de la API ni el
+CSV completo se arman en memoria, asi se pueden exportar tablas grandes.
+
+Un CSV vacio o cortado no debe parecer una descarga correcta:
+    - si la API falla antes de la primera fila, se responde 503 (API caida
+      o circuito abierto) o 502 (error de red o respuesta con error);
+    - si la respuesta se corta a mitad, el error se propaga y el servidor
+      corta la descarga (la respuesta por partes queda sin terminar y el
+      navegador la marca como fallida).
+
+Rutas:
+    GET /exportar/<tabla>.csv     →  Tabla completa en CSV (solo EXPORTAR_TABLAS)
+    GET /exportar/facturas.csv    →  Facturas con nombres y cantidad de productos (SP listar)
+"""
+
+# csv: escribe filas en formato CSV con las comillas y separadores correctos
+import csv
+
+# io.StringIO: archivo en memoria donde csv escribe cada bloque antes de enviarlo
+import io
+
+# chain: volver a poner la primera fila (leida antes de responder) delante de las demas
+from itertools import chain
+
+# requests: errores de la API al empezar a leer
+import requests
+
+# Blueprint: agrupa rutas en un modulo independiente
+# Response: respuesta HTTP cuyo cuerpo puede ser un generador (se envia por partes)
+# stream_with_context: mantiene el contexto de la peticion mientras se envia el generador
+# abort: responde con un codigo de error (404 si la tabla no se puede exportar)
+from flask import Blueprint, Response, stream_with_context, abort
+
+# ApiService: lectura por partes de listados y SP
+from services.api_service import ApiService
+
+# ApiCaida / CircuitoAbierto: la API no esta disponible (503 en lugar de 502)
+from services.monitor_salud import ApiCaida
+from services.resiliencia import CircuitoAbierto
+
+from config import EXPORTAR_TABLAS, STREAMING_TAMANO_BLOQUE
+
+
+# ══════════════════════════════════════════════
+# CONFIGURACION DEL BLUEPRINT
+# ══════════════════════════════════════════════
+
+bp = Blueprint('exportar', __name__)
+
+api = ApiService()
+
+# Columnas del CSV de facturas (los productos se resumen en una cantidad)
+COLUMNAS_FACTURA = ('numero', 'fecha', 'total', 'fkidcliente', 'nombre_cliente',
+                    'fkidvendedor', 'nombre_vendedor', 'productos')
+
+
+# ══════════════════════════════════════════════
+# GENERADOR DEL CSV
+# ══════════════════════════════════════════════
+
+def _csv(filas, columnas=None):
+    """
+    Convierte un generador de diccionarios en bloques de texto CSV.
+
+    Args:
+        filas:    generador de diccionarios (se recorre una sola vez)
+        columnas: nombres de las columnas; si es None se toman de la primera fila
+
+    Yields:
+        Bloques de texto de al menos STREAMING_TAMANO_BLOQUE caracteres.
+    """
+    bloque = io.StringIO()
+    # BOM de UTF-8: para que Excel muestre bien las tildes y la ñ
+    bloque.write('\ufeff')
+    escritor = None
+
+    for fila in filas:
+        if escritor is None:
+            escritor = csv.DictWriter(bloque, fieldnames=list(columnas or fila.keys()),
+                                      extrasaction='ignore')
+            escritor.writeheader()
+        escritor.writerow(fila)
+
+        if bloque.tell() >= STREAMING_TAMANO_BLOQUE:
+            yield bloque.getvalue()
+            # Vaciar el archivo en memoria y seguir escribiendo en el mismo
+            bloque.seek(0)
+            bloque.truncate()
+
+    if escritor is None and columnas:
+        # Sin filas: enviar al menos el encabezado
+        csv.writer(bloque).writerow(columnas)
+    if bloque.tell():
+        yield bloque.getvalue()
+
+
+def _empezar(filas, nombre):
+    """
+    Lee la primera fila antes de responder, para que un error de la API sea
+    un 503/502 y no un CSV vacio con codigo 200.
+
+    Returns:
+        Iterador con todas las filas (la primera incluida).
+    """
+    try:
+        primera = next(filas)
+    except StopIteration:
+        return iter(())
+    except (ApiCaida, CircuitoAbierto) as ex:
+        abort(503, description=f"La API no esta disponible para exportar {nombre}: {ex}")
+    except (requests.RequestException, ValueError) as ex:
+        abort(502, description=f"La API respondio con un error al exportar {nombre}: {ex}")
+    return chain([primera], filas)
+
+
+def _descarga(generador, nombre_archivo):
+    """Respuesta HTTP que envia el CSV por partes como archivo adjunto."""
+    return Response(
+        stream_with_context(generador),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={nombre_archivo}'}
+    )
+
+
+# ══════════════════════════════════════════════
+# RUTAS
+# ══════════════════════════════════════════════
+
+@bp.route('/exportar/facturas.csv')
+def facturas_csv():
+    """Exporta todas las facturas (una fila por factura) leyendo el SP por partes."""
+    facturas = _empezar(api.ejecutar_sp_flujo('sp_listar_facturas_y_productosporfactura',
+                                              {'p_resultado': None}, 'facturas'), 'facturas')
+    # Reemplazar la lista de productos por su cantidad (diccionario nuevo por fila)
+    filas = ({**fac, 'productos': len(fac.get('productos') or [])} for fac in facturas)
+    return _descarga(_csv(filas, COLUMNAS_FACTURA), 'facturas.csv')
+
+
+@bp.route('/exportar/<tabla>.csv')
+def tabla_csv(tabla):
+    """Exporta una tabla completa en CSV."""
+    if tabla not in EXPORTAR_TABLAS:
+        abort(404)
+    return _descarga(_csv(_empezar(api.listar_flujo(tabla), tabla)), f'{tabla}.csv')
@@ -1,8 +1,10 @@
 """
 factura.py - Blueprint con las rutas CRUD para Facturas y Productos por Factura.
 
-Usa los stored procedures de PostgreSQL a traves de la API:
-    - sp_listar_facturas_y_productosporfactura
+Todas las rutas usan los stored procedures de PostgreSQL a traves de la API.
+El listado trae solo los encabezados de una pagina y la cantidad de
+productos de cada factura:
+    - sp_listar_facturas_pagina
     - sp_consultar_factura_y_productosporfactura
     - sp_insertar_factura_y_productosporfactura
     - sp_actualizar_factura_y_productosporfactura
@@ -11,7 +13,7 @@ Usa los stored procedures de PostgreSQL a traves de la API:
 Endpoint API: POST /api/procedimientos/ejecutarsp
 
 Rutas:
-    GET  /factura                →  Listar facturas
+    GET  /factura                →  Listar facturas (?desde=&hasta=&cliente=&vendedor=&despues=)
     GET  /factura/ver/<numero>   →  Ver detalle de una factura
     GET  /factura/nueva          →  Formulario nueva factura
     POST /factura/crear          →  Crear factura con productos
@@ -23,6 +25,9 @@ Rutas:
 import json
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from services.api_service import ApiService
+from services.api_async import AsyncApiService, vista_async
+from routes.renderizado import renderizar
+from services.paginacion import Pagina, parametros_pagina, codificar_cursor, decodificar_cursor
 
 
 # ══════════════════════════════════════════════
@@ -31,27 +36,129 @@ from services.api_service import ApiService
 
 bp = Blueprint('factura', __name__)
 api = ApiService()
+# Variante asincrona para los formularios (varias consultas a la vez sin ocupar hilos)
+api_async = AsyncApiService()
 
 
 # ══════════════════════════════════════════════
 # LISTAR FACTURAS (GET)
 # ══════════════════════════════════════════════
 
-@bp.route('/factura')
-def index():
-    """Lista todas las facturas con sus productos."""
-    exito, datos = api.ejecutar_sp("sp_listar_facturas_y_productosporfactura", {
+def _filtros_factura(args):
+    """
+    Lee los filtros del listado de facturas del query string.
+
+    Returns:
+        {'desde': 'AAAA-MM-DD' o None, 'hasta': ..., 'cliente': int o None, 'vendedor': int o None}
+    """
+    filtros = {
+        'desde': (args.get('desde') or '')[:10] or None,
+        'hasta': (args.get('hasta') or '')[:10] or None,
+    }
+    for campo in ('cliente', 'vendedor'):
+        try:
+            filtros[campo] = int(args.get(campo)) if args.get(campo) else None
+        except ValueError:
+            filtros[campo] = None
+    return filtros
+
+
+def _pagina_facturas(filtros, parametros):
+    """
+    Pagina de encabezados de factura con la cantidad de productos de cada una.
+
+    Usa sp_listar_facturas_pagina: la base de datos filtra por fecha, cliente
+    y vendedor y corta en la pagina pedida, asi el costo depende del tamano
+    de pagina y no del historial de facturas. Las paginas van de la factura
+    mas nueva a la mas vieja, con cursores (keyset) sobre el numero:
+    ?despues= para la siguiente y ?antes= para la anterior.
+
+    Returns:
+        (Pagina, mensaje de error o None)
+    """
+    tamano = parametros['tamano']
+    despues = decodificar_cursor(parametros['despues'])
+    antes = None if despues else decodificar_cursor(parametros['antes'])
+    numero = parametros['pagina'] if (despues or antes) else 1
+
+    # Una fila de mas para saber si hay otra pagina en esa direccion
+    exito, datos = api.ejecutar_sp("sp_listar_facturas_pagina", {
+        "p_desde": filtros['desde'],
+        "p_hasta": filtros['hasta'],
+        "p_cliente": filtros['cliente'],
+        "p_vendedor": filtros['vendedor'],
+        "p_despues": despues[0] if despues else None,
+        "p_antes": antes[0] if antes else None,
+        "p_limite": tamano + 1,
         "p_resultado": None
     })
+    error = None
+    if not exito:
+        error, datos = datos, []
+    elif not isinstance(datos, list):
+        datos = []
+
+    if antes:
+        # El SP retorna las mas cercanas por encima del cursor: la fila de
+        # mas es la mas nueva, al principio
+        hay_anterior, hay_siguiente = len(datos) > tamano, True
+        registros = datos[-tamano:]
+    else:
+        hay_anterior, hay_siguiente = despues is not None, len(datos) > tamano
+        registros = datos[:tamano]
+
+    if not hay_anterior:
+        # Se volvio hasta la factura mas nueva: es la primera pagina
+        numero = 1
+
+    # El cursor de una factura es su numero (columna de orden y clave a la vez)
+    primera, ultima = (registros[0]['numero'], registros[-1]['numero']) if registros else (None, None)
+    pagina = Pagina(
+        registros, numero, tamano, 'numero', 'desc', None,
+        hay_anterior, hay_siguiente,
+        cursor_anterior=codificar_cursor(primera, primera) if registros else None,
+        cursor_siguiente=codificar_cursor(ultima, ultima) if registros else None,
+        filtros=filtros,
+    )
+    # El orden es siempre por numero: los encabezados no ordenan
+    pagina.ordenable = False
+    return pagina, error
 
-    facturas = []
-    if exito and isinstance(datos, dict):
-        facturas = datos.get("facturas", [])
-    elif exito and isinstance(datos, list):
-        facturas = datos
 
-    return render_template('pages/factura.html',
+@bp.route('/factura')
+def index():
+    """
+    Lista las facturas por paginas, con filtros por fecha, cliente y vendedor.
+
+    Solo se traen los encabezados de la pagina actual y cuantos productos
+    tiene cada factura; el detalle se carga en ver/editar. El rango de
+    fechas filtra solo o junto con un cliente/vendedor. Cliente y vendedor
+    se eligen con campos de busqueda (GET /buscar/cliente), no con un select
+    de todas las filas.
+    """
+    filtros = _filtros_factura(request.args)
+    pagina, error = _pagina_facturas(filtros, parametros_pagina(request.args))
+    if error:
+        flash(f"Error al listar facturas: {error}", "danger")
+
+    # Diccionarios nuevos: los encabezados pueden venir del cache de SP o de single-flight.
+    # El nombre de cliente/vendedor se resuelve en O(1) en los indices.
+    facturas = [
+        {
+            **fac,
+            'nombre_cliente': api.nombre('cliente', fac.get('fkidcliente')),
+            'nombre_vendedor': api.nombre('vendedor', fac.get('fkidvendedor')),
+        }
+        for fac in pagina.registros
+    ]
+
+    return renderizar('pages/factura.html',
         facturas=facturas,
+        pagina=pagina,
+        filtros=filtros,
+        # Texto de los campos de busqueda cuando ya hay un cliente/vendedor elegido
+        nombre_cliente=api.nombre('cliente', filtros['cliente']),
+        nombre_vendedor=api.nombre('vendedor', filtros['vendedor']),
         vista='listar'
     )
 
@@ -71,9 +178,9 @@ def ver(numero):
     factura = None
     if exito and isinstance(datos, dict):
         # SP retorna {factura: {...}, productos: [...]}
-        info = datos.get("factura", datos)
-        info["productos"] = datos.get("productos", [])
-        factura = info
+        # Se arma un diccionario nuevo: el resultado del SP puede ser
+        # compartido con otras peticiones simultaneas y no se modifica.
+        factura = {**datos.get("factura", datos), "productos": datos.get("productos", [])}
 
     return render_template('pages/factura.html',
         factura=factura,
@@ -86,27 +193,34 @@ def ver(numero):
 # ══════════════════════════════════════════════
 
 @bp.route('/factura/nueva')
-def nueva():
+@vista_async
+async def nueva():
     """Muestra el formulario para crear una factura."""
-    # Cargar clientes, vendedores, personas y productos para los selects
-    clientes = api.listar('cliente')
-    vendedores = api.listar('vendedor')
-    personas = api.listar('persona')
-    productos = api.listar('producto')
-
-    # Cruzar cliente/vendedor con persona para obtener el nombre
-    mapa_personas = {p['codigo']: p['nombre'] for p in personas}
-    for cli in clientes:
-        cli['nombre'] = mapa_personas.get(cli.get('fkcodpersona'), 'Sin nombre')
-    for ven in vendedores:
-        ven['nombre'] = mapa_personas.get(ven.get('fkcodpersona'), 'Sin nombre')
+    # Cargar clientes y vendedores para los selects y el indice de nombres
+    # de persona (al mismo tiempo).
+    # Los productos se buscan mientras se escribe (GET /buscar/producto).
+    clientes, vendedores, _ = await api_async.en_paralelo(
+        api_async.listar('cliente'),
+        api_async.listar('vendedor'),
+        api_async.preparar_nombres('persona')
+    )
+
+    # Nombre de la persona de cada cliente/vendedor (indice de nombres, sin
+    # descargar persona). Diccionarios nuevos: los de listar() son de solo lectura.
+    clientes = [
+        {**cli, 'nombre': api_async.nombre('persona', cli.get('fkcodpersona'))}
+        for cli in clientes
+    ]
+    vendedores = [
+        {**ven, 'nombre': api_async.nombre('persona', ven.get('fkcodpersona'))}
+        for ven in vendedores
+    ]
 
     return render_template('pages/factura.html',
         vista='formulario',
         editando=False,
         clientes=clientes,
-        vendedores=vendedores,
-        productos_disponibles=productos
+        vendedores=vendedores
     )
 
 
@@ -157,45 +271,51 @@ def crear():
 # ══════════════════════════════════════════════
 
 @bp.route('/factura/editar/<int:numero>')
-def editar(numero):
+@vista_async
+async def editar(numero):
     """Muestra el formulario para editar una factura existente."""
-    # Consultar la factura actual
-    exito, datos = api.ejecutar_sp("sp_consultar_factura_y_productosporfactura", {
-        "p_numero": numero,
-        "p_resultado": None
-    })
+    # Consultar la factura actual y, al mismo tiempo, las tablas de los selects
+    # y el indice de nombres de persona.
+    # Las llamadas son independientes: la pagina tarda lo que la mas lenta.
+    # Los productos se buscan mientras se escribe (GET /buscar/producto).
+    (exito, datos), clientes, vendedores, _ = await api_async.en_paralelo(
+        api_async.ejecutar_sp("sp_consultar_factura_y_productosporfactura", {
+            "p_numero": numero,
+            "p_resultado": None
+        }),
+        api_async.listar('cliente'),
+        api_async.listar('vendedor'),
+        api_async.preparar_nombres('persona')
+    )
 
     factura = None
     if exito and isinstance(datos, dict):
         # SP retorna {factura: {...}, productos: [...]}
-        info = datos.get("factura", datos)
-        info["productos"] = datos.get("productos", [])
-        factura = info
+        # Se arma un diccionario nuevo: el resultado del SP puede ser
+        # compartido con otras peticiones simultaneas y no se modifica.
+        factura = {**datos.get("factura", datos), "productos": datos.get("productos", [])}
 
     if not factura:
         flash("Factura no encontrada.", "danger")
         return redirect(url_for('factura.index'))
 
-    # Cargar clientes, vendedores, personas y productos para los selects
-    clientes = api.listar('cliente')
-    vendedores = api.listar('vendedor')
-    personas = api.listar('persona')
-    productos = api.listar('producto')
-
-    # Cruzar cliente/vendedor con persona para obtener el nombre
-    mapa_personas = {p['codigo']: p['nombre'] for p in personas}
-    for cli in clientes:
-        cli['nombre'] = mapa_personas.get(cli.get('fkcodpersona'), 'Sin nombre')
-    for ven in vendedores:
-        ven['nombre'] = mapa_personas.get(ven.get('fkcodpersona'), 'Sin nombre')
+    # Nombre de la persona de cada cliente/vendedor (indice de nombres, sin
+    # descargar persona). Diccionarios nuevos: los de listar() son de solo lectura.
+    clientes = [
+        {**cli, 'nombre': api_async.nombre('persona', cli.get('fkcodpersona'))}
+        for cli in clientes
+    ]
+    vendedores = [
+        {**ven, 'nombre': api_async.nombre('persona', ven.get('fkcodpersona'))}
+        for ven in vendedores
+    ]
 
     return render_template('pages/factura.html',
         vista='formulario',
         editando=True,
         factura=factura,
         clientes=clientes,
-        vendedores=vendedores,
-        productos_disponibles=productos
+        vendedores=vendedores
     )
 
 
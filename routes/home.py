@@ -3,18 +3,18 @@ home.py - Blueprint para la pagina de inicio.
 
 Ruta:
     GET /  →  Renderiza la pagina de bienvenida con info de conexion a la BD.
+
+La info de conexion viene del monitor de salud (services/monitor_salud.py),
+que la consulta en segundo plano: esta ruta no hace peticiones a la API.
 """
 
 # Blueprint: permite agrupar rutas en un modulo independiente
 # render_template: funcion que renderiza un archivo HTML Jinja2 y lo retorna como respuesta
 from flask import Blueprint, render_template
 
-# ApiService: para reutilizar la URL base de la API
+# ApiService: para leer el estado de la API del monitor de salud compartido
 from services.api_service import ApiService
 
-# requests: para hacer la llamada al endpoint de diagnostico de la API
-import requests
-
 
 # ══════════════════════════════════════════════
 # CREAR EL BLUEPRINT
@@ -25,7 +25,7 @@ import requests
 # __name__ le indica a Flask donde buscar templates y archivos estaticos.
 bp = Blueprint('home', __name__)
 
-# Instancia del servicio para acceder a la URL base de la API
+# Instancia del servicio para acceder al monitor de salud de la API
 api = ApiService()
 
 
@@ -39,20 +39,15 @@ api = ApiService()
 def index():
     """Renderiza la pagina de inicio con informacion del proyecto y conexion a BD."""
 
-    # Intentar obtener el diagnostico de conexion de la API.
-    # Endpoint: GET /api/diagnostico/conexion
-    # Retorna info del servidor de BD: nombre, proveedor, version, etc.
-    diagnostico = None
-    try:
-        url = f"{api.base_url}/api/diagnostico/conexion"
-        respuesta = requests.get(url, timeout=3)
-        if respuesta.ok:
-            diagnostico = respuesta.json()
-    except Exception:
-        # Si la API no responde, diagnostico queda como None
-        # y el template simplemente no muestra la seccion de conexion
-        pass
+    # El diagnostico de conexion (GET /api/diagnostico/conexion) lo consulta
+    # el monitor de salud en segundo plano: aqui solo se lee el ultimo
+    # resultado, sin esperar a la API. Si nunca respondio, queda como None
+    # y el template muestra un aviso discreto.
+    diagnostico = api.salud.diagnostico()
+
+    # Disponibilidad y latencias recientes de la API (segun las sondas)
+    salud = api.estado_salud()
 
     # render_template() busca el archivo 'pages/home.html' en la carpeta templates/,
     # lo procesa con Jinja2 (reemplaza variables, evalua bloques) y retorna el HTML final.
-    return render_template('pages/home.html', diagnostico=diagnostico)
+    return render_template('pages/home.html', diagnostico=diagnostico, salud=salud)
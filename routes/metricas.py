@@ -0,0 +1,41 @@
+"""
+metricas.py - Blueprint de metricas en formato de texto de Prometheus.
+
+Rutas:
+    GET /metrics   →  Contadores, medidores e histogramas del frontend (ver services/metricas.py)
+
+Como /estado, no hace peticiones a la API: solo lee lo que registraron los
+servicios compartidos. Con METRICAS_DIRECTORIO responde la suma de todos
+los workers de gunicorn. Tambien como /estado, solo responde con la clave
+INTERNO_CLAVE o desde INTERNO_REDES (ver routes/acceso.py); Prometheus
+envia la clave con 'authorization: credentials: <clave>' en su scrape_config.
+"""
+
+# Blueprint: agrupa rutas en un modulo independiente
+# Response: respuesta de texto con el Content-Type que espera Prometheus
+from flask import Blueprint, Response
+
+# metricas: registro de metricas compartido por todos los hilos del proceso
+from services.metricas import metricas
+
+# solo_interno: 404 a las peticiones sin clave que no llegan desde INTERNO_REDES
+from routes.acceso import solo_interno
+
+
+# ══════════════════════════════════════════════
+# CONFIGURACION DEL BLUEPRINT
+# ══════════════════════════════════════════════
+
+bp = Blueprint('metricas', __name__)
+# Las metricas nombran tablas, SP y endpoints: solo para el monitoreo
+bp.before_request(solo_interno)
+
+
+# ══════════════════════════════════════════════
+# RUTAS
+# ══════════════════════════════════════════════
+
+@bp.route('/metrics')
+def index():
+    """Metricas en el formato de texto 0.0.4 de Prometheus."""
+    return Response(metricas.exposicion(), content_type='text/plain; version=0.0.4; charset=utf-8')
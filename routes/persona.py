@@ -15,11 +15,17 @@ Rutas:
 """
 
 # Importar las funciones necesarias de Flask (ver empresa.py para detalle de cada una)
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, request, redirect, url_for, flash
 
 # Servicio generico para las llamadas HTTP a la API REST
 from services.api_service import ApiService
 
+# renderizar: igual que render_template, pero puede enviar el HTML por partes
+from routes.renderizado import renderizar
+
+# parametros_pagina: lee pagina, tamano, orden y cursores del query string
+from services.paginacion import parametros_pagina
+
 
 # ══════════════════════════════════════════════
 # CONFIGURACION DEL BLUEPRINT
@@ -51,29 +57,28 @@ def index():
     accion = request.args.get('accion', '')              # 'nuevo', 'editar' o '' (vacio)
     valor_clave = request.args.get('clave', '')          # Valor de la PK para editar
 
-    # Obtener registros de la API
-    registros = api.listar(TABLA, limite)
+    # Obtener solo la pagina actual de registros (con orden y cursores de la URL)
+    pagina = api.listar_pagina(TABLA, CLAVE, limite=limite, **parametros_pagina(request.args))
+    registros = pagina.registros
 
     # Determinar estado del formulario
     mostrar_formulario = accion in ('nuevo', 'editar')   # True si hay que mostrar formulario
     editando = accion == 'editar'                        # True solo en modo edicion
 
-    # Buscar el registro a editar en la lista (si aplica)
+    # Obtener el registro a editar (si aplica)
     registro = None
     if editando and valor_clave:
-        # Buscar el primer registro cuyo 'codigo' coincida con valor_clave
-        registro = next(
-            (r for r in registros if str(r.get(CLAVE)) == valor_clave),
-            None  # Retorna None si no encuentra coincidencia
-        )
+        # Pedir solo ese registro por su clave: GET /api/persona/codigo/{valor}
+        registro = api.obtener(TABLA, CLAVE, valor_clave)  # None si no existe
 
     # Renderizar la pagina pasando las variables al template
-    return render_template('pages/persona.html',
+    return renderizar('pages/persona.html',
         registros=registros,                  # Lista de personas para la tabla HTML
         mostrar_formulario=mostrar_formulario, # Controla visibilidad del formulario
         editando=editando,                     # Controla modo crear vs editar
         registro=registro,                     # Datos del registro a editar (o None)
-        limite=limite                          # Mantener el valor de limite en el input
+        limite=limite,                         # Mantener el valor de limite en el input
+        pagina=pagina                          # Datos para los enlaces de paginacion y orden
     )
 
 
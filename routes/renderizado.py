@@ -0,0 +1,68 @@
+"""
+renderizado.py - Renderizado normal o por partes (streaming) de las paginas.
+
+render_template() arma todo el HTML en memoria antes de enviar el primer byte.
+Con tablas grandes eso retrasa la respuesta y consume memoria del worker.
+
+renderizar() usa stream_template() de Flask para los Blueprints listados en
+STREAMING_BLUEPRINTS: Jinja genera el HTML por partes y se envia al navegador
+en bloques de STREAMING_TAMANO_BLOQUE bytes. El encabezado y el menu lateral
+se envian apenas se generan (marca PUNTO_ENVIO en layout/base.html).
+"""
+
+from flask import Response, render_template, stream_template, request, get_flashed_messages
+
+from config import STREAMING_BLUEPRINTS, STREAMING_TAMANO_BLOQUE
+
+
+# Comentario HTML que base.html escribe despues del menu y la barra superior.
+# Al encontrarlo, el bloque acumulado se envia aunque no llegue al tamano minimo.
+PUNTO_ENVIO = '<!-- enviar -->'
+
+
+def streaming_activo():
+    """True si el Blueprint de la peticion actual usa renderizado por partes."""
+    return request.blueprint in STREAMING_BLUEPRINTS
+
+
+def agrupar(partes, tamano_bloque=STREAMING_TAMANO_BLOQUE):
+    """
+    Junta los pedazos pequenos que genera Jinja en bloques mas grandes.
+
+    Jinja produce muchos textos cortos (uno por etiqueta o variable);
+    enviarlos uno por uno seria ineficiente. Se acumulan hasta tamano_bloque
+    bytes o hasta encontrar PUNTO_ENVIO, y entonces se envian juntos.
+    """
+    bloque = []
+    acumulado = 0
+    for parte in partes:
+        bloque.append(parte)
+        acumulado += len(parte)
+        if acumulado >= tamano_bloque or PUNTO_ENVIO in parte:
+            yield ''.join(bloque)
+            bloque = []
+            acumulado = 0
+    if bloque:
+        yield ''.join(bloque)
+
+
+def renderizar(template, **contexto):
+    """
+    Renderiza el template completo o por partes segun STREAMING_BLUEPRINTS.
+
+    Se usa igual que render_template():
+        return renderizar('pages/producto.html', registros=registros, ...)
+    """
+    if not streaming_activo():
+        return render_template(template, **contexto)
+
+    # Leer los mensajes flash ANTES de empezar a enviar.
+    # get_flashed_messages() los quita de la sesion; con streaming la cookie de
+    # sesion sale con los encabezados, antes de que el template los lea.
+    # Flask guarda el resultado en la peticion, asi que base.html los vuelve a
+    # obtener sin tocar la sesion.
+    get_flashed_messages(with_categories=True)
+
+    # stream_template() conserva el contexto de la peticion mientras se genera
+    partes = stream_template(template, **contexto)
+    return Response(agrupar(partes), mimetype='text/html')
@@ -14,8 +14,11 @@ Rutas:
     POST /vendedor/eliminar     →  Eliminar un registro
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, request, redirect, url_for, flash
 from services.api_service import ApiService
+from services.api_async import AsyncApiService, vista_async
+from routes.renderizado import renderizar
+from services.paginacion import parametros_pagina
 
 
 # ══════════════════════════════════════════════
@@ -24,6 +27,8 @@ from services.api_service import ApiService
 
 bp = Blueprint('vendedor', __name__)
 api = ApiService()
+# Variante asincrona para el listado (varias consultas a la vez sin ocupar hilos)
+api_async = AsyncApiService()
 TABLA = 'vendedor'
 CLAVE = 'id'
 
@@ -33,35 +38,39 @@ CLAVE = 'id'
 # ══════════════════════════════════════════════
 
 @bp.route('/vendedor')
-def index():
+@vista_async
+async def index():
     """Muestra la tabla de vendedores con select de persona."""
     limite = request.args.get('limite', type=int)
     accion = request.args.get('accion', '')
     valor_clave = request.args.get('clave', '')
 
-    registros = api.listar(TABLA, limite)
-    personas = api.listar('persona')
-
     mostrar_formulario = accion in ('nuevo', 'editar')
     editando = accion == 'editar'
 
-    registro = None
-    if editando and valor_clave:
-        registro = next(
-            (r for r in registros if str(r.get(CLAVE)) == valor_clave),
-            None
-        )
+    # Solo la pagina de vendedores: la persona se busca mientras se escribe
+    # en el formulario (GET /buscar/persona), no se envia la tabla completa.
+    # La pagina, el registro a editar (o tomarlo del cache) y el indice de
+    # nombres se piden al mismo tiempo.
+    parametros = parametros_pagina(request.args)
+    pagina, registro, _ = await api_async.en_paralelo(
+        api_async.listar_pagina(TABLA, CLAVE, limite=limite, **parametros),
+        api_async.obtener(TABLA, CLAVE, valor_clave) if editando and valor_clave else None,
+        api_async.preparar_nombres('persona')
+    )
+    registros = pagina.registros
 
-    # Mapa persona codigo -> nombre para mostrar en la tabla
-    mapa_personas = {str(p.get('codigo', '')): p.get('nombre', 'Sin nombre') for p in personas}
+    # Mapa persona codigo -> nombre para mostrar en la tabla (indice compartido,
+    # no se descarga persona en cada peticion)
+    mapa_personas = api_async.mapa_nombres('persona')
 
-    return render_template('pages/vendedor.html',
+    return renderizar('pages/vendedor.html',
         registros=registros,
         mostrar_formulario=mostrar_formulario,
         editando=editando,
         registro=registro,
         limite=limite,
-        personas=personas,
+        pagina=pagina,
         mapa_personas=mapa_personas
     )
 
@@ -109,6 +109,12 @@ CREATE TABLE rutarol (
     CONSTRAINT pk_rutarol PRIMARY KEY (ruta, rol)
 );
 
+-- Índices del listado paginado de facturas (sp_listar_facturas_pagina):
+-- cada filtro lee solo la página pedida, en orden de número descendente
+CREATE INDEX ix_factura_cliente_numero ON factura (fkidcliente, numero);
+CREATE INDEX ix_factura_vendedor_numero ON factura (fkidvendedor, numero);
+CREATE INDEX ix_factura_fecha ON factura (fecha);
+
 -- ============================================================
 -- DATOS
 -- ============================================================
@@ -614,3 +620,92 @@ BEGIN
     );
 END;
 $$;
+
+-- ------------------------------------------------------------
+-- 6. SP LISTAR FACTURAS PAGINA
+-- Una página de encabezados de factura con la cantidad de productos
+-- de cada una (sin el detalle), de la más nueva a la más vieja.
+-- Filtros opcionales (NULL, 0 o '' = sin filtro): rango de fechas
+-- (AAAA-MM-DD, ambos incluidos), cliente y vendedor.
+-- Paginación por cursor (keyset) sobre el número de factura:
+--   p_despues: facturas con número menor (página siguiente)
+--   p_antes:   facturas con número mayor (página anterior)
+-- El costo depende del tamaño de página, no del historial.
+-- Ejemplo via API:
+--   POST /api/procedimientos/ejecutarsp
+--   { "nombreSP": "sp_listar_facturas_pagina",
+--     "p_desde": "2024-01-01", "p_hasta": "2024-01-31",
+--     "p_cliente": 3, "p_vendedor": null,
+--     "p_despues": 120, "p_antes": null, "p_limite": 26,
+--     "p_resultado": "" }
+-- ------------------------------------------------------------
+CREATE OR REPLACE PROCEDURE sp_listar_facturas_pagina(
+    IN p_desde VARCHAR DEFAULT NULL,
+    IN p_hasta VARCHAR DEFAULT NULL,
+    IN p_cliente INTEGER DEFAULT NULL,
+    IN p_vendedor INTEGER DEFAULT NULL,
+    IN p_despues INTEGER DEFAULT NULL,
+    IN p_antes INTEGER DEFAULT NULL,
+    IN p_limite INTEGER DEFAULT 26,
+    INOUT p_resultado JSON DEFAULT NULL
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    -- NULLIF: la API envia 0 o '' cuando no se pasa el parametro
+    v_desde DATE := NULLIF(p_desde, '')::DATE;
+    v_hasta DATE := NULLIF(p_hasta, '')::DATE;
+    v_cliente INTEGER := NULLIF(p_cliente, 0);
+    v_vendedor INTEGER := NULLIF(p_vendedor, 0);
+    v_despues INTEGER := NULLIF(p_despues, 0);
+    v_antes INTEGER := NULLIF(p_antes, 0);
+    v_limite INTEGER := LEAST(COALESCE(NULLIF(p_limite, 0), 26), 1000);
+    v_numeros INTEGER[];
+BEGIN
+    -- Página siguiente (o primera): las que vienen por debajo del cursor, en
+    -- orden descendente. Página anterior: las más cercanas por encima del
+    -- cursor, en orden ascendente. Cada consulta tiene un ORDER BY simple
+    -- para que el índice (número, o cliente/vendedor y número) entregue las
+    -- filas ya ordenadas y se corte en v_limite.
+    IF v_antes IS NULL THEN
+        SELECT array_agg(f.numero) INTO v_numeros FROM (
+            SELECT f.numero
+            FROM factura f
+            WHERE (v_desde IS NULL OR f.fecha >= v_desde)
+              AND (v_hasta IS NULL OR f.fecha < v_hasta + 1)
+              AND (v_cliente IS NULL OR f.fkidcliente = v_cliente)
+              AND (v_vendedor IS NULL OR f.fkidvendedor = v_vendedor)
+              AND (v_despues IS NULL OR f.numero < v_despues)
+            ORDER BY f.numero DESC
+            LIMIT v_limite
+        ) f;
+    ELSE
+        SELECT array_agg(f.numero) INTO v_numeros FROM (
+            SELECT f.numero
+            FROM factura f
+            WHERE (v_desde IS NULL OR f.fecha >= v_desde)
+              AND (v_hasta IS NULL OR f.fecha < v_hasta + 1)
+              AND (v_cliente IS NULL OR f.fkidcliente = v_cliente)
+              AND (v_vendedor IS NULL OR f.fkidvendedor = v_vendedor)
+              AND f.numero > v_antes
+            ORDER BY f.numero ASC
+            LIMIT v_limite
+        ) f;
+    END IF;
+
+    -- Encabezados y cantidad de productos solo de las facturas de la página
+    SELECT COALESCE(json_agg(json_build_object(
+        'numero', f.numero,
+        'fecha', f.fecha,
+        'total', f.total,
+        'fkidcliente', f.fkidcliente,
+        'fkidvendedor', f.fkidvendedor,
+        'lineas', (
+            SELECT COUNT(*) FROM productosporfactura pf
+            WHERE pf.fknumfactura = f.numero
+        )
+    ) ORDER BY f.numero DESC), '[]'::json) INTO p_resultado
+    FROM factura f
+    WHERE f.numero = ANY(COALESCE(v_numeros, '{}'));
+END;
+$$;
@@ -0,0 +1,626 @@
+"""
+api_async.py - Variante asincrona de ApiService para vistas async def.
+
+Flask 3 acepta vistas 'async def', pero ApiService es bloqueante: mientras
+espera a la API el hilo del worker no hace nada mas. Las vistas que piden
+varias cosas a la vez (formularios de factura, listados de cliente y
+vendedor) usaban un hilo del pool por cada llamada (en_paralelo).
+
+AsyncApiService tiene el mismo contrato (listar, obtener, crear, actualizar,
+eliminar, ejecutar_sp...) pero sus metodos son corutinas: una vista puede
+esperar muchas respuestas de la API al mismo tiempo con un solo hilo.
+
+    api_async = AsyncApiService()
+
+    @bp.route('/factura/nueva')
+    @vista_async
+    async def nueva():
+        clientes, vendedores = await api_async.en_paralelo(
+            api_async.listar('cliente'), api_async.listar('vendedor'))
+
+Como funciona:
+    - Las peticiones usan un httpx.AsyncClient (conexiones reutilizadas,
+      HTTP_ASYNC_CONEXIONES) que vive en un bucle de eventos con hilo propio
+      (BucleHttp). Flask ejecuta cada vista async en un bucle nuevo que se
+      cierra al terminar la peticion; un cliente creado ahi perderia sus
+      conexiones abiertas.
+    - Comparte con ApiService el cache de listados y de SP, el monitor de
+      salud, los circuit breakers, el decodificador JSON y los indices de
+      nombres y de busqueda: una escritura hecha por cualquiera de los dos
+      invalida lo mismo y modifica los mismos indices.
+    - Las reglas tampoco se repiten: reintentos y circuit breaker (Intentos),
+      cache y respaldo de los listados, claves del single-flight y lectura
+      de las respuestas son los de ApiService. Aqui solo cambia el cliente
+      HTTP; los cuerpos grandes se decodifican en un hilo, fuera del bucle.
+    - Las lecturas iguales simultaneas se agrupan (single-flight) dentro del
+      bucle, igual que services/single_flight.py entre hilos.
+
+Dependencias opcionales:
+    - httpx (pip install httpx): sin ella cada metodo ejecuta el de
+      ApiService en un hilo (asyncio.to_thread). Las llamadas de una vista
+      se siguen haciendo al mismo tiempo, pero cada una ocupa un hilo.
+    - flask[async] (asgiref): Flask la necesita para ejecutar vistas async.
+      Sin ella, @vista_async ejecuta la corutina con asyncio.run().
+"""
+
+# asyncio: corutinas, gather y el bucle de eventos del cliente HTTP
+import asyncio
+
+# functools.wraps: conservar el nombre de la vista al envolverla
+import functools
+
+# os.getpid(): detectar un fork (el hilo del bucle no pasa al proceso hijo)
+import os
+
+# time.perf_counter(): duracion de las peticiones trazadas
+import time
+
+# threading: hilo del bucle de eventos y lock de su creacion
+import threading
+
+# requests: los errores se reportan con los mismos tipos que ApiService
+import requests
+
+# httpx es opcional: cliente HTTP asincrono con pool de conexiones
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# asgiref es opcional: Flask la usa para ejecutar las vistas async def
+try:
+    import asgiref
+except ImportError:
+    asgiref = None
+
+# ApiService: implementacion bloqueante (respaldo sin httpx, paginas, indices)
+# y reglas compartidas (cache, respaldo, decodificacion de respuestas)
+# Intentos: monitor de salud, circuit breaker, reintentos y metricas de cada peticion
+# segmento_clave: valor de la clave en la URL (igual que ApiService)
+from services.api_service import ApiService, Intentos, segmento_clave
+
+# es_sp_lectura: los SP de lectura se reintentan, usan el cache y se agrupan
+from services.resiliencia import es_sp_lectura
+
+# SIN_NOMBRE: texto por defecto de ApiService.nombre()
+from services.indices import SIN_NOMBRE
+
+# copiar: los listados compartidos se entregan como Tabla de solo lectura (services/filas.py)
+from services.filas import copiar
+
+# Traza de la peticion actual: se pasa a las corutinas del bucle y registra sus llamadas
+from services.traza import traza_actual, registrar_cache, en_traza, TiemposHttpx
+
+from config import API_TIMEOUTS
+from config import HTTP_ASYNC_CONEXIONES, HTTP_ASYNC_LIBRES
+
+
+def _exito(respuesta):
+    """Equivalente a requests.Response.ok para una respuesta de httpx."""
+    return respuesta.status_code < 400
+
+
+# ══════════════════════════════════════════════
+# BUCLE DE EVENTOS COMPARTIDO
+# ══════════════════════════════════════════════
+
+class BucleHttp:
+    """
+    Bucle de eventos en un hilo propio con el httpx.AsyncClient compartido.
+
+    Las corutinas que hablan con la API se ejecutan aqui; la vista las espera
+    desde su propio bucle sin bloquearlo.
+
+    Metodos:
+        ejecutar(corutina)        → resultado de la corutina (await desde cualquier bucle)
+        compartir(clave, fabrica) → como ejecutar, agrupando llamadas iguales (single-flight)
+        cliente()                 → httpx.AsyncClient (solo dentro del bucle)
+        estadisticas()            → dict con peticiones, agrupadas y en curso
+        cerrar(espera)            → cierra las conexiones y detiene el bucle
+    """
+
+    def __init__(self, conexiones=HTTP_ASYNC_CONEXIONES, libres=HTTP_ASYNC_LIBRES):
+        self._conexiones = conexiones
+        self._libres = libres
+        self._lock = threading.Lock()
+        self._bucle = None
+        self._pid = None
+        self._cliente = None
+        # clave → Task en curso (solo se usa dentro del bucle)
+        self._en_curso = {}
+        self._lideres = 0
+        self._agrupadas = 0
+
+    def _iniciar(self):
+        """Bucle de eventos del proceso actual, creandolo si hace falta."""
+        with self._lock:
+            # Despues de un fork (gunicorn --preload) el hilo del bucle no
+            # existe en el proceso hijo: se crea uno nuevo
+            if self._bucle is None or self._pid != os.getpid():
+                bucle = asyncio.new_event_loop()
+                hilo = threading.Thread(target=bucle.run_forever, name='api-async', daemon=True)
+                hilo.start()
+                self._bucle = bucle
+                self._pid = os.getpid()
+                self._cliente = None
+                self._en_curso = {}
+            return self._bucle
+
+    def cliente(self):
+        """httpx.AsyncClient del bucle (se crea en la primera peticion)."""
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=self._conexiones,
+                max_keepalive_connections=self._libres,
+            ))
+        return self._cliente
+
+    async def ejecutar(self, corutina):
+        """Ejecuta la corutina en el bucle compartido y espera su resultado."""
+        # La tarea del bucle no hereda las ContextVar de la vista: la traza se pasa aparte
+        traza = traza_actual()
+        if traza is not None:
+            corutina = en_traza(traza, corutina)
+        futuro = asyncio.run_coroutine_threadsafe(corutina, self._iniciar())
+        return await asyncio.wrap_future(futuro)
+
+    async def _agrupar(self, clave, fabrica):
+        """Single-flight dentro del bucle: la primera llamada crea la tarea, las demas la esperan."""
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(fabrica())
+            self._en_curso[clave] = tarea
+            self._lideres += 1
+
+            def terminar(terminada):
+                if self._en_curso.get(clave) is terminada:
+                    del self._en_curso[clave]
+            tarea.add_done_callback(terminar)
+        else:
+            self._agrupadas += 1
+        # shield: si una vista se cancela, la peticion sigue para las demas
+        return await asyncio.shield(tarea)
+
+    async def compartir(self, clave, fabrica):
+        """
+        Ejecuta fabrica() en el bucle, una sola vez por grupo de llamadas simultaneas.
+
+        Args:
+            clave:   valor hashable que identifica la lectura
+            fabrica: funcion sin argumentos que retorna la corutina
+
+        Todas las llamadas del grupo reciben el mismo objeto: no se debe modificar.
+        """
+        return await self.ejecutar(self._agrupar(clave, fabrica))
+
+    def estadisticas(self):
+        """Estado del bucle y llamadas hechas y agrupadas."""
+        return {
+            'httpx': httpx is not None,
+            'asgiref': asgiref is not None,
+            'activo': self._bucle is not None and self._pid == os.getpid(),
+            'peticiones': self._lideres,
+            'agrupadas': self._agrupadas,
+            'en_curso': len(self._en_curso),
+        }
+
+    def cerrar(self, espera=5):
+        """Cierra las conexiones del cliente y detiene el bucle (al apagar el worker)."""
+        with self._lock:
+            bucle, cliente = self._bucle, self._cliente
+            if bucle is None or self._pid != os.getpid():
+                return
+            self._bucle = self._cliente = None
+        if cliente is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(cliente.aclose(), bucle).result(espera)
+            except Exception as ex:
+                print(f"Error al cerrar el cliente HTTP asincrono: {ex}")
+        bucle.call_soon_threadsafe(bucle.stop)
+
+
+# Instancia unica compartida por todos los AsyncApiService del proceso
+bucle_http = BucleHttp()
+
+
+# ══════════════════════════════════════════════
+# VISTAS ASYNC
+# ══════════════════════════════════════════════
+
+def vista_async(funcion):
+    """
+    Decorador para las vistas 'async def'.
+
+    Con flask[async] instalado la vista se registra tal cual y Flask la
+    ejecuta. Sin asgiref se envuelve en una vista normal que la ejecuta con
+    asyncio.run() (la corutina ve el contexto de la peticion).
+
+    Uso:
+        @bp.route('/cliente')
+        @vista_async
+        async def index():
+            ...
+    """
+    if asgiref is not None:
+        return funcion
+
+    @functools.wraps(funcion)
+    def vista(*args, **kwargs):
+        return asyncio.run(funcion(*args, **kwargs))
+    return vista
+
+
+# ══════════════════════════════════════════════
+# SERVICIO
+# ══════════════════════════════════════════════
+
+class AsyncApiService:
+    """
+    Servicio para consumir la API desde corutinas (vistas async def).
+
+    Metodos (corutinas, se usan con await):
+        listar(tabla, limite)            → Tabla (filas de solo lectura)
+        listar_many(consultas)           → lista de listados (al mismo tiempo)
+        listar_pagina(tabla, clave, ...) → Pagina (ApiService en un hilo)
+        obtener(tabla, clave, valor)     → registro o None
+        listar_por(tabla, campo, valor)  → registros con ese valor en el campo
+        en_paralelo(*corutinas)          → lista de resultados (asyncio.gather)
+        preparar_nombres(*tablas)        → construye los indices de nombres fuera del bucle
+        opciones_nombres(tabla)          → lista [(clave, nombre), ...]
+        crear(tabla, datos, ...)         → (bool, str)
+        actualizar(tabla, clave, ...)    → (bool, str)
+        eliminar(tabla, clave, valor)    → (bool, str)
+        ejecutar_sp(nombre_sp, params)   → (bool, datos_o_mensaje)
+
+    Metodos normales (sin E/S una vez construidos los indices):
+        nombre(tabla, clave)             → nombre para mostrar de una clave foranea
+        mapa_nombres(tabla)              → clave → nombre para los templates
+        estadisticas_async()             → dict con el estado del bucle HTTP
+    """
+
+    def __init__(self):
+        # Implementacion bloqueante: respaldo sin httpx y operaciones en memoria
+        self.sync = ApiService()
+
+        # Los mismos servicios compartidos que ApiService
+        self.cache = self.sync.cache
+        self.cache_sp = self.sync.cache_sp
+        self.salud = self.sync.salud
+        self.circuitos = self.sync.circuitos
+        self.decodificador = self.sync.decodificador
+
+        # Bucle con el cliente httpx (None: sin httpx, se usa self.sync en hilos)
+        self.bucle = bucle_http if httpx is not None else None
+
+    @property
+    def base_url(self):
+        """URL de la API (la misma de self.sync)."""
+        return self.sync.base_url
+
+    @base_url.setter
+    def base_url(self, valor):
+        self.sync.base_url = valor
+
+    def estadisticas_async(self):
+        """Estado del bucle HTTP compartido."""
+        if self.bucle is None:
+            return {'httpx': False, 'asgiref': asgiref is not None, 'activo': False}
+        return self.bucle.estadisticas()
+
+    # ──────────────────────────────────────────────
+    # PETICION HTTP (se ejecuta dentro del bucle compartido)
+    # Las reglas (monitor de salud, circuit breaker, reintentos de las
+    # lecturas, metricas) son las de ApiService: ver Intentos.
+    # ──────────────────────────────────────────────
+    async def _peticion(self, metodo, url, operacion, endpoint, reintentar=False, **kwargs):
+        """
+        Hace una peticion HTTP con el cliente httpx compartido.
+
+        Los errores de red se lanzan como requests.ConnectionError, asi los
+        metodos usan el mismo manejo de errores que ApiService.
+
+        Returns:
+            httpx.Response (puede ser 5xx si se agotaron los reintentos).
+        """
+        intentos = Intentos(self.salud, self.circuitos, metodo, url, endpoint, reintentar)
+        conexion, lectura = API_TIMEOUTS[operacion]
+        kwargs.setdefault('timeout', httpx.Timeout(lectura, connect=conexion))
+        traza = traza_actual()
+
+        for intento in intentos:
+            inicio = time.perf_counter()
+            try:
+                with self.sync.http.llamada():
+                    if traza is None:
+                        respuesta = await self.bucle.cliente().request(metodo, url, **kwargs)
+                    else:
+                        respuesta = await self._peticion_trazada(traza, metodo, url, endpoint, kwargs)
+            except httpx.HTTPError as ex:
+                if not intentos.fallo(ex, inicio):
+                    raise requests.ConnectionError(f"{type(ex).__name__}: {ex}") from ex
+            except (Exception, asyncio.CancelledError):
+                # Error inesperado o vista cancelada: liberar el circuito y propagar
+                intentos.error()
+                raise
+            else:
+                if intentos.terminar(respuesta.status_code, inicio):
+                    return respuesta
+            await asyncio.sleep(intentos.espera(intento))
+
+    async def _peticion_trazada(self, traza, metodo, url, endpoint, kwargs):
+        """Hace la peticion y la registra en la traza (tiempos con la extension 'trace' de httpx)."""
+        tiempos = TiemposHttpx()
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.bucle.cliente().request(
+                metodo, url, extensions={'trace': tiempos}, **kwargs)
+        except httpx.HTTPError as ex:
+            traza.llamada(metodo, endpoint, conexion=tiempos.conexion(),
+                          total=time.perf_counter() - inicio, error=type(ex).__name__)
+            raise
+        traza.llamada(metodo, endpoint, respuesta.status_code, len(respuesta.content),
+                      tiempos.conexion(), tiempos.primer_byte(), time.perf_counter() - inicio)
+        return respuesta
+
+    # ──────────────────────────────────────────────
+    # LISTAR: GET /api/{tabla}
+    # ──────────────────────────────────────────────
+    async def listar(self, tabla, limite=None):
+        """
+        Registros de la tabla; mismo comportamiento que ApiService.listar().
+
+        Cache fresco o viejo (se refresca en segundo plano), single-flight y,
+        si la API no responde, el ultimo listado exitoso con aviso.
+        """
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.listar, tabla, limite)
+
+        registros = self.sync._listado_en_cache(tabla, limite)
+        if registros is not None:
+            return registros
+
+        try:
+            return copiar(await self.bucle.compartir(
+                self.sync._clave_listado(tabla, limite),
+                lambda: self._descargar_listado(tabla, limite)
+            ))
+        except requests.RequestException as ex:
+            return self.sync._respaldo_listado(tabla, limite, ex)
+
+    async def _descargar_listado(self, tabla, limite):
+        """GET /api/{tabla} y guardar el resultado en el cache (dentro del bucle)."""
+        generacion = self.cache.generacion(tabla)
+        params = {'limite': limite} if limite else {}
+        respuesta = await self._peticion('GET', f"{self.base_url}/api/{tabla}", 'listar',
+                                         f"GET /api/{tabla}", reintentar=True, params=params)
+        if respuesta.status_code >= 500:
+            raise requests.HTTPError(f"{respuesta.status_code} al listar {tabla}")
+
+        # Decodificar en un hilo: un listado grande no detiene las demas peticiones del bucle
+        registros = await asyncio.to_thread(self.sync._registros, respuesta.content)
+        if _exito(respuesta):
+            self.cache.guardar(tabla, limite, registros, len(respuesta.content), generacion)
+        return registros
+
+    async def listar_many(self, consultas):
+        """
+        Lista varias tablas al mismo tiempo.
+
+        Args:
+            consultas: lista de nombres de tabla o de tuplas (tabla, limite)
+        """
+        corutinas = []
+        for consulta in consultas:
+            tabla, limite = (consulta, None) if isinstance(consulta, str) else consulta
+            corutinas.append(self.listar(tabla, limite))
+        return await self.en_paralelo(*corutinas)
+
+    async def listar_pagina(self, tabla, clave, **parametros):
+        """
+        Una pagina de la tabla (ver ApiService.listar_pagina).
+
+        Usa ApiService en un hilo: la pagina puede leerse por partes o salir
+        del indice de busqueda, y ambos son bloqueantes.
+        """
+        return await asyncio.to_thread(self.sync.listar_pagina, tabla, clave, **parametros)
+
+    async def en_paralelo(self, *corutinas):
+        """
+        Espera varias corutinas al mismo tiempo.
+
+        Un None en lugar de una corutina da None como resultado (consultas
+        condicionales). Si una falla, la excepcion se propaga.
+
+        Returns:
+            Lista con el resultado de cada una, en el mismo orden.
+        """
+        async def ninguno():
+            return None
+        return list(await asyncio.gather(*[
+            ninguno() if corutina is None else corutina for corutina in corutinas
+        ]))
+
+    # ──────────────────────────────────────────────
+    # OBTENER / LISTAR POR CAMPO
+    # ──────────────────────────────────────────────
+    async def obtener(self, tabla, nombre_clave, valor_clave):
+        """Un registro por su clave primaria (cache primero); None si no existe."""
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.obtener, tabla, nombre_clave, valor_clave)
+
+        encontrado, registro = self.cache.buscar(tabla, nombre_clave, valor_clave)
+        if encontrado:
+            registrar_cache(tabla, 'acierto')
+            return registro
+
+        async def consultar():
+            url = f"{self.base_url}/api/{tabla}/{nombre_clave}/{segmento_clave(valor_clave)}"
+            respuesta = await self._peticion('GET', url, 'obtener',
+                                             f"GET /api/{tabla}/{nombre_clave}", reintentar=True)
+            if not _exito(respuesta):
+                return None
+            # Un solo registro: se decodifica en el bucle
+            datos = self.sync._decodificar(respuesta.content).get("datos", [])
+            return datos[0] if datos else None
+
+        try:
+            return await self.bucle.ejecutar(consultar())
+        except requests.RequestException as ex:
+            return self.sync._registro_de_respaldo(tabla, nombre_clave, valor_clave, ex)
+
+    async def listar_por(self, tabla, nombre_campo, valor):
+        """Registros cuyo campo tiene el valor indicado; lista vacia si no hay o hay error."""
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.listar_por, tabla, nombre_campo, valor)
+
+        async def descargar():
+            url = f"{self.base_url}/api/{tabla}/{nombre_campo}/{segmento_clave(valor)}"
+            respuesta = await self._peticion('GET', url, 'listar',
+                                             f"GET /api/{tabla}/{nombre_campo}", reintentar=True)
+            if not _exito(respuesta):
+                return []
+            # Decodificar en un hilo: puede traer muchas filas
+            return await asyncio.to_thread(self.sync._registros, respuesta.content)
+
+        try:
+            return copiar(await self.bucle.compartir(
+                self.sync._clave_listar_por(tabla, nombre_campo, valor), descargar
+            ))
+        except requests.RequestException as ex:
+            print(f"Error al listar {tabla} por {nombre_campo}={valor}: {ex}")
+            return []
+
+    # ──────────────────────────────────────────────
+    # NOMBRES PARA MOSTRAR
+    # Los indices estan en memoria; solo su primera construccion descarga
+    # la tabla, y eso se hace en un hilo con preparar_nombres().
+    # ──────────────────────────────────────────────
+    async def preparar_nombres(self, *tablas):
+        """Construye (si hace falta) los indices de nombres de las tablas, al mismo tiempo."""
+        # nombre(tabla, '') consulta el indice: la primera vez lo construye
+        await asyncio.gather(*[
+            asyncio.to_thread(self.sync.nombre, tabla, '') for tabla in tablas
+        ])
+
+    def nombre(self, tabla, clave, defecto=SIN_NOMBRE):
+        """Nombre para mostrar de la clave (ver ApiService.nombre)."""
+        return self.sync.nombre(tabla, clave, defecto)
+
+    def mapa_nombres(self, tabla):
+        """Vista clave → nombre para el template (ver ApiService.mapa_nombres)."""
+        return self.sync.mapa_nombres(tabla)
+
+    async def opciones_nombres(self, tabla):
+        """Lista [(clave, nombre), ...] ordenada por nombre."""
+        return await asyncio.to_thread(self.sync.opciones_nombres, tabla)
+
+    # ──────────────────────────────────────────────
+    # ESCRITURAS: POST / PUT / DELETE
+    # Nunca se reintentan ni se agrupan. Si tienen exito se invalidan los
+    # caches y se actualizan los indices, igual que en ApiService.
+    # ──────────────────────────────────────────────
+    async def _escribir(self, metodo, url, endpoint, **kwargs):
+        """Hace la escritura dentro del bucle. Retorna (exito, contenido JSON)."""
+        respuesta = await self._peticion(metodo, url, 'escribir', endpoint, **kwargs)
+        return _exito(respuesta), self.sync._decodificar(respuesta.content)
+
+    async def crear(self, tabla, datos, campos_encriptar=None):
+        """Crea un registro (ver ApiService.crear). Retorna (exito, mensaje)."""
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.crear, tabla, datos, campos_encriptar)
+        params = {'camposEncriptar': campos_encriptar} if campos_encriptar else {}
+        try:
+            exito, contenido = await self.bucle.ejecutar(self._escribir(
+                'POST', f"{self.base_url}/api/{tabla}", f"POST /api/{tabla}",
+                json=datos, params=params))
+            if exito:
+                # Los indices pueden descargar tablas: en un hilo
+                await asyncio.to_thread(self.sync._registrar_creacion, tabla, datos)
+            return (exito, contenido.get("mensaje", "Operacion completada."))
+        except requests.RequestException as ex:
+            return (False, f"Error de conexion: {ex}")
+
+    async def actualizar(self, tabla, nombre_clave, valor_clave, datos, campos_encriptar=None):
+        """Actualiza un registro (ver ApiService.actualizar). Retorna (exito, mensaje)."""
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.actualizar, tabla, nombre_clave,
+                                           valor_clave, datos, campos_encriptar)
+        params = {'camposEncriptar': campos_encriptar} if campos_encriptar else {}
+        try:
+            exito, contenido = await self.bucle.ejecutar(self._escribir(
+                'PUT', f"{self.base_url}/api/{tabla}/{nombre_clave}/{segmento_clave(valor_clave)}",
+                f"PUT /api/{tabla}", json=datos, params=params))
+            if exito:
+                await asyncio.to_thread(self.sync._registrar_actualizacion,
+                                        tabla, nombre_clave, valor_clave, datos)
+            return (exito, contenido.get("mensaje", "Operacion completada."))
+        except requests.RequestException as ex:
+            return (False, f"Error de conexion: {ex}")
+
+    async def eliminar(self, tabla, nombre_clave, valor_clave):
+        """Elimina un registro (ver ApiService.eliminar). Retorna (exito, mensaje)."""
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.eliminar, tabla, nombre_clave, valor_clave)
+        try:
+            exito, contenido = await self.bucle.ejecutar(self._escribir(
+                'DELETE', f"{self.base_url}/api/{tabla}/{nombre_clave}/{segmento_clave(valor_clave)}",
+                f"DELETE /api/{tabla}"))
+            if exito:
+                await asyncio.to_thread(self.sync._registrar_eliminacion,
+                                        tabla, nombre_clave, valor_clave)
+            return (exito, contenido.get("mensaje", "Operacion completada."))
+        except requests.RequestException as ex:
+            return (False, f"Error de conexion: {ex}")
+
+    # ──────────────────────────────────────────────
+    # EJECUTAR SP: POST /api/procedimientos/ejecutarsp
+    # ──────────────────────────────────────────────
+    async def ejecutar_sp(self, nombre_sp, parametros=None):
+        """
+        Ejecuta un stored procedure (ver ApiService.ejecutar_sp).
+
+        Los SP de lectura usan el cache de SP y se agrupan; los de escritura
+        invalidan lo que modifican.
+
+        Returns:
+            Tupla (exito: bool, datos_o_mensaje). Los datos pueden ser
+            compartidos con otras peticiones: no se deben modificar.
+        """
+        if self.bucle is None:
+            return await asyncio.to_thread(self.sync.ejecutar_sp, nombre_sp, parametros)
+
+        if not es_sp_lectura(nombre_sp):
+            exito, datos = await self.bucle.ejecutar(self._llamar_sp(nombre_sp, parametros))
+            if exito:
+                self.sync._invalidar_por_sp(nombre_sp, parametros)
+            return (exito, datos)
+
+        datos = self.sync._sp_en_cache(nombre_sp, parametros)
+        if datos is not None:
+            return (True, datos)
+
+        return await self.bucle.compartir(self.sync._clave_sp(nombre_sp, parametros),
+                                          lambda: self._consultar_sp(nombre_sp, parametros))
+
+    async def _consultar_sp(self, nombre_sp, parametros):
+        """SP de lectura: ejecutarlo y guardar el resultado si tuvo exito."""
+        generacion = self.cache_sp.generacion(nombre_sp)
+        exito, datos = await self._llamar_sp(nombre_sp, parametros)
+        if exito:
+            self.cache_sp.guardar(nombre_sp, parametros, datos, generacion)
+        return (exito, datos)
+
+    async def _llamar_sp(self, nombre_sp, parametros):
+        """POST /api/procedimientos/ejecutarsp y decodificar p_resultado."""
+        try:
+            respuesta = await self._peticion('POST', f"{self.base_url}/api/procedimientos/ejecutarsp",
+                                             'sp', f"SP {nombre_sp}",
+                                             reintentar=es_sp_lectura(nombre_sp),
+                                             json=self.sync._payload_sp(nombre_sp, parametros))
+            # El resultado (y el texto JSON de p_resultado) puede ser grande: en un hilo
+            return await asyncio.to_thread(self.sync._resultado_sp, _exito(respuesta), respuesta.content)
+
+        except requests.RequestException as ex:
+            return (False, f"Error de conexion: {ex}")
+        except Exception as ex:
+            return (False, f"Error procesando respuesta: {ex}")
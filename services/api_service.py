@@ -4,14 +4,211 @@ api_service.py - Servicio generico que consume la API REST.
 Contiene los 4 metodos CRUD (Listar, Crear, Actualizar, Eliminar)
 que se reutilizan en todos los Blueprints/rutas.
 Cada metodo retorna los datos o una tupla (exito, mensaje).
+
+Todas las peticiones salen por el pool de conexiones compartido
+(services/http_pool.py), asi que las conexiones TCP a la API se
+reutilizan entre peticiones y entre Blueprints.
 """
 
 # requests: libreria de Python para hacer peticiones HTTP (GET, POST, PUT, DELETE)
 import requests
 
+# time.sleep(): espera entre reintentos
+import time
+
+# json: arma la clave de las lecturas agrupadas de SP
+import json
+
+# closing / islice: recorrer solo una parte de un generador y cerrarlo despues
+from contextlib import closing
+from itertools import islice
+
+# quote: codifica el valor de la clave para usarlo dentro de la URL (ver segmento_clave)
+from urllib.parse import quote
+
 # API_BASE_URL: URL base de la API, importada desde config.py (ej: "http://localhost:5034")
 from config import API_BASE_URL
 
+# pool: pool de conexiones HTTP compartido por todas las instancias de ApiService
+from services.http_pool import pool
+
+# en_paralelo: ejecuta varias llamadas independientes al mismo tiempo
+# ejecutor: pool de hilos donde se refrescan los listados vencidos
+from services.concurrencia import en_paralelo, ejecutor
+
+# cache_tablas: cache TTL/LRU de listados, compartido por todas las instancias
+# cache_sp: cache de los resultados de los SP de solo lectura
+# FRESCO / VIEJO: estados de un listado guardado (ver services/cache.py)
+from services.cache import cache_tablas, cache_sp, FRESCO, VIEJO
+
+# marcar_desactualizado: avisa a base.html que se sirvio un respaldo
+from services.avisos import marcar_desactualizado
+
+# monitor: estado de la API segun las sondas en segundo plano
+# ApiCaida: error que se lanza sin ir a la API cuando se sabe que esta caida
+from services.monitor_salud import monitor, ApiCaida
+
+# circuitos: un circuit breaker por endpoint
+# CircuitoAbierto: error que se lanza sin ir a la API mientras el circuito esta abierto
+# espera_reintento / es_sp_lectura: espera con jitter y SP que se pueden reintentar
+# ESTADOS_REINTENTABLES: codigos HTTP de API no disponible (502, 503, 504)
+from services.resiliencia import (
+    circuitos, CircuitoAbierto, espera_reintento, es_sp_lectura, ESTADOS_REINTENTABLES
+)
+
+# decodificador: JSON rapido (orjson si esta instalado) con medicion de tiempos
+from services.json_rapido import decodificador
+
+# single_flight: agrupa lecturas identicas simultaneas en una sola peticion
+from services.single_flight import single_flight
+
+# paginar: extrae una pagina (offset o cursor) de una lista de registros
+# Pagina: resultado de una consulta paginada (se arma directo en las paginas profundas)
+from services.paginacion import paginar, Pagina
+
+# filas_listado / filas_sp: leen las filas de una respuesta JSON a medida que llega
+from services.json_flujo import filas_listado, filas_sp
+
+# indices / SIN_NOMBRE: indices clave → nombre de las tablas de referencia
+from services.indices import indices, SIN_NOMBRE
+
+# sugerencias: busqueda por prefijo/subcadena para los campos typeahead
+from services.sugerencias import sugerencias
+
+# Indices invertidos de las paginas de listado (?q=...)
+from services.busqueda import busqueda
+
+# traza_actual / registrar_cache: llamadas y aciertos del cache de la peticion actual
+from services.traza import traza_actual, registrar_cache
+
+# metricas: duracion y errores de cada llamada a la API (GET /metrics)
+from services.metricas import metricas
+
+# compactar: listado como Tabla (columnas compartidas + una tupla por fila)
+# copiar: comparte las Tabla (inmutables) y copia las listas
+from services.filas import compactar, copiar
+
+# Tablas cuyo cache debe invalidarse cuando un SP de escritura termina con exito,
+# SP de lectura que invalida cada SP de escritura, tablas que lee cada SP de lectura
+# y tamano de pagina por defecto
+from config import SP_TABLAS_AFECTADAS, SP_INVALIDA, SP_TABLAS_LEIDAS, PAGINA_TAMANO
+
+# Filas maximas que se recorren para llegar a una pagina de una tabla sin cache
+from config import PAGINA_FILAS_MAXIMAS
+
+# Timeouts por operacion y numero de reintentos de las lecturas
+from config import API_TIMEOUTS, API_REINTENTOS
+
+# Lectura por partes: bytes por paso y desde cuantas filas se usa en listar_pagina
+from config import FLUJO_TAMANO_TROZO, FLUJO_DESDE_FILAS
+
+# Si la barra de las claves viaja como %2F (ver segmento_clave)
+from config import API_CLAVE_BARRA_CODIFICADA
+
+
+def segmento_clave(valor):
+    """
+    Valor de una clave listo para ir como ultimo segmento de la URL de la API.
+
+    Codifica los caracteres especiales ('?', '#', espacios...), que ASP.NET
+    Core decodifica. La barra se envia tal cual salvo con
+    API_CLAVE_BARRA_CODIFICADA: ASP.NET Core entrega %2F sin decodificar.
+
+    Ejemplo: 'PR 01' → 'PR%2001'; '/home' → '/home' (o '%2Fhome')
+    """
+    return quote(str(valor), safe='' if API_CLAVE_BARRA_CODIFICADA else '/')
+
+
+# ══════════════════════════════════════════════
+# REGLAS DE UNA PETICION
+# ══════════════════════════════════════════════
+
+class Intentos:
+    """
+    Intentos de una peticion a la API con las reglas comunes a ApiService y
+    AsyncApiService: monitor de salud, circuit breaker del endpoint,
+    reintentos de las lecturas y metricas. Cada servicio solo pone el
+    cliente HTTP (requests o httpx) y la forma de esperar entre intentos.
+
+    Uso:
+        intentos = Intentos(salud, circuitos, metodo, url, endpoint, reintentar)
+        for intento in intentos:                 # ApiCaida / CircuitoAbierto
+            inicio = time.perf_counter()
+            try:
+                respuesta = ...
+            except <error de red> as ex:
+                if not intentos.fallo(ex, inicio):
+                    raise
+            else:
+                if intentos.terminar(respuesta.status_code, inicio):
+                    return respuesta
+            time.sleep(intentos.espera(intento))
+
+    Metodos:
+        fallo(ex, inicio)          → registra un error de red; True si queda otro intento
+        error()                    → error inesperado: libera el circuito (si era la prueba)
+        terminar(estado, inicio)   → registra la respuesta; True si se retorna
+        espera(intento)            → segundos antes del siguiente intento
+    """
+
+    __slots__ = ('_salud', '_circuito', '_metodo', '_endpoint', '_total', '_intento')
+
+    def __init__(self, salud, circuitos, metodo, url, endpoint, reintentar):
+        # El monitor de salud sabe que la API esta caida: fallar sin esperar el timeout
+        if salud.caida() and url.startswith(salud.base_url):
+            raise ApiCaida("La API no responde (detectado por el monitor de salud).")
+        self._salud = salud
+        self._circuito = circuitos.de(endpoint)
+        self._metodo = metodo
+        self._endpoint = endpoint
+        self._total = 1 + (API_REINTENTOS if reintentar else 0)
+        self._intento = 0
+
+    def __iter__(self):
+        for intento in range(self._total):
+            if not self._circuito.permitir():
+                raise CircuitoAbierto(f"Circuito abierto para {self._endpoint}: "
+                                      f"la API fallo varias veces seguidas.")
+            self._intento = intento
+            yield intento
+
+    def _ultimo(self):
+        return self._intento + 1 >= self._total
+
+    def fallo(self, ex, inicio):
+        """La API no respondio (error de red). Retorna True si se debe reintentar."""
+        metricas.llamada_api(self._metodo, self._endpoint, None,
+                             time.perf_counter() - inicio, type(ex).__name__)
+        self._circuito.registrar_fallo()
+        # Adelantar la proxima sonda para detectar la caida cuanto antes
+        self._salud.avisar_fallo()
+        return not self._ultimo()
+
+    def error(self):
+        """Error inesperado (o peticion cancelada): cuenta como fallo del circuito."""
+        self._circuito.registrar_fallo()
+
+    def terminar(self, estado, inicio):
+        """
+        La API respondio con el codigo 'estado'.
+
+        Retorna True si la respuesta se entrega: cualquier codigo que no sea
+        502/503/504 (un 404 o un 500 por datos invalidos no son una falla del
+        servicio), o el ultimo intento. False: se reintenta.
+        """
+        # Con stream=True la duracion llega hasta los encabezados, sin el cuerpo
+        metricas.llamada_api(self._metodo, self._endpoint, estado, time.perf_counter() - inicio)
+        if estado not in ESTADOS_REINTENTABLES:
+            self._circuito.registrar_exito()
+            return True
+        self._circuito.registrar_fallo()
+        return self._ultimo()
+
+    @staticmethod
+    def espera(intento):
+        """Segundos antes del intento siguiente (espera exponencial aleatoria)."""
+        return espera_reintento(intento)
+
 
 # Clase que encapsula las 4 operaciones CRUD contra la API REST.
 # Se instancia en cada Blueprint con: api = ApiService()
@@ -20,10 +217,31 @@ class ApiService:
     Servicio generico para consumir la API REST.
 
     Metodos:
-        listar(tabla, limite)           → lista de diccionarios
+        listar(tabla, limite)           → Tabla (filas de solo lectura, ver services/filas.py)
+        listar_many(consultas)          → lista de listas (consultas concurrentes)
+        listar_pagina(tabla, clave,...) → Pagina (registros de una pagina + enlaces, con busqueda ?q=)
+        listar_flujo(tabla, limite)     → generador de registros (lectura por partes)
+        obtener(tabla, clave, valor)    → diccionario del registro o None
+        listar_por(tabla, campo, valor) → lista de registros con ese valor en el campo
+        en_paralelo(*funciones)         → lista de resultados (llamadas concurrentes)
+        nombre(tabla, clave)            → nombre para mostrar de una clave foranea (O(1))
+        mapa_nombres(tabla)             → clave → nombre para los templates
+        opciones_nombres(tabla)         → lista [(clave, nombre), ...] para selects
+        buscar(tabla, consulta)         → lista de {valor, texto} (typeahead)
+        preparar(tabla)                 → descarga e indexa la tabla antes de recibir trafico
         crear(tabla, datos, ...)        → (bool, str)
         actualizar(tabla, clave, ...)   → (bool, str)
         eliminar(tabla, clave, valor)   → (bool, str)
+        ejecutar_sp(nombre_sp, params)  → (bool, datos_o_mensaje)
+        ejecutar_sp_flujo(nombre_sp, ...) → generador de filas de un SP de lectura
+        estadisticas_pool()             → dict con aciertos/fallos del pool
+        estadisticas_cache()            → dict con aciertos/fallos del cache
+        estadisticas_cache_sp()         → dict con aciertos/fallos del cache de SP
+        estadisticas_json()             → dict con backend y tiempos de decodificacion
+        estado_salud()                  → dict con disponibilidad y latencias de la API
+        estado_circuitos()              → dict con el estado del circuito de cada endpoint
+        estadisticas_indices()          → dict con el estado de los indices de nombres
+        estadisticas_busqueda()         → dict con el estado de los indices de busqueda
     """
 
     # Constructor: se ejecuta al crear una instancia con ApiService()
@@ -31,49 +249,795 @@ class ApiService:
         # Guarda la URL base como atributo de la instancia para usarla en todos los metodos
         self.base_url = API_BASE_URL
 
+        # Pool de conexiones compartido: todas las instancias usan el mismo objeto
+        self.http = pool
+
+        # Cache de listados compartido (persona, empresa, producto...)
+        self.cache = cache_tablas
+
+        # Cache de los SP de solo lectura (listado y consulta de facturas)
+        self.cache_sp = cache_sp
+
+        # Monitor de salud compartido: permite fallar rapido si la API esta caida
+        self.salud = monitor
+
+        # Circuit breakers por endpoint, compartidos por todas las instancias
+        self.circuitos = circuitos
+
+        # Lecturas en curso: los hilos que piden lo mismo a la vez comparten la respuesta
+        self.single_flight = single_flight
+
+        # Decodificador JSON compartido (backend configurable y tiempos por llamada)
+        self.decodificador = decodificador
+
+        # Indices clave → nombre (persona, empresa, producto, cliente, vendedor)
+        self.nombres = indices
+
+        # Indices de busqueda de los campos typeahead (producto, persona, empresa)
+        self.sugerencias = sugerencias
+
+        # Indices invertidos para buscar en las paginas de listado (todas las tablas CRUD)
+        self.busqueda = busqueda
+
+    # ──────────────────────────────────────────────
+    # SESION HTTP DEL HILO ACTUAL
+    # Reutiliza las conexiones abiertas del pool (keep-alive)
+    # en lugar de abrir una conexion TCP nueva por peticion.
+    # ──────────────────────────────────────────────
+    def sesion(self):
+        """Retorna la requests.Session del hilo actual, conectada al pool compartido."""
+        return self.http.sesion()
+
+    def _peticion(self, metodo, url, operacion, endpoint, reintentar=False, **kwargs):
+        """
+        Hace una peticion HTTP a la API por el pool compartido.
+
+        - Si el monitor de salud sabe que la API esta caida, lanza ApiCaida
+          sin esperar el timeout.
+        - Si el circuito del endpoint esta abierto, lanza CircuitoAbierto.
+        - Usa el timeout (conexion, lectura) de la operacion (API_TIMEOUTS).
+        - Si reintentar es True (solo lecturas), reintenta los errores de red
+          y las respuestas 502/503/504 con espera exponencial aleatoria.
+
+        Ambos errores son requests.ConnectionError, asi los metodos que la
+        llaman usan su manejo de errores de siempre (respaldo, mensaje).
+
+        Args:
+            metodo:     'GET', 'POST', 'PUT' o 'DELETE'
+            url:        URL completa
+            operacion:  clave de API_TIMEOUTS ('listar', 'obtener', 'escribir', 'sp')
+            endpoint:   nombre del circuito (ej: 'GET /api/producto')
+            reintentar: True para peticiones idempotentes
+
+        Returns:
+            requests.Response (puede ser 5xx si se agotaron los reintentos).
+        """
+        intentos = Intentos(self.salud, self.circuitos, metodo, url, endpoint, reintentar)
+        kwargs.setdefault('timeout', API_TIMEOUTS[operacion])
+        traza = traza_actual()
+
+        for intento in intentos:
+            inicio = time.perf_counter()
+            try:
+                with self.http.llamada():
+                    if traza is None:
+                        respuesta = self.sesion().request(metodo, url, **kwargs)
+                    else:
+                        respuesta = self._peticion_trazada(traza, metodo, url, endpoint, kwargs)
+            except requests.RequestException as ex:
+                if not intentos.fallo(ex, inicio):
+                    raise
+            except Exception:
+                # Error inesperado: liberar el circuito (si era la prueba) y propagar
+                intentos.error()
+                raise
+            else:
+                if intentos.terminar(respuesta.status_code, inicio):
+                    return respuesta
+                # Se va a reintentar: liberar la conexion de esta respuesta
+                respuesta.close()
+            time.sleep(intentos.espera(intento))
+
+    def _peticion_trazada(self, traza, metodo, url, endpoint, kwargs):
+        """Hace la peticion y la registra en la traza de la peticion actual (services/traza.py)."""
+        # Descartar lo que el hilo tardo en abrir conexiones en peticiones anteriores
+        self.http.segundos_conexion()
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.sesion().request(metodo, url, **kwargs)
+        except requests.RequestException as ex:
+            traza.llamada(metodo, endpoint, conexion=self.http.segundos_conexion(),
+                          total=time.perf_counter() - inicio, error=type(ex).__name__)
+            raise
+        total = time.perf_counter() - inicio
+        conexion = self.http.segundos_conexion()
+        if kwargs.get('stream'):
+            # Cuerpo sin leer: el tamano solo se conoce por el encabezado
+            tamano = int(respuesta.headers.get('Content-Length', 0)) or None
+        else:
+            tamano = len(respuesta.content)
+        # elapsed: desde el envio (incluida la conexion) hasta los encabezados de la respuesta
+        traza.llamada(metodo, endpoint, respuesta.status_code, tamano, conexion,
+                      respuesta.elapsed.total_seconds() - conexion, total)
+        return respuesta
+
+    def _json(self, respuesta):
+        """Decodifica el cuerpo de la respuesta directamente desde sus bytes."""
+        return self._decodificar(respuesta.content, respuesta)
+
+    # ──────────────────────────────────────────────
+    # DECODIFICAR RESPUESTAS
+    # Reciben el cuerpo (bytes), no la respuesta: AsyncApiService los usa
+    # con las respuestas de httpx y los ejecuta en un hilo, fuera del bucle.
+    # ──────────────────────────────────────────────
+    def _decodificar(self, contenido, respuesta=None):
+        """
+        Decodifica un cuerpo JSON.
+
+        Usa el decodificador compartido (orjson si esta instalado) y mide el
+        tiempo de cada llamada. Un JSON invalido se reporta como
+        requests.exceptions.InvalidJSONError (una RequestException), igual
+        que hacia respuesta.json(), para que los metodos lo traten como error.
+        """
+        try:
+            return self.decodificador.decodificar(contenido)
+        except ValueError as ex:
+            raise requests.exceptions.InvalidJSONError(f"Respuesta JSON invalida: {ex}", response=respuesta)
+
+    def _registros(self, contenido):
+        """
+        Cuerpo de un listado → Tabla compacta.
+
+        La API retorna: { "datos": [...], "mensaje": "..." }
+        compactar(): los nombres de las columnas se guardan una vez, no en cada fila
+        """
+        return compactar(self._decodificar(contenido).get("datos", []))
+
+    def _resultado_sp(self, exito, contenido):
+        """
+        Cuerpo de la respuesta de ejecutarsp → (exito, datos_o_mensaje).
+
+        Si el SP retorna p_resultado se entrega su contenido (decodificado si
+        llega como texto JSON); si no, la respuesta completa.
+        """
+        contenido = self._decodificar(contenido)
+        if not exito:
+            return (False, contenido.get("mensaje", "Error al ejecutar el procedimiento."))
+
+        resultados = contenido.get("resultados", [])
+        if resultados:
+            # SQL Server retorna "@p_resultado", PostgreSQL retorna "p_resultado"
+            p_resultado = resultados[0].get("p_resultado") or resultados[0].get("@p_resultado")
+            if p_resultado is not None:
+                if isinstance(p_resultado, str):
+                    # p_resultado es un texto JSON dentro del JSON: se decodifica con el mismo backend
+                    return (True, self.decodificador.decodificar(p_resultado))
+                return (True, p_resultado)
+
+        return (True, contenido)
+
+    @staticmethod
+    def _payload_sp(nombre_sp, parametros):
+        """Cuerpo del POST /api/procedimientos/ejecutarsp."""
+        payload = {"nombreSP": nombre_sp}
+        if parametros:
+            payload.update(parametros)
+        return payload
+
+    def _invalidar_tabla(self, tabla):
+        """Descarta los listados de la tabla y los resultados de los SP que la leen."""
+        self.cache.invalidar(tabla)
+        for nombre_sp, tablas in SP_TABLAS_LEIDAS.items():
+            if tabla in tablas:
+                self.cache_sp.invalidar(nombre_sp)
+
+    # ──────────────────────────────────────────────
+    # CLAVES DE SINGLE-FLIGHT
+    # Llevan la generacion del cache: una peticion que empieza despues de
+    # una escritura no se une a un GET que empezo antes (y que puede traer
+    # los datos de antes de la escritura). Tambien las usa AsyncApiService.
+    # ──────────────────────────────────────────────
+    def _clave_listado(self, tabla, limite):
+        """Clave de GET /api/{tabla} con la generacion actual de la tabla."""
+        return ('listar', self.base_url, tabla, limite, self.cache.generacion(tabla))
+
+    def _clave_listar_por(self, tabla, nombre_campo, valor):
+        """Clave de GET /api/{tabla}/{campo}/{valor} con la generacion actual de la tabla."""
+        return ('listar_por', self.base_url, tabla, nombre_campo, str(valor),
+                self.cache.generacion(tabla))
+
+    def _clave_sp(self, nombre_sp, parametros):
+        """Clave de un SP de lectura con la generacion actual de su cache."""
+        return ('sp', self.base_url, nombre_sp,
+                json.dumps(parametros or {}, sort_keys=True, default=str),
+                self.cache_sp.generacion(nombre_sp))
+
+    # ──────────────────────────────────────────────
+    # DESPUES DE UNA ESCRITURA EXITOSA
+    # Tambien los usa AsyncApiService (services/api_async.py).
+    # Los indices de nombres y de busqueda se modifican en el momento; la
+    # generacion del cache despues de invalidar le indica a la busqueda que
+    # descarte los indices armados con listados anteriores a la escritura.
+    # ──────────────────────────────────────────────
+    def _registrar_creacion(self, tabla, datos):
+        """Invalida el cache de la tabla y agrega el registro a los indices."""
+        self._invalidar_tabla(tabla)
+        self.nombres.al_crear(tabla, datos)
+        self.busqueda.al_crear(tabla, datos, self.cache.generacion(tabla), self.nombre)
+
+    def _registrar_actualizacion(self, tabla, nombre_clave, valor_clave, datos):
+        """Invalida el cache de la tabla y actualiza el registro en los indices."""
+        self._invalidar_tabla(tabla)
+        self.nombres.al_actualizar(tabla, nombre_clave, valor_clave, datos)
+        self.busqueda.al_actualizar(tabla, nombre_clave, valor_clave, datos,
+                                    self.cache.generacion(tabla), self.nombre)
+
+    def _registrar_eliminacion(self, tabla, nombre_clave, valor_clave):
+        """Invalida el cache de la tabla y quita el registro de los indices."""
+        self._invalidar_tabla(tabla)
+        self.nombres.al_eliminar(tabla, nombre_clave, valor_clave)
+        self.busqueda.al_eliminar(tabla, nombre_clave, valor_clave, self.cache.generacion(tabla))
+
+    def estadisticas_pool(self):
+        """Retorna las estadisticas de reutilizacion de conexiones del pool."""
+        return self.http.estadisticas()
+
+    def estadisticas_cache(self):
+        """Retorna las estadisticas del cache de listados."""
+        return self.cache.estadisticas()
+
+    def estadisticas_cache_sp(self):
+        """Retorna las estadisticas del cache de stored procedures."""
+        return self.cache_sp.estadisticas()
+
+    def estadisticas_json(self):
+        """Retorna el backend JSON en uso y el tiempo de cada decodificacion reciente."""
+        return self.decodificador.estadisticas()
+
+    def estado_salud(self):
+        """Retorna el estado de la API segun el monitor de salud (sin hacer peticiones)."""
+        return self.salud.estado()
+
+    def estadisticas_indices(self):
+        """Entradas, edad y reconstrucciones de cada indice de nombres."""
+        return self.nombres.estadisticas()
+
+    def estadisticas_busqueda(self):
+        """Filas, palabras y tiempo de consulta de los indices de busqueda."""
+        return self.busqueda.estadisticas()
+
+    def estado_circuitos(self):
+        """Retorna el estado del circuit breaker de cada endpoint usado."""
+        return self.circuitos.estado()
+
     # ──────────────────────────────────────────────
     # LISTAR: GET /api/{tabla}
     # Obtiene todos los registros de una tabla.
     # Opcionalmente limita la cantidad con ?limite=N
+    # Si la tabla tiene TTL en CACHE_TTL_TABLAS, el resultado se guarda
+    # en el cache y las siguientes llamadas no van a la API.
     # ──────────────────────────────────────────────
     def listar(self, tabla, limite=None):
         """
-        Consulta la API y retorna la lista de registros.
+        Consulta la API (o el cache) y retorna la lista de registros.
+
+        - Cache fresco: se retorna sin ir a la API.
+        - Cache viejo (ventana SWR): se retorna de inmediato y se refresca
+          en segundo plano.
+        - API caida: se retorna el ultimo listado exitoso (si lo hay) y se
+          marca la peticion para que base.html muestre un aviso.
 
         Args:
             tabla:  nombre de la tabla (ej: 'empresa')
             limite: cantidad maxima de registros (opcional)
 
         Returns:
-            Lista de diccionarios con los datos, o lista vacia si hay error.
+            Tabla con los datos (se lee como una lista de diccionarios de solo
+            lectura: fila['codigo'], fila.codigo), o lista vacia si hay error.
+            Para modificar una fila se arma un diccionario nuevo: {**fila, ...}
         """
+        # Buscar primero en el cache
+        registros = self._listado_en_cache(tabla, limite)
+        if registros is not None:
+            return registros
+
         try:
-            # Construir la URL del endpoint: ej → "http://localhost:5034/api/empresa"
-            url = f"{self.base_url}/api/{tabla}"
+            # Si otro hilo ya esta pidiendo este mismo listado, esperar su respuesta
+            # en lugar de hacer otra peticion igual (single-flight).
+            # copiar(): la Tabla es inmutable y se comparte; una lista se copia por hilo
+            return copiar(self.single_flight.ejecutar(
+                self._clave_listado(tabla, limite),
+                lambda: self._descargar_listado(tabla, limite)
+            ))
 
-            # Diccionario para los query params de la URL (ej: ?limite=5)
-            params = {}
-            # Solo agregar el parametro limite si el usuario lo proporciono
-            if limite:
-                params['limite'] = limite
+        # RequestException: captura cualquier error de conexion (timeout, DNS, servidor caido)
+        except requests.RequestException as ex:
+            return self._respaldo_listado(tabla, limite, ex)
 
-            # requests.get() hace una peticion HTTP GET a la URL indicada
-            # params se agrega automaticamente como query string (ej: ?limite=5)
-            respuesta = requests.get(url, params=params)
+    # ──────────────────────────────────────────────
+    # REGLAS DEL CACHE DE LISTADOS
+    # Tambien las usa AsyncApiService: solo cambia como se descarga.
+    # ──────────────────────────────────────────────
+    def _listado_en_cache(self, tabla, limite):
+        """
+        Listado guardado si esta fresco o viejo; None si hay que pedirlo a la API.
 
-            # .json() convierte el cuerpo de la respuesta de texto JSON a diccionario Python
-            datos_json = respuesta.json()
+        Un listado viejo (ventana SWR) se retorna igual y se refresca en
+        segundo plano (solo un hilo refresca cada listado).
+        """
+        registros, estado = self.cache.consultar(tabla, limite)
+        if estado == FRESCO:
+            registrar_cache(tabla, 'acierto')
+            return registros
+        if estado == VIEJO:
+            registrar_cache(tabla, 'viejo')
+            if self.cache.iniciar_refresco(tabla, limite):
+                ejecutor.submit(self._refrescar_listado, tabla, limite)
+            return registros
+        registrar_cache(tabla, 'fallo')
+        return None
 
-            # La API retorna: { "datos": [...], "mensaje": "..." }
-            # .get("datos", []) extrae la lista; si no existe la clave, retorna lista vacia
-            return datos_json.get("datos", [])
+    def _respaldo_listado(self, tabla, limite, ex):
+        """
+        La API no respondio: el ultimo listado exitoso (y el aviso de
+        base.html) o, si no hay, lista vacia para que el template muestre
+        "No se encontraron registros".
+        """
+        # Imprimir el error en la consola del servidor para depuracion
+        print(f"Error al listar {tabla}: {ex}")
+        respaldo = self.cache.respaldo(tabla, limite)
+        if respaldo is not None:
+            marcar_desactualizado(tabla)
+            return respaldo
+        return []
 
-        # RequestException: captura cualquier error de conexion (timeout, DNS, servidor caido)
+    def _registro_de_respaldo(self, tabla, nombre_clave, valor_clave, ex):
+        """La API no respondio: el registro del ultimo listado completo guardado, o None."""
+        print(f"Error al obtener {tabla} {nombre_clave}={valor_clave}: {ex}")
+        encontrado, registro = self.cache.buscar(tabla, nombre_clave, valor_clave,
+                                                 incluir_respaldo=True)
+        if encontrado:
+            marcar_desactualizado(tabla)
+            return registro
+        return None
+
+    def _descargar_listado(self, tabla, limite):
+        """
+        Hace el GET /api/{tabla} y guarda el resultado en el cache.
+
+        Lanza requests.RequestException si la API no responde o responde
+        con un error 5xx (para que listar() use el respaldo).
+        """
+        # Leer la generacion antes de consultar: si hay una escritura mientras
+        # tanto, el cache descarta este resultado en lugar de guardar datos viejos
+        generacion = self.cache.generacion(tabla)
+
+        # Construir la URL del endpoint: ej → "http://localhost:5034/api/empresa"
+        url = f"{self.base_url}/api/{tabla}"
+
+        # Diccionario para los query params de la URL (ej: ?limite=5)
+        params = {}
+        # Solo agregar el parametro limite si el usuario lo proporciono
+        if limite:
+            params['limite'] = limite
+
+        # GET a la URL indicada, usando una conexion del pool.
+        # params se agrega automaticamente como query string (ej: ?limite=5)
+        respuesta = self._peticion('GET', url, 'listar', f"GET /api/{tabla}",
+                                   reintentar=True, params=params)
+
+        # Un error 5xx significa que la API (o la BD) fallo: se trata como caida
+        if respuesta.status_code >= 500:
+            respuesta.raise_for_status()
+
+        # Convierte el cuerpo de la respuesta (bytes JSON) en una Tabla de registros
+        registros = self._registros(respuesta.content)
+
+        # Guardar en el cache solo las respuestas exitosas.
+        # len(respuesta.content) es el tamano en bytes, usado para el limite de memoria.
+        if respuesta.ok:
+            self.cache.guardar(tabla, limite, registros,
+                               len(respuesta.content), generacion)
+
+        return registros
+
+    def _refrescar_listado(self, tabla, limite):
+        """Refresca un listado vencido en segundo plano (stale-while-revalidate)."""
+        try:
+            self.single_flight.ejecutar(
+                self._clave_listado(tabla, limite),
+                lambda: self._descargar_listado(tabla, limite)
+            )
+        except requests.RequestException as ex:
+            # Se sigue sirviendo el listado viejo; el proximo acceso lo reintenta
+            print(f"Error al refrescar {tabla}: {ex}")
+        finally:
+            self.cache.terminar_refresco(tabla, limite)
+
+    # ──────────────────────────────────────────────
+    # LISTAR POR PARTES (streaming)
+    # Lee el JSON a medida que llega del socket y entrega las filas una por
+    # una, sin tener el cuerpo completo ni la lista entera en memoria.
+    # ──────────────────────────────────────────────
+    def listar_flujo(self, tabla, limite=None):
+        """
+        Generador con los registros de la tabla, leidos por partes.
+
+        Si el listado esta en el cache (fresco o viejo) se recorre ese.
+        Si la API falla antes de empezar, se recorre el respaldo (si hay).
+        Los registros leidos por partes no se guardan en el cache.
+
+        A diferencia de listar(), los errores se lanzan (requests.RequestException
+        o ValueError si el JSON llega mal): sin respaldo, si la API no responde
+        o responde con error; y siempre que la respuesta se corte a mitad.
+        Quien envia las filas al navegador debe poder distinguir una tabla
+        vacia o incompleta de una exportacion correcta.
+
+        Ejemplo:
+            for fila in api.listar_flujo('producto'):
+                escritor.writerow(fila)
+        """
+        registros, estado = self.cache.consultar(tabla, limite)
+        if estado is not None:
+            registrar_cache(tabla, 'acierto' if estado == FRESCO else 'viejo')
+            yield from registros
+            return
+        registrar_cache(tabla, 'fallo')
+
+        url = f"{self.base_url}/api/{tabla}"
+        params = {'limite': limite} if limite else {}
+        try:
+            # stream=True: requests no descarga el cuerpo; se lee con iter_content()
+            respuesta = self._peticion('GET', url, 'listar', f"GET /api/{tabla}",
+                                       reintentar=True, params=params, stream=True)
+            if respuesta.status_code >= 500:
+                respuesta.close()
+                respuesta.raise_for_status()
         except requests.RequestException as ex:
-            # Imprimir el error en la consola del servidor para depuracion
             print(f"Error al listar {tabla}: {ex}")
-            # Retornar lista vacia para que el template muestre "No se encontraron registros"
+            respaldo = self.cache.respaldo(tabla, limite)
+            if respaldo is None:
+                raise
+            marcar_desactualizado(tabla)
+            yield from respaldo
+            return
+
+        # with: la conexion vuelve al pool (o se cierra) aunque no se lean todas las filas
+        with respuesta:
+            # 4xx (ej: la tabla no existe): no es una tabla vacia
+            respuesta.raise_for_status()
+            try:
+                yield from filas_listado(respuesta.iter_content(FLUJO_TAMANO_TROZO))
+            except (requests.RequestException, ValueError) as ex:
+                # La conexion se corto a mitad de la respuesta: las filas leidas no estan completas
+                print(f"Error al leer {tabla} por partes: {ex}")
+                raise
+
+    # ──────────────────────────────────────────────
+    # LISTAR UNA PAGINA
+    # Tablas con cache: la pagina sale del listado en memoria (se puede ordenar).
+    # Tablas sin cache: solo pide a la API las filas hasta el final de la pagina,
+    # sin orden y hasta PAGINA_FILAS_MAXIMAS de profundidad.
+    # Con busqueda (?q=): el indice invertido elige las filas del listado del cache.
+    # ──────────────────────────────────────────────
+    def listar_pagina(self, tabla, clave, pagina=1, tamano=PAGINA_TAMANO, orden=None,
+                      direccion='asc', limite=None, despues=None, antes=None, buscar=None):
+        """
+        Retorna una pagina de registros de la tabla.
+
+        Args:
+            tabla:     nombre de la tabla
+            clave:     nombre del campo clave primaria (desempata el orden)
+            pagina:    numero de pagina (1, 2, 3...)
+            tamano:    registros por pagina
+            orden:     columna por la que se ordena (None = orden de la API);
+                       se ignora en las tablas sin cache
+            direccion: 'asc' o 'desc'
+            limite:    limite total de registros elegido por el usuario
+            despues / antes: cursores de la pagina siguiente / anterior
+            buscar:    texto buscado (solo filas con todas sus palabras)
+
+        Returns:
+            Objeto Pagina (ver services/paginacion.py). pagina.buscable y
+            pagina.ordenable indican si el template muestra el campo Buscar
+            y los encabezados ordenables.
+
+        Ejemplo:
+            pagina = api.listar_pagina('producto', 'codigo', **parametros_pagina(request.args))
+        """
+        ordenable = self.cache.ttl(tabla) > 0
+        if not ordenable:
+            # Sin cache, ordenar obligaria a descargar la tabla completa
+            orden = despues = antes = None
+        resultado = self._listar_pagina(tabla, clave, pagina, tamano, orden, direccion,
+                                        limite, despues, antes, buscar)
+        resultado.buscable = tabla in self.busqueda.tablas()
+        resultado.ordenable = ordenable
+        return resultado
+
+    def _listar_pagina(self, tabla, clave, pagina, tamano, orden, direccion,
+                       limite, despues, antes, buscar):
+        """Pagina de la tabla (ver listar_pagina)."""
+        if buscar and tabla in self.busqueda.tablas():
+            return self._buscar_pagina(tabla, clave, buscar, pagina, tamano, orden,
+                                       direccion, limite, despues, antes)
+
+        if self.cache.ttl(tabla) > 0:
+            # Las tablas con cache ya tienen todas las filas en memoria (y se pueden ordenar)
+            registros = self.listar(tabla, limite)
+            return paginar(registros, clave, pagina=pagina, tamano=tamano, orden=orden,
+                           direccion=direccion, limite=limite, despues=despues, antes=antes)
+
+        # Sin cache cada pagina lee todas las anteriores: no mas alla de PAGINA_FILAS_MAXIMAS
+        ultima = max(PAGINA_FILAS_MAXIMAS // tamano, 1)
+        pagina = min(pagina, ultima)
+
+        # Pedir solo hasta el final de esta pagina, +1 para saber si hay siguiente
+        pedir = pagina * tamano + 1
+        if limite:
+            pedir = min(pedir, limite)
+
+        if pedir > FLUJO_DESDE_FILAS:
+            # Pagina profunda: leer por partes, saltar las filas anteriores
+            # y guardar solo las de esta pagina (+1 para saber si hay siguiente)
+            inicio = (pagina - 1) * tamano
+            try:
+                with closing(self.listar_flujo(tabla, pedir)) as filas:
+                    registros = list(islice(filas, inicio, inicio + tamano + 1))
+            except (requests.RequestException, ValueError) as ex:
+                # Igual que listar(): la pagina muestra "No se encontraron registros"
+                print(f"Error al listar {tabla} (pagina {pagina}): {ex}")
+                registros = []
+            resultado = Pagina(registros[:tamano], pagina, tamano, None, direccion, limite,
+                               hay_anterior=pagina > 1, hay_siguiente=len(registros) > tamano)
+        else:
+            resultado = paginar(self.listar(tabla, pedir), clave, pagina=pagina, tamano=tamano,
+                                direccion=direccion, limite=limite)
+
+        # La ultima pagina permitida no tiene enlace a la siguiente
+        if pagina == ultima:
+            resultado.hay_siguiente = False
+        return resultado
+
+    def _buscar_pagina(self, tabla, clave, buscar, pagina, tamano, orden,
+                       direccion, limite, despues, antes):
+        """
+        Pagina de las filas que coinciden con la busqueda.
+
+        Sin orden solo se toman del indice las filas de esta pagina (+1 para
+        saber si hay siguiente). Con orden se toman todas las coincidencias
+        y paginar() elige la pagina. Los enlaces conservan ?q= (filtros).
+        """
+        filtros = {'q': buscar}
+        # La version se lee antes que el listado (ver BusquedaListados)
+        version = self.cache.version(tabla)
+        registros = self.listar(tabla)
+        if orden:
+            registros = self.busqueda.buscar(tabla, buscar, registros, limite=limite,
+                                             version=version, nombre=self.nombre)
+            return paginar(registros, clave, pagina=pagina, tamano=tamano, orden=orden,
+                           direccion=direccion, limite=limite, despues=despues, antes=antes,
+                           filtros=filtros)
+
+        inicio = (pagina - 1) * tamano
+        registros = self.busqueda.buscar(tabla, buscar, registros, saltar=inicio,
+                                         cantidad=tamano + 1, limite=limite,
+                                         version=version, nombre=self.nombre)
+        return Pagina(registros[:tamano], pagina, tamano, None, direccion, limite,
+                      hay_anterior=pagina > 1, hay_siguiente=len(registros) > tamano,
+                      filtros=filtros)
+
+    # ──────────────────────────────────────────────
+    # LISTAR VARIAS TABLAS A LA VEZ
+    # Lanza todos los GET al mismo tiempo en el pool de hilos
+    # y retorna los resultados juntos, en el mismo orden.
+    # ──────────────────────────────────────────────
+    def listar_many(self, consultas):
+        """
+        Lista varias tablas de forma concurrente.
+
+        Args:
+            consultas: lista de nombres de tabla o de tuplas (tabla, limite)
+                       Ejemplo: ['persona', ('cliente', 10)]
+
+        Returns:
+            Lista con la lista de registros de cada consulta, en el mismo orden.
+
+        Ejemplo:
+            personas, empresas = api.listar_many(['persona', 'empresa'])
+        """
+        funciones = []
+        for consulta in consultas:
+            # Aceptar 'tabla' o ('tabla', limite)
+            tabla, limite = (consulta, None) if isinstance(consulta, str) else consulta
+            # tabla=tabla y limite=limite fijan los valores actuales dentro del lambda
+            funciones.append(lambda tabla=tabla, limite=limite: self.listar(tabla, limite))
+        return en_paralelo(funciones)
+
+    # ──────────────────────────────────────────────
+    # OBTENER: GET /api/{tabla}/{nombre_clave}/{valor_clave}
+    # Trae un solo registro por su clave primaria, sin descargar la tabla.
+    # Si el listado completo de la tabla esta en el cache, lo toma de ahi.
+    # ──────────────────────────────────────────────
+    def obtener(self, tabla, nombre_clave, valor_clave):
+        """
+        Obtiene un registro por su clave primaria.
+
+        Args:
+            tabla:        nombre de la tabla (ej: 'producto')
+            nombre_clave: nombre del campo clave (ej: 'codigo')
+            valor_clave:  valor de la clave (ej: 'PR001')
+
+        Returns:
+            Diccionario con el registro, o None si no existe o hay error.
+        """
+        # Busqueda O(1) en el listado completo guardado en el cache (si lo hay)
+        encontrado, registro = self.cache.buscar(tabla, nombre_clave, valor_clave)
+        if encontrado:
+            registrar_cache(tabla, 'acierto')
+            return registro
+
+        try:
+            # Ejemplo: "http://localhost:5034/api/producto/codigo/PR001"
+            url = f"{self.base_url}/api/{tabla}/{nombre_clave}/{segmento_clave(valor_clave)}"
+            respuesta = self._peticion('GET', url, 'obtener', f"GET /api/{tabla}/{nombre_clave}",
+                                       reintentar=True)
+
+            # 404 u otro error: el registro no existe o no se pudo consultar
+            if not respuesta.ok:
+                return None
+
+            # La API retorna la misma estructura que listar: { "datos": [ {...} ] }
+            datos = self._json(respuesta).get("datos", [])
+            return datos[0] if datos else None
+
+        except requests.RequestException as ex:
+            # API caida: buscar en el ultimo listado completo guardado
+            return self._registro_de_respaldo(tabla, nombre_clave, valor_clave, ex)
+
+    # ──────────────────────────────────────────────
+    # LISTAR POR CAMPO: GET /api/{tabla}/{nombre_campo}/{valor}
+    # Trae todos los registros con ese valor en el campo (filtro hecho por la API).
+    # Ejemplo: las lineas de una factura → listar_por('productosporfactura', 'fknumfactura', 7)
+    # ──────────────────────────────────────────────
+    def listar_por(self, tabla, nombre_campo, valor):
+        """
+        Lista los registros cuyo campo tiene el valor indicado.
+
+        A diferencia de obtener(), retorna todos los registros que coinciden
+        (el campo no tiene que ser la clave primaria).
+
+        Returns:
+            Tabla de filas de solo lectura, o lista vacia si no hay o hay error.
+            Las llamadas simultaneas iguales comparten la respuesta.
+        """
+        def descargar():
+            url = f"{self.base_url}/api/{tabla}/{nombre_campo}/{segmento_clave(valor)}"
+            respuesta = self._peticion('GET', url, 'listar', f"GET /api/{tabla}/{nombre_campo}",
+                                       reintentar=True)
+            # 404: ningun registro tiene ese valor
+            if not respuesta.ok:
+                return []
+            return self._registros(respuesta.content)
+
+        try:
+            return copiar(self.single_flight.ejecutar(
+                self._clave_listar_por(tabla, nombre_campo, valor), descargar
+            ))
+        except requests.RequestException as ex:
+            print(f"Error al listar {tabla} por {nombre_campo}={valor}: {ex}")
+            return []
+
+    # ──────────────────────────────────────────────
+    # EJECUTAR LLAMADAS ARBITRARIAS A LA VEZ
+    # Para mezclar listar() con ejecutar_sp() u otros metodos.
+    # ──────────────────────────────────────────────
+    def en_paralelo(self, *funciones):
+        """
+        Ejecuta varias funciones sin argumentos de forma concurrente.
+
+        Ejemplo:
+            (exito, datos), clientes = api.en_paralelo(
+                lambda: api.ejecutar_sp('sp_consultar_...', {...}),
+                lambda: api.listar('cliente'),
+            )
+
+        Returns:
+            Lista con el resultado de cada funcion, en el mismo orden.
+        """
+        return en_paralelo(funciones)
+
+    # ──────────────────────────────────────────────
+    # NOMBRES PARA MOSTRAR (indices clave → nombre)
+    # Resuelven claves foraneas sin descargar ni recorrer la tabla en cada
+    # peticion: el indice se arma una vez y las escrituras lo actualizan.
+    # ──────────────────────────────────────────────
+    def nombre(self, tabla, clave, defecto=SIN_NOMBRE):
+        """
+        Nombre para mostrar del registro de la tabla con esa clave.
+
+        Ejemplo:
+            api.nombre('persona', 'P001')   →  'Ana Lopez'
+            api.nombre('cliente', 3)        →  nombre de la persona del cliente 3
+        """
+        return self.nombres.nombre(tabla, clave, self._listado_completo, defecto)
+
+    def mapa_nombres(self, tabla):
+        """Vista clave → nombre de la tabla para el template (mapa.get(clave, defecto))."""
+        return self.nombres.mapa(tabla, self._listado_completo)
+
+    def opciones_nombres(self, tabla):
+        """Lista [(clave, nombre), ...] ordenada por nombre, para llenar un select."""
+        return self.nombres.opciones(tabla, self._listado_completo)
+
+    # ──────────────────────────────────────────────
+    # BUSCAR MIENTRAS SE ESCRIBE (typeahead)
+    # Busca en el listado guardado en el cache (o, en las tablas cuyo nombre
+    # esta en otra tabla, en su indice de nombres); los formularios piden solo las opciones que
+    # coinciden en lugar de recibir toda la tabla.
+    # ──────────────────────────────────────────────
+    def buscar(self, tabla, consulta, limite=None):
+        """
+        Opciones de la tabla que coinciden con lo escrito.
+
+        Args:
+            tabla:    tabla de BUSQUEDA_TABLAS (ej: 'producto')
+            consulta: texto escrito (ej: 'lap' encuentra 'Laptop')
+            limite:   cantidad maxima de opciones (opcional)
+
+        Returns:
+            Lista de {'valor': clave, 'texto': texto a mostrar}, o lista
+            vacia si la tabla no esta configurada o la API no responde.
+        """
+        if tabla not in self.sugerencias.tablas():
             return []
+        # La version se lee antes que el listado: si cambia mientras tanto, la
+        # proxima consulta reconstruye el indice en lugar de usar uno viejo
+        if self.nombres.via(tabla):
+            # cliente, vendedor: se busca por el nombre de su persona
+            version = self.nombres.version(tabla, self._listado_completo)
+            registros = self.nombres.listado(tabla, self._listado_completo)
+        else:
+            version = self.cache.version(tabla)
+            registros = self.listar(tabla)
+        return self.sugerencias.buscar(tabla, consulta, registros, limite, version)
+
+    def _listado_completo(self, tabla):
+        """
+        Listado completo de la tabla para construir su indice.
+
+        A diferencia de listar(), lanza requests.RequestException si la API
+        no responde, para no guardar un indice vacio.
+        """
+        registros, estado = self.cache.consultar(tabla, None)
+        if estado is not None:
+            return registros
+        return self.single_flight.ejecutar(
+            self._clave_listado(tabla, None),
+            lambda: self._descargar_listado(tabla, None)
+        )
+
+    def preparar(self, tabla):
+        """
+        Deja la tabla lista antes de recibir trafico (ver services/arranque.py).
+
+        Arma su indice de nombres y, si la tabla usa el cache
+        (CACHE_TTL_TABLAS), deja su listado completo guardado y arma su
+        indice de busqueda.
+
+        Returns:
+            True si quedo lista, False si la API no respondio.
+        """
+        nombres = self.nombres.preparar(tabla, self._listado_completo)
+        if tabla in self.busqueda.tablas():
+            # Si un indice ya descargo la tabla, esto la encuentra en el cache
+            try:
+                version = self.cache.version(tabla)
+                self.busqueda.preparar(tabla, self._listado_completo(tabla), version, self.nombre)
+            except requests.RequestException as ex:
+                print(f"Error al preparar {tabla}: {ex}")
+                return False
+        return nombres
 
     # ──────────────────────────────────────────────
     # CREAR: POST /api/{tabla}
@@ -103,18 +1067,24 @@ class ApiService:
             if campos_encriptar:
                 params['camposEncriptar'] = campos_encriptar
 
-            # requests.post() hace una peticion HTTP POST.
+            # POST (conexion reutilizada del pool).
             # json=datos: convierte el diccionario Python a JSON y lo envia en el cuerpo.
             # params: agrega los query params a la URL si existen.
-            respuesta = requests.post(url, json=datos, params=params)
+            respuesta = self._peticion('POST', url, 'escribir', f"POST /api/{tabla}",
+                                       json=datos, params=params)
 
             # Convertir la respuesta JSON a diccionario Python
-            contenido = respuesta.json()
+            contenido = self._json(respuesta)
 
             # Extraer el mensaje de la respuesta (ej: "Registro creado exitosamente.")
             # Si no viene el campo "mensaje", usar un texto por defecto
             mensaje = contenido.get("mensaje", "Operacion completada.")
 
+            # La tabla cambio: descartar sus listados y los SP que la leen,
+            # y agregar el registro al indice de nombres
+            if respuesta.ok:
+                self._registrar_creacion(tabla, datos)
+
             # respuesta.ok es True si el codigo HTTP esta entre 200-299 (exito)
             # Retorna una tupla: (True/False, "texto del mensaje")
             return (respuesta.ok, mensaje)
@@ -146,7 +1116,7 @@ class ApiService:
         try:
             # Construir la URL con la clave primaria en la ruta
             # Ejemplo: "http://localhost:5034/api/producto/codigo/PR001"
-            url = f"{self.base_url}/api/{tabla}/{nombre_clave}/{valor_clave}"
+            url = f"{self.base_url}/api/{tabla}/{nombre_clave}/{segmento_clave(valor_clave)}"
 
             # Diccionario para query params opcionales (encriptacion)
             params = {}
@@ -154,16 +1124,22 @@ class ApiService:
             if campos_encriptar:
                 params['camposEncriptar'] = campos_encriptar
 
-            # requests.put() hace una peticion HTTP PUT para modificar un recurso existente.
+            # PUT modifica un recurso existente.
             # json=datos: envia solo los campos que cambiaron (sin la clave primaria).
-            respuesta = requests.put(url, json=datos, params=params)
+            respuesta = self._peticion('PUT', url, 'escribir', f"PUT /api/{tabla}",
+                                       json=datos, params=params)
 
             # Convertir la respuesta JSON a diccionario Python
-            contenido = respuesta.json()
+            contenido = self._json(respuesta)
 
             # Extraer el mensaje de la API (ej: "Registro actualizado exitosamente.")
             mensaje = contenido.get("mensaje", "Operacion completada.")
 
+            # La tabla cambio: descartar sus listados y los SP que la leen,
+            # y actualizar el registro en el indice de nombres
+            if respuesta.ok:
+                self._registrar_actualizacion(tabla, nombre_clave, valor_clave, datos)
+
             # Retornar tupla (exito, mensaje) para que el Blueprint muestre la alerta
             return (respuesta.ok, mensaje)
 
@@ -190,18 +1166,23 @@ class ApiService:
         try:
             # Construir la URL con la clave primaria
             # Ejemplo: "http://localhost:5034/api/empresa/codigo/E001"
-            url = f"{self.base_url}/api/{tabla}/{nombre_clave}/{valor_clave}"
+            url = f"{self.base_url}/api/{tabla}/{nombre_clave}/{segmento_clave(valor_clave)}"
 
-            # requests.delete() hace una peticion HTTP DELETE para borrar el recurso.
+            # DELETE borra el recurso.
             # No necesita cuerpo JSON porque la clave ya va en la URL.
-            respuesta = requests.delete(url)
+            respuesta = self._peticion('DELETE', url, 'escribir', f"DELETE /api/{tabla}")
 
             # Convertir la respuesta JSON a diccionario Python
-            contenido = respuesta.json()
+            contenido = self._json(respuesta)
 
             # Extraer el mensaje de la API (ej: "Registro eliminado exitosamente.")
             mensaje = contenido.get("mensaje", "Operacion completada.")
 
+            # La tabla cambio: descartar sus listados y los SP que la leen,
+            # y quitar el registro del indice de nombres
+            if respuesta.ok:
+                self._registrar_eliminacion(tabla, nombre_clave, valor_clave)
+
             # Retornar tupla (exito, mensaje)
             return (respuesta.ok, mensaje)
 
@@ -217,38 +1198,114 @@ class ApiService:
         """
         Ejecuta un stored procedure via la API.
 
+        SP de solo lectura (sp_listar_*, sp_consultar_*): el resultado se
+        guarda por (SP, parametros) durante CACHE_TTL_SP segundos, y las
+        llamadas simultaneas iguales comparten una sola peticion (single-flight).
+        SP de escritura: al terminar con exito descartan los listados y los
+        resultados de SP que pudieron cambiar.
+
         Args:
             nombre_sp:   nombre del procedimiento
             parametros:  diccionario con los parametros del SP (sin nombreSP)
 
         Returns:
             Tupla (exito: bool, datos_o_mensaje)
+            Los datos pueden ser compartidos con otros hilos: no se deben modificar.
+        """
+        # Los SP de escritura nunca se agrupan ni se guardan: cada llamada debe ejecutarse
+        if not es_sp_lectura(nombre_sp):
+            exito, datos = self._llamar_sp(nombre_sp, parametros)
+            if exito:
+                self._invalidar_por_sp(nombre_sp, parametros)
+            return (exito, datos)
+
+        # SP de lectura: primero el cache (por SP y parametros)
+        datos = self._sp_en_cache(nombre_sp, parametros)
+        if datos is not None:
+            return (True, datos)
+
+        return self.single_flight.ejecutar(self._clave_sp(nombre_sp, parametros),
+                                           lambda: self._consultar_sp(nombre_sp, parametros))
+
+    def ejecutar_sp_flujo(self, nombre_sp, parametros=None, clave='facturas'):
         """
+        Generador con las filas del arreglo 'clave' del resultado de un SP de lectura.
+
+        El p_resultado se lee por partes (incluso cuando llega como texto JSON
+        dentro del JSON), sin tener el resultado completo en memoria.
+        Si el resultado esta en el cache de SP se recorre ese.
+
+        Los errores se lanzan como en listar_flujo(): si la API no responde,
+        responde con error o la respuesta se corta a mitad.
+
+        Ejemplo:
+            for fac in api.ejecutar_sp_flujo('sp_listar_facturas_y_productosporfactura',
+                                              {'p_resultado': None}, 'facturas'):
+                ...
+        """
+        if not es_sp_lectura(nombre_sp):
+            raise ValueError(f"{nombre_sp} no es un SP de lectura: use ejecutar_sp()")
+
+        datos = self._sp_en_cache(nombre_sp, parametros)
+        if datos is not None:
+            yield from ((datos.get(clave) or []) if isinstance(datos, dict) else datos)
+            return
+
         try:
-            import json as json_mod
-            url = f"{self.base_url}/api/procedimientos/ejecutarsp"
+            respuesta = self._peticion('POST', f"{self.base_url}/api/procedimientos/ejecutarsp",
+                                       'sp', f"SP {nombre_sp}", reintentar=True,
+                                       json=self._payload_sp(nombre_sp, parametros), stream=True)
+        except requests.RequestException as ex:
+            print(f"Error al ejecutar {nombre_sp}: {ex}")
+            raise
 
-            payload = {"nombreSP": nombre_sp}
-            if parametros:
-                payload.update(parametros)
+        with respuesta:
+            respuesta.raise_for_status()
+            try:
+                yield from filas_sp(respuesta.iter_content(FLUJO_TAMANO_TROZO), clave)
+            except (requests.RequestException, ValueError) as ex:
+                print(f"Error al leer {nombre_sp} por partes: {ex}")
+                raise
 
-            respuesta = requests.post(url, json=payload)
-            contenido = respuesta.json()
+    def _sp_en_cache(self, nombre_sp, parametros):
+        """Resultado guardado del SP de lectura (registrado en la traza), o None."""
+        datos = self.cache_sp.obtener(nombre_sp, parametros)
+        registrar_cache(nombre_sp, 'fallo' if datos is None else 'acierto')
+        return datos
 
-            if not respuesta.ok:
-                mensaje = contenido.get("mensaje", "Error al ejecutar el procedimiento.")
-                return (False, mensaje)
-
-            resultados = contenido.get("resultados", [])
-            if resultados:
-                # SQL Server retorna "@p_resultado", PostgreSQL retorna "p_resultado"
-                p_resultado = resultados[0].get("p_resultado") or resultados[0].get("@p_resultado")
-                if p_resultado is not None:
-                    if isinstance(p_resultado, str):
-                        return (True, json_mod.loads(p_resultado))
-                    return (True, p_resultado)
-
-            return (True, contenido)
+    def _consultar_sp(self, nombre_sp, parametros):
+        """Ejecuta un SP de lectura y guarda su resultado en el cache si tuvo exito."""
+        # Leer la generacion antes de llamar: si un SP de escritura termina
+        # mientras tanto, este resultado (posiblemente viejo) no se guarda
+        generacion = self.cache_sp.generacion(nombre_sp)
+        exito, datos = self._llamar_sp(nombre_sp, parametros)
+        if exito:
+            self.cache_sp.guardar(nombre_sp, parametros, datos, generacion)
+        return (exito, datos)
+
+    def _invalidar_por_sp(self, nombre_sp, parametros):
+        """
+        Un SP de escritura termino con exito: descartar lo que pudo cambiar.
+
+        - Listados de las tablas que modifica (SP_TABLAS_AFECTADAS).
+        - Resultados guardados de los SP de lectura afectados (SP_INVALIDA),
+          solo los que coinciden con sus parametros (ej: la misma p_numero).
+        """
+        for tabla in SP_TABLAS_AFECTADAS.get(nombre_sp, ()):
+            self.cache.invalidar(tabla)
+        for sp_lectura in SP_INVALIDA.get(nombre_sp, ()):
+            self.cache_sp.invalidar(sp_lectura, parametros)
+
+    def _llamar_sp(self, nombre_sp, parametros):
+        """Hace el POST /api/procedimientos/ejecutarsp y decodifica p_resultado."""
+        try:
+            url = f"{self.base_url}/api/procedimientos/ejecutarsp"
+
+            # Los SP de solo lectura (sp_listar_*, sp_consultar_*) se pueden reintentar
+            respuesta = self._peticion('POST', url, 'sp', f"SP {nombre_sp}",
+                                       reintentar=es_sp_lectura(nombre_sp),
+                                       json=self._payload_sp(nombre_sp, parametros))
+            return self._resultado_sp(respuesta.ok, respuesta.content)
 
         except requests.RequestException as ex:
             return (False, f"Error de conexion: {ex}")
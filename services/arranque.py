@@ -0,0 +1,128 @@
+"""
+arranque.py - Calentamiento y apagado ordenado de un worker de produccion.
+
+Con "python app.py" la primera visita a cada pagina pagaba la descarga de
+los listados, la construccion de los indices y la apertura de conexiones a
+la API. En produccion (gunicorn.conf.py) cada worker llama:
+
+    calentar()  antes de recibir trafico:
+        - sondea la API una vez (el monitor de salud ya tiene estado),
+        - descarga los listados de CALENTAR_TABLAS (quedan en el cache),
+        - arma sus indices de nombres y de busqueda,
+        - abre CALENTAR_CONEXIONES conexiones keep-alive en el pool.
+
+    drenar()    al apagarse, despues de que gunicorn termino las peticiones:
+        - detiene el monitor de salud y el pool de hilos de fondo,
+        - espera hasta DRENAR_ESPERA segundos a las peticiones a la API en
+          curso (refrescos del cache, reconstruccion de indices, vistas async),
+        - cierra el cliente asincrono y las conexiones del pool.
+
+Con preload_app el proceso maestro llama calentar(conexiones=0, paralelo=False)
+antes del fork: los listados e indices quedan en memoria y los workers los
+heredan. En el maestro no se crean hilos (un fork con hilos a medio trabajo
+puede dejar locks tomados en el hijo) y al terminar se cierran las
+conexiones, porque un socket compartido entre procesos mezcla respuestas.
+"""
+
+# time.monotonic(): duracion del calentamiento
+import time
+
+from services.api_service import ApiService
+
+# bucle_http: cliente httpx y bucle de eventos de AsyncApiService
+from services.api_async import bucle_http
+
+# ejecutor: pool de hilos de fondo; en_paralelo: calentar varias tablas a la vez
+from services.concurrencia import ejecutor, en_paralelo
+
+# pool: conexiones HTTP del proceso; cuenta las peticiones en curso
+from services.http_pool import pool
+
+from services.monitor_salud import monitor
+
+from config import CALENTAR_TABLAS, CALENTAR_CONEXIONES, DRENAR_ESPERA, SALUD_TIMEOUT
+
+
+# ──────────────────────────────────────────────
+# CALENTAR
+# ──────────────────────────────────────────────
+def _abrir_conexiones(api, cantidad):
+    """
+    Abre varias conexiones keep-alive a la API al mismo tiempo.
+
+    Las peticiones deben ser simultaneas: una detras de otra reutilizarian
+    siempre la misma conexion. Retorna cuantas respondieron.
+    """
+    url = f"{api.base_url}/api/diagnostico/conexion"
+
+    def abrir():
+        try:
+            with pool.llamada():
+                api.sesion().get(url, timeout=SALUD_TIMEOUT).close()
+            return True
+        except Exception as ex:
+            print(f"Error al abrir una conexion con la API: {ex}")
+            return False
+
+    return sum(en_paralelo([abrir] * cantidad))
+
+
+def calentar(tablas=CALENTAR_TABLAS, conexiones=CALENTAR_CONEXIONES, paralelo=True):
+    """
+    Prepara el proceso para recibir trafico.
+
+    Si la API no responde no se espera nada mas: el worker arranca igual y
+    los caches se llenan con las primeras visitas, como sin calentamiento.
+
+    Args:
+        tablas:     listados a descargar e indexar
+        conexiones: conexiones keep-alive a abrir (0 = ninguna)
+        paralelo:   False en el proceso maestro, para no crear hilos antes del fork
+
+    Returns:
+        Diccionario {api, tablas: {tabla: lista}, conexiones, segundos}.
+    """
+    inicio = time.monotonic()
+    api = ApiService()
+    monitor.sondear()
+    resumen = {'api': monitor.estado()['disponible'], 'tablas': {}, 'conexiones': 0}
+
+    if resumen['api']:
+        tablas = list(tablas)
+        if paralelo:
+            listas = en_paralelo([lambda t=tabla: api.preparar(t) for tabla in tablas])
+        else:
+            listas = [api.preparar(tabla) for tabla in tablas]
+        resumen['tablas'] = dict(zip(tablas, listas))
+
+        if conexiones and paralelo:
+            resumen['conexiones'] = _abrir_conexiones(api, conexiones)
+
+    resumen['segundos'] = round(time.monotonic() - inicio, 3)
+    return resumen
+
+
+# ──────────────────────────────────────────────
+# APAGAR
+# ──────────────────────────────────────────────
+def drenar(espera=DRENAR_ESPERA):
+    """
+    Apaga los servicios de fondo del proceso sin cortar peticiones a la API.
+
+    Args:
+        espera: segundos maximos esperando las peticiones en curso
+
+    Returns:
+        True si todas las peticiones en curso terminaron a tiempo.
+    """
+    monitor.detener()
+    # cancel_futures: los refrescos que todavia no empezaron ya no hacen falta
+    ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    terminadas = pool.esperar_llamadas(espera)
+    if not terminadas:
+        print(f"Apagado: {pool.en_curso()} peticiones a la API seguian en curso despues de {espera} s")
+
+    bucle_http.cerrar()
+    pool.cerrar()
+    return terminadas
@@ -0,0 +1,20 @@
+"""
+avisos.py - Avisos de la capa de servicio para la pagina actual.
+
+ApiService no conoce los templates, pero a veces necesita avisarle al
+usuario algo sobre los datos que se le muestran (por ejemplo, que la API
+no respondio y se esta viendo un listado guardado).
+
+Los avisos se guardan en flask.g (dura solo la peticion actual) y
+layout/base.html los muestra. Fuera de una peticion (hilos en segundo
+plano, scripts) no hacen nada.
+"""
+
+from flask import g, has_app_context
+
+
+def marcar_desactualizado(tabla):
+    """Registra que la tabla se sirvio desde el respaldo (la API no respondio)."""
+    if has_app_context():
+        g.setdefault('tablas_desactualizadas', set()).add(tabla)
+
@@ -0,0 +1,506 @@
+"""
+busqueda.py - Busqueda en las paginas de listado (?q=...) con un indice invertido.
+
+Las paginas CRUD solo tenian 'limite': para encontrar un registro habia que
+recorrer la tabla o pedirla completa. Ahora cada pagina de las tablas de
+BUSQUEDA_LISTADOS acepta ?q=texto y muestra solo la pagina de filas que
+coinciden.
+
+Por cada tabla se arma, a partir del listado del cache, un indice invertido:
+
+    tokens:   palabra → lista ORDENADA de posiciones de fila que la contienen
+    palabras: lista ORDENADA de todas las palabras (prefijos con bisect)
+    textos:   posicion → texto normalizado de la fila (' ana lopez p001 ...')
+    cambios:  posicion → registro escrito desde este frontend despues de armarlo
+
+Las filas salen del mismo listado que muestra la pagina sin ?q= (el indice
+guarda posiciones, no copias). Las escritas desde este frontend salen de
+'cambios', asi /producto?q=... muestra la escritura al instante, igual que
+/producto (que vuelve a pedir la tabla porque la escritura borro su cache).
+
+Mantener el indice al dia:
+    - crear/actualizar/eliminar de ApiService lo modifican en el momento
+      (al_crear, al_actualizar, al_eliminar): no se rearma por cada escritura.
+    - Cuando el cache entrega otro listado (vencio el TTL o hubo una escritura
+      de otro cliente de la API), se rearma UNA vez en segundo plano con ese
+      listado; mientras tanto las busquedas usan el indice anterior.
+    - Un indice rearmado con un listado anterior a la ultima escritura se
+      descarta (le faltaria esa escritura): se usa el del listado siguiente.
+
+Solo se busca en tablas con cache (CACHE_TTL_TABLAS): en las demas cada
+consulta descargaria la tabla completa.
+
+Una consulta ('ana lo'):
+    1. Cada palabra buscada es un prefijo: 'lo' → 'lopez', 'lora'...
+    2. Se recorren las posiciones de la palabra mas selectiva (si tiene varias
+       palabras con ese prefijo, se mezclan en orden con heapq.merge).
+    3. Las demas palabras se verifican en el texto de la fila.
+    4. Se salta hasta la pagina pedida y se corta al llenarla: el costo depende
+       del tamano de pagina, no del tamano de la tabla.
+"""
+
+# bisect: insertar y buscar en las listas ordenadas (palabras y posiciones)
+import bisect
+
+# heapq.merge: recorrer en orden varias listas de posiciones ya ordenadas
+import heapq
+
+# re: separar el texto de una fila en palabras
+import re
+
+# threading: los indices se comparten entre los hilos del servidor
+import threading
+
+# time: edad de cada indice y duracion de las consultas
+import time
+
+# ejecutor: pool de hilos donde se rearman los indices
+from services.concurrencia import ejecutor
+
+# normalizar: minusculas y sin tildes, igual que el typeahead
+from services.sugerencias import normalizar
+
+from config import BUSQUEDA_LISTADOS, CACHE_TTL_TABLAS, CACHE_TTL_DEFECTO
+
+
+# Una palabra: letras, numeros y _ (el correo 'ana@x.com' son 'ana', 'x', 'com')
+_PALABRA = re.compile(r'\w+')
+
+# Un prefijo que abarca mas palabras que esto (ej: 'a') no se usa para
+# recorrer el indice: se verifica en el texto de cada fila
+PREFIJO_MAXIMO = 256
+
+
+def palabras(texto):
+    """Palabras normalizadas de un texto: 'José Pérez-Díaz' → ['jose', 'perez', 'diaz']."""
+    return _PALABRA.findall(normalizar(texto))
+
+
+class _Indice:
+    """Indice invertido de un listado. __slots__ evita crear un dict por indice."""
+
+    __slots__ = ('registros', 'version', 'cambios', 'claves', 'textos', 'tokens',
+                 'palabras', 'filas', 'construido')
+
+    def __init__(self, registros, version):
+        # Listado del que salen las filas y su version en el cache
+        self.registros = registros
+        self.version = version
+        # posicion → registro escrito despues de armar el indice
+        self.cambios = {}
+        # str(clave) → posicion / posicion → texto (None = fila eliminada)
+        self.claves = {}
+        self.textos = []
+        # palabra → [posiciones ordenadas] y todas las palabras ordenadas
+        self.tokens = {}
+        self.palabras = []
+        self.filas = 0
+        self.construido = time.monotonic()
+
+    def fila(self, posicion):
+        """Registro de esa posicion: el escrito desde este frontend o el del listado."""
+        registro = self.cambios.get(posicion)
+        return self.registros[posicion] if registro is None else registro
+
+
+class _Estado:
+    """Indice vigente de una tabla y sus contadores."""
+
+    __slots__ = ('indice', 'reconstruyendo', 'generacion', 'reconstrucciones',
+                 'descartados', 'cambios', 'consultas', 'segundos', 'lock_carga')
+
+    def __init__(self):
+        self.indice = None
+        self.reconstruyendo = False
+        # Generacion del cache despues de la ultima escritura (ver _reconstruir)
+        self.generacion = 0
+        self.reconstrucciones = 0
+        self.descartados = 0
+        self.cambios = 0
+        self.consultas = 0
+        self.segundos = 0.0
+        # Solo un hilo arma el primer indice; los demas lo esperan
+        self.lock_carga = threading.Lock()
+
+
+class BusquedaListados:
+    """
+    Indices invertidos de las tablas con busqueda, seguros entre hilos.
+
+    Metodos:
+        tablas()                                     → tablas con busqueda (BUSQUEDA_LISTADOS con cache)
+        buscar(tabla, consulta, registros, ...)      → registros que coinciden (una pagina)
+        preparar(tabla, registros, version, nombre)  → construye el indice antes de usarlo (arranque)
+        al_crear(tabla, datos, generacion, nombre)   → agrega el registro nuevo
+        al_actualizar(tabla, nombre_clave, valor_clave, datos, generacion, nombre)
+        al_eliminar(tabla, nombre_clave, valor_clave, generacion)
+        estadisticas()                               → dict con filas, palabras y tiempos
+
+    'version' es CacheTablas.version(tabla) leida ANTES de pedir el listado
+    (None si no se conoce) y 'generacion' es CacheTablas.generacion(tabla)
+    despues de invalidar la tabla. 'nombre' es una funcion nombre(tabla,
+    clave, defecto) con el nombre de las claves foraneas (ApiService.nombre).
+    """
+
+    def __init__(self, definiciones=None, ttl_tablas=None, ttl_defecto=CACHE_TTL_DEFECTO):
+        definiciones = BUSQUEDA_LISTADOS if definiciones is None else definiciones
+        ttl_tablas = CACHE_TTL_TABLAS if ttl_tablas is None else ttl_tablas
+        # Solo las tablas con cache: sin el, cada busqueda descargaria la tabla
+        self._definiciones = {tabla: definicion for tabla, definicion in definiciones.items()
+                              if ttl_tablas.get(tabla, ttl_defecto) > 0}
+        self._estados = {tabla: _Estado() for tabla in self._definiciones}
+        self._lock = threading.Lock()
+
+    def tablas(self):
+        """Nombres de las tablas en las que se puede buscar."""
+        return tuple(self._definiciones)
+
+    # ──────────────────────────────────────────────
+    # TEXTO DE UNA FILA
+    # ──────────────────────────────────────────────
+    def _texto(self, tabla, registro, nombre):
+        """
+        Texto normalizado de la fila.
+
+        Las columnas excluidas (ej: contrasena) no se indexan.
+        Las claves foraneas agregan el nombre del registro al que apuntan.
+        """
+        _clave, excluidos, foraneas = self._definiciones[tabla]
+        partes = [str(valor) for campo, valor in registro.items()
+                  if valor is not None and campo not in excluidos]
+        if nombre is not None:
+            for campo, tabla_foranea in foraneas.items():
+                texto = nombre(tabla_foranea, registro.get(campo), None)
+                if texto:
+                    partes.append(str(texto))
+        # Sin repetidos y en el orden de la fila; el espacio inicial permite
+        # buscar un prefijo de palabra con ' ' + termino in texto
+        return ' ' + ' '.join(dict.fromkeys(palabras(' '.join(partes))))
+
+    # ──────────────────────────────────────────────
+    # CONSTRUIR
+    # ──────────────────────────────────────────────
+    def _construir(self, tabla, registros, version, nombre):
+        """Indice nuevo del listado (sin el lock: no modifica el vigente)."""
+        campo_clave = self._definiciones[tabla][0]
+        indice = _Indice(registros, version)
+        textos, claves, tokens = indice.textos, indice.claves, indice.tokens
+        for posicion, registro in enumerate(registros):
+            texto = self._texto(tabla, registro, nombre)
+            textos.append(texto)
+            clave = registro.get(campo_clave)
+            if clave not in (None, ''):
+                claves[str(clave)] = posicion
+            # Las posiciones crecen: cada lista queda ordenada sin ordenarla
+            for palabra in texto.split():
+                posiciones = tokens.get(palabra)
+                if posiciones is None:
+                    tokens[palabra] = [posicion]
+                else:
+                    posiciones.append(posicion)
+        indice.palabras = sorted(tokens)
+        indice.filas = len(textos)
+        return indice
+
+    def _reconstruir(self, tabla, registros, version, nombre):
+        """Rearma el indice en segundo plano; mientras tanto se usa el anterior."""
+        estado = self._estados[tabla]
+        try:
+            indice = self._construir(tabla, registros, version, nombre)
+            with self._lock:
+                if version[0] < estado.generacion:
+                    # Listado pedido antes de una escritura: el indice vigente
+                    # ya la tiene y este no. Se rearma con el listado siguiente
+                    estado.descartados += 1
+                    return
+                estado.indice = indice
+                estado.reconstrucciones += 1
+        except Exception as ex:
+            print(f"Error al reconstruir el indice de busqueda de {tabla}: {ex}")
+        finally:
+            with self._lock:
+                estado.reconstruyendo = False
+
+    def _vigente(self, tabla, registros, version, nombre):
+        """
+        Indice de la tabla listo para consultar.
+
+        La primera vez se construye en este hilo (los demas esperan). Si el
+        cache entrego otro listado, se sigue usando el indice actual y se
+        rearma una sola vez en segundo plano. Sin version (listado de
+        respaldo con la API caida) se usa el indice actual.
+        """
+        estado = self._estados[tabla]
+        if estado.indice is None:
+            with estado.lock_carga:
+                if estado.indice is None:
+                    indice = self._construir(tabla, registros, version, nombre)
+                    with self._lock:
+                        estado.indice = indice
+                        estado.reconstrucciones += 1
+            return estado.indice
+
+        with self._lock:
+            indice = estado.indice
+            rearmar = (version is not None and version != indice.version
+                       and not estado.reconstruyendo)
+            if rearmar:
+                estado.reconstruyendo = True
+        if rearmar:
+            ejecutor.submit(self._reconstruir, tabla, registros, version, nombre)
+        return indice
+
+    def preparar(self, tabla, registros, version=None, nombre=None):
+        """Construye el indice de la tabla con el listado si todavia no existe."""
+        if tabla in self._definiciones:
+            self._vigente(tabla, registros, version, nombre)
+
+    # ──────────────────────────────────────────────
+    # CONSULTAR
+    # ──────────────────────────────────────────────
+    def _candidatos(self, indice, terminos):
+        """
+        Posiciones (en orden) de las filas que contienen todas las palabras buscadas.
+
+        Se recorre la palabra con menos posiciones; las demas se verifican en el texto.
+        """
+        mejor, mejor_total = None, None
+        for termino in terminos:
+            inicio = bisect.bisect_left(indice.palabras, termino)
+            listas = []
+            total = 0
+            for palabra in indice.palabras[inicio:inicio + PREFIJO_MAXIMO + 1]:
+                if not palabra.startswith(termino):
+                    break
+                posiciones = indice.tokens[palabra]
+                listas.append(posiciones)
+                total += len(posiciones)
+            else:
+                if len(listas) > PREFIJO_MAXIMO:
+                    # Prefijo demasiado comun: se verifica en el texto
+                    continue
+            if not listas:
+                # Ninguna palabra empieza asi: no hay resultados
+                return iter(())
+            if mejor is None or total < mejor_total:
+                mejor, mejor_total = (termino, listas), total
+
+        textos = indice.textos
+        if mejor is None:
+            # Solo prefijos muy comunes: se recorren todas las filas (menos las eliminadas)
+            posiciones = (posicion for posicion, texto in enumerate(textos) if texto is not None)
+            resto = terminos
+        else:
+            termino, listas = mejor
+            posiciones = (iter(listas[0]) if len(listas) == 1
+                          else _sin_repetidos(heapq.merge(*listas)))
+            resto = [t for t in terminos if t != termino]
+
+        if not resto:
+            return posiciones
+        return (posicion for posicion in posiciones
+                if all(' ' + t in textos[posicion] for t in resto))
+
+    def buscar(self, tabla, consulta, registros, saltar=0, cantidad=None, limite=None,
+               version=None, nombre=None):
+        """
+        Registros de la tabla que contienen todas las palabras de la consulta.
+
+        Args:
+            tabla:     tabla con busqueda (ej: 'producto')
+            consulta:  texto buscado (ej: 'lap dell'); cada palabra es un prefijo
+            registros: listado completo de la tabla (ApiService.listar)
+            saltar:    coincidencias que se saltan (paginas anteriores)
+            cantidad:  coincidencias que se retornan (None = todas)
+            limite:    coincidencias maximas en total (limite elegido por el usuario)
+            version:   version del listado en el cache (ver la clase)
+            nombre:    funcion con el nombre de las claves foraneas (ver la clase)
+
+        Returns:
+            Lista de registros en el orden del listado; lista vacia si no hay
+            coincidencias.
+        """
+        terminos = list(dict.fromkeys(palabras(consulta)))
+        if not terminos or tabla not in self._definiciones:
+            return []
+
+        fin = None if cantidad is None else saltar + cantidad
+        if limite:
+            fin = limite if fin is None else min(fin, limite)
+
+        estado = self._estados[tabla]
+        indice = self._vigente(tabla, registros, version, nombre)
+        inicio = time.perf_counter()
+        # Con el lock tomado: las escrituras modifican las listas de posiciones en su lugar
+        with self._lock:
+            resultado = []
+            for numero, posicion in enumerate(self._candidatos(indice, terminos)):
+                if fin is not None and numero >= fin:
+                    break
+                if numero >= saltar:
+                    resultado.append(indice.fila(posicion))
+            estado.consultas += 1
+            estado.segundos += time.perf_counter() - inicio
+        return resultado
+
+    # ──────────────────────────────────────────────
+    # ACTUALIZAR DESPUES DE UNA ESCRITURA
+    # ApiService los llama solo si la API respondio con exito.
+    # El texto se arma fuera del lock (puede consultar el indice de nombres).
+    # ──────────────────────────────────────────────
+    def _agregar(self, indice, posicion, registro, texto, campo_clave):
+        """Agrega una fila al indice (con el lock tomado)."""
+        indice.cambios[posicion] = registro
+        indice.textos[posicion] = texto
+        indice.filas += 1
+        clave = registro.get(campo_clave)
+        if clave not in (None, ''):
+            indice.claves[str(clave)] = posicion
+        for palabra in texto.split():
+            posiciones = indice.tokens.get(palabra)
+            if posiciones is None:
+                indice.tokens[palabra] = [posicion]
+                bisect.insort(indice.palabras, palabra)
+            else:
+                bisect.insort(posiciones, posicion)
+
+    def _quitar(self, indice, posicion, campo_clave):
+        """Quita una fila del indice (con el lock tomado). Retorna el registro quitado."""
+        registro = indice.fila(posicion)
+        texto = indice.textos[posicion]
+        indice.cambios.pop(posicion, None)
+        indice.textos[posicion] = None
+        indice.filas -= 1
+        clave = registro.get(campo_clave)
+        if clave not in (None, '') and indice.claves.get(str(clave)) == posicion:
+            del indice.claves[str(clave)]
+        for palabra in texto.split():
+            posiciones = indice.tokens[palabra]
+            del posiciones[bisect.bisect_left(posiciones, posicion)]
+            if not posiciones:
+                del indice.tokens[palabra]
+                del indice.palabras[bisect.bisect_left(indice.palabras, palabra)]
+        return registro
+
+    def _escrito(self, tabla, datos):
+        """
+        Campos escritos que se guardan en la fila.
+
+        Las columnas excluidas no se copian: la contrasena del formulario no
+        es la que muestra el listado (la API la guarda encriptada).
+        """
+        excluidos = self._definiciones[tabla][1]
+        return {campo: valor for campo, valor in datos.items() if campo not in excluidos}
+
+    def _posicion(self, tabla, nombre_clave, valor_clave, generacion):
+        """
+        Registra la escritura y retorna (indice, posicion, registro) de la fila
+        con esa clave, o (None, None, None) si el indice no la tiene.
+        """
+        estado = self._estados[tabla]
+        with self._lock:
+            # Desde ahora se descartan los indices de listados anteriores a la escritura
+            estado.generacion = max(estado.generacion, generacion)
+            indice = estado.indice
+            if indice is None or nombre_clave != self._definiciones[tabla][0]:
+                return None, None, None
+            posicion = indice.claves.get(str(valor_clave))
+            if posicion is None:
+                return None, None, None
+            return indice, posicion, indice.fila(posicion)
+
+    def al_crear(self, tabla, datos, generacion, nombre=None):
+        """
+        Agrega el registro creado al final, igual que en el listado de la API.
+
+        Sin clave (id autoincremental) no se sabe cual es: la fila llega con
+        el indice rearmado a partir del listado siguiente.
+        """
+        if tabla not in self._definiciones:
+            return
+        estado = self._estados[tabla]
+        campo_clave = self._definiciones[tabla][0]
+        registro = self._escrito(tabla, datos)
+        texto = self._texto(tabla, registro, nombre)
+        with self._lock:
+            estado.generacion = max(estado.generacion, generacion)
+            indice = estado.indice
+            clave = registro.get(campo_clave)
+            if indice is None or clave in (None, ''):
+                return
+            anterior = indice.claves.get(str(clave))
+            if anterior is not None:
+                self._quitar(indice, anterior, campo_clave)
+            posicion = len(indice.textos)
+            indice.textos.append(None)
+            self._agregar(indice, posicion, registro, texto, campo_clave)
+            estado.cambios += 1
+
+    def al_actualizar(self, tabla, nombre_clave, valor_clave, datos, generacion, nombre=None):
+        """Reemplaza el registro modificado; conserva su posicion en el listado."""
+        if tabla not in self._definiciones:
+            return
+        estado = self._estados[tabla]
+        campo_clave = self._definiciones[tabla][0]
+        indice, posicion, anterior = self._posicion(tabla, nombre_clave, valor_clave, generacion)
+        if indice is None:
+            return
+        registro = {**anterior, **self._escrito(tabla, datos)}
+        texto = self._texto(tabla, registro, nombre)
+        with self._lock:
+            # Otro hilo reemplazo el indice o movio la fila mientras tanto
+            if estado.indice is not indice or indice.textos[posicion] is None:
+                return
+            self._quitar(indice, posicion, campo_clave)
+            self._agregar(indice, posicion, registro, texto, campo_clave)
+            estado.cambios += 1
+
+    def al_eliminar(self, tabla, nombre_clave, valor_clave, generacion):
+        """Quita el registro eliminado."""
+        if tabla not in self._definiciones:
+            return
+        estado = self._estados[tabla]
+        campo_clave = self._definiciones[tabla][0]
+        indice, posicion, _anterior = self._posicion(tabla, nombre_clave, valor_clave, generacion)
+        if indice is None:
+            return
+        with self._lock:
+            if estado.indice is not indice or indice.textos[posicion] is None:
+                return
+            self._quitar(indice, posicion, campo_clave)
+            estado.cambios += 1
+
+    def estadisticas(self):
+        """Filas, palabras, edad, escrituras y tiempo promedio de consulta de cada indice."""
+        ahora = time.monotonic()
+        with self._lock:
+            resultado = {}
+            for tabla, estado in self._estados.items():
+                indice = estado.indice
+                resultado[tabla] = {
+                    'construido': indice is not None,
+                    'filas': indice.filas if indice is not None else 0,
+                    'palabras': len(indice.tokens) if indice is not None else 0,
+                    'edad': round(ahora - indice.construido, 1) if indice is not None else None,
+                    'reconstruyendo': estado.reconstruyendo,
+                    'reconstrucciones': estado.reconstrucciones,
+                    'descartados': estado.descartados,
+                    'cambios': estado.cambios,
+                    'consultas': estado.consultas,
+                    'consulta_ms': (round(estado.segundos / estado.consultas * 1000, 3)
+                                    if estado.consultas else None),
+                }
+            return resultado
+
+
+def _sin_repetidos(posiciones):
+    """Quita los repetidos consecutivos de una secuencia ordenada de posiciones."""
+    anterior = None
+    for posicion in posiciones:
+        if posicion != anterior:
+            yield posicion
+            anterior = posicion
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+busqueda = BusquedaListados()
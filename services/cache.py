@@ -0,0 +1,485 @@
+"""
+cache.py - Cache en memoria de los listados de la API.
+
+Las tablas de referencia (persona, empresa, producto) se descargan completas
+en varias paginas solo para llenar selects o mapas codigo → nombre.
+Este cache guarda el resultado de listar(tabla, limite) durante unos segundos
+(TTL por tabla) para no volver a pedirlo en cada visita.
+
+Reglas:
+    - Cada tabla tiene su propio TTL (CACHE_TTL_TABLAS). TTL 0 = no se sirve del cache.
+    - Stale-while-revalidate: durante CACHE_SWR_SEGUNDOS despues del TTL el
+      listado viejo se sigue sirviendo de inmediato mientras ApiService lo
+      refresca en segundo plano (un solo refresco a la vez por listado).
+    - Ultimo dato bueno: si la API falla, ApiService puede pedir el ultimo
+      listado exitoso con respaldo() (hasta CACHE_RESPALDO_SEGUNDOS de edad),
+      incluso de tablas sin TTL o ya invalidadas.
+    - Si el cache supera CACHE_MAX_BYTES, se descartan las entradas usadas
+      hace mas tiempo (LRU), midiendo el tamano por los bytes de la respuesta.
+    - ApiService invalida la tabla cuando crear/actualizar/eliminar tienen
+      exito, asi nunca se muestran datos viejos despues de una escritura propia
+      (salvo como respaldo cuando la API no responde).
+
+Tambien contiene CacheProcedimientos: el resultado de los stored procedures
+de solo lectura (sp_listar_*, sp_consultar_*) por (SP, parametros), que los
+SP de escritura y las escrituras de tablas invalidan (ver config.py).
+"""
+
+# threading: el cache se comparte entre los hilos del servidor
+import threading
+
+# time.monotonic(): reloj que no retrocede (no le afectan cambios de hora del sistema)
+import time
+
+# OrderedDict: diccionario que recuerda el orden de uso (para descartar el mas viejo)
+from collections import OrderedDict
+
+# json: para comparar parametros de SP sin importar el orden de las claves
+import json
+
+# copiar: las Tabla compactas se comparten (son inmutables), las listas se copian
+from services.filas import copiar
+
+from config import (
+    CACHE_TTL_SP,
+    CACHE_SP_MAX_ENTRADAS,
+    CACHE_TTL_TABLAS,
+    CACHE_TTL_DEFECTO,
+    CACHE_MAX_BYTES,
+    CACHE_SWR_SEGUNDOS,
+    CACHE_RESPALDO_SEGUNDOS,
+    CACHE_RESPALDO_TODAS,
+)
+
+
+# Estados que retorna consultar()
+FRESCO = 'fresco'   # Dentro del TTL: se sirve sin ir a la API
+VIEJO = 'viejo'     # Paso el TTL pero esta en la ventana SWR: se sirve y se refresca
+
+
+class _Entrada:
+    """Un listado guardado. __slots__ evita crear un dict por entrada."""
+
+    __slots__ = ('registros', 'guardado', 'tamano', 'valido')
+
+    def __init__(self, registros, tamano):
+        self.registros = registros
+        self.guardado = time.monotonic()  # Momento en que se guardo
+        self.tamano = tamano              # Bytes de la respuesta JSON
+        self.valido = True                # False despues de invalidar(): solo sirve de respaldo
+
+    def edad(self):
+        """Segundos desde que se guardo."""
+        return time.monotonic() - self.guardado
+
+
+class CacheTablas:
+    """
+    Cache TTL + LRU de listados, seguro entre hilos.
+
+    Metodos:
+        ttl(tabla)                           → segundos de vida de la tabla
+        generacion(tabla)                    → contador de invalidaciones de la tabla
+        version(tabla, limite)               → identifica el listado guardado (cambia al reemplazarlo)
+        consultar(tabla, limite)             → (registros, FRESCO | VIEJO | None)
+        obtener(tabla, limite)               → lista de registros frescos o None
+        respaldo(tabla, limite)              → ultimo listado exitoso o None
+        buscar(tabla, nombre_clave, valor)   → (encontrado, registro) en O(1)
+        guardar(tabla, limite, registros, tamano, generacion)
+        iniciar_refresco / terminar_refresco → evita refrescos duplicados (SWR)
+        invalidar(tabla)                     → las entradas de la tabla dejan de ser frescas
+        estadisticas()                       → dict con aciertos, fallos, bytes, entradas
+    """
+
+    def __init__(self, ttl_tablas=None, ttl_defecto=CACHE_TTL_DEFECTO,
+                 max_bytes=CACHE_MAX_BYTES, swr=CACHE_SWR_SEGUNDOS,
+                 respaldo=CACHE_RESPALDO_SEGUNDOS, respaldo_todas=CACHE_RESPALDO_TODAS):
+        self._ttl_tablas = CACHE_TTL_TABLAS if ttl_tablas is None else ttl_tablas
+        self._ttl_defecto = ttl_defecto
+        self._max_bytes = max_bytes
+        self._swr = swr
+        self._respaldo = respaldo
+        self._respaldo_todas = respaldo_todas
+
+        # (tabla, limite) → _Entrada
+        self._entradas = OrderedDict()
+        # tabla → numero de invalidaciones (ver guardar())
+        self._generaciones = {}
+        # (tabla, nombre_clave) → {str(valor_clave): posicion del registro}
+        # Indices construidos a partir del listado completo (limite None) de la tabla
+        self._indices = {}
+        # Claves (tabla, limite) que se estan refrescando en segundo plano
+        self._refrescando = set()
+        self._bytes = 0
+        self._aciertos = 0
+        self._viejos = 0
+        self._respaldos = 0
+        self._fallos = 0
+        self._lock = threading.Lock()
+
+    def ttl(self, tabla):
+        """Segundos que vive un listado de la tabla en el cache (0 = no se sirve del cache)."""
+        return self._ttl_tablas.get(tabla, self._ttl_defecto)
+
+    def generacion(self, tabla):
+        """
+        Numero de veces que se ha invalidado la tabla.
+
+        Se lee ANTES de pedir los datos a la API y se pasa a guardar().
+        Si mientras tanto hubo una escritura, la generacion cambio y el
+        resultado (posiblemente viejo) no se guarda.
+        """
+        with self._lock:
+            return self._generaciones.get(tabla, 0)
+
+    def version(self, tabla, limite=None):
+        """
+        Version del listado guardado: (generacion, momento en que se guardo).
+
+        Cambia cada vez que el listado se reemplaza o se invalida, aunque
+        consultar() entregue una lista nueva en cada llamada. Los indices
+        construidos sobre un listado (typeahead) se reutilizan mientras no
+        cambie. Retorna None si no hay listado guardado o fue invalidado
+        (el listado que se entregue despues no es ese).
+        """
+        with self._lock:
+            entrada = self._entradas.get((tabla, limite))
+            if entrada is None or not entrada.valido:
+                return None
+            # Un listado valido siempre es de la generacion actual (ver guardar)
+            return (self._generaciones.get(tabla, 0), entrada.guardado)
+
+    # ──────────────────────────────────────────────
+    # LEER DEL CACHE
+    # ──────────────────────────────────────────────
+    def consultar(self, tabla, limite=None):
+        """
+        Busca un listado y dice si esta fresco o viejo.
+
+        Returns:
+            Tupla (registros, estado):
+                (lista, FRESCO)  dentro del TTL
+                (lista, VIEJO)   vencido pero dentro de la ventana SWR
+                (None, None)     no hay, fue invalidado o es demasiado viejo
+
+        Retorna una copia de la lista para que la vista pueda agregar o quitar
+        elementos sin afectar al cache (los registros si son compartidos).
+        Los listados compactos (Tabla, ver services/filas.py) son de solo
+        lectura y se retornan sin copiar.
+        """
+        ttl = self.ttl(tabla)
+        if ttl <= 0:
+            return (None, None)
+
+        clave = (tabla, limite)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or not entrada.valido:
+                self._fallos += 1
+                return (None, None)
+
+            edad = entrada.edad()
+            if edad >= ttl + self._swr:
+                self._fallos += 1
+                return (None, None)
+
+            # Marcar como usado recientemente (pasa al final del orden LRU)
+            self._entradas.move_to_end(clave)
+            if edad < ttl:
+                self._aciertos += 1
+                return (copiar(entrada.registros), FRESCO)
+            self._viejos += 1
+            return (copiar(entrada.registros), VIEJO)
+
+    def obtener(self, tabla, limite=None):
+        """Retorna los registros guardados si estan frescos, o None."""
+        registros, estado = self.consultar(tabla, limite)
+        return registros if estado == FRESCO else None
+
+    def respaldo(self, tabla, limite=None):
+        """
+        Ultimo listado exitoso de la tabla, aunque este vencido o invalidado.
+
+        Se usa solo cuando la API no responde. Retorna None si no hay
+        o si tiene mas de CACHE_RESPALDO_SEGUNDOS.
+        """
+        with self._lock:
+            entrada = self._entradas.get((tabla, limite))
+            if entrada is None or entrada.edad() >= self._respaldo:
+                return None
+            self._respaldos += 1
+            return copiar(entrada.registros)
+
+    # ──────────────────────────────────────────────
+    # BUSCAR UN REGISTRO POR CLAVE
+    # Usa el listado completo de la tabla si esta en el cache.
+    # El indice clave → posicion se construye una sola vez por listado,
+    # asi cada busqueda posterior es O(1) en lugar de recorrer la lista.
+    # ──────────────────────────────────────────────
+    def buscar(self, tabla, nombre_clave, valor, incluir_respaldo=False):
+        """
+        Busca un registro por su clave en el listado completo guardado.
+
+        Args:
+            incluir_respaldo: True para buscar tambien en listados vencidos
+                              (solo cuando la API no responde)
+
+        Returns:
+            Tupla (encontrado, registro):
+                (True, registro)  si el listado completo esta en cache y tiene la clave
+                (False, None)     si no hay listado completo vigente o no tiene la clave
+        """
+        ttl = self.ttl(tabla)
+        if ttl <= 0 and not incluir_respaldo:
+            return (False, None)
+
+        with self._lock:
+            entrada = self._entradas.get((tabla, None))
+            if entrada is None:
+                return (False, None)
+            if incluir_respaldo:
+                if entrada.edad() >= self._respaldo:
+                    return (False, None)
+            elif not entrada.valido or entrada.edad() >= ttl:
+                return (False, None)
+
+            indice = self._indices.get((tabla, nombre_clave))
+            if indice is None:
+                # Primer uso: construir el indice recorriendo el listado una vez.
+                # Guarda la posicion de cada registro (no el registro) para no
+                # crear una vista Fila por cada fila de un listado compacto.
+                indice = {str(r.get(nombre_clave)): i for i, r in enumerate(entrada.registros)}
+                self._indices[(tabla, nombre_clave)] = indice
+
+            posicion = indice.get(str(valor))
+            if posicion is None:
+                return (False, None)
+            self._aciertos += 1
+            return (True, entrada.registros[posicion])
+
+    # ──────────────────────────────────────────────
+    # GUARDAR EN EL CACHE
+    # ──────────────────────────────────────────────
+    def guardar(self, tabla, limite, registros, tamano, generacion):
+        """
+        Guarda un listado en el cache.
+
+        Args:
+            tabla:      nombre de la tabla
+            limite:     limite usado en la consulta (parte de la clave)
+            registros:  lista de registros retornada por la API
+            tamano:     bytes de la respuesta (se usa para el limite de memoria)
+            generacion: valor de generacion(tabla) leido antes de la consulta
+        """
+        # Las tablas sin TTL solo se guardan como respaldo (si esta activado)
+        if self.ttl(tabla) <= 0 and not self._respaldo_todas:
+            return
+        if tamano > self._max_bytes:
+            return
+
+        clave = (tabla, limite)
+        with self._lock:
+            # Hubo una escritura mientras se consultaba: no guardar datos viejos
+            if self._generaciones.get(tabla, 0) != generacion:
+                return
+
+            self._descartar(clave)
+            self._entradas[clave] = _Entrada(copiar(registros), tamano)
+            self._bytes += tamano
+
+            # Descartar las entradas menos usadas hasta volver al limite de memoria
+            while self._bytes > self._max_bytes and self._entradas:
+                self._descartar(next(iter(self._entradas)))
+
+    # ──────────────────────────────────────────────
+    # REFRESCO EN SEGUNDO PLANO (stale-while-revalidate)
+    # ──────────────────────────────────────────────
+    def iniciar_refresco(self, tabla, limite=None):
+        """Retorna True si el que llama debe refrescar (nadie mas lo esta haciendo)."""
+        with self._lock:
+            if (tabla, limite) in self._refrescando:
+                return False
+            self._refrescando.add((tabla, limite))
+            return True
+
+    def terminar_refresco(self, tabla, limite=None):
+        """Marca el refresco como terminado (con o sin exito)."""
+        with self._lock:
+            self._refrescando.discard((tabla, limite))
+
+    # ──────────────────────────────────────────────
+    # INVALIDAR UNA TABLA
+    # Se llama despues de crear/actualizar/eliminar con exito.
+    # ──────────────────────────────────────────────
+    def invalidar(self, tabla):
+        """
+        Los listados guardados de la tabla dejan de servirse.
+
+        No se borran: quedan como respaldo por si la API deja de responder.
+        """
+        with self._lock:
+            self._generaciones[tabla] = self._generaciones.get(tabla, 0) + 1
+            for clave, entrada in self._entradas.items():
+                if clave[0] == tabla:
+                    entrada.valido = False
+            for clave_indice in [c for c in self._indices if c[0] == tabla]:
+                del self._indices[clave_indice]
+
+    def _descartar(self, clave):
+        """Quita una entrada y sus indices. Se llama con el lock tomado."""
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        self._bytes -= entrada.tamano
+        tabla, limite = clave
+        if limite is None:
+            # Los indices por clave se construyen del listado completo de la tabla
+            for clave_indice in [c for c in self._indices if c[0] == tabla]:
+                del self._indices[clave_indice]
+
+    def estadisticas(self):
+        """Retorna aciertos, viejos servidos, respaldos, fallos, bytes y entradas."""
+        with self._lock:
+            return {
+                'aciertos': self._aciertos,
+                'viejos': self._viejos,
+                'respaldos': self._respaldos,
+                'fallos': self._fallos,
+                'bytes': self._bytes,
+                'max_bytes': self._max_bytes,
+                'entradas': len(self._entradas)
+            }
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+cache_tablas = CacheTablas()
+
+
+# ══════════════════════════════════════════════
+# CACHE DE STORED PROCEDURES DE SOLO LECTURA
+# ══════════════════════════════════════════════
+
+def _parametros_sp(parametros):
+    """Parametros del SP sin el de salida (p_resultado), para comparar y usar como clave."""
+    return {k: v for k, v in (parametros or {}).items() if k.lower() != 'p_resultado'}
+
+
+class CacheProcedimientos:
+    """
+    Cache TTL + LRU del resultado de los SP de solo lectura, seguro entre hilos.
+
+    La clave es (nombre_sp, parametros). Ejemplo: la factura 5 consultada con
+    sp_consultar_factura_y_productosporfactura {p_numero: 5} se guarda aparte
+    de la factura 6.
+
+    Metodos:
+        ttl(nombre_sp)                          → segundos de vida (0 = no se guarda)
+        generacion(nombre_sp)                   → contador de invalidaciones del SP
+        obtener(nombre_sp, parametros)          → resultado guardado o None
+        guardar(nombre_sp, parametros, datos, generacion)
+        invalidar(nombre_sp, parametros=None)   → descarta el SP (o solo las entradas
+                                                  que coinciden con esos parametros)
+        estadisticas()                          → dict con aciertos, fallos y entradas
+    """
+
+    def __init__(self, ttl_sp=None, max_entradas=CACHE_SP_MAX_ENTRADAS):
+        self._ttl_sp = CACHE_TTL_SP if ttl_sp is None else ttl_sp
+        self._max_entradas = max_entradas
+
+        # (nombre_sp, parametros en JSON) → (datos, momento en que se guardo)
+        self._entradas = OrderedDict()
+        # nombre_sp → numero de invalidaciones (igual que en CacheTablas)
+        self._generaciones = {}
+        self._aciertos = 0
+        self._fallos = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(nombre_sp, parametros):
+        """Clave del cache: los mismos parametros en distinto orden dan la misma clave."""
+        return (nombre_sp, json.dumps(_parametros_sp(parametros), sort_keys=True, default=str))
+
+    def ttl(self, nombre_sp):
+        """Segundos que vive el resultado del SP (0 = no se guarda)."""
+        return self._ttl_sp.get(nombre_sp, 0)
+
+    def generacion(self, nombre_sp):
+        """Numero de invalidaciones del SP (se lee antes de llamar a la API)."""
+        with self._lock:
+            return self._generaciones.get(nombre_sp, 0)
+
+    def obtener(self, nombre_sp, parametros=None):
+        """
+        Retorna el resultado guardado si esta dentro del TTL, o None.
+
+        El resultado es compartido entre peticiones: no se debe modificar.
+        """
+        ttl = self.ttl(nombre_sp)
+        if ttl <= 0:
+            return None
+
+        clave = self._clave(nombre_sp, parametros)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or time.monotonic() - entrada[1] >= ttl:
+                self._fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self._aciertos += 1
+            return entrada[0]
+
+    def guardar(self, nombre_sp, parametros, datos, generacion):
+        """
+        Guarda el resultado de un SP.
+
+        Args:
+            generacion: valor de generacion(nombre_sp) leido antes de la llamada.
+                        Si hubo una escritura mientras tanto, no se guarda.
+        """
+        if self.ttl(nombre_sp) <= 0:
+            return
+
+        clave = self._clave(nombre_sp, parametros)
+        with self._lock:
+            if self._generaciones.get(nombre_sp, 0) != generacion:
+                return
+            self._entradas[clave] = (datos, time.monotonic())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, nombre_sp, parametros=None):
+        """
+        Descarta resultados guardados del SP.
+
+        Args:
+            parametros: si se indican, solo se descartan las entradas cuyos
+                        parametros coinciden en todas las claves en comun.
+                        Ejemplo: {p_numero: 5, p_fkidcliente: 2} descarta la
+                        consulta de la factura 5 pero no la de la 6, y descarta
+                        el listado (que no tiene claves en comun).
+        """
+        filtro = _parametros_sp(parametros) if parametros else None
+        with self._lock:
+            self._generaciones[nombre_sp] = self._generaciones.get(nombre_sp, 0) + 1
+            for clave in [c for c in self._entradas if c[0] == nombre_sp]:
+                if filtro is not None:
+                    guardados = json.loads(clave[1])
+                    comunes = filtro.keys() & guardados.keys()
+                    if any(str(filtro[k]) != str(guardados[k]) for k in comunes):
+                        continue
+                del self._entradas[clave]
+
+    def estadisticas(self):
+        """Retorna aciertos, fallos y cantidad de entradas."""
+        with self._lock:
+            return {
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'entradas': len(self._entradas),
+                'max_entradas': self._max_entradas,
+            }
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+cache_sp = CacheProcedimientos()
@@ -0,0 +1,64 @@
+"""
+concurrencia.py - Ejecucion concurrente de llamadas independientes a la API.
+
+Las vistas que necesitan varias tablas (factura, cliente, vendedor) hacian
+una llamada detras de otra, asi que la pagina tardaba la suma de todas.
+Con en_paralelo() las llamadas se lanzan al mismo tiempo en un pool de
+hilos acotado (MAX_HILOS_API) y la pagina tarda lo que tarde la mas lenta.
+"""
+
+# contextvars: copia el contexto del hilo que llama (incluye el contexto de Flask)
+import contextvars
+
+# threading: para marcar los hilos del pool y evitar bloqueos por anidamiento
+import threading
+
+# ThreadPoolExecutor: pool de hilos reutilizables de la libreria estandar
+from concurrent.futures import ThreadPoolExecutor
+
+from config import MAX_HILOS_API
+
+
+# Pool de hilos unico para todo el proceso (se crea una sola vez)
+ejecutor = ThreadPoolExecutor(max_workers=MAX_HILOS_API, thread_name_prefix='api')
+
+# Marca por hilo: True si el hilo actual pertenece al pool
+_local = threading.local()
+
+
+def _ejecutar_en_pool(funcion):
+    """Ejecuta la funcion marcando el hilo como parte del pool."""
+    _local.en_pool = True
+    try:
+        return funcion()
+    finally:
+        _local.en_pool = False
+
+
+def en_paralelo(funciones):
+    """
+    Ejecuta varias funciones sin argumentos al mismo tiempo.
+
+    Cada funcion corre con una copia del contexto del hilo que llama, asi
+    pueden usar el contexto de Flask (g, current_app) de la peticion actual.
+
+    Si se llama desde un hilo del propio pool (llamadas anidadas), las
+    funciones se ejecutan en secuencia para no bloquear el pool esperando
+    hilos que nunca quedarian libres.
+
+    Args:
+        funciones: lista de funciones sin argumentos
+
+    Returns:
+        Lista con el resultado de cada funcion, en el mismo orden.
+        Si una funcion lanza una excepcion, se propaga al que llama.
+    """
+    funciones = list(funciones)
+    if len(funciones) <= 1 or getattr(_local, 'en_pool', False):
+        return [funcion() for funcion in funciones]
+
+    futuros = [
+        ejecutor.submit(contextvars.copy_context().run, _ejecutar_en_pool, funcion)
+        for funcion in funciones
+    ]
+    return [futuro.result() for futuro in futuros]
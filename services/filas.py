@@ -0,0 +1,205 @@
+"""
+filas.py - Representacion compacta de los listados de la API.
+
+La API retorna cada fila como un objeto JSON y el decodificador la convierte
+en un diccionario. Un dict por fila repite en cada una la tabla hash con los
+nombres de las columnas: con miles de filas en el cache (persona, producto...)
+la mayor parte de la memoria son esas tablas, no los datos.
+
+Tabla guarda los nombres de las columnas UNA sola vez (Columnas) y cada fila
+como una tupla con los valores en ese orden:
+
+    Columnas: ('codigo', 'nombre', 'stock', 'valorunitario')
+    filas:    [('PR001', 'Laptop', 10, 2500.0),
+               ('PR002', 'Mouse',  50,   20.0), ...]
+
+Al recorrer la Tabla se entregan vistas Fila (con __slots__, sin dict propio)
+que se leen igual que un diccionario, asi que las vistas y los templates no
+cambian:
+
+    fila['codigo']   fila.codigo   fila.get('stock', 0)   {**fila, 'x': 1}
+
+Tabla y Fila son de solo lectura: como vienen del cache y se comparten entre
+hilos, no se pueden modificar por accidente. Para cambiar una fila se arma un
+diccionario nuevo ({**fila, ...} o dict(fila)).
+
+Funciones:
+    compactar(registros)  → Tabla (o la misma lista si las filas no son uniformes)
+    copiar(registros)     → la misma Tabla (inmutable) o una copia de la lista
+"""
+
+# Mapping / Sequence: Fila se comporta como un diccionario de solo lectura
+# (get, keys, items, in, ==, {**fila}) y Tabla como una lista de solo lectura
+from collections.abc import Mapping, Sequence
+
+# DefaultJSONProvider: serializador JSON de Flask (jsonify y el filtro tojson)
+from flask.json.provider import DefaultJSONProvider
+
+
+class Columnas:
+    """
+    Nombres de las columnas de una Tabla, compartidos por todas sus filas.
+
+    Atributos:
+        nombres: tupla con los nombres en el orden de los valores
+        indice:  {nombre: posicion} para leer una columna en O(1)
+    """
+
+    __slots__ = ('nombres', 'indice')
+
+    def __init__(self, nombres):
+        self.nombres = tuple(nombres)
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __repr__(self):
+        return f"Columnas({list(self.nombres)})"
+
+
+class Fila(Mapping):
+    """
+    Vista de solo lectura de una fila: se lee como un diccionario.
+
+    Solo guarda una referencia a las Columnas compartidas y a la tupla de
+    valores (__slots__: sin __dict__ por instancia).
+
+    Acceso:
+        fila['codigo'] / fila.get('codigo') / fila.codigo (para Jinja)
+    """
+
+    __slots__ = ('_columnas', '_valores')
+
+    def __init__(self, columnas, valores):
+        self._columnas = columnas
+        self._valores = valores
+
+    def __getitem__(self, nombre):
+        try:
+            return self._valores[self._columnas.indice[nombre]]
+        except (KeyError, TypeError):
+            raise KeyError(nombre) from None
+
+    def __getattr__(self, nombre):
+        # Solo se llama si 'nombre' no es un atributo real (ej: fila.codigo).
+        # Los nombres con _ no son columnas (evita recursion si los slots no existen aun)
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        indice = self._columnas.indice.get(nombre)
+        if indice is None:
+            raise AttributeError(nombre)
+        return self._valores[indice]
+
+    def __iter__(self):
+        return iter(self._columnas.nombres)
+
+    def __len__(self):
+        return len(self._columnas.nombres)
+
+    def __contains__(self, nombre):
+        return nombre in self._columnas.indice
+
+    def values(self):
+        # La tupla de valores tal cual: recorrerla no pasa por __getitem__
+        return self._valores
+
+    def __repr__(self):
+        return f"Fila({dict(self)!r})"
+
+
+class Tabla(Sequence):
+    """
+    Lista de solo lectura de filas que comparten las mismas columnas.
+
+    Se usa igual que la lista de diccionarios que reemplaza: len(), for,
+    tabla[0], tabla[inicio:fin] (retorna otra Tabla), 'if tabla:'.
+
+    Atributos:
+        columnas: Columnas compartidas
+        filas:    lista de tuplas con los valores de cada fila
+    """
+
+    __slots__ = ('columnas', 'filas')
+
+    def __init__(self, columnas, filas):
+        self.columnas = columnas
+        self.filas = filas
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return Tabla(self.columnas, self.filas[posicion])
+        return Fila(self.columnas, self.filas[posicion])
+
+    def __iter__(self):
+        columnas = self.columnas
+        for valores in self.filas:
+            yield Fila(columnas, valores)
+
+    def __len__(self):
+        return len(self.filas)
+
+    def __repr__(self):
+        return f"Tabla({len(self.filas)} filas, {self.columnas!r})"
+
+
+# ══════════════════════════════════════════════
+# FUNCIONES PUBLICAS
+# ══════════════════════════════════════════════
+
+def compactar(registros):
+    """
+    Convierte una lista de diccionarios con las mismas columnas en una Tabla.
+
+    Args:
+        registros: lista de diccionarios (ej: datos_json['datos'])
+
+    Returns:
+        Tabla con los mismos datos. Si la lista esta vacia, o alguna fila
+        no es un diccionario o tiene otras columnas, se retorna la lista
+        original sin cambios (no se pierde informacion).
+    """
+    if not registros or not isinstance(registros[0], dict):
+        return registros
+
+    nombres = tuple(registros[0])
+    filas = []
+    for registro in registros:
+        # Las filas de un SELECT tienen siempre las mismas columnas en el mismo orden
+        if not isinstance(registro, dict) or tuple(registro) != nombres:
+            return registros
+        filas.append(tuple(registro.values()))
+    return Tabla(Columnas(nombres), filas)
+
+
+def copiar(registros):
+    """
+    Copia un listado antes de entregarlo a una vista.
+
+    Una Tabla no se puede modificar, asi que se comparte tal cual; una lista
+    se copia para que la vista pueda agregar o quitar elementos sin afectar
+    al cache.
+    """
+    if isinstance(registros, Tabla):
+        return registros
+    return list(registros)
+
+
+# ══════════════════════════════════════════════
+# SERIALIZACION JSON (jsonify y filtro tojson)
+# ══════════════════════════════════════════════
+
+class ProveedorJson(DefaultJSONProvider):
+    """
+    Serializador JSON de Flask que acepta Tabla y Fila.
+
+    Se activa en app.py con: app.json = ProveedorJson(app)
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Tabla):
+            return [dict(fila) for fila in o]
+        if isinstance(o, Fila):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
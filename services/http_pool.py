@@ -0,0 +1,237 @@
+"""
+http_pool.py - Pool de conexiones HTTP compartido por todos los ApiService.
+
+Cada Blueprint crea su propia instancia con api = ApiService(), pero todas
+usan el mismo PoolHttp del modulo. Asi una conexion abierta por /producto
+se reutiliza despues en /cliente o /factura (keep-alive), en lugar de abrir
+un socket TCP nuevo por cada peticion a la API.
+
+Cada hilo del servidor obtiene su propia requests.Session (las sesiones no
+son seguras entre hilos), pero todas montan los mismos HTTPAdapter, que si
+son seguros entre hilos y son los que guardan las conexiones abiertas.
+"""
+
+# threading: para guardar una sesion distinta en cada hilo
+import threading
+
+# time.perf_counter(): tiempo de apertura de las conexiones (ver services/traza.py)
+import time
+
+# contextmanager: llamada() marca una peticion en curso mientras dura el 'with'
+from contextlib import contextmanager
+
+# requests: Session reutiliza conexiones; HTTPAdapter contiene el pool de urllib3
+import requests
+from requests.adapters import HTTPAdapter
+
+# Conexiones y pools de urllib3 (se extienden para medir la apertura de conexiones)
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import (
+    HTTP_POOL_HOSTS,
+    HTTP_POOL_TAMANO,
+    HTTP_POOL_TAMANO_POR_HOST,
+    HTTP_POOL_BLOQUEAR,
+)
+
+
+# ──────────────────────────────────────────────
+# TIEMPO DE CONEXION
+# La traza de una peticion (services/traza.py) separa el tiempo de abrir
+# una conexion del de esperar la respuesta. requests no lo informa, asi
+# que las conexiones suman a un contador del hilo lo que tarda connect().
+# ──────────────────────────────────────────────
+_apertura = threading.local()
+
+
+def _medir_connect(clase):
+    """Subclase de una conexion de urllib3 que mide connect() (TCP y TLS)."""
+    class ConexionMedida(clase):
+        def connect(self):
+            inicio = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                _apertura.segundos = getattr(_apertura, 'segundos', 0.0) + time.perf_counter() - inicio
+    ConexionMedida.__name__ = f"{clase.__name__}Medida"
+    return ConexionMedida
+
+
+class _PoolMedido(HTTPConnectionPool):
+    ConnectionCls = _medir_connect(HTTPConnection)
+
+
+class _PoolMedidoHttps(HTTPSConnectionPool):
+    ConnectionCls = _medir_connect(HTTPSConnection)
+
+
+class _AdaptadorMedido(HTTPAdapter):
+    """HTTPAdapter cuyas conexiones miden lo que tardan en abrirse."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # Diccionario nuevo: el de urllib3 es global y lo comparten todos los PoolManager
+        self.poolmanager.pool_classes_by_scheme = {'http': _PoolMedido, 'https': _PoolMedidoHttps}
+
+
+class PoolHttp:
+    """
+    Pool de conexiones HTTP seguro entre hilos.
+
+    Metodos:
+        sesion()          → requests.Session del hilo actual (conexiones compartidas)
+        estadisticas()    → dict con aciertos/fallos del pool por host
+        llamada()         → 'with' que cuenta una peticion a la API en curso
+        en_curso()        → cantidad de peticiones en curso
+        esperar_llamadas(espera) → espera a que terminen las peticiones en curso
+        segundos_conexion() → segundos que el hilo paso abriendo conexiones (y lo pone en cero)
+        cerrar()          → cierra todas las conexiones abiertas
+    """
+
+    def __init__(self, hosts=HTTP_POOL_HOSTS, tamano=HTTP_POOL_TAMANO,
+                 tamano_por_host=None, bloquear=HTTP_POOL_BLOQUEAR):
+        self._hosts = hosts
+        self._bloquear = bloquear
+
+        # Adaptador por defecto para cualquier URL http:// o https://
+        self._adaptador = self._nuevo_adaptador(tamano)
+
+        # Adaptadores especificos por host (prefijo de URL → HTTPAdapter).
+        # requests elige el prefijo montado mas largo que coincida con la URL.
+        if tamano_por_host is None:
+            tamano_por_host = HTTP_POOL_TAMANO_POR_HOST
+        self._por_host = {
+            prefijo: self._nuevo_adaptador(tam)
+            for prefijo, tam in tamano_por_host.items()
+        }
+
+        # Una sesion por hilo: threading.local() guarda un valor distinto en cada hilo
+        self._local = threading.local()
+
+        # Peticiones en curso (de ApiService y AsyncApiService), para drenar al apagar
+        self._en_curso = 0
+        self._sin_llamadas = threading.Condition()
+
+    def _nuevo_adaptador(self, tamano):
+        """Crea un HTTPAdapter con el tamano de pool indicado."""
+        return _AdaptadorMedido(
+            pool_connections=self._hosts,  # Cuantos hosts distintos se recuerdan
+            pool_maxsize=tamano,           # Conexiones que se conservan por host
+            pool_block=self._bloquear      # Esperar o desbordar si el pool esta lleno
+        )
+
+    # ──────────────────────────────────────────────
+    # SESION DEL HILO ACTUAL
+    # ──────────────────────────────────────────────
+    def sesion(self):
+        """Retorna la requests.Session del hilo actual, creandola si no existe."""
+        sesion = getattr(self._local, 'sesion', None)
+        if sesion is None:
+            sesion = requests.Session()
+            # Montar los adaptadores compartidos: la sesion es del hilo,
+            # pero las conexiones abiertas viven en el adaptador comun.
+            sesion.mount('http://', self._adaptador)
+            sesion.mount('https://', self._adaptador)
+            for prefijo, adaptador in self._por_host.items():
+                sesion.mount(prefijo, adaptador)
+            self._local.sesion = sesion
+        return sesion
+
+    # ──────────────────────────────────────────────
+    # ESTADISTICAS DEL POOL
+    # Un "acierto" es una peticion que reutilizo una conexion abierta;
+    # un "fallo" es una peticion que tuvo que abrir una conexion TCP nueva.
+    # ──────────────────────────────────────────────
+    def estadisticas(self):
+        """
+        Resume el uso del pool por host.
+
+        Returns:
+            Diccionario {host: {peticiones, aciertos, fallos, libres, maximo}}
+            mas una entrada 'total' con la suma de todos los hosts.
+        """
+        adaptadores = [self._adaptador] + list(self._por_host.values())
+
+        resumen = {}
+        for adaptador in adaptadores:
+            pools = adaptador.poolmanager.pools
+            for clave in pools.keys():
+                # El pool pudo ser descartado entre keys() y get() (LRU de urllib3)
+                pool = pools.get(clave)
+                if pool is None:
+                    continue
+                host = f"{pool.scheme}://{pool.host}:{pool.port}"
+                datos = resumen.setdefault(host, {
+                    'peticiones': 0, 'aciertos': 0, 'fallos': 0,
+                    'libres': 0, 'maximo': 0
+                })
+                datos['peticiones'] += pool.num_requests
+                datos['fallos'] += pool.num_connections
+                datos['aciertos'] += max(pool.num_requests - pool.num_connections, 0)
+                datos['libres'] += pool.pool.qsize() if pool.pool else 0
+                datos['maximo'] += pool.pool.maxsize if pool.pool else 0
+
+        total = {'peticiones': 0, 'aciertos': 0, 'fallos': 0}
+        for datos in resumen.values():
+            for campo in total:
+                total[campo] += datos[campo]
+        resumen['total'] = total
+        return resumen
+
+    # ──────────────────────────────────────────────
+    # PETICIONES EN CURSO
+    # Al apagar un worker (ver services/arranque.py) se espera a que
+    # terminen antes de cerrar las conexiones, incluidas las de los hilos
+    # de fondo (refrescos del cache, reconstruccion de indices).
+    # ──────────────────────────────────────────────
+    @contextmanager
+    def llamada(self):
+        """Cuenta una peticion en curso mientras dura el bloque 'with'."""
+        with self._sin_llamadas:
+            self._en_curso += 1
+        try:
+            yield
+        finally:
+            with self._sin_llamadas:
+                self._en_curso -= 1
+                if not self._en_curso:
+                    self._sin_llamadas.notify_all()
+
+    def en_curso(self):
+        """Cantidad de peticiones a la API que todavia no terminaron."""
+        return self._en_curso
+
+    def esperar_llamadas(self, espera):
+        """
+        Espera a que terminen las peticiones en curso.
+
+        Args:
+            espera: segundos maximos de espera
+
+        Returns:
+            True si no quedo ninguna, False si se agoto la espera.
+        """
+        with self._sin_llamadas:
+            return self._sin_llamadas.wait_for(lambda: not self._en_curso, espera)
+
+    def segundos_conexion(self):
+        """
+        Segundos que el hilo actual paso abriendo conexiones desde la consulta anterior.
+
+        Se consulta antes y despues de una peticion: la segunda lectura es
+        lo que tardo en abrir su conexion (0 si reutilizo una abierta).
+        """
+        segundos = getattr(_apertura, 'segundos', 0.0)
+        _apertura.segundos = 0.0
+        return segundos
+
+    def cerrar(self):
+        """Cierra todas las conexiones abiertas de todos los adaptadores."""
+        self._adaptador.close()
+        for adaptador in self._por_host.values():
+            adaptador.close()
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+pool = PoolHttp()
@@ -0,0 +1,400 @@
+"""
+indices.py - Indices clave → nombre de las tablas de referencia.
+
+Las vistas de cliente, vendedor y factura muestran nombres en lugar de
+claves foraneas (fkcodpersona → 'Ana Lopez'). Antes cada peticion descargaba
+persona/empresa completas y armaba un diccionario codigo → nombre.
+
+IndicesNombres construye ese diccionario UNA vez por tabla (INDICES_NOMBRES)
+y lo mantiene al dia:
+
+    - crear/actualizar/eliminar de ApiService lo modifican en el momento
+      (sin volver a descargar la tabla).
+    - Si una escritura no trae los datos necesarios (ej: el id autoincremental
+      de un cliente nuevo), el indice se marca vencido y se reconstruye en
+      segundo plano mientras se sigue usando el actual.
+    - Cada INDICES_TTL segundos se reconstruye en segundo plano para ver los
+      cambios hechos por otros clientes de la API.
+    - Si la API no responde, la carga no se repite en cada peticion: se
+      vuelve a intentar en segundo plano despues de INDICES_REINTENTO
+      segundos, y mientras tanto los nombres salen como SIN_NOMBRE.
+
+cliente y vendedor guardan su fkcodpersona y el nombre se resuelve en el
+indice de persona ('via'), asi renombrar una persona se ve de inmediato.
+
+Los indices no descargan nada por si solos: ApiService les pasa la funcion
+que lee el listado completo (cargar(tabla)), que usa el cache de listados.
+"""
+
+# threading: los indices se comparten entre los hilos del servidor
+import threading
+
+# time.monotonic(): edad de cada indice
+import time
+
+# Mapping: MapaNombres se usa en los templates como un diccionario de solo lectura
+from collections.abc import Mapping
+
+# requests: errores de red al cargar un indice
+import requests
+
+# ejecutor: pool de hilos donde se reconstruyen los indices vencidos
+from services.concurrencia import ejecutor
+
+# compactar: el listado para el typeahead se guarda como Tabla compacta
+from services.filas import compactar
+
+from config import INDICES_NOMBRES, INDICES_TTL, INDICES_REINTENTO
+
+
+# Texto que se muestra cuando la clave no esta en el indice
+SIN_NOMBRE = 'Sin nombre'
+
+
+class _Indice:
+    """Indice de una tabla. __slots__ evita crear un dict por indice."""
+
+    __slots__ = ('entradas', 'construido', 'vencido', 'reconstruyendo',
+                 'generacion', 'reconstrucciones', 'fallo', 'lock_carga')
+
+    def __init__(self):
+        # str(clave) → (clave original, valor del campo nombre)
+        self.entradas = None
+        self.construido = 0.0
+        self.vencido = False
+        self.reconstruyendo = False
+        # Se incrementa con cada escritura (ver _construir)
+        self.generacion = 0
+        self.reconstrucciones = 0
+        # Momento de la ultima carga fallida (None: la ultima funciono)
+        self.fallo = None
+        # Solo un hilo descarga la tabla la primera vez
+        self.lock_carga = threading.Lock()
+
+
+class MapaNombres(Mapping):
+    """
+    Vista de solo lectura clave → nombre de un indice, para los templates.
+
+    Acepta la clave como texto o como numero: mapa.get(3) == mapa.get('3').
+
+    Ejemplo (template):
+        {{ mapa_personas.get(reg.fkcodpersona, reg.fkcodpersona) }}
+    """
+
+    __slots__ = ('_indices', '_tabla', '_cargar')
+
+    def __init__(self, indices, tabla, cargar):
+        self._indices = indices
+        self._tabla = tabla
+        self._cargar = cargar
+
+    def __getitem__(self, clave):
+        nombre = self._indices.nombre(self._tabla, clave, self._cargar, defecto=None)
+        if nombre is None:
+            raise KeyError(clave)
+        return nombre
+
+    def __iter__(self):
+        return (clave for clave, _ in self._indices.opciones(self._tabla, self._cargar))
+
+    def __len__(self):
+        return len(self._indices.opciones(self._tabla, self._cargar))
+
+
+class IndicesNombres:
+    """
+    Indices clave → nombre, seguros entre hilos.
+
+    Metodos:
+        nombre(tabla, clave, cargar)       → nombre para mostrar (O(1))
+        mapa(tabla, cargar)                → MapaNombres (para los templates)
+        opciones(tabla, cargar)            → lista [(clave, nombre), ...] ordenada por nombre
+        listado(tabla, cargar)             → Tabla [{clave, 'nombre'}, ...] para el typeahead
+        version(tabla, cargar)             → cambia cada vez que cambia el indice (o el de su 'via')
+        via(tabla)                         → tabla de la que se toma el nombre, o None
+        preparar(tabla, cargar)            → construye el indice antes de usarlo (arranque)
+        al_crear(tabla, datos)             → agrega el registro nuevo
+        al_actualizar(tabla, nombre_clave, valor_clave, datos)
+        al_eliminar(tabla, nombre_clave, valor_clave)
+        estadisticas()                     → dict con entradas y edad de cada indice
+
+    'cargar' es una funcion cargar(tabla) que retorna el listado completo de
+    la tabla y lanza requests.RequestException si la API no responde.
+    """
+
+    def __init__(self, definiciones=None, ttl=INDICES_TTL, reintento=INDICES_REINTENTO):
+        self._definiciones = INDICES_NOMBRES if definiciones is None else definiciones
+        self._ttl = ttl
+        self._reintento = reintento
+        self._indices = {tabla: _Indice() for tabla in self._definiciones}
+        # tabla → (version de los indices, listado) (ver listado())
+        self._listados = {}
+        self._lock = threading.Lock()
+
+    # ──────────────────────────────────────────────
+    # CONSTRUIR
+    # ──────────────────────────────────────────────
+    def _construir(self, tabla, cargar):
+        """Descarga la tabla y reemplaza su indice. Lanza RequestException si falla."""
+        indice = self._indices[tabla]
+        campo_clave, campo_nombre, _via = self._definiciones[tabla]
+        with self._lock:
+            generacion = indice.generacion
+
+        registros = cargar(tabla)
+        entradas = {}
+        for registro in registros:
+            clave = registro.get(campo_clave)
+            if clave is not None:
+                entradas[str(clave)] = (clave, registro.get(campo_nombre))
+
+        with self._lock:
+            indice.reconstrucciones += 1
+            # Hubo una escritura mientras se descargaba: el listado descargado
+            # podria no tenerla. Si ya habia indice (que si la tiene) se conserva;
+            # en los dos casos se vuelve a construir en el proximo uso.
+            escritura = indice.generacion != generacion
+            if escritura and indice.entradas is not None:
+                indice.vencido = True
+                return
+            indice.fallo = None
+            indice.entradas = entradas
+            indice.construido = time.monotonic()
+            indice.vencido = escritura
+
+    def _reconstruir(self, tabla, cargar):
+        """Reconstruye en segundo plano; si falla se sigue usando el indice actual."""
+        indice = self._indices[tabla]
+        try:
+            self._construir(tabla, cargar)
+        except requests.RequestException as ex:
+            print(f"Error al reconstruir el indice de {tabla}: {ex}")
+            with self._lock:
+                indice.fallo = time.monotonic()
+        finally:
+            with self._lock:
+                indice.reconstruyendo = False
+
+    def _reintentar(self, indice, ahora):
+        """True si paso INDICES_REINTENTO desde la ultima carga fallida (con el lock tomado)."""
+        return indice.fallo is None or ahora - indice.fallo >= self._reintento
+
+    def _entradas(self, tabla, cargar):
+        """
+        Entradas vigentes del indice de la tabla.
+
+        La primera vez se construye en este hilo (los demas esperan).
+        Si esta vencido se sigue usando y se reconstruye en segundo plano.
+        Retorna {} si no se pudo construir (la API no responde): despues de
+        una carga fallida no se vuelve a descargar en la peticion, se
+        reintenta en segundo plano pasados INDICES_REINTENTO segundos.
+        """
+        indice = self._indices[tabla]
+        if indice.entradas is None and indice.fallo is None:
+            with indice.lock_carga:
+                # Los hilos que esperaban la primera carga no la repiten si fallo
+                if indice.entradas is None and indice.fallo is None:
+                    try:
+                        self._construir(tabla, cargar)
+                    except requests.RequestException as ex:
+                        print(f"Error al construir el indice de {tabla}: {ex}")
+                        with self._lock:
+                            indice.fallo = time.monotonic()
+
+        ahora = time.monotonic()
+        with self._lock:
+            entradas = indice.entradas
+            if entradas is None:
+                vencer = True
+            else:
+                vencer = indice.vencido or ahora - indice.construido >= self._ttl
+            vencer = vencer and not indice.reconstruyendo and self._reintentar(indice, ahora)
+            if vencer:
+                indice.reconstruyendo = True
+        if vencer:
+            ejecutor.submit(self._reconstruir, tabla, cargar)
+        return {} if entradas is None else entradas
+
+    def preparar(self, tabla, cargar):
+        """
+        Construye el indice de la tabla (y el de su 'via') si todavia no existe.
+
+        Returns:
+            True si el indice quedo listo (o la tabla no tiene indice),
+            False si la API no respondio.
+        """
+        if tabla not in self._definiciones:
+            return True
+        self._entradas(tabla, cargar)
+        listo = self._indices[tabla].entradas is not None
+        via = self._definiciones[tabla][2]
+        if via:
+            listo = self.preparar(via, cargar) and listo
+        return listo
+
+    # ──────────────────────────────────────────────
+    # CONSULTAR
+    # ──────────────────────────────────────────────
+    def nombre(self, tabla, clave, cargar, defecto=SIN_NOMBRE):
+        """
+        Nombre para mostrar del registro con esa clave.
+
+        Args:
+            tabla:   tabla del indice (ej: 'persona', 'cliente')
+            clave:   valor de la clave (texto o numero)
+            cargar:  funcion que descarga el listado completo (ver la clase)
+            defecto: valor si la clave no existe
+
+        Ejemplo:
+            api.nombre('cliente', fac['fkidcliente'])  →  'Ana Lopez'
+        """
+        if clave is None or tabla not in self._definiciones:
+            return defecto
+        entrada = self._entradas(tabla, cargar).get(str(clave))
+        if entrada is None:
+            return defecto
+        valor = entrada[1]
+
+        # cliente/vendedor: el valor es la clave de la persona
+        via = self._definiciones[tabla][2]
+        if via:
+            return self.nombre(via, valor, cargar, defecto)
+        return defecto if valor is None else valor
+
+    def mapa(self, tabla, cargar):
+        """Vista clave → nombre para pasar al template (mapa.get(clave, defecto))."""
+        return MapaNombres(self, tabla, cargar)
+
+    def opciones(self, tabla, cargar):
+        """
+        Todas las claves con su nombre, ordenadas por nombre (para selects).
+
+        Returns:
+            Lista de tuplas (clave original, nombre).
+        """
+        if tabla not in self._definiciones:
+            return []
+        via = self._definiciones[tabla][2]
+        entradas = self._entradas(tabla, cargar)
+        with self._lock:
+            entradas = list(entradas.values())
+        if via:
+            pares = [(clave, self.nombre(via, valor, cargar)) for clave, valor in entradas]
+        else:
+            pares = [(clave, SIN_NOMBRE if valor is None else valor) for clave, valor in entradas]
+        pares.sort(key=lambda par: str(par[1]).lower())
+        return pares
+
+    def via(self, tabla):
+        """Tabla de la que se toma el nombre (cliente → 'persona'), o None si no tiene."""
+        definicion = self._definiciones.get(tabla)
+        return definicion[2] if definicion else None
+
+    def version(self, tabla, cargar):
+        """Cambia cada vez que cambia el indice de la tabla (o el de su 'via')."""
+        self._entradas(tabla, cargar)
+        indice = self._indices[tabla]
+        with self._lock:
+            version = (indice.construido, indice.generacion)
+        via = self._definiciones[tabla][2]
+        if via:
+            version += self.version(via, cargar)
+        return version
+
+    def listado(self, tabla, cargar):
+        """
+        Claves y nombres de la tabla como listado, para buscar en el (typeahead).
+
+        Es el mismo objeto mientras el indice no cambie, asi la busqueda
+        (services/sugerencias.py) solo rearma su indice cuando hay cambios.
+
+        Returns:
+            Tabla con las columnas (campo clave, 'nombre'), ordenada por nombre.
+        """
+        if tabla not in self._definiciones:
+            return []
+        version = self.version(tabla, cargar)
+        with self._lock:
+            guardado = self._listados.get(tabla)
+        if guardado is not None and guardado[0] == version:
+            return guardado[1]
+        campo_clave = self._definiciones[tabla][0]
+        listado = compactar([{campo_clave: clave, 'nombre': nombre}
+                             for clave, nombre in self.opciones(tabla, cargar)])
+        with self._lock:
+            self._listados[tabla] = (version, listado)
+        return listado
+
+    # ──────────────────────────────────────────────
+    # ACTUALIZAR DESPUES DE UNA ESCRITURA
+    # ApiService los llama solo si la API respondio con exito.
+    # ──────────────────────────────────────────────
+    def _escribir(self, tabla, cambio):
+        """
+        Aplica cambio(indice, definicion) con el lock tomado, si la tabla tiene indice.
+
+        El diccionario se modifica en su lugar: una asignacion o un borrado en
+        un dict es atomico, y opciones() copia los valores con el lock tomado.
+        """
+        if tabla not in self._definiciones:
+            return
+        indice = self._indices[tabla]
+        with self._lock:
+            indice.generacion += 1
+            if indice.entradas is not None:
+                cambio(indice, self._definiciones[tabla])
+
+    def al_crear(self, tabla, datos):
+        """Agrega el registro creado. Sin clave (autoincremental) el indice queda vencido."""
+        def cambio(indice, definicion):
+            campo_clave, campo_nombre, _via = definicion
+            clave = datos.get(campo_clave)
+            if clave in (None, ''):
+                indice.vencido = True
+                return
+            indice.entradas[str(clave)] = (clave, datos.get(campo_nombre))
+        self._escribir(tabla, cambio)
+
+    def al_actualizar(self, tabla, nombre_clave, valor_clave, datos):
+        """Actualiza el nombre (y la clave, si cambio) del registro modificado."""
+        def cambio(indice, definicion):
+            campo_clave, campo_nombre, _via = definicion
+            anterior = indice.entradas.get(str(valor_clave))
+            if nombre_clave != campo_clave or anterior is None:
+                indice.vencido = True
+                return
+            clave = datos.get(campo_clave, anterior[0])
+            valor = datos.get(campo_nombre, anterior[1])
+            del indice.entradas[str(valor_clave)]
+            indice.entradas[str(clave)] = (clave, valor)
+        self._escribir(tabla, cambio)
+
+    def al_eliminar(self, tabla, nombre_clave, valor_clave):
+        """Quita el registro eliminado."""
+        def cambio(indice, definicion):
+            if nombre_clave != definicion[0]:
+                indice.vencido = True
+                return
+            indice.entradas.pop(str(valor_clave), None)
+        self._escribir(tabla, cambio)
+
+    def estadisticas(self):
+        """Entradas, edad en segundos y reconstrucciones de cada indice."""
+        ahora = time.monotonic()
+        with self._lock:
+            return {
+                tabla: {
+                    'construido': indice.entradas is not None,
+                    'entradas': len(indice.entradas) if indice.entradas is not None else 0,
+                    'edad': round(ahora - indice.construido, 1) if indice.entradas is not None else None,
+                    'vencido': indice.vencido,
+                    'fallo': round(ahora - indice.fallo, 1) if indice.fallo is not None else None,
+                    'reconstrucciones': indice.reconstrucciones,
+                }
+                for tabla, indice in self._indices.items()
+            }
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+indices = IndicesNombres()
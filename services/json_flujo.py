@@ -0,0 +1,291 @@
+"""
+json_flujo.py - Lectura incremental de respuestas JSON grandes.
+
+listar() necesita tener en memoria al mismo tiempo el cuerpo de la respuesta,
+el arbol JSON decodificado y la lista final. Para tablas grandes eso triplica
+el uso de memoria. Este modulo lee el JSON por partes, a medida que llega
+del socket, y entrega las filas de un arreglo una por una (generador):
+
+    {"datos": [ {...}, {...}, ... ], "mensaje": "..."}
+                 ▲ fila    ▲ fila
+
+Solo se guarda en memoria la fila actual y el trozo de texto pendiente.
+
+Los SP retornan el resultado como un TEXTO JSON dentro del JSON:
+
+    {"resultados": [{"p_resultado": "{\\"facturas\\": [ ... ]}"}]}
+
+El texto de p_resultado tambien se lee por partes: se quitan los escapes
+(\\" → ") a medida que llega y el resultado se lee con otro lector.
+
+Funciones:
+    filas_listado(trozos, clave='datos')  → generador de filas de {"datos": [...]}
+    filas_sp(trozos, clave='facturas')    → generador de filas del p_resultado de un SP
+"""
+
+# codecs: decodifica UTF-8 por partes (un caracter puede quedar partido entre dos trozos)
+import codecs
+
+# json: raw_decode() lee UN valor JSON desde una posicion del texto
+import json
+
+# re: buscar rapido el proximo caracter especial dentro de un texto JSON
+import re
+
+
+# Caracteres que se saltan entre valores JSON
+_ESPACIOS = ' \t\n\r'
+
+# Dentro de un texto JSON solo interesan el cierre (") y los escapes (\)
+_ESPECIAL = re.compile(r'["\\]')
+
+# Escapes de un caracter dentro de un texto JSON (\uXXXX se decodifica aparte)
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+# Tamano minimo de cada trozo de texto sin escapes que se entrega al lector interno
+_TAMANO_TROZO_TEXTO = 8 * 1024
+
+_decodificador = json.JSONDecoder()
+
+
+def _textos(trozos):
+    """Convierte trozos de bytes (ej: respuesta.iter_content()) en trozos de texto UTF-8."""
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    for trozo in trozos:
+        if isinstance(trozo, str):
+            yield trozo
+            continue
+        texto = utf8.decode(trozo)
+        if texto:
+            yield texto
+    final = utf8.decode(b'', final=True)
+    if final:
+        yield final
+
+
+# ══════════════════════════════════════════════
+# LECTOR INCREMENTAL
+# ══════════════════════════════════════════════
+
+class _Lector:
+    """
+    Recorre un JSON que llega por partes.
+
+    Guarda solo el texto que todavia no se ha consumido (desde self.pos).
+    Cuando necesita mas texto pide el siguiente trozo al iterador.
+    """
+
+    def __init__(self, textos):
+        self._textos = iter(textos)
+        self.buf = ''
+        self.pos = 0
+
+    def _mas(self):
+        """Agrega el siguiente trozo al texto pendiente. Retorna False si ya no hay mas."""
+        trozo = next(self._textos, None)
+        if trozo is None:
+            return False
+        self.buf = self.buf[self.pos:] + trozo
+        self.pos = 0
+        return True
+
+    def caracter(self):
+        """Salta los espacios y retorna el siguiente caracter (sin consumirlo)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _ESPACIOS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._mas():
+                raise ValueError("JSON incompleto: termino antes de lo esperado")
+
+    def esperar(self, esperado):
+        """Consume el caracter esperado (ej: '{' o ':') o lanza ValueError."""
+        encontrado = self.caracter()
+        if encontrado != esperado:
+            raise ValueError(f"JSON invalido: se esperaba '{esperado}' y llego '{encontrado}'")
+        self.pos += 1
+
+    def valor(self):
+        """Lee un valor JSON completo (objeto, arreglo, texto, numero...)."""
+        self.caracter()
+        while True:
+            try:
+                valor, fin = _decodificador.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # El valor todavia no llego completo
+                if not self._mas():
+                    raise
+                continue
+            # Un numero al final del texto podria continuar en el proximo trozo
+            if fin == len(self.buf) and self._mas():
+                continue
+            self.pos = fin
+            return valor
+
+    def arreglo(self):
+        """Generador: entrega uno por uno los elementos del arreglo actual."""
+        self.esperar('[')
+        if self.caracter() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.valor()
+            separador = self.caracter()
+            self.pos += 1
+            if separador == ']':
+                return
+            if separador != ',':
+                raise ValueError(f"JSON invalido: se esperaba ',' o ']' y llego '{separador}'")
+
+    def buscar_clave(self, claves):
+        """
+        Entra al objeto actual y avanza hasta el valor de una de las claves.
+
+        Los valores de las demas claves se leen y se descartan.
+
+        Returns:
+            El nombre de la clave encontrada, o None si el objeto no la tiene
+            (en ese caso el objeto queda consumido).
+        """
+        self.esperar('{')
+        if self.caracter() == '}':
+            self.pos += 1
+            return None
+        while True:
+            nombre = self.valor()
+            self.esperar(':')
+            if nombre in claves:
+                return nombre
+            self.valor()
+            separador = self.caracter()
+            self.pos += 1
+            if separador == '}':
+                return None
+            if separador != ',':
+                raise ValueError(f"JSON invalido: se esperaba ',' o '}}' y llego '{separador}'")
+
+    def texto(self):
+        """
+        Generador: entrega el contenido de un texto JSON ya sin escapes, por partes.
+
+        Se usa para p_resultado, que es un JSON guardado dentro de un texto:
+        el resultado se puede pasar a otro _Lector sin armar el texto completo.
+        """
+        self.esperar('"')
+        partes = []
+        tamano = 0
+        while True:
+            especial = _ESPECIAL.search(self.buf, self.pos)
+            fin = especial.start() if especial else len(self.buf)
+            if fin > self.pos:
+                partes.append(self.buf[self.pos:fin])
+                tamano += fin - self.pos
+                self.pos = fin
+            if tamano >= _TAMANO_TROZO_TEXTO:
+                yield ''.join(partes)
+                partes, tamano = [], 0
+
+            if especial is None:
+                if not self._mas():
+                    raise ValueError("JSON incompleto: texto sin cerrar")
+                continue
+
+            if especial.group() == '"':
+                self.pos += 1
+                if partes:
+                    yield ''.join(partes)
+                return
+
+            # Escape: \n, \", \\, \uXXXX... Esperar a que llegue completo
+            while True:
+                largo = self._largo_escape()
+                if len(self.buf) - self.pos >= largo:
+                    break
+                if not self._mas():
+                    if largo == 12:
+                        largo = 6
+                        break
+                    raise ValueError("JSON incompleto: escape sin terminar")
+            escape = self.buf[self.pos:self.pos + largo]
+            simple = _ESCAPES.get(escape[1])
+            partes.append(simple if simple is not None else json.loads('"' + escape + '"'))
+            tamano += 1
+            self.pos += largo
+
+    def _largo_escape(self):
+        r"""
+        Largo del escape que empieza en self.pos: 2 (\n), 6 (\u00e9) o
+        12 (par sustituto \ud83d\ude00, que se decodifica junto).
+        """
+        disponible = len(self.buf) - self.pos
+        if disponible < 2 or self.buf[self.pos + 1] != 'u':
+            return 2
+        if disponible < 4:
+            return 6
+        # \uD800-\uDBFF: primera mitad de un par sustituto, sigue otro \uXXXX
+        if self.buf[self.pos + 2] in 'dD' and self.buf[self.pos + 3] in '89abAB':
+            if disponible < 8 or self.buf[self.pos + 6:self.pos + 8] == '\\u':
+                return 12
+        return 6
+
+
+# ══════════════════════════════════════════════
+# FUNCIONES PUBLICAS
+# ══════════════════════════════════════════════
+
+def filas_listado(trozos, clave='datos'):
+    """
+    Entrega las filas del arreglo 'clave' de un JSON que llega por partes.
+
+    Args:
+        trozos: iterador de bytes o texto (ej: respuesta.iter_content(65536))
+        clave:  clave del arreglo en el objeto raiz (ej: 'datos')
+
+    Ejemplo:
+        for fila in filas_listado(respuesta.iter_content(65536)):
+            escribir(fila)
+    """
+    lector = _Lector(_textos(trozos))
+    if lector.buscar_clave((clave,)) is None:
+        return
+    if lector.caracter() == '[':
+        yield from lector.arreglo()
+    else:
+        # null u otro valor: no hay filas
+        lector.valor()
+
+
+def filas_sp(trozos, clave='facturas'):
+    """
+    Entrega las filas del arreglo 'clave' dentro del p_resultado de un SP.
+
+    Acepta p_resultado como texto JSON (PostgreSQL / SQL Server) o como
+    objeto ya anidado, y p_resultado que sea directamente un arreglo.
+
+    Args:
+        trozos: iterador de bytes de la respuesta de /api/procedimientos/ejecutarsp
+        clave:  arreglo dentro de p_resultado (ej: 'facturas')
+    """
+    lector = _Lector(_textos(trozos))
+    if lector.buscar_clave(('resultados',)) is None:
+        return
+    lector.esperar('[')
+    if lector.caracter() == ']':
+        return
+    if lector.buscar_clave(('p_resultado', '@p_resultado')) is None:
+        return
+
+    inicio = lector.caracter()
+    if inicio == '"':
+        # JSON dentro de un texto: quitar los escapes por partes y leerlo con otro lector
+        interno = _Lector(lector.texto())
+    else:
+        interno = lector
+
+    inicio = interno.caracter()
+    if inicio == '[':
+        yield from interno.arreglo()
+    elif inicio == '{':
+        if interno.buscar_clave((clave,)) is not None and interno.caracter() == '[':
+            yield from interno.arreglo()
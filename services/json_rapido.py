@@ -0,0 +1,124 @@
+"""
+json_rapido.py - Decodificador JSON intercambiable para las respuestas de la API.
+
+ApiService decodificaba cada respuesta con respuesta.json() (bytes → str → dict)
+y ejecutar_sp decodificaba p_resultado otra vez con json.loads, porque llega
+como un texto JSON dentro del JSON. Con facturas grandes ese doble parseo
+era lo que mas CPU consumia.
+
+Este modulo:
+    - Usa orjson si esta instalado (pip install orjson) y si no, el json
+      de la libreria estandar (JSON_DECODIFICADOR en config.py).
+    - Decodifica directamente desde los bytes de la respuesta
+      (respuesta.content), sin crear antes un str con todo el cuerpo.
+    - Mide el tiempo de cada decodificacion y guarda las ultimas
+      (estadisticas(), visible en GET /estado).
+"""
+
+# json: decodificador de la libreria estandar (siempre disponible)
+import json
+
+# threading: las estadisticas se actualizan desde varios hilos
+import threading
+
+# time.perf_counter(): reloj de alta resolucion para medir cada decodificacion
+import time
+
+# deque(maxlen=N): ultimas mediciones, descarta las mas viejas
+from collections import deque
+
+from config import JSON_DECODIFICADOR, JSON_HISTORIAL
+
+# orjson es opcional: si no esta instalado se usa json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# ══════════════════════════════════════════════
+# BACKENDS DISPONIBLES
+# Cada uno recibe bytes o str y retorna el objeto Python.
+# ══════════════════════════════════════════════
+
+BACKENDS = {'json': json.loads}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.loads
+
+
+def _elegir_backend(nombre):
+    """'auto' elige el mas rapido instalado; un nombre no instalado cae a 'json'."""
+    if nombre == 'auto':
+        return 'orjson' if 'orjson' in BACKENDS else 'json'
+    return nombre if nombre in BACKENDS else 'json'
+
+
+class DecodificadorJson:
+    """
+    Decodifica JSON con el backend elegido y mide cada llamada.
+
+    Metodos:
+        decodificar(datos)  → objeto Python (lanza ValueError si el JSON es invalido)
+        estadisticas()      → dict con backend, llamadas, bytes y tiempos
+    """
+
+    def __init__(self, backend=JSON_DECODIFICADOR, historial=JSON_HISTORIAL):
+        self.backend = _elegir_backend(backend)
+        self._loads = BACKENDS[self.backend]
+
+        self._llamadas = 0
+        self._bytes = 0
+        self._segundos = 0.0
+        self._maximo = 0.0
+        # (bytes, milisegundos) de las ultimas decodificaciones
+        self._ultimas = deque(maxlen=historial)
+        self._lock = threading.Lock()
+
+    def decodificar(self, datos):
+        """
+        Convierte bytes (o str) JSON en un objeto Python.
+
+        Args:
+            datos: cuerpo de la respuesta (respuesta.content) o un texto JSON
+
+        Returns:
+            dict, list, str, numero, bool o None.
+
+        Lanza ValueError (o una subclase) si el JSON es invalido.
+        """
+        inicio = time.perf_counter()
+        resultado = self._loads(datos)
+        duracion = time.perf_counter() - inicio
+
+        with self._lock:
+            self._llamadas += 1
+            self._bytes += len(datos)
+            self._segundos += duracion
+            if duracion > self._maximo:
+                self._maximo = duracion
+            self._ultimas.append((len(datos), round(duracion * 1000, 3)))
+        return resultado
+
+    def estadisticas(self):
+        """
+        Resumen de las decodificaciones hechas.
+
+        Returns:
+            Diccionario {backend, disponibles, llamadas, bytes, total_ms,
+                         promedio_ms, maximo_ms, ultimas: [[bytes, ms], ...]}
+        """
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'disponibles': sorted(BACKENDS),
+                'llamadas': self._llamadas,
+                'bytes': self._bytes,
+                'total_ms': round(self._segundos * 1000, 3),
+                'promedio_ms': round(self._segundos * 1000 / self._llamadas, 3) if self._llamadas else None,
+                'maximo_ms': round(self._maximo * 1000, 3),
+                'ultimas': [list(u) for u in self._ultimas],
+            }
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+decodificador = DecodificadorJson()
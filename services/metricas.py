@@ -0,0 +1,473 @@
+"""
+metricas.py - Metricas del proceso en formato Prometheus (GET /metrics).
+
+Detras del balanceador no habia ninguna metrica del lado de Python. Este
+modulo cuenta:
+
+    - peticiones del navegador por endpoint de Flask ('producto.index',
+      'factura.crear'...), metodo y codigo, con histograma de duracion
+    - peticiones del navegador en curso
+    - llamadas a la API por tabla o SP, con histograma de duracion y
+      contador de errores (error de red o codigo 5xx)
+    - consultas a los caches de listados y de SP por resultado
+      (acierto, viejo, fallo), para calcular la tasa de aciertos
+    - uso del pool de conexiones y llamadas a la API en curso (se leen de
+      los servicios compartidos al generar la respuesta)
+
+Cada hilo suma en sus propios diccionarios (threading.local): registrar un
+valor no toma ningun lock. El lock solo se toma la primera vez que un hilo
+registra algo y al leer las metricas, que suma los diccionarios de todos
+los hilos. Los hilos que terminaron se acumulan en un total aparte.
+
+Varios procesos (workers de gunicorn): con METRICAS_DIRECTORIO cada worker
+escribe su instantanea en <directorio>/<pid>.json cada METRICAS_INTERVALO
+segundos (y al apagarse), y GET /metrics responde la suma de todos los
+archivos, sin importar que worker atienda la peticion. Los contadores e
+histogramas de los workers que ya terminaron se siguen sumando (no bajan
+cuando gunicorn recicla un worker); los medidores (en curso, pool) solo se
+suman de los procesos vivos.
+"""
+
+# bisect_left: tramo del histograma de cada duracion
+from bisect import bisect_left
+
+# json: instantanea de cada worker en METRICAS_DIRECTORIO
+import json
+
+# os: pid del worker, archivos de METRICAS_DIRECTORIO, register_at_fork
+import os
+
+# sys: detectar el parche de gevent (modo FRONT_MODO=verde)
+import sys
+
+# threading: diccionarios por hilo y lock de registro
+import threading
+
+# time.perf_counter(): duracion de las peticiones; time.monotonic(): intervalo de guardado
+import time
+
+# g: inicio y codigo de la peticion entre before_request y teardown_request
+from flask import g, request
+
+# pool: conexiones y llamadas en curso; caches: bytes y entradas
+from services.http_pool import pool
+from services.cache import cache_tablas, cache_sp
+
+from config import METRICAS_TRAMOS, METRICAS_DIRECTORIO, METRICAS_INTERVALO
+
+
+# ══════════════════════════════════════════════
+# METRICAS EXPUESTAS
+# nombre → (tipo de Prometheus, descripcion)
+# ══════════════════════════════════════════════
+DEFINICIONES = {
+    'front_peticiones_total': (
+        'counter', 'Peticiones atendidas por endpoint de Flask, metodo y codigo'),
+    'front_peticion_segundos': (
+        'histogram', 'Duracion de las peticiones por endpoint de Flask (incluye el envio por partes)'),
+    'front_peticiones_en_curso': (
+        'gauge', 'Peticiones del navegador en curso'),
+    'front_api_llamadas_total': (
+        'counter', 'Llamadas a la API por tabla o SP, metodo y codigo (cada reintento cuenta)'),
+    'front_api_errores_total': (
+        'counter', 'Llamadas a la API fallidas por tabla o SP: error de red o codigo 5xx'),
+    'front_api_segundos': (
+        'histogram', 'Duracion de las llamadas a la API por tabla o SP, hasta recibir la respuesta'),
+    'front_api_en_curso': (
+        'gauge', 'Llamadas a la API en curso (ApiService, AsyncApiService y tareas de fondo)'),
+    'front_cache_consultas_total': (
+        'counter', 'Consultas a los caches de listados y de SP por tabla o SP y resultado'),
+    'front_cache_bytes': (
+        'gauge', 'Bytes de los listados guardados en el cache'),
+    'front_cache_entradas': (
+        'gauge', 'Entradas guardadas en cada cache'),
+    'front_pool_conexiones_en_uso': (
+        'gauge', 'Conexiones del pool ocupadas por una peticion, por host de la API'),
+    'front_pool_conexiones_maximo': (
+        'gauge', 'Conexiones keep-alive que el pool conserva por host de la API'),
+    'front_pool_peticiones_total': (
+        'counter', 'Peticiones hechas por el pool, por host de la API'),
+    'front_pool_conexiones_abiertas_total': (
+        'counter', 'Conexiones nuevas abiertas por el pool (peticiones sin conexion libre)'),
+}
+
+
+def nombre_llamada(endpoint):
+    """Tabla o SP de un endpoint: 'GET /api/producto/codigo' → 'producto', 'SP sp_x' → 'sp_x'."""
+    metodo, _, ruta = endpoint.partition(' ')
+    if metodo == 'SP':
+        return ruta
+    partes = ruta.split('/')
+    return partes[2] if len(partes) > 2 else ruta
+
+
+def _hilos_verdes():
+    """True si gevent parcheo threading (cada greenlet tendria su propio threading.local)."""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+class _Hilo:
+    """
+    Valores registrados por un hilo.
+
+    valores:     {(nombre, etiquetas): numero} de contadores y medidores
+    histogramas: {(nombre, etiquetas): [cuenta por tramo..., cuenta > ultimo tramo, suma]}
+    """
+
+    __slots__ = ('hilo', 'valores', 'histogramas')
+
+    def __init__(self, hilo=None):
+        self.hilo = hilo
+        self.valores = {}
+        self.histogramas = {}
+
+    def terminado(self):
+        return self.hilo is not None and not self.hilo.is_alive()
+
+
+class Metricas:
+    """
+    Contadores, medidores e histogramas del proceso, sumados por hilo.
+
+    Metodos:
+        sumar(nombre, etiquetas, valor)      → suma a un contador o medidor
+        observar(nombre, etiquetas, valor)   → agrega un valor a un histograma
+        llamada_api(metodo, endpoint, ...)   → registra una llamada a la API
+        instantanea()                        → suma de todos los hilos
+        guardar() / guardar_si_toca()        → escribe la instantanea en METRICAS_DIRECTORIO
+        exposicion()                         → texto para GET /metrics
+    """
+
+    def __init__(self, tramos=METRICAS_TRAMOS, directorio=METRICAS_DIRECTORIO,
+                 intervalo=METRICAS_INTERVALO):
+        self.tramos = tuple(sorted(tramos))
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._reiniciar()
+        # El proceso hijo no debe sumar lo que el maestro registro antes del fork
+        # (calentamiento con preload_app): cada worker empieza de cero
+        os.register_at_fork(after_in_child=self._reiniciar)
+
+    def _reiniciar(self):
+        """Estado vacio (al crear la instancia y en el proceso hijo de un fork)."""
+        # Solo para registrar hilos nuevos y para leer; registrar valores no lo usa
+        self._lock = threading.Lock()
+        # Evita que dos hilos escriban la instantanea a la vez
+        self._guardando = threading.Lock()
+        self._ultimo_guardado = time.monotonic()
+        self._local = threading.local()
+        self._hilos = []
+        # Con mas hilos registrados se acumulan los terminados antes de agregar otro
+        self._limite = 64
+        # Lo que registraron los hilos que ya terminaron
+        self._terminados = _Hilo()
+        if _hilos_verdes():
+            # gevent: un solo hilo real y los greenlets solo cambian en las
+            # esperas de red; un diccionario compartido no necesita lock
+            compartido = _Hilo()
+            self._hilos.append(compartido)
+            self._local = _Compartido(compartido)
+
+    # ──────────────────────────────────────────────
+    # REGISTRAR (sin lock)
+    # ──────────────────────────────────────────────
+    def _datos(self):
+        """Diccionarios del hilo actual (la primera vez los registra)."""
+        datos = getattr(self._local, 'datos', None)
+        if datos is None:
+            datos = self._local.datos = _Hilo(threading.current_thread())
+            with self._lock:
+                if len(self._hilos) >= self._limite:
+                    self._acumular_terminados()
+                    self._limite = max(64, 2 * len(self._hilos))
+                self._hilos.append(datos)
+        return datos
+
+    def sumar(self, nombre, etiquetas=(), valor=1):
+        """
+        Suma a un contador o medidor (un medidor puede restar con valor negativo).
+
+        Args:
+            nombre:    clave de DEFINICIONES
+            etiquetas: tupla de pares (etiqueta, valor), siempre en el mismo orden
+            valor:     cantidad a sumar
+        """
+        valores = self._datos().valores
+        clave = (nombre, etiquetas)
+        valores[clave] = valores.get(clave, 0) + valor
+
+    def observar(self, nombre, etiquetas, valor):
+        """Agrega un valor (segundos) al histograma."""
+        histogramas = self._datos().histogramas
+        clave = (nombre, etiquetas)
+        cubetas = histogramas.get(clave)
+        if cubetas is None:
+            cubetas = histogramas[clave] = [0] * (len(self.tramos) + 2)
+        cubetas[bisect_left(self.tramos, valor)] += 1
+        cubetas[-1] += valor
+
+    def llamada_api(self, metodo, endpoint, estado, segundos, error=None):
+        """
+        Registra una llamada a la API.
+
+        Args:
+            metodo:   'GET', 'POST', 'PUT' o 'DELETE'
+            endpoint: nombre del circuito (ej: 'GET /api/producto', 'SP sp_x')
+            estado:   codigo HTTP (None si fallo la red)
+            segundos: duracion hasta la respuesta o el error
+            error:    nombre de la excepcion si fallo la red
+        """
+        nombre = nombre_llamada(endpoint)
+        self.sumar('front_api_llamadas_total', (
+            ('nombre', nombre), ('metodo', metodo), ('estado', str(estado) if estado else 'error')))
+        self.observar('front_api_segundos', (('nombre', nombre),), segundos)
+        if error or estado >= 500:
+            self.sumar('front_api_errores_total', (
+                ('nombre', nombre), ('tipo', error or f"http_{estado}")))
+
+    # ──────────────────────────────────────────────
+    # LEER (con lock)
+    # ──────────────────────────────────────────────
+    def _acumular_terminados(self):
+        """Pasa los valores de los hilos terminados al total aparte (con el lock tomado)."""
+        vivos = []
+        for datos in self._hilos:
+            if datos.terminado():
+                _sumar_en(self._terminados.valores, datos.valores)
+                _sumar_histogramas_en(self._terminados.histogramas, datos.histogramas)
+            else:
+                vivos.append(datos)
+        self._hilos = vivos
+
+    def instantanea(self):
+        """
+        Suma de los valores de todos los hilos, mas los medidores de los servicios.
+
+        Returns:
+            (valores, histogramas) con las mismas claves que _Hilo
+        """
+        with self._lock:
+            self._acumular_terminados()
+            valores = dict(self._terminados.valores)
+            histogramas = {clave: list(cubetas) for clave, cubetas in self._terminados.histogramas.items()}
+            for datos in self._hilos:
+                # copy() es atomico: el hilo puede seguir sumando mientras tanto
+                _sumar_en(valores, datos.valores.copy())
+                _sumar_histogramas_en(histogramas, datos.histogramas.copy())
+        for nombre, etiquetas, valor in _medidores_servicios():
+            valores[(nombre, etiquetas)] = valor
+        return valores, histogramas
+
+    # ──────────────────────────────────────────────
+    # VARIOS PROCESOS (METRICAS_DIRECTORIO)
+    # ──────────────────────────────────────────────
+    def guardar(self, instantanea=None):
+        """Escribe la instantanea del proceso en <directorio>/<pid>.json."""
+        if not self.directorio:
+            return
+        valores, histogramas = instantanea or self.instantanea()
+        datos = {
+            'valores': [[nombre, etiquetas, valor] for (nombre, etiquetas), valor in valores.items()],
+            'histogramas': [[nombre, etiquetas, cubetas] for (nombre, etiquetas), cubetas in histogramas.items()],
+        }
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = os.path.join(self.directorio, f"{os.getpid()}.json")
+        # Escribir aparte y renombrar: quien lee nunca ve un archivo a medias
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo)
+        os.replace(ruta + '.tmp', ruta)
+        self._ultimo_guardado = time.monotonic()
+
+    def guardar_si_toca(self):
+        """Guarda la instantanea si pasaron METRICAS_INTERVALO segundos (al terminar cada peticion)."""
+        if not self.directorio or time.monotonic() - self._ultimo_guardado < self.intervalo:
+            return
+        if not self._guardando.acquire(blocking=False):
+            return
+        try:
+            self.guardar()
+        except OSError as ex:
+            print(f"Error al guardar las metricas en {self.directorio}: {ex}")
+            self._ultimo_guardado = time.monotonic()
+        finally:
+            self._guardando.release()
+
+    def _sumar_procesos(self, valores, histogramas):
+        """Suma a la instantanea local los archivos de los demas workers."""
+        propio = f"{os.getpid()}.json"
+        for archivo in sorted(os.listdir(self.directorio)):
+            if not archivo.endswith('.json') or archivo == propio:
+                continue
+            try:
+                with open(os.path.join(self.directorio, archivo), encoding='utf-8') as entrada:
+                    datos = json.load(entrada)
+            except (OSError, ValueError):
+                continue
+            vivo = _proceso_vivo(int(archivo[:-5])) if archivo[:-5].isdigit() else False
+            for nombre, etiquetas, valor in datos['valores']:
+                tipo = DEFINICIONES.get(nombre, ('gauge',))[0]
+                if tipo == 'gauge' and not vivo:
+                    continue
+                clave = (nombre, tuple(tuple(par) for par in etiquetas))
+                valores[clave] = valores.get(clave, 0) + valor
+            _sumar_histogramas_en(histogramas, {
+                (nombre, tuple(tuple(par) for par in etiquetas)): cubetas
+                for nombre, etiquetas, cubetas in datos['histogramas']})
+
+    # ──────────────────────────────────────────────
+    # FORMATO DE TEXTO DE PROMETHEUS
+    # ──────────────────────────────────────────────
+    def exposicion(self):
+        """Texto de GET /metrics (con METRICAS_DIRECTORIO, la suma de todos los workers)."""
+        valores, histogramas = instantanea = self.instantanea()
+        if self.directorio:
+            try:
+                self.guardar(instantanea)
+                self._sumar_procesos(valores, histogramas)
+            except OSError as ex:
+                print(f"Error al leer las metricas de {self.directorio}: {ex}")
+
+        lineas = []
+        for nombre, (tipo, descripcion) in DEFINICIONES.items():
+            lineas.append(f"# HELP {nombre} {descripcion}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            if tipo == 'histogram':
+                series = sorted((e, c) for (n, e), c in histogramas.items() if n == nombre)
+                for etiquetas, cubetas in series:
+                    acumulado = 0
+                    for tramo, cuenta in zip(self.tramos + ('+Inf',), cubetas):
+                        acumulado += cuenta
+                        lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', str(tramo)),))} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(cubetas[-1])}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {acumulado}")
+            else:
+                series = sorted((e, v) for (n, e), v in valores.items() if n == nombre)
+                for etiquetas, valor in series:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+        return '\n'.join(lineas) + '\n'
+
+
+class _Compartido:
+    """Reemplazo de threading.local con gevent: todos los greenlets usan los mismos datos."""
+
+    __slots__ = ('datos',)
+
+    def __init__(self, datos):
+        self.datos = datos
+
+
+def _sumar_en(destino, origen):
+    for clave, valor in origen.items():
+        destino[clave] = destino.get(clave, 0) + valor
+
+
+def _sumar_histogramas_en(destino, origen):
+    for clave, cubetas in origen.items():
+        actual = destino.get(clave)
+        if actual is None:
+            destino[clave] = list(cubetas)
+        elif len(actual) == len(cubetas):
+            for posicion, cuenta in enumerate(cubetas):
+                actual[posicion] += cuenta
+
+
+def _proceso_vivo(pid):
+    """True si el proceso existe (os.kill con la senal 0 no envia nada)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _etiquetas(etiquetas):
+    """(('nombre', 'producto'),) → '{nombre="producto"}' con los valores escapados."""
+    if not etiquetas:
+        return ''
+    partes = []
+    for etiqueta, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{etiqueta}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+def _numero(valor):
+    """Enteros sin decimales; flotantes con toda su precision."""
+    if isinstance(valor, float) and not valor.is_integer():
+        return repr(valor)
+    return str(int(valor))
+
+
+# ──────────────────────────────────────────────
+# MEDIDORES DE LOS SERVICIOS COMPARTIDOS
+# Se leen al generar la respuesta, no se registran en cada llamada.
+# ──────────────────────────────────────────────
+def _medidores_servicios():
+    """Lista de (nombre, etiquetas, valor) del pool y los caches."""
+    medidores = [('front_api_en_curso', (), pool.en_curso())]
+    for host, datos in pool.estadisticas().items():
+        if host == 'total':
+            continue
+        etiquetas = (('host', host),)
+        medidores += [
+            ('front_pool_conexiones_en_uso', etiquetas, datos['maximo'] - datos['libres']),
+            ('front_pool_conexiones_maximo', etiquetas, datos['maximo']),
+            ('front_pool_peticiones_total', etiquetas, datos['peticiones']),
+            ('front_pool_conexiones_abiertas_total', etiquetas, datos['fallos']),
+        ]
+    tablas = cache_tablas.estadisticas()
+    medidores += [
+        ('front_cache_bytes', (('cache', 'tablas'),), tablas['bytes']),
+        ('front_cache_entradas', (('cache', 'tablas'),), tablas['entradas']),
+        ('front_cache_entradas', (('cache', 'sp'),), cache_sp.estadisticas()['entradas']),
+    ]
+    return medidores
+
+
+# Instancia unica compartida por todos los hilos del proceso
+metricas = Metricas()
+
+
+# ──────────────────────────────────────────────
+# INTEGRACION CON FLASK
+# ──────────────────────────────────────────────
+def _iniciar():
+    """before_request: hora de inicio y peticion en curso."""
+    g.metricas_inicio = time.perf_counter()
+    metricas.sumar('front_peticiones_en_curso', (), 1)
+
+
+def _responder(respuesta):
+    """after_request: guarda el codigo (teardown_request no recibe la respuesta)."""
+    g.metricas_estado = respuesta.status_code
+    return respuesta
+
+
+def _terminar(error=None):
+    """
+    teardown_request: cuenta la peticion con su duracion.
+
+    En las paginas enviadas por partes se ejecuta al terminar el envio,
+    asi la duracion incluye el render.
+    """
+    inicio = g.pop('metricas_inicio', None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    endpoint = request.endpoint or 'sin_ruta'
+    estado = 500 if error is not None else g.pop('metricas_estado', 500)
+    metricas.sumar('front_peticiones_en_curso', (), -1)
+    metricas.sumar('front_peticiones_total', (
+        ('endpoint', endpoint), ('metodo', request.method), ('estado', str(estado))))
+    metricas.observar('front_peticion_segundos', (('endpoint', endpoint),), segundos)
+    metricas.guardar_si_toca()
+
+
+def registrar_metricas(app):
+    """Conecta las metricas a la aplicacion (ver crear_app() en app.py)."""
+    app.before_request(_iniciar)
+    app.after_request(_responder)
+    app.teardown_request(_terminar)
@@ -0,0 +1,187 @@
+"""
+monitor_salud.py - Monitor de salud de la API en segundo plano.
+
+Un hilo consulta GET /api/diagnostico/conexion cada SALUD_INTERVALO segundos
+y guarda el ultimo resultado y un historial de latencias. Asi:
+
+    - La pagina de inicio muestra la informacion de conexion sin hacer
+      ninguna peticion (antes esperaba hasta 3 s en cada visita a /).
+    - ApiService consulta caida() antes de cada peticion: si la API no
+      respondio a las ultimas SALUD_FALLOS_CAIDA sondas, falla de inmediato
+      (y usa el respaldo del cache) en lugar de esperar el timeout.
+
+Mientras la API esta caida se sondea cada SALUD_INTERVALO_CAIDA segundos,
+para detectar pronto que volvio.
+"""
+
+# threading: hilo de sondeo y Event para despertarlo o detenerlo
+import threading
+
+# time.monotonic(): para medir la latencia; time.time(): hora de la ultima sonda
+import time
+
+# deque(maxlen=N): historial de latencias que descarta las mas viejas
+from collections import deque
+
+import requests
+
+from config import (
+    API_BASE_URL,
+    SALUD_INTERVALO,
+    SALUD_INTERVALO_CAIDA,
+    SALUD_TIMEOUT,
+    SALUD_HISTORIAL,
+    SALUD_FALLOS_CAIDA,
+)
+
+# pool: la sonda reutiliza las mismas conexiones que el resto de la aplicacion
+from services.http_pool import pool
+
+
+class ApiCaida(requests.ConnectionError):
+    """La API esta marcada como caida: la peticion no se intento."""
+
+
+class MonitorSalud:
+    """
+    Sondea la API en un hilo de fondo y guarda su estado.
+
+    Metodos:
+        iniciar()        → arranca el hilo de sondeo (solo la primera vez)
+        detener()        → detiene el hilo
+        sondear()        → hace una sonda ahora (la usa el hilo)
+        avisar_fallo()   → adelanta la proxima sonda (una peticion normal fallo)
+        caida()          → True si la API se considera caida
+        diagnostico()    → ultimo JSON de diagnostico exitoso o None
+        estado()         → dict con disponibilidad, latencias y ultima sonda
+    """
+
+    def __init__(self, base_url=API_BASE_URL, intervalo=SALUD_INTERVALO,
+                 intervalo_caida=SALUD_INTERVALO_CAIDA, timeout=SALUD_TIMEOUT,
+                 historial=SALUD_HISTORIAL, fallos_caida=SALUD_FALLOS_CAIDA):
+        self.base_url = base_url
+        self._intervalo = intervalo
+        self._intervalo_caida = intervalo_caida
+        self._timeout = timeout
+        self._fallos_caida = fallos_caida
+
+        self._diagnostico = None       # Ultimo JSON exitoso
+        self._disponible = None        # None = todavia no se ha sondeado
+        self._fallos_seguidos = 0
+        self._ultima_sonda = None      # time.time() de la ultima sonda
+        self._ultimo_error = None
+        # Latencias en milisegundos de las sondas exitosas (las mas recientes)
+        self._latencias = deque(maxlen=historial)
+
+        self._hilo = None
+        self._despertar = threading.Event()
+        self._detenido = threading.Event()
+        self._lock = threading.Lock()
+
+    # ──────────────────────────────────────────────
+    # HILO DE SONDEO
+    # ──────────────────────────────────────────────
+    def iniciar(self):
+        """Arranca el hilo de sondeo. Llamarlo varias veces no crea mas hilos."""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detenido.clear()
+            # daemon=True: el hilo no impide que el proceso termine
+            self._hilo = threading.Thread(target=self._ciclo, name='monitor-salud', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        """Detiene el hilo de sondeo (espera a que termine la sonda en curso)."""
+        self._detenido.set()
+        self._despertar.set()
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(self._timeout + 1)
+
+    def activo(self):
+        """True si el hilo de sondeo esta corriendo."""
+        hilo = self._hilo
+        return hilo is not None and hilo.is_alive()
+
+    def _ciclo(self):
+        """Sondea la API hasta que se llame a detener()."""
+        while not self._detenido.is_set():
+            self.sondear()
+            espera = self._intervalo_caida if self.caida() else self._intervalo
+            # wait() termina antes si alguien llama a avisar_fallo() o detener()
+            self._despertar.wait(espera)
+            self._despertar.clear()
+
+    def sondear(self):
+        """Consulta /api/diagnostico/conexion una vez y actualiza el estado."""
+        url = f"{self.base_url}/api/diagnostico/conexion"
+        inicio = time.monotonic()
+        try:
+            respuesta = pool.sesion().get(url, timeout=self._timeout)
+            latencia = (time.monotonic() - inicio) * 1000
+            if respuesta.status_code >= 500:
+                respuesta.raise_for_status()
+            diagnostico = respuesta.json() if respuesta.ok else None
+        except (requests.RequestException, ValueError) as ex:
+            with self._lock:
+                self._fallos_seguidos += 1
+                self._ultimo_error = str(ex)
+                self._ultima_sonda = time.time()
+                if self._fallos_seguidos >= self._fallos_caida:
+                    self._disponible = False
+            return
+
+        # La API respondio (aunque el endpoint de diagnostico no exista: 404)
+        with self._lock:
+            self._fallos_seguidos = 0
+            self._ultimo_error = None
+            self._disponible = True
+            self._ultima_sonda = time.time()
+            self._latencias.append(latencia)
+            if diagnostico is not None:
+                self._diagnostico = diagnostico
+
+    def avisar_fallo(self):
+        """
+        Una peticion normal a la API fallo: adelantar la proxima sonda.
+
+        No marca la API como caida por si sola; solo la sonda decide.
+        """
+        self._despertar.set()
+
+    # ──────────────────────────────────────────────
+    # CONSULTAR EL ESTADO (sin hacer peticiones)
+    # ──────────────────────────────────────────────
+    def caida(self):
+        """True si las ultimas sondas fallaron y el monitor esta activo."""
+        return self._disponible is False and self.activo()
+
+    def diagnostico(self):
+        """Ultimo JSON de /api/diagnostico/conexion, o None si nunca respondio."""
+        return self._diagnostico
+
+    def estado(self):
+        """
+        Resumen del estado de la API.
+
+        Returns:
+            Diccionario {disponible, fallos_seguidos, ultima_sonda, ultimo_error,
+                         latencia_ms, latencia_promedio_ms, latencia_maxima_ms, latencias_ms}
+        """
+        with self._lock:
+            latencias = list(self._latencias)
+            return {
+                'disponible': self._disponible,
+                'fallos_seguidos': self._fallos_seguidos,
+                'ultima_sonda': self._ultima_sonda,
+                'ultimo_error': self._ultimo_error,
+                'latencia_ms': round(latencias[-1], 1) if latencias else None,
+                'latencia_promedio_ms': round(sum(latencias) / len(latencias), 1) if latencias else None,
+                'latencia_maxima_ms': round(max(latencias), 1) if latencias else None,
+                'latencias_ms': [round(l, 1) for l in latencias],
+            }
+
+
+# Instancia unica del proceso (se inicia con la primera peticion, ver app.py)
+monitor = MonitorSalud()
@@ -0,0 +1,274 @@
+"""
+paginacion.py - Paginacion, ordenamiento y cursores para los listados.
+
+La API solo acepta ?limite=N, asi que la paginacion se resuelve aqui:
+
+    - Sin orden: paginas por numero (offset). Solo se piden a la API las
+      filas necesarias hasta el final de la pagina actual (limite = fin + 1),
+      nunca la tabla completa.
+    - Con orden por una columna: paginas por cursor (keyset). El cursor guarda
+      el valor de la columna y la clave del ultimo registro mostrado, y la
+      pagina siguiente son los 'tamano' registros que vienen despues de el.
+      Se usa heapq para tomar solo esos registros sin ordenar toda la lista.
+
+En ambos casos al template solo llega la pagina actual (HTML acotado).
+"""
+
+# base64 / json: para codificar el cursor como texto seguro para la URL
+import base64
+import json
+
+# heapq: nsmallest/nlargest toman los N primeros sin ordenar toda la lista
+import heapq
+
+from config import PAGINA_TAMANO, PAGINA_TAMANO_MAXIMO
+
+
+# ══════════════════════════════════════════════
+# CURSORES
+# Un cursor es [valor_de_la_columna, valor_de_la_clave] en JSON + base64.
+# Ejemplo: ["Laptop", "PR001"] → "WyJMYXB0b3AiLCAiUFIwMDEiXQ"
+# ══════════════════════════════════════════════
+
+def codificar_cursor(valor, clave):
+    """Convierte (valor, clave) en un texto apto para la URL."""
+    texto = json.dumps([valor, clave], default=str)
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Convierte el texto del cursor en (valor, clave). Retorna None si es invalido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valor, clave = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return (valor, clave)
+    except (ValueError, TypeError):
+        return None
+
+
+def _clave_orden(valor, clave):
+    """
+    Clave de comparacion para ordenar registros.
+
+    Los None van al final (en orden ascendente) y la clave primaria desempata,
+    asi dos registros nunca quedan en la misma posicion.
+    Los numeros se comparan como numeros y el resto como texto
+    (nunca se compara un numero con un texto).
+    """
+    if valor is None:
+        return (True, True, '', str(clave))
+    if isinstance(valor, (int, float)):
+        return (False, False, valor, str(clave))
+    return (False, True, str(valor), str(clave))
+
+
+# ══════════════════════════════════════════════
+# RESULTADO DE UNA CONSULTA PAGINADA
+# ══════════════════════════════════════════════
+
+class Pagina:
+    """
+    Una pagina de registros y los datos para construir los enlaces.
+
+    Atributos:
+        registros:      lista de registros de esta pagina
+        numero:         numero de pagina (1, 2, 3...)
+        tamano:         registros por pagina
+        orden:          columna de ordenamiento (o None)
+        direccion:      'asc' o 'desc'
+        limite:         limite total de registros elegido por el usuario (o None)
+        hay_anterior:   True si existe una pagina anterior
+        hay_siguiente:  True si existe una pagina siguiente
+        cursor_anterior / cursor_siguiente: cursores keyset (solo con orden)
+        filtros:        parametros de filtro de la vista que los enlaces deben conservar
+                        (ej: {'desde': '2024-01-01', 'cliente': 3})
+        buscable:       True si la tabla tiene busqueda ?q= (ApiService.listar_pagina)
+        ordenable:      True si los encabezados permiten ordenar (?orden=)
+    """
+
+    def __init__(self, registros, numero, tamano, orden, direccion, limite,
+                 hay_anterior, hay_siguiente, cursor_anterior=None, cursor_siguiente=None,
+                 filtros=None):
+        self.registros = registros
+        self.numero = numero
+        self.tamano = tamano
+        self.orden = orden
+        self.direccion = direccion
+        self.limite = limite
+        self.hay_anterior = hay_anterior
+        self.hay_siguiente = hay_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+        self.filtros = filtros or {}
+        self.buscable = False
+        self.ordenable = True
+
+    # ──────────────────────────────────────────────
+    # PARAMETROS PARA LOS ENLACES
+    # Se usan en el template: url_for(request.endpoint, **pagina.args_siguiente())
+    # ──────────────────────────────────────────────
+    def args_base(self):
+        """Parametros comunes a todos los enlaces (filtros, limite, tamano y orden)."""
+        args = {campo: valor for campo, valor in self.filtros.items() if valor not in (None, '')}
+        args['tamano'] = self.tamano
+        if self.limite:
+            args['limite'] = self.limite
+        if self.orden:
+            args['orden'] = self.orden
+            args['dir'] = self.direccion
+        return args
+
+    def args_siguiente(self):
+        """Parametros del enlace 'Siguiente'."""
+        args = self.args_base()
+        args['pagina'] = self.numero + 1
+        if self.orden and self.cursor_siguiente:
+            args['despues'] = self.cursor_siguiente
+        return args
+
+    def args_anterior(self):
+        """Parametros del enlace 'Anterior'."""
+        args = self.args_base()
+        args['pagina'] = max(self.numero - 1, 1)
+        if self.orden and self.cursor_anterior and self.numero > 2:
+            args['antes'] = self.cursor_anterior
+        return args
+
+    def args_orden(self, campo):
+        """Parametros para ordenar por 'campo' (invierte la direccion si ya esta ordenado)."""
+        args = self.args_base()
+        direccion = 'desc' if self.orden == campo and self.direccion == 'asc' else 'asc'
+        args['orden'] = campo
+        args['dir'] = direccion
+        return args
+
+
+# ══════════════════════════════════════════════
+# LEER LOS PARAMETROS DE LA URL
+# ══════════════════════════════════════════════
+
+def parametros_pagina(args):
+    """
+    Lee los parametros de paginacion del query string.
+
+    Args:
+        args: request.args (o cualquier diccionario con .get())
+
+    Returns:
+        Diccionario listo para pasar a ApiService.listar_pagina(**...)
+    """
+    try:
+        numero = max(int(args.get('pagina', 1)), 1)
+    except (TypeError, ValueError):
+        numero = 1
+    try:
+        tamano = int(args.get('tamano', PAGINA_TAMANO))
+    except (TypeError, ValueError):
+        tamano = PAGINA_TAMANO
+    # Nunca menos de 1 ni mas del maximo configurado (HTML acotado)
+    tamano = min(max(tamano, 1), PAGINA_TAMANO_MAXIMO)
+
+    direccion = 'desc' if args.get('dir') == 'desc' else 'asc'
+    return {
+        'pagina': numero,
+        'tamano': tamano,
+        'orden': args.get('orden') or None,
+        'direccion': direccion,
+        'despues': args.get('despues') or None,
+        'antes': args.get('antes') or None,
+        # Texto buscado (?q=): se busca en el indice de la tabla (services/busqueda.py)
+        'buscar': (args.get('q') or '').strip() or None,
+    }
+
+
+# ══════════════════════════════════════════════
+# PAGINAR UNA LISTA YA DESCARGADA
+# ══════════════════════════════════════════════
+
+def paginar(registros, clave, pagina=1, tamano=PAGINA_TAMANO, orden=None,
+            direccion='asc', limite=None, despues=None, antes=None, filtros=None):
+    """
+    Extrae una pagina de una lista de registros.
+
+    Args:
+        registros: lista completa (o las primeras filas) de la tabla
+        clave:     nombre del campo clave primaria (desempata el orden)
+        pagina:    numero de pagina (modo offset, sin orden)
+        tamano:    registros por pagina
+        orden:     columna de ordenamiento (None = orden de la API)
+        direccion: 'asc' o 'desc'
+        limite:    limite total elegido por el usuario (o None)
+        despues:   cursor: pagina que viene despues de este registro
+        antes:     cursor: pagina que viene antes de este registro
+        filtros:   filtros de la vista que deben conservar los enlaces (opcional)
+
+    Returns:
+        Objeto Pagina.
+    """
+    if limite:
+        registros = registros[:limite]
+
+    # Solo se permite ordenar por columnas que existen en los registros
+    if orden and not (registros and orden in registros[0]):
+        orden = None
+
+    # ── Modo offset: orden natural de la API ──
+    if not orden:
+        inicio = (pagina - 1) * tamano
+        filas = registros[inicio:inicio + tamano]
+        return Pagina(
+            filas, pagina, tamano, None, direccion, limite,
+            hay_anterior=pagina > 1,
+            hay_siguiente=len(registros) > inicio + tamano,
+            filtros=filtros
+        )
+
+    # ── Modo cursor (keyset): ordenado por una columna ──
+    def clave_de(r):
+        return _clave_orden(r.get(orden), r.get(clave))
+
+    descendente = direccion == 'desc'
+    cursor_despues = decodificar_cursor(despues)
+    cursor_antes = decodificar_cursor(antes)
+
+    if cursor_antes:
+        # Pagina anterior: los 'tamano' registros justo antes del cursor
+        limite_orden = _clave_orden(*cursor_antes)
+        candidatos = [r for r in registros
+                      if (clave_de(r) > limite_orden if descendente else clave_de(r) < limite_orden)]
+        # Se toman en orden inverso (los mas cercanos al cursor) y se voltean
+        tomar = heapq.nsmallest if descendente else heapq.nlargest
+        filas = list(reversed(tomar(tamano + 1, candidatos, key=clave_de)))
+        hay_anterior = len(filas) > tamano
+        filas = filas[-tamano:]
+        hay_siguiente = True
+    else:
+        if cursor_despues:
+            # Pagina siguiente: los registros que vienen despues del cursor
+            limite_orden = _clave_orden(*cursor_despues)
+            candidatos = [r for r in registros
+                          if (clave_de(r) < limite_orden if descendente else clave_de(r) > limite_orden)]
+            hay_anterior = True
+        else:
+            # Sin cursor: saltar (pagina - 1) paginas desde el inicio
+            candidatos = registros
+            hay_anterior = pagina > 1
+        saltar = 0 if cursor_despues else (pagina - 1) * tamano
+        tomar = heapq.nlargest if descendente else heapq.nsmallest
+        filas = tomar(saltar + tamano + 1, candidatos, key=clave_de)[saltar:]
+        hay_siguiente = len(filas) > tamano
+        filas = filas[:tamano]
+
+    cursor_anterior = cursor_siguiente = None
+    if filas:
+        cursor_anterior = codificar_cursor(filas[0].get(orden), filas[0].get(clave))
+        cursor_siguiente = codificar_cursor(filas[-1].get(orden), filas[-1].get(clave))
+
+    return Pagina(
+        filas, pagina, tamano, orden, direccion, limite,
+        hay_anterior=hay_anterior, hay_siguiente=hay_siguiente,
+        cursor_anterior=cursor_anterior, cursor_siguiente=cursor_siguiente,
+        filtros=filtros
+    )
@@ -0,0 +1,187 @@
+"""
+resiliencia.py - Timeouts, reintentos y circuit breaker para las peticiones a la API.
+
+    - Timeouts: cada tipo de operacion tiene su timeout de conexion y de
+      lectura (API_TIMEOUTS). Sin timeout, una API colgada deja el hilo del
+      servidor esperando para siempre.
+    - Reintentos: las lecturas (GET y los SP de solo lectura) se reintentan
+      hasta API_REINTENTOS veces con espera exponencial aleatoria ("full jitter"),
+      para que muchos hilos no reintenten todos en el mismo instante.
+      Se reintentan los errores de red y las respuestas 502/503/504.
+    - Circuit breaker: cada endpoint tiene un Circuito. Despues de
+      CIRCUITO_FALLOS fallos seguidos se abre y las peticiones fallan de
+      inmediato durante CIRCUITO_ESPERA segundos. Luego se deja pasar UNA
+      peticion de prueba (semiabierto): si funciona se cierra, si falla
+      vuelve a abrirse.
+
+Estados de un circuito:
+
+    CERRADO ──(N fallos)──► ABIERTO ──(espera)──► SEMIABIERTO ──(exito)──► CERRADO
+                                ▲                      │
+                                └──────(fallo)─────────┘
+"""
+
+# threading: los circuitos se comparten entre los hilos del servidor
+import threading
+
+# time.monotonic(): para medir cuanto lleva abierto un circuito
+import time
+
+# random.uniform(): espera aleatoria entre reintentos (jitter)
+import random
+
+import requests
+
+from config import (
+    CIRCUITO_FALLOS,
+    CIRCUITO_ESPERA,
+    API_REINTENTO_BASE,
+    API_REINTENTO_MAXIMO,
+    SP_LECTURA_PREFIJOS,
+)
+
+
+# Estados de un circuito
+CERRADO = 'cerrado'          # Normal: todas las peticiones pasan
+ABIERTO = 'abierto'          # Fallando: las peticiones se rechazan sin ir a la API
+SEMIABIERTO = 'semiabierto'  # Probando: pasa una sola peticion para ver si la API volvio
+
+
+# Codigos HTTP que indican que la API (o un proxy delante de ella) no esta
+# disponible. Cuentan como fallo del circuito y se reintentan.
+# Un 500 normalmente es un error de los datos enviados: no se reintenta.
+ESTADOS_REINTENTABLES = (502, 503, 504)
+
+
+class CircuitoAbierto(requests.ConnectionError):
+    """El circuito del endpoint esta abierto: la peticion no se intento."""
+
+
+# ══════════════════════════════════════════════
+# CIRCUITO DE UN ENDPOINT
+# ══════════════════════════════════════════════
+
+class Circuito:
+    """
+    Circuit breaker de un endpoint, seguro entre hilos.
+
+    Metodos:
+        permitir()          → True si la peticion puede ir a la API
+        registrar_exito()   → la API respondio bien
+        registrar_fallo()   → la API no respondio o respondio 502/503/504
+        estado()            → dict con estado, fallos seguidos y totales
+    """
+
+    def __init__(self, fallos=CIRCUITO_FALLOS, espera=CIRCUITO_ESPERA):
+        self._umbral = fallos
+        self._espera = espera
+        self._estado = CERRADO
+        self._fallos_seguidos = 0
+        self._abierto_desde = None
+        self._probando = False       # True mientras la peticion de prueba esta en curso
+        self._aperturas = 0
+        self._rechazadas = 0
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """
+        Decide si la peticion puede ir a la API.
+
+        En estado ABIERTO, pasado el tiempo de espera, deja pasar una sola
+        peticion de prueba (SEMIABIERTO); las demas se siguen rechazando
+        hasta conocer su resultado.
+        """
+        with self._lock:
+            if self._estado == CERRADO:
+                return True
+            if self._estado == ABIERTO and time.monotonic() - self._abierto_desde >= self._espera:
+                self._estado = SEMIABIERTO
+            if self._estado == SEMIABIERTO and not self._probando:
+                self._probando = True
+                return True
+            self._rechazadas += 1
+            return False
+
+    def registrar_exito(self):
+        """La peticion funciono: el circuito se cierra."""
+        with self._lock:
+            self._estado = CERRADO
+            self._fallos_seguidos = 0
+            self._probando = False
+
+    def registrar_fallo(self):
+        """La peticion fallo: abre el circuito si es la prueba o se llego al umbral."""
+        with self._lock:
+            self._fallos_seguidos += 1
+            if self._estado == SEMIABIERTO or self._fallos_seguidos >= self._umbral:
+                if self._estado != ABIERTO:
+                    self._aperturas += 1
+                self._estado = ABIERTO
+                self._abierto_desde = time.monotonic()
+            self._probando = False
+
+    def estado(self):
+        """Retorna el estado actual del circuito y sus contadores."""
+        with self._lock:
+            restante = None
+            if self._estado == ABIERTO:
+                restante = max(self._espera - (time.monotonic() - self._abierto_desde), 0)
+            return {
+                'estado': self._estado,
+                'fallos_seguidos': self._fallos_seguidos,
+                'aperturas': self._aperturas,
+                'rechazadas': self._rechazadas,
+                'segundos_para_probar': round(restante, 1) if restante is not None else None,
+            }
+
+
+# ══════════════════════════════════════════════
+# REGISTRO DE CIRCUITOS (uno por endpoint)
+# ══════════════════════════════════════════════
+
+class Circuitos:
+    """Crea y guarda un Circuito por endpoint (ej: 'GET /api/producto')."""
+
+    def __init__(self, fallos=CIRCUITO_FALLOS, espera=CIRCUITO_ESPERA):
+        self._fallos = fallos
+        self._espera = espera
+        self._circuitos = {}
+        self._lock = threading.Lock()
+
+    def de(self, endpoint):
+        """Retorna el circuito del endpoint, creandolo si no existe."""
+        circuito = self._circuitos.get(endpoint)
+        if circuito is None:
+            with self._lock:
+                circuito = self._circuitos.setdefault(
+                    endpoint, Circuito(self._fallos, self._espera))
+        return circuito
+
+    def estado(self):
+        """Retorna {endpoint: estado del circuito} de todos los endpoints usados."""
+        with self._lock:
+            circuitos = dict(self._circuitos)
+        return {endpoint: c.estado() for endpoint, c in sorted(circuitos.items())}
+
+
+# ══════════════════════════════════════════════
+# REINTENTOS
+# ══════════════════════════════════════════════
+
+def espera_reintento(intento, base=API_REINTENTO_BASE, maximo=API_REINTENTO_MAXIMO):
+    """
+    Segundos a esperar antes del reintento numero 'intento' (0, 1, 2...).
+
+    Full jitter: un valor aleatorio entre 0 y base * 2^intento (con tope),
+    asi los hilos que fallaron juntos no reintentan todos a la vez.
+    """
+    return random.uniform(0, min(maximo, base * (2 ** intento)))
+
+
+def es_sp_lectura(nombre_sp):
+    """True si el SP solo lee datos (ej: sp_listar_*, sp_consultar_*) y se puede reintentar."""
+    return nombre_sp.lower().startswith(SP_LECTURA_PREFIJOS)
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+circuitos = Circuitos()
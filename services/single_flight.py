@@ -0,0 +1,103 @@
+"""
+single_flight.py - Agrupa lecturas identicas que se hacen al mismo tiempo.
+
+Cuando muchos usuarios abren /factura o /cliente a la vez, cada hilo del
+servidor pediria a la API exactamente lo mismo en el mismo instante
+(ej: api.listar('persona') justo despues de vencer su cache).
+
+Con SingleFlight, el primer hilo (el "lider") hace la peticion y los demas
+que piden la misma clave mientras tanto esperan y reciben el mismo
+resultado (o la misma excepcion). La API recibe una sola peticion.
+
+Solo se agrupan llamadas simultaneas: cuando la peticion termina, la
+siguiente llamada con esa clave vuelve a ir a la API.
+"""
+
+# threading: Lock para el registro de llamadas y Event para despertar a los que esperan
+import threading
+
+
+class _Llamada:
+    """Una peticion en curso y su resultado, compartido con los que esperan."""
+
+    __slots__ = ('terminada', 'resultado', 'error')
+
+    def __init__(self):
+        self.terminada = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplica llamadas concurrentes con la misma clave, seguro entre hilos.
+
+    Metodos:
+        ejecutar(clave, funcion) → resultado de funcion() (propio o compartido)
+        estadisticas()           → dict con llamadas hechas y agrupadas
+    """
+
+    def __init__(self):
+        # clave → _Llamada en curso
+        self._en_curso = {}
+        self._lideres = 0
+        self._agrupadas = 0
+        self._lock = threading.Lock()
+
+    def ejecutar(self, clave, funcion):
+        """
+        Ejecuta funcion() una sola vez por cada grupo de llamadas simultaneas.
+
+        Args:
+            clave:   valor hashable que identifica la lectura
+                     (ej: ('listar', 'persona', None))
+            funcion: funcion sin argumentos que hace la peticion
+
+        Returns:
+            El resultado de funcion(). Todos los hilos del grupo reciben el
+            mismo objeto: no se debe modificar.
+
+        Si funcion() lanza una excepcion, se relanza en todos los hilos del grupo.
+        """
+        with self._lock:
+            llamada = self._en_curso.get(clave)
+            if llamada is None:
+                # Nadie la esta haciendo: este hilo es el lider
+                llamada = self._en_curso[clave] = _Llamada()
+                lider = True
+                self._lideres += 1
+            else:
+                lider = False
+                self._agrupadas += 1
+
+        if not lider:
+            llamada.terminada.wait()
+            if llamada.error is not None:
+                raise llamada.error
+            return llamada.resultado
+
+        try:
+            llamada.resultado = funcion()
+            return llamada.resultado
+        except BaseException as ex:
+            llamada.error = ex
+            raise
+        finally:
+            # Quitar la llamada antes de despertar a los demas: una llamada
+            # que llegue despues ya no debe recibir este resultado
+            with self._lock:
+                del self._en_curso[clave]
+            llamada.terminada.set()
+
+    def estadisticas(self):
+        """Retorna cuantas peticiones se hicieron (lideres) y cuantas se agruparon."""
+        with self._lock:
+            return {
+                'peticiones': self._lideres,
+                'agrupadas': self._agrupadas,
+                'en_curso': len(self._en_curso),
+            }
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+single_flight = SingleFlight()
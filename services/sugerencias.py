@@ -0,0 +1,195 @@
+"""
+sugerencias.py - Busqueda por prefijo y por subcadena para el typeahead.
+
+Los formularios de factura, cliente y vendedor llenaban sus <select> con
+todas las filas de producto, persona y empresa. Con catalogos grandes el
+HTML del formulario pesaba megabytes. Ahora el navegador pide solo las
+opciones que coinciden con lo que el usuario escribe (GET /buscar/<tabla>?q=).
+
+Por cada tabla se arma un indice a partir del listado guardado en el cache:
+
+    textos:   texto normalizado de cada fila (minusculas, sin tildes)
+    palabras: lista ORDENADA de (palabra, fila) → busqueda por prefijo con bisect
+
+Una consulta:
+    1. Filas con una palabra que EMPIEZA con la primera palabra buscada
+       (bisect: O(log n) + las coincidencias que se entregan), en orden
+       alfabetico de esa palabra.
+    2. Si faltan resultados, filas cuyo texto CONTIENE la consulta (recorrido).
+    En ambos casos la fila debe contener todas las palabras buscadas.
+
+El indice se reconstruye cuando cambia la version del listado (la del cache
+o la del indice de nombres): despues de vencer el TTL o de una escritura
+sobre la tabla. No se compara el objeto: el cache entrega una lista nueva en
+cada consulta cuando el listado no se pudo compactar.
+"""
+
+# bisect: buscar en la lista ordenada de palabras la primera con el prefijo
+import bisect
+
+# threading: los indices se comparten entre los hilos del servidor
+import threading
+
+# unicodedata: quitar tildes (Lopez encuentra López)
+import unicodedata
+
+from config import BUSQUEDA_TABLAS, BUSQUEDA_LIMITE
+
+
+def normalizar(texto):
+    """Minusculas y sin tildes: 'José Pérez' → 'jose perez'."""
+    texto = str(texto).lower()
+    if texto.isascii():
+        # Caso comun (sin tildes ni ñ): no hace falta descomponer los caracteres
+        return texto
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+class _Campos(dict):
+    """Diccionario para format_map(): una columna que falta se muestra vacia."""
+
+    def __missing__(self, clave):
+        return ''
+
+
+class IndiceTexto:
+    """
+    Indice de busqueda de un listado (prefijo de palabra + subcadena).
+
+    Guarda posiciones de fila, no las filas: el listado sigue en el cache.
+    """
+
+    __slots__ = ('registros', 'version', 'textos', 'palabras')
+
+    def __init__(self, registros, campos, version=None):
+        self.registros = registros
+        # Version del listado (ver Sugerencias.buscar); None: se compara el objeto
+        self.version = version
+        self.textos = []
+        palabras = []
+        for posicion, registro in enumerate(registros):
+            texto = normalizar(' '.join(str(registro.get(campo) or '') for campo in campos))
+            self.textos.append(texto)
+            for palabra in set(texto.split()):
+                palabras.append((palabra, posicion))
+        palabras.sort()
+        self.palabras = palabras
+
+    def buscar(self, consulta, limite):
+        """
+        Posiciones de las filas que coinciden, primero las de prefijo.
+
+        Args:
+            consulta: texto escrito por el usuario
+            limite:   cantidad maxima de posiciones
+
+        Returns:
+            Lista de posiciones (sin repetidos) en self.registros.
+        """
+        terminos = normalizar(consulta).split()
+        if not terminos:
+            return []
+        primero, resto = terminos[0], terminos[1:]
+
+        def contiene_resto(posicion):
+            texto = self.textos[posicion]
+            return all(termino in texto for termino in resto)
+
+        encontradas = []
+        vistas = set()
+
+        # 1. Prefijo: las palabras que empiezan con 'primero' estan juntas en la lista ordenada
+        palabras = self.palabras
+        for i in range(bisect.bisect_left(palabras, (primero,)), len(palabras)):
+            palabra, posicion = palabras[i]
+            if not palabra.startswith(primero):
+                break
+            if posicion not in vistas and contiene_resto(posicion):
+                vistas.add(posicion)
+                encontradas.append(posicion)
+                # Se corta al llegar al limite: no se recorren todas las coincidencias
+                if len(encontradas) >= limite:
+                    return encontradas
+
+        # 2. Subcadena: 'top' encuentra 'Laptop'
+        for posicion, texto in enumerate(self.textos):
+            if posicion not in vistas and primero in texto and contiene_resto(posicion):
+                encontradas.append(posicion)
+                if len(encontradas) >= limite:
+                    break
+        return encontradas
+
+
+class Sugerencias:
+    """
+    Indices de busqueda por tabla, seguros entre hilos.
+
+    Metodos:
+        tablas()                                 → tablas con busqueda (BUSQUEDA_TABLAS)
+        buscar(tabla, consulta, registros, ...)  → lista de {'valor', 'texto'}
+        texto(tabla, registro)                   → texto a mostrar de una fila
+    """
+
+    def __init__(self, tablas=None, limite=BUSQUEDA_LIMITE):
+        self._tablas = BUSQUEDA_TABLAS if tablas is None else tablas
+        self._limite = limite
+        # tabla → IndiceTexto del ultimo listado recibido
+        self._indices = {}
+        self._lock = threading.Lock()
+
+    def tablas(self):
+        """Nombres de las tablas en las que se puede buscar."""
+        return tuple(self._tablas)
+
+    def texto(self, tabla, registro):
+        """Texto de la opcion para una fila (ej: 'PR001 - Laptop (Stock: 5)')."""
+        formato = self._tablas[tabla][2]
+        return formato.format_map(_Campos(registro))
+
+    def _indice(self, tabla, registros, version):
+        """Indice del listado; se reconstruye si cambio la version del listado."""
+        with self._lock:
+            indice = self._indices.get(tabla)
+        if indice is not None:
+            if version is not None and indice.version == version:
+                return indice
+            if version is None and indice.registros is registros:
+                return indice
+        # Se construye fuera del lock: dos hilos pueden construirlo a la vez,
+        # pero ninguno bloquea las busquedas de las demas tablas
+        indice = IndiceTexto(registros, self._tablas[tabla][1], version)
+        with self._lock:
+            self._indices[tabla] = indice
+        return indice
+
+    def buscar(self, tabla, consulta, registros, limite=None, version=None):
+        """
+        Busca en el listado de la tabla.
+
+        Args:
+            tabla:     tabla de BUSQUEDA_TABLAS (ej: 'producto')
+            consulta:  texto escrito por el usuario (ej: 'lap')
+            registros: listado completo de la tabla (ApiService.listar)
+            limite:    sugerencias maximas (por defecto BUSQUEDA_LIMITE)
+            version:   version del listado, leida antes de pedirlo (ej:
+                       CacheTablas.version). Con la misma version se reutiliza
+                       el indice. None: se reutiliza solo con el mismo objeto.
+
+        Returns:
+            Lista de diccionarios {'valor': clave, 'texto': texto a mostrar}.
+        """
+        limite = min(limite or self._limite, self._limite)
+        indice = self._indice(tabla, registros, version)
+        campo_clave = self._tablas[tabla][0]
+        resultados = []
+        for posicion in indice.buscar(consulta, limite):
+            # Las filas salen del listado sobre el que se construyo el indice
+            registro = indice.registros[posicion]
+            resultados.append({'valor': registro.get(campo_clave),
+                               'texto': self.texto(tabla, registro)})
+        return resultados
+
+
+# Instancia unica compartida por todos los ApiService del proceso
+sugerencias = Sugerencias()
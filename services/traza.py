@@ -0,0 +1,312 @@
+"""
+traza.py - Llamadas a la API y tiempo de render de cada peticion.
+
+Cuando una pagina es lenta no se sabia que llamada de ApiService la hizo
+lenta. Cada peticion muestreada (TRAZA_MUESTREO, o forzada con el
+encabezado TRAZA_FORZAR y la clave TRAZA_CLAVE) guarda una Traza con:
+
+    - cada llamada a la API: metodo, tabla o SP, codigo, bytes y los tiempos
+      de conexion (solo si abrio una conexion nueva), primer byte y total
+      (cada reintento es una llamada aparte)
+    - los aciertos y fallos del cache de listados y de SP
+    - el tiempo de los templates (senales before_render_template y template_rendered)
+
+Al cerrar la respuesta se escribe una linea JSON en el logger 'traza'
+(las muestreadas, solo si tardaron TRAZA_LOG_DESDE_MS). Las forzadas ademas
+reciben el encabezado Server-Timing (lo muestran las herramientas del
+navegador, pestana Red → Tiempos); las muestreadas no, porque nombra
+tablas, SP y errores internos a cualquier cliente. El log se escribe al cerrar
+porque las paginas por partes (STREAMING_BLUEPRINTS) se renderizan despues
+de enviar los encabezados: su Server-Timing no trae el render, el log si.
+
+La traza vive en una ContextVar y no en flask.g: las llamadas de
+AsyncApiService corren en el hilo de su bucle de eventos, donde no hay
+contexto de Flask. en_paralelo() y asyncio.to_thread() copian las ContextVar
+al hilo que hace la llamada, y BucleHttp.ejecutar() la pasa a la corutina
+con en_traza(). Las lecturas agrupadas (single-flight) se registran solo en
+la peticion que hizo la llamada.
+
+Las peticiones no muestreadas no tienen traza: cada punto de medicion lee
+la ContextVar, encuentra None y sigue.
+"""
+
+# contextvars: la traza de la peticion actual (pasa a los hilos de en_paralelo)
+import contextvars
+
+# hmac.compare_digest: comparar la clave de TRAZA_FORZAR sin filtrar su largo por el tiempo
+import hmac
+
+# json: linea de log estructurada
+import json
+
+# logging: logger 'traza' (se puede redirigir con la configuracion de logging)
+import logging
+
+# random: muestreo de peticiones
+import random
+
+# sys: salida por defecto del log (la de gunicorn)
+import sys
+
+# time.perf_counter(): reloj de alta resolucion
+import time
+
+# request: ruta y encabezados; senales de Flask para medir los templates
+from flask import request, before_render_template, template_rendered
+
+# metricas: los aciertos del cache tambien se cuentan en GET /metrics;
+# nombre_llamada: tabla o SP de cada llamada
+from services.metricas import metricas, nombre_llamada
+
+from config import (
+    TRAZA_MUESTREO, TRAZA_FORZAR, TRAZA_CLAVE, TRAZA_SERVER_TIMING,
+    TRAZA_LOG, TRAZA_LOG_DESDE_MS, TRAZA_DETALLE,
+)
+
+
+# Traza de la peticion actual (None: la peticion no se muestreo)
+_actual = contextvars.ContextVar('traza', default=None)
+
+# Logger de las lineas JSON; sin configuracion propia escribe en stdout
+registro = logging.getLogger('traza')
+if not registro.handlers:
+    _manejador = logging.StreamHandler(sys.stdout)
+    _manejador.setFormatter(logging.Formatter('%(message)s'))
+    registro.addHandler(_manejador)
+    registro.setLevel(logging.INFO)
+    registro.propagate = False
+
+
+def _ms(segundos):
+    """Segundos → milisegundos con 2 decimales (None se conserva)."""
+    return None if segundos is None else round(segundos * 1000, 2)
+
+
+class Traza:
+    """
+    Mediciones de una peticion.
+
+    Los hilos de en_paralelo agregan llamadas a la misma Traza;
+    list.append es atomico, no hace falta lock.
+
+    Metodos:
+        llamada(metodo, endpoint, ...)   → registra una peticion a la API
+        resumen()                        → dict con totales y llamadas (para el log)
+        server_timing(total)             → valor del encabezado Server-Timing
+    """
+
+    __slots__ = ('inicio', 'forzada', 'llamadas', 'cache', 'render', '_renders')
+
+    def __init__(self, forzada=False):
+        self.inicio = time.perf_counter()
+        # True si la pidio el encabezado TRAZA_FORZAR con la clave
+        self.forzada = forzada
+        self.llamadas = []
+        # (tabla o SP, 'acierto' | 'viejo' | 'fallo')
+        self.cache = []
+        # Segundos en templates; _renders guarda el inicio de los que estan en curso
+        self.render = 0.0
+        self._renders = []
+
+    def llamada(self, metodo, endpoint, estado=None, tamano=None, conexion=None,
+                primer_byte=None, total=0.0, error=None):
+        """
+        Registra una peticion a la API.
+
+        Args:
+            metodo:      'GET', 'POST', 'PUT' o 'DELETE'
+            endpoint:    nombre del circuito (ej: 'GET /api/producto', 'SP sp_x')
+            estado:      codigo HTTP (None si fallo la red)
+            tamano:      bytes del cuerpo (None si se leyo por partes sin Content-Length)
+            conexion:    segundos abriendo la conexion (0 si se reutilizo una abierta)
+            primer_byte: segundos desde el envio hasta los encabezados de la respuesta
+            total:       segundos de la peticion completa
+            error:       nombre de la excepcion si fallo la red
+        """
+        datos = {
+            'metodo': metodo,
+            'nombre': nombre_llamada(endpoint),
+            'estado': estado,
+            'bytes': tamano,
+            'conexion_ms': _ms(conexion),
+            'primer_byte_ms': _ms(primer_byte),
+            'total_ms': _ms(total),
+        }
+        if error:
+            datos['error'] = error
+        self.llamadas.append(datos)
+
+    def _contar_cache(self):
+        cuenta = {'acierto': 0, 'viejo': 0, 'fallo': 0}
+        for _nombre_cache, resultado in self.cache:
+            cuenta[resultado] += 1
+        return cuenta
+
+    def resumen(self):
+        """Totales, llamadas y cache de la peticion (la linea de log)."""
+        return {
+            'total_ms': _ms(time.perf_counter() - self.inicio),
+            'render_ms': _ms(self.render),
+            'api_ms': _ms(sum(llamada['total_ms'] for llamada in self.llamadas) / 1000),
+            'llamadas': self.llamadas,
+            'cache': self._contar_cache(),
+            'cache_detalle': [f"{nombre}:{resultado}" for nombre, resultado in self.cache],
+        }
+
+    def server_timing(self, total):
+        """
+        Valor del encabezado Server-Timing.
+
+        'api' suma las llamadas (con llamadas en paralelo puede superar a
+        'app'); se detallan las TRAZA_DETALLE mas lentas como api1, api2...
+        """
+        partes = [f"app;dur={_ms(total)}"]
+        if self.llamadas:
+            suma = sum(llamada['total_ms'] for llamada in self.llamadas)
+            partes.append(f'api;dur={round(suma, 2)};desc="{len(self.llamadas)} llamadas"')
+            lentas = sorted(self.llamadas, key=lambda llamada: -llamada['total_ms'])
+            for numero, llamada in enumerate(lentas[:TRAZA_DETALLE], 1):
+                detalle = f"{llamada['metodo']} {llamada['nombre']} {llamada['estado'] or llamada.get('error')}"
+                partes.append(f'api{numero};dur={llamada["total_ms"]};desc="{detalle}"')
+        if self.cache:
+            cuenta = self._contar_cache()
+            partes.append(f'cache;desc="{cuenta["acierto"]} aciertos, {cuenta["viejo"]} viejos, '
+                          f'{cuenta["fallo"]} fallos"')
+        if self.render:
+            partes.append(f"render;dur={_ms(self.render)}")
+        return ', '.join(partes)
+
+
+# ──────────────────────────────────────────────
+# PUNTOS DE MEDICION (ApiService, AsyncApiService)
+# ──────────────────────────────────────────────
+def traza_actual():
+    """Traza de la peticion actual, o None si no se muestreo (o no hay peticion)."""
+    return _actual.get()
+
+
+def registrar_cache(nombre, resultado):
+    """
+    Registra un acierto ('acierto', 'viejo') o fallo ('fallo') del cache de la tabla o SP.
+
+    Se cuenta en las metricas del proceso siempre y en la traza solo si la
+    peticion se muestreo.
+    """
+    metricas.sumar('front_cache_consultas_total', (('nombre', nombre), ('resultado', resultado)))
+    traza = _actual.get()
+    if traza is not None:
+        traza.cache.append((nombre, resultado))
+
+
+async def en_traza(traza, corutina):
+    """Ejecuta la corutina con la traza indicada (para el bucle de AsyncApiService)."""
+    # Cada corutina enviada al bucle corre en una tarea con su propio contexto:
+    # el valor no pasa a las demas tareas
+    _actual.set(traza)
+    return await corutina
+
+
+class TiemposHttpx:
+    """
+    Extension 'trace' de httpx: tiempos de conexion y de primer byte.
+
+    httpcore llama al objeto con eventos como 'connection.connect_tcp.started'
+    o 'http11.receive_response_headers.complete'.
+    """
+
+    __slots__ = ('_eventos',)
+
+    def __init__(self):
+        self._eventos = {}
+
+    async def __call__(self, evento, informacion):
+        # 'http11.send_request_headers.started' → 'send_request_headers.started' (igual en http2)
+        self._eventos[evento.split('.', 1)[-1]] = time.perf_counter()
+
+    def conexion(self):
+        """Segundos abriendo la conexion (TCP y TLS); 0 si se reutilizo una abierta."""
+        inicio = self._eventos.get('connect_tcp.started')
+        if inicio is None:
+            return 0.0
+        fin = self._eventos.get('start_tls.complete') or self._eventos.get('connect_tcp.complete', inicio)
+        return fin - inicio
+
+    def primer_byte(self):
+        """Segundos desde el envio hasta los encabezados de la respuesta."""
+        inicio = self._eventos.get('send_request_headers.started')
+        fin = self._eventos.get('receive_response_headers.complete')
+        return fin - inicio if inicio is not None and fin is not None else None
+
+
+# ──────────────────────────────────────────────
+# INTEGRACION CON FLASK
+# ──────────────────────────────────────────────
+def _forzada():
+    """True si la peticion trae el encabezado TRAZA_FORZAR con la clave TRAZA_CLAVE."""
+    if not TRAZA_FORZAR or not TRAZA_CLAVE:
+        return False
+    valor = request.headers.get(TRAZA_FORZAR)
+    return valor is not None and hmac.compare_digest(valor.encode(), TRAZA_CLAVE.encode())
+
+
+def _iniciar():
+    """before_request: decide si la peticion se traza."""
+    forzada = _forzada()
+    # Siempre se asigna: el hilo del worker conserva el valor de la peticion anterior
+    if forzada or random.random() < TRAZA_MUESTREO:
+        _actual.set(Traza(forzada))
+    else:
+        _actual.set(None)
+
+
+def _responder(respuesta):
+    """after_request: encabezado Server-Timing y log al cerrar la respuesta."""
+    traza = _actual.get()
+    if traza is None:
+        return respuesta
+    if TRAZA_SERVER_TIMING and traza.forzada:
+        respuesta.headers['Server-Timing'] = traza.server_timing(time.perf_counter() - traza.inicio)
+    if TRAZA_LOG:
+        datos = {'metodo': request.method, 'ruta': request.path,
+                 'endpoint': request.endpoint, 'estado': respuesta.status_code}
+        respuesta.call_on_close(lambda: _escribir_log(traza, datos))
+    return respuesta
+
+
+def _escribir_log(traza, datos):
+    """Escribe la linea JSON de la peticion (forzada, o muestreada que tardo al menos TRAZA_LOG_DESDE_MS)."""
+    resumen = traza.resumen()
+    if traza.forzada or resumen['total_ms'] >= TRAZA_LOG_DESDE_MS:
+        registro.info(json.dumps({**datos, **resumen}, ensure_ascii=False))
+
+
+def _terminar(error=None):
+    """teardown_request: la traza no pasa a la siguiente peticion del hilo."""
+    _actual.set(None)
+
+
+def _antes_render(app, template, context, **extra):
+    traza = _actual.get()
+    if traza is not None:
+        traza._renders.append(time.perf_counter())
+
+
+def _despues_render(app, template, context, **extra):
+    traza = _actual.get()
+    if traza is not None and traza._renders:
+        traza.render += time.perf_counter() - traza._renders.pop()
+
+
+def registrar_traza(app):
+    """
+    Conecta la traza a la aplicacion (ver crear_app() en app.py).
+
+    Con TRAZA_MUESTREO = 0 y sin TRAZA_FORZAR / TRAZA_CLAVE no se registra nada.
+    """
+    if not TRAZA_MUESTREO and not (TRAZA_FORZAR and TRAZA_CLAVE):
+        return
+    app.before_request(_iniciar)
+    app.after_request(_responder)
+    app.teardown_request(_terminar)
+    before_render_template.connect(_antes_render, app)
+    template_rendered.connect(_despues_render, app)
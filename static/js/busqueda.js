@@ -0,0 +1,142 @@
+/* ══════════════════════════════════════════════
+   busqueda.js - Campos de seleccion con busqueda mientras se escribe.
+
+   Cada campo (macro campo_busqueda en templates/components/busqueda.html):
+
+     <div class="busqueda" data-url="/buscar/producto" data-requerido>
+         <input class="busqueda-texto">            lo que el usuario escribe
+         <input class="busqueda-valor" type="hidden" name="...">   clave elegida
+         <div class="busqueda-lista"></div>        opciones sugeridas
+     </div>
+
+   Los eventos se escuchan en el documento (delegacion), asi tambien
+   funcionan los campos agregados despues (filas nuevas de productos).
+   ══════════════════════════════════════════════ */
+
+(function () {
+    // Milisegundos sin escribir antes de consultar al servidor
+    const ESPERA_MS = 200;
+
+    function campoDe(elemento) {
+        return elemento.closest('.busqueda');
+    }
+
+    function lista(campo) {
+        return campo.querySelector('.busqueda-lista');
+    }
+
+    function cerrar(campo) {
+        lista(campo).replaceChildren();
+    }
+
+    function elegir(campo, opcion) {
+        campo.querySelector('.busqueda-valor').value = opcion.dataset.valor;
+        const texto = campo.querySelector('.busqueda-texto');
+        texto.value = opcion.dataset.texto;
+        texto.setCustomValidity('');
+        cerrar(campo);
+    }
+
+    function mostrar(campo, resultados) {
+        const opciones = resultados.map(function (r) {
+            const boton = document.createElement('button');
+            boton.type = 'button';
+            boton.className = 'list-group-item list-group-item-action';
+            boton.dataset.valor = r.valor;
+            boton.dataset.texto = r.texto;
+            boton.textContent = r.texto;   // textContent: sin riesgo de inyectar HTML
+            return boton;
+        });
+        if (!opciones.length) {
+            const vacio = document.createElement('div');
+            vacio.className = 'list-group-item text-muted';
+            vacio.textContent = 'Sin resultados';
+            opciones.push(vacio);
+        }
+        lista(campo).replaceChildren(...opciones);
+    }
+
+    function consultar(campo, texto) {
+        // Numero de consulta: si llega tarde la respuesta de una anterior, se ignora
+        const numero = (campo._consulta || 0) + 1;
+        campo._consulta = numero;
+
+        const url = campo.dataset.url + '?q=' + encodeURIComponent(texto);
+        fetch(url, { headers: { 'Accept': 'application/json' } })
+            .then(function (respuesta) { return respuesta.json(); })
+            .then(function (datos) {
+                if (campo._consulta === numero) {
+                    mostrar(campo, datos.resultados || []);
+                }
+            })
+            .catch(function () { cerrar(campo); });
+    }
+
+    // Al escribir: la clave elegida antes deja de valer y se consulta de nuevo
+    document.addEventListener('input', function (evento) {
+        if (!evento.target.classList.contains('busqueda-texto')) return;
+        const campo = campoDe(evento.target);
+        campo.querySelector('.busqueda-valor').value = '';
+        evento.target.setCustomValidity('');
+
+        clearTimeout(campo._espera);
+        const texto = evento.target.value.trim();
+        if (!texto) {
+            cerrar(campo);
+            return;
+        }
+        campo._espera = setTimeout(function () { consultar(campo, texto); }, ESPERA_MS);
+    });
+
+    // mousedown (no click): ocurre antes de que el campo de texto pierda el foco
+    document.addEventListener('mousedown', function (evento) {
+        const opcion = evento.target.closest('.busqueda-lista [data-valor]');
+        if (!opcion) return;
+        evento.preventDefault();
+        elegir(campoDe(opcion), opcion);
+    });
+
+    // Teclado: flechas para moverse, Enter para elegir, Escape para cerrar
+    document.addEventListener('keydown', function (evento) {
+        if (!evento.target.classList.contains('busqueda-texto')) return;
+        const campo = campoDe(evento.target);
+        const opciones = Array.from(lista(campo).querySelectorAll('[data-valor]'));
+        if (!opciones.length) return;
+
+        const actual = opciones.findIndex(function (o) { return o.classList.contains('active'); });
+        let siguiente = actual;
+        if (evento.key === 'ArrowDown') siguiente = Math.min(actual + 1, opciones.length - 1);
+        else if (evento.key === 'ArrowUp') siguiente = Math.max(actual - 1, 0);
+        else if (evento.key === 'Enter') {
+            evento.preventDefault();
+            elegir(campo, opciones[Math.max(actual, 0)]);
+            return;
+        } else if (evento.key === 'Escape') {
+            cerrar(campo);
+            return;
+        } else return;
+
+        evento.preventDefault();
+        opciones.forEach(function (o, i) { o.classList.toggle('active', i === siguiente); });
+    });
+
+    // Al salir del campo se cierran las sugerencias
+    document.addEventListener('focusout', function (evento) {
+        if (!evento.target.classList.contains('busqueda-texto')) return;
+        cerrar(campoDe(evento.target));
+    });
+
+    // Antes de enviar: los campos obligatorios deben tener una opcion elegida
+    document.addEventListener('submit', function (evento) {
+        const pendientes = evento.target.querySelectorAll('.busqueda[data-requerido]');
+        for (const campo of pendientes) {
+            if (campo.querySelector('.busqueda-valor').value) continue;
+            const texto = campo.querySelector('.busqueda-texto');
+            texto.setCustomValidity('Seleccione una opcion de la lista');
+            texto.reportValidity();
+            evento.preventDefault();
+            evento.stopImmediatePropagation();
+            return;
+        }
+    }, true);
+})();
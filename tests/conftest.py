@@ -0,0 +1,12 @@
+"""
+conftest.py - Configuracion comun de las pruebas (pytest).
+
+Ejecutar desde la raiz del proyecto:
+    python -m pytest -q
+"""
+
+# os / sys: importar los modulos del proyecto (services, routes) desde tests/
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
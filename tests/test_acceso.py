@@ -0,0 +1,72 @@
+"""
+test_acceso.py - Acceso a las rutas internas (routes/acceso.py).
+
+/estado y /metrics no responden a cualquiera: solo con la clave
+INTERNO_CLAVE, desde una direccion de INTERNO_REDES sin pasar por un proxy,
+o con INTERNO_LIBRE.
+"""
+
+import pytest
+from flask import Flask
+
+from routes import acceso, estado, metricas
+
+CLAVE = 'una-clave-larga-y-aleatoria'
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    """Cliente de una aplicacion con solo los Blueprints internos."""
+    monkeypatch.setattr(acceso, 'INTERNO_CLAVE', CLAVE)
+    monkeypatch.setattr(acceso, 'INTERNO_REDES', ('127.0.0.0/8', '::1'))
+    monkeypatch.setattr(acceso, 'INTERNO_LIBRE', False)
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(estado.bp)
+    app.register_blueprint(metricas.bp)
+    return app.test_client()
+
+
+def _externa(cliente, ruta, **opciones):
+    return cliente.get(ruta, environ_base={'REMOTE_ADDR': '203.0.113.7'}, **opciones)
+
+
+@pytest.mark.parametrize('ruta', ['/estado', '/estado/circuitos', '/metrics'])
+def test_externa_sin_clave(cliente, ruta):
+    assert _externa(cliente, ruta).status_code == 404
+    assert _externa(cliente, ruta, headers={'Authorization': 'Bearer otra'}).status_code == 404
+
+
+def test_externa_con_clave(cliente):
+    assert _externa(cliente, '/estado/circuitos',
+                    headers={'Authorization': f'Bearer {CLAVE}'}).status_code == 200
+    assert _externa(cliente, '/estado/circuitos',
+                    headers={'X-Interno-Clave': CLAVE}).status_code == 200
+
+
+def test_misma_maquina(cliente):
+    assert cliente.get('/estado/circuitos').status_code == 200
+    assert cliente.get('/estado/circuitos',
+                       environ_base={'REMOTE_ADDR': '::ffff:127.0.0.1'}).status_code == 200
+
+
+def test_detras_de_un_proxy(cliente):
+    # El proxy conecta desde 127.0.0.1: la direccion no basta
+    encabezados = {'X-Forwarded-For': '203.0.113.7'}
+    assert cliente.get('/estado/circuitos', headers=encabezados).status_code == 404
+    encabezados['Authorization'] = f'Bearer {CLAVE}'
+    assert cliente.get('/estado/circuitos', headers=encabezados).status_code == 200
+
+
+def test_sin_clave_configurada(cliente, monkeypatch):
+    monkeypatch.setattr(acceso, 'INTERNO_CLAVE', None)
+    assert _externa(cliente, '/estado/circuitos',
+                    headers={'Authorization': 'Bearer '}).status_code == 404
+    monkeypatch.setattr(acceso, 'INTERNO_LIBRE', True)
+    assert _externa(cliente, '/estado/circuitos').status_code == 200
+
+
+def test_metricas_con_clave(cliente):
+    respuesta = _externa(cliente, '/metrics', headers={'Authorization': f'Bearer {CLAVE}'})
+    assert respuesta.status_code == 200
+    assert respuesta.content_type.startswith('text/plain')
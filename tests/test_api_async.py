@@ -0,0 +1,137 @@
+"""
+test_api_async.py - AsyncApiService con httpx (services/api_async.py).
+
+Las reglas son las de ApiService (cache, respaldo, single-flight, circuit
+breaker, lectura de los SP); los cuerpos grandes se decodifican en un hilo,
+nunca en el hilo del bucle compartido.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('httpx')
+
+from benchmarks.api_simulada import iniciar
+from services.api_async import AsyncApiService
+from services.cache import CacheTablas, CacheProcedimientos
+from services.indices import IndicesNombres
+from services.resiliencia import Circuitos, ABIERTO
+
+SP_CONSULTA = 'sp_consultar_factura_y_productosporfactura'
+
+
+@pytest.fixture
+def api():
+    servidor = iniciar(puerto=0)
+    servicio = AsyncApiService()
+    servicio.base_url = servidor.url
+    # Cache, circuitos e indices propios (los comparten AsyncApiService y su ApiService)
+    servicio.cache = servicio.sync.cache = CacheTablas()
+    servicio.cache_sp = servicio.sync.cache_sp = CacheProcedimientos()
+    servicio.circuitos = servicio.sync.circuitos = Circuitos(fallos=2, espera=30)
+    servicio.sync.nombres = IndicesNombres()
+    yield servidor, servicio
+    servidor.detener()
+
+
+def _hilos_de(servicio, monkeypatch, metodo):
+    """Registra en que hilo se ejecuta servicio.sync.<metodo>."""
+    hilos = []
+    original = getattr(servicio.sync, metodo)
+
+    def espia(*args):
+        hilos.append(threading.current_thread().name)
+        return original(*args)
+
+    monkeypatch.setattr(servicio.sync, metodo, espia)
+    return hilos
+
+
+def test_listar_usa_el_cache(api):
+    servidor, servicio = api
+    registros = asyncio.run(servicio.listar('producto'))
+    assert registros[0]['codigo'] == 'PR001'
+
+    servidor.api.estadisticas(reiniciar=True)
+    assert asyncio.run(servicio.listar('producto'))[0]['codigo'] == 'PR001'
+    assert servidor.api.estadisticas()['peticiones'] == 0
+
+
+def test_listados_iguales_se_agrupan(api):
+    servidor, servicio = api
+    servidor.api.configurar(latencia_ms=100)
+    servidor.api.estadisticas(reiniciar=True)
+
+    async def varios():
+        return await servicio.en_paralelo(*[servicio.listar('cliente') for _ in range(5)])
+
+    listados = asyncio.run(varios())
+    assert all(len(listado) == len(listados[0]) > 0 for listado in listados)
+    assert servidor.api.estadisticas()['endpoints']['GET /api/cliente']['peticiones'] == 1
+
+
+def test_lectura_despues_de_escribir(api):
+    servidor, servicio = api
+    servidor.api.configurar(latencia_ms=150)
+
+    async def escenario():
+        # GET en curso antes de la escritura
+        antes = asyncio.ensure_future(servicio.listar('producto'))
+        await asyncio.sleep(0.05)
+        exito, _mensaje = await servicio.actualizar('producto', 'codigo', 'PR001', {'stock': 3})
+        assert exito
+        despues = await servicio.listar('producto')
+        await antes
+        return despues
+
+    despues = asyncio.run(escenario())
+    assert despues[0]['stock'] == 3
+
+
+def test_cuerpos_se_decodifican_fuera_del_bucle(api, monkeypatch):
+    _servidor, servicio = api
+    hilos_listado = _hilos_de(servicio, monkeypatch, '_registros')
+    hilos_sp = _hilos_de(servicio, monkeypatch, '_resultado_sp')
+
+    async def consultas():
+        return await servicio.en_paralelo(
+            servicio.listar('producto'),
+            servicio.listar_por('productosporfactura', 'fknumfactura', 1),
+            servicio.ejecutar_sp(SP_CONSULTA, {'p_numero': 1, 'p_resultado': None}))
+
+    productos, lineas, (exito, factura) = asyncio.run(consultas())
+    assert productos and lineas[0]['fkcodproducto'] == 'PR001'
+    assert exito and factura['factura']['numero'] == 1
+    assert len(hilos_listado) == 2 and len(hilos_sp) == 1
+    assert 'api-async' not in hilos_listado + hilos_sp
+
+
+def test_sp_de_lectura_usa_el_cache(api):
+    servidor, servicio = api
+    parametros = {'p_numero': 1, 'p_resultado': None}
+    asyncio.run(servicio.ejecutar_sp(SP_CONSULTA, parametros))
+
+    servidor.api.estadisticas(reiniciar=True)
+    exito, factura = asyncio.run(servicio.ejecutar_sp(SP_CONSULTA, parametros))
+    assert exito and factura['factura']['numero'] == 1
+    assert servidor.api.estadisticas()['peticiones'] == 0
+
+
+def test_api_con_errores_abre_el_circuito(api, monkeypatch):
+    servidor, servicio = api
+    monkeypatch.setattr('services.api_service.espera_reintento', lambda intento: 0)
+    asyncio.run(servicio.listar('producto'))
+    servicio.cache.invalidar('producto')
+
+    servidor.api.configurar(errores=1.0, codigo_error=503)
+    # Sin respuesta: se sirve el ultimo listado exitoso
+    assert asyncio.run(servicio.listar('producto'))[0]['codigo'] == 'PR001'
+    assert servicio.sync.estado_circuitos()['GET /api/producto']['estado'] == ABIERTO
+
+    servidor.api.estadisticas(reiniciar=True)
+    assert asyncio.run(servicio.listar('cliente')) == []
+    # El circuito de producto no deja pasar peticiones; el de cliente si
+    asyncio.run(servicio.listar('producto'))
+    assert list(servidor.api.estadisticas()['endpoints']) == ['GET /api/cliente']
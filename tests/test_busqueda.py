@@ -0,0 +1,159 @@
+"""
+test_busqueda.py - Busqueda ?q= en los listados (services/busqueda.py).
+
+Las filas encontradas salen del listado actual o de las escrituras hechas
+desde este frontend, nunca de una copia guardada en el indice: /producto y
+/producto?q=... muestran lo mismo. Un listado nuevo del cache rearma el
+indice una sola vez, en segundo plano.
+"""
+
+import threading
+import time
+
+import pytest
+import requests
+
+from benchmarks.api_simulada import iniciar
+from services.api_service import ApiService
+from services.busqueda import BusquedaListados
+from services.cache import CacheTablas
+from services.filas import compactar
+from services.indices import IndicesNombres
+
+
+def _productos(stock):
+    return compactar([
+        {'codigo': 'PR001', 'nombre': 'Laptop Lenovo IdeaPad', 'stock': stock},
+        {'codigo': 'PR002', 'nombre': 'Monitor Samsung', 'stock': 27},
+        {'codigo': 'PR003', 'nombre': 'Laptop Dell Inspiron', 'stock': 5},
+    ])
+
+
+def _esperar(condicion, segundos=5):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def _codigos(registros):
+    return [fila['codigo'] for fila in registros]
+
+
+@pytest.fixture
+def busqueda():
+    return BusquedaListados({'producto': ('codigo', (), {}),
+                             'usuario': ('email', ('contrasena',), {}),
+                             'factura': ('numero', (), {})},
+                            ttl_tablas={'producto': 30, 'usuario': 60})
+
+
+def test_solo_tablas_con_cache(busqueda):
+    assert busqueda.tablas() == ('producto', 'usuario')
+    assert busqueda.buscar('factura', '1', compactar([{'numero': 1}])) == []
+
+
+def test_prefijos_y_paginas(busqueda):
+    listado = _productos(17)
+    assert _codigos(busqueda.buscar('producto', 'lap', listado)) == ['PR001', 'PR003']
+    assert _codigos(busqueda.buscar('producto', 'LAP del', listado)) == ['PR003']
+    assert _codigos(busqueda.buscar('producto', 'lap', listado, saltar=1, cantidad=5)) == ['PR003']
+    assert busqueda.buscar('producto', 'tablet', listado) == []
+
+
+def test_listado_nuevo_se_rearma_una_vez(busqueda):
+    viejo = _productos(17)
+    assert busqueda.buscar('producto', 'lenovo', viejo, version=(0, 1.0))[0]['stock'] == 17
+
+    # Varias busquedas con el listado nuevo: se rearma una vez, en segundo
+    # plano, y mientras tanto se responde con el indice anterior
+    nuevo = _productos(99)
+    hilos = [threading.Thread(target=busqueda.buscar,
+                              args=('producto', 'lenovo', nuevo), kwargs={'version': (0, 2.0)})
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    _esperar(lambda: not busqueda.estadisticas()['producto']['reconstruyendo'])
+    assert busqueda.buscar('producto', 'lenovo', nuevo, version=(0, 2.0))[0]['stock'] == 99
+    assert busqueda.estadisticas()['producto']['reconstrucciones'] == 2
+
+    # Sin version (listado de respaldo) se sigue usando el indice actual
+    busqueda.buscar('producto', 'lenovo', _productos(1))
+    assert busqueda.estadisticas()['producto']['reconstrucciones'] == 2
+
+
+def test_escrituras_modifican_el_indice(busqueda):
+    listado = _productos(17)
+    busqueda.buscar('producto', 'lap', listado, version=(0, 1.0))
+
+    busqueda.al_actualizar('producto', 'codigo', 'PR002', {'nombre': 'Laptop HP'}, 1)
+    busqueda.al_crear('producto', {'codigo': 'PR004', 'nombre': 'Laptop Asus', 'stock': 3}, 1)
+    busqueda.al_eliminar('producto', 'codigo', 'PR001', 1)
+    assert _codigos(busqueda.buscar('producto', 'lap', listado)) == ['PR002', 'PR003', 'PR004']
+    assert busqueda.buscar('producto', 'monitor', listado) == []
+    assert busqueda.buscar('producto', 'hp', listado)[0]['stock'] == 27
+    assert busqueda.estadisticas()['producto']['filas'] == 3
+
+    # Un listado pedido antes de las escrituras no reemplaza el indice
+    busqueda.buscar('producto', 'lap', listado, version=(0, 2.0))
+    _esperar(lambda: busqueda.estadisticas()['producto']['descartados'] == 1)
+    assert _codigos(busqueda.buscar('producto', 'asus', listado)) == ['PR004']
+
+
+def test_contrasena_no_se_indexa(busqueda):
+    listado = compactar([{'email': 'ana@x.com', 'contrasena': '$2a$hash'}])
+    busqueda.buscar('usuario', 'ana', listado, version=(0, 1.0))
+    busqueda.al_actualizar('usuario', 'email', 'ana@x.com', {'contrasena': 'secreta'}, 1)
+    assert busqueda.buscar('usuario', 'secreta', listado) == []
+    assert busqueda.buscar('usuario', 'ana', listado)[0]['contrasena'] == '$2a$hash'
+
+
+@pytest.fixture
+def api():
+    servidor = iniciar(puerto=0)
+    servicio = ApiService()
+    servicio.base_url = servidor.url
+    # Cache e indices propios: no quedan listados de respaldo para otras pruebas
+    servicio.cache = CacheTablas()
+    servicio.nombres = IndicesNombres()
+    servicio.busqueda = BusquedaListados()
+    yield servidor, servicio
+    servidor.detener()
+
+
+def test_cambio_de_otro_cliente(api):
+    servidor, servicio = api
+    pagina = servicio.listar_pagina('producto', 'codigo', buscar='lenovo')
+    assert pagina.buscable
+    assert pagina.registros[0]['stock'] == 17
+
+    # Otro cliente de la API cambia el stock; al vencer el cache se ve en
+    # ambas paginas cuando termina de rearmarse el indice
+    respuesta = requests.put(f"{servidor.url}/api/producto/codigo/PR001", json={'stock': 3})
+    assert respuesta.ok
+    servicio.cache.invalidar('producto')
+    listado = servicio.listar_pagina('producto', 'codigo')
+    servicio.listar_pagina('producto', 'codigo', buscar='lenovo')
+    _esperar(lambda: servicio.busqueda.estadisticas()['producto']['reconstrucciones'] == 2)
+    encontrado = servicio.listar_pagina('producto', 'codigo', buscar='lenovo')
+    assert listado.registros[0]['stock'] == encontrado.registros[0]['stock'] == 3
+
+    # Una escritura propia se ve al instante, sin rearmar el indice
+    servicio.actualizar('producto', 'codigo', 'PR001', {'stock': 8})
+    assert servicio.listar_pagina('producto', 'codigo', buscar='lenovo').registros[0]['stock'] == 8
+    assert servicio.busqueda.estadisticas()['producto']['reconstrucciones'] == 2
+    assert servicio.listar_pagina('producto', 'codigo').registros[0]['stock'] == 8
+
+
+def test_cliente_por_nombre_de_persona(api):
+    _servidor, servicio = api
+    pagina = servicio.listar_pagina('cliente', 'id', buscar='ana')
+    assert pagina.buscable
+    assert [fila['id'] for fila in pagina.registros] == [1]
+
+
+def test_tabla_sin_cache_no_busca(api):
+    _servidor, servicio = api
+    assert not servicio.listar_pagina('factura', 'numero').buscable
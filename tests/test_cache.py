@@ -0,0 +1,105 @@
+"""
+test_cache.py - Cache de listados y de SP de lectura (services/cache.py).
+"""
+
+import time
+
+from services.cache import CacheTablas, CacheProcedimientos, FRESCO, VIEJO
+from services.filas import compactar
+
+SP_LISTA = 'sp_listar_facturas_y_productosporfactura'
+SP_CONSULTA = 'sp_consultar_factura_y_productosporfactura'
+
+
+def _productos(stock):
+    return compactar([{'codigo': 'PR001', 'stock': stock}, {'codigo': 'PR002', 'stock': 27}])
+
+
+def test_invalidar_deja_el_listado_como_respaldo():
+    cache = CacheTablas(ttl_tablas={'producto': 30})
+    cache.guardar('producto', None, _productos(17), 100, cache.generacion('producto'))
+    registros, estado = cache.consultar('producto')
+    assert estado == FRESCO and registros[0]['stock'] == 17
+
+    cache.invalidar('producto')
+    assert cache.consultar('producto')[1] is None
+    assert cache.respaldo('producto')[0]['stock'] == 17
+
+
+def test_guardar_despues_de_una_escritura_se_descarta():
+    cache = CacheTablas(ttl_tablas={'producto': 30})
+    # La consulta empezo antes de la escritura y termina despues
+    generacion = cache.generacion('producto')
+    cache.invalidar('producto')
+    cache.guardar('producto', None, _productos(17), 100, generacion)
+    assert cache.consultar('producto')[1] is None
+
+    cache.guardar('producto', None, _productos(3), 100, cache.generacion('producto'))
+    assert cache.consultar('producto')[0][0]['stock'] == 3
+
+
+def test_listado_vencido_se_sirve_viejo():
+    cache = CacheTablas(ttl_tablas={'producto': 0.05}, swr=30)
+    cache.guardar('producto', None, _productos(17), 100, 0)
+    time.sleep(0.06)
+    assert cache.consultar('producto')[1] == VIEJO
+    # Un solo refresco en segundo plano a la vez
+    assert cache.iniciar_refresco('producto')
+    assert not cache.iniciar_refresco('producto')
+    cache.terminar_refresco('producto')
+    assert cache.iniciar_refresco('producto')
+
+
+def test_tabla_sin_ttl_no_se_sirve():
+    cache = CacheTablas(ttl_tablas={'cliente': 0}, respaldo_todas=False)
+    cache.guardar('cliente', None, compactar([{'id': 1}]), 10, 0)
+    assert cache.consultar('cliente')[1] is None
+    assert cache.respaldo('cliente') is None
+
+
+def test_sp_por_parametros_y_ttl():
+    cache = CacheProcedimientos(ttl_sp={SP_CONSULTA: 0.05})
+    cache.guardar(SP_CONSULTA, {'p_numero': 5, 'p_resultado': None}, {'total': 1}, 0)
+    # p_resultado no es parte de la clave; el orden de los parametros tampoco
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 5}) == {'total': 1}
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 6}) is None
+    time.sleep(0.06)
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 5}) is None
+
+
+def test_sp_sin_ttl_no_se_guarda():
+    cache = CacheProcedimientos(ttl_sp={})
+    cache.guardar(SP_CONSULTA, {'p_numero': 5}, {'total': 1}, 0)
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 5}) is None
+
+
+def test_sp_invalidar_solo_los_parametros_que_coinciden():
+    cache = CacheProcedimientos(ttl_sp={SP_CONSULTA: 60, SP_LISTA: 60})
+    cache.guardar(SP_CONSULTA, {'p_numero': 5}, {'numero': 5}, 0)
+    cache.guardar(SP_CONSULTA, {'p_numero': 6}, {'numero': 6}, 0)
+    cache.guardar(SP_LISTA, {}, {'facturas': []}, 0)
+
+    cache.invalidar(SP_CONSULTA, {'p_numero': 5, 'p_fkidcliente': 2})
+    cache.invalidar(SP_LISTA, {'p_numero': 5})
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 5}) is None
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 6}) == {'numero': 6}
+    # El listado no tiene parametros en comun: se descarta
+    assert cache.obtener(SP_LISTA, {}) is None
+
+    # Un resultado pedido antes de la invalidacion no se guarda
+    cache.guardar(SP_CONSULTA, {'p_numero': 5}, {'numero': 'viejo'}, 0)
+    assert cache.obtener(SP_CONSULTA, {'p_numero': 5}) is None
+
+
+def test_version_cambia_con_cada_listado():
+    cache = CacheTablas(ttl_tablas={'producto': 30})
+    assert cache.version('producto') is None
+    cache.guardar('producto', None, _productos(17), 100, cache.generacion('producto'))
+    version = cache.version('producto')
+    assert version is not None and cache.version('producto') == version
+
+    # Invalidado: el proximo listado sera otro, aunque el viejo siga como respaldo
+    cache.invalidar('producto')
+    assert cache.version('producto') is None
+    cache.guardar('producto', None, _productos(3), 100, cache.generacion('producto'))
+    assert cache.version('producto') not in (None, version)
@@ -0,0 +1,101 @@
+"""
+test_exportar.py - Descarga de CSV cuando la API falla.
+
+Una falla de la API no debe terminar en un CSV vacio o incompleto con
+codigo 200: antes de la primera fila se responde 502/503 y, si la
+respuesta se corta a mitad, el error se propaga (el servidor corta la
+descarga).
+
+Usa la API simulada (benchmarks/api_simulada.py) y, para el corte a mitad,
+un servidor que envia parte del cuerpo y cierra la conexion.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from flask import Flask
+
+from benchmarks.api_simulada import iniciar
+from routes import exportar
+
+
+@pytest.fixture
+def cliente():
+    """Cliente de una aplicacion con solo el Blueprint de exportacion."""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(exportar.bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def api_simulada(monkeypatch):
+    servidor = iniciar(puerto=0)
+    monkeypatch.setattr(exportar.api, 'base_url', servidor.url)
+    yield servidor
+    servidor.detener()
+
+
+class _CuerpoCortado(BaseHTTPRequestHandler):
+    """Anuncia un cuerpo mas largo, envia parte del arreglo y cierra."""
+
+    def do_GET(self):
+        # Varios trozos de lectura (FLUJO_TAMANO_TROZO) de filas completas y una fila a medias
+        filas = b', '.join(b'{"codigo": "P%d", "nombre": "Persona %d"}' % (i, i) for i in range(5000))
+        parte = b'{"datos": [' + filas + b', {"codigo": "P9", "nombre": "Pers'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(parte) * 2))
+        self.end_headers()
+        self.wfile.write(parte)
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_cortada(monkeypatch):
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _CuerpoCortado)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setattr(exportar.api, 'base_url', f"http://127.0.0.1:{servidor.server_address[1]}")
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_exporta_la_tabla(cliente, api_simulada):
+    respuesta = cliente.get('/exportar/empresa.csv')
+    assert respuesta.status_code == 200
+    lineas = respuesta.get_data(as_text=True).lstrip('﻿').splitlines()
+    assert lineas[0].split(',')[0] == 'codigo'
+    assert len(lineas) - 1 == len(api_simulada.api.tablas['empresa'].filas)
+
+
+def test_api_con_errores_responde_502_o_503(cliente, api_simulada):
+    api_simulada.api.configurar(errores=1.0)
+    respuesta = cliente.get('/exportar/producto.csv')
+    assert respuesta.status_code in (502, 503)
+    assert respuesta.mimetype != 'text/csv'
+
+
+def test_sp_con_errores_responde_502_o_503(cliente, api_simulada):
+    api_simulada.api.configurar(errores=1.0)
+    respuesta = cliente.get('/exportar/facturas.csv')
+    assert respuesta.status_code in (502, 503)
+
+
+def test_tabla_inexistente_en_la_api_no_es_un_csv_vacio(cliente, api_simulada, monkeypatch):
+    monkeypatch.setattr(exportar, 'EXPORTAR_TABLAS', ('no_existe',))
+    assert cliente.get('/exportar/no_existe.csv').status_code == 502
+
+
+def test_corte_a_mitad_propaga_el_error(cliente, api_cortada):
+    respuesta = cliente.get('/exportar/persona.csv')
+    # La primera fila llego: la descarga ya empezo con 200
+    assert respuesta.status_code == 200
+    with pytest.raises((requests.RequestException, ValueError)):
+        respuesta.get_data()
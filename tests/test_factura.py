@@ -0,0 +1,93 @@
+"""
+test_factura.py - Listado de facturas por paginas (GET /factura).
+
+Cada pagina es una llamada a sp_listar_facturas_pagina: la API filtra por
+fecha, cliente y vendedor y devuelve solo los encabezados de la pagina con
+la cantidad de productos de cada factura.
+"""
+
+import pytest
+
+from app import crear_app
+from benchmarks.api_simulada import iniciar
+from routes import factura
+from services.cache import CacheProcedimientos
+from services.paginacion import parametros_pagina
+
+SIN_FILTROS = {'desde': None, 'hasta': None, 'cliente': None, 'vendedor': None}
+
+
+@pytest.fixture
+def api_simulada(monkeypatch):
+    servidor = iniciar(puerto=0, filas={'factura': 60})
+    monkeypatch.setattr(factura.api, 'base_url', servidor.url)
+    # Cache de SP propio: no quedan paginas guardadas para otras pruebas
+    monkeypatch.setattr(factura.api, 'cache_sp', CacheProcedimientos())
+    yield servidor
+    servidor.detener()
+
+
+def _pagina(filtros=None, **args):
+    return factura._pagina_facturas({**SIN_FILTROS, **(filtros or {})}, parametros_pagina(args))
+
+
+def _numeros(pagina):
+    return [fac['numero'] for fac in pagina.registros]
+
+
+def test_paginas_por_cursor(api_simulada):
+    primera, error = _pagina(tamano=10)
+    assert error is None
+    numeros = _numeros(primera)
+    assert numeros == sorted(numeros, reverse=True) and len(numeros) == 10
+    assert not primera.hay_anterior and primera.hay_siguiente
+
+    segunda, _ = _pagina(**primera.args_siguiente())
+    assert segunda.numero == 2 and segunda.hay_anterior
+    assert max(_numeros(segunda)) < min(numeros)
+
+    tercera, _ = _pagina(**segunda.args_siguiente())
+    de_vuelta, _ = _pagina(**tercera.args_anterior())
+    assert _numeros(de_vuelta) == _numeros(segunda)
+    assert de_vuelta.numero == 2 and de_vuelta.hay_siguiente
+
+
+def test_filtro_solo_por_fecha(api_simulada):
+    todas, _ = _pagina(tamano=1000)
+    fecha = str(todas.registros[0]['fecha'])[:10]
+    esperadas = [fac['numero'] for fac in todas.registros if str(fac['fecha'])[:10] == fecha]
+
+    pagina, _ = _pagina({'desde': fecha, 'hasta': fecha}, tamano=1000)
+    assert _numeros(pagina) == esperadas
+
+    cliente = todas.registros[0]['fkidcliente']
+    pagina, _ = _pagina({'cliente': cliente}, tamano=1000)
+    assert {fac['fkidcliente'] for fac in pagina.registros} == {cliente}
+
+
+def test_cantidad_de_productos(api_simulada):
+    pagina, _ = _pagina(tamano=1000)
+    # Los datos iniciales del script traen facturas con productos
+    con_productos = [fac for fac in pagina.registros if fac['lineas']]
+    assert con_productos
+    detalle = factura.api.ejecutar_sp('sp_consultar_factura_y_productosporfactura', {
+        'p_numero': con_productos[0]['numero'], 'p_resultado': None})[1]
+    assert con_productos[0]['lineas'] == len(detalle['productos'])
+
+
+def test_una_llamada_por_pagina(api_simulada):
+    cliente = crear_app({'TESTING': True}).test_client()
+    cliente.get('/factura')
+    api_simulada.api.estadisticas(reiniciar=True)
+
+    respuesta = cliente.get('/factura?tamano=5&desde=2025-01-01')
+    assert respuesta.status_code == 200
+    assert b'<th>Productos</th>' in respuesta.data
+    assert api_simulada.api.estadisticas()['peticiones'] == 1
+
+
+def test_error_del_sp(api_simulada, monkeypatch):
+    monkeypatch.setattr(factura.api, 'ejecutar_sp', lambda *args: (False, 'sin conexion'))
+    pagina, error = _pagina()
+    assert error == 'sin conexion'
+    assert pagina.registros == [] and not pagina.hay_siguiente
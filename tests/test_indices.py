@@ -0,0 +1,62 @@
+"""
+test_indices.py - Indices clave → nombre (services/indices.py).
+
+Si la API no responde al construir un indice, las peticiones siguientes no
+vuelven a descargar la tabla: reciben SIN_NOMBRE de inmediato y la carga se
+reintenta en segundo plano.
+"""
+
+import time
+
+import requests
+
+from services.indices import IndicesNombres, SIN_NOMBRE
+from services.filas import compactar
+
+DEFINICIONES = {'persona': ('codigo', 'nombre', None)}
+
+
+class _Api:
+    """Listado de persona que falla mientras 'caida' es True."""
+
+    def __init__(self):
+        self.caida = True
+        self.cargas = 0
+
+    def cargar(self, tabla):
+        self.cargas += 1
+        if self.caida:
+            raise requests.ConnectionError('sin respuesta')
+        return compactar([{'codigo': 'P1', 'nombre': 'Ana Torres'}])
+
+
+def _esperar(condicion):
+    limite = time.monotonic() + 5
+    while not condicion():
+        assert time.monotonic() < limite, "la condicion no se cumplio"
+        time.sleep(0.005)
+
+
+def test_carga_fallida_no_se_repite_en_cada_peticion():
+    api = _Api()
+    indices = IndicesNombres(DEFINICIONES, reintento=30)
+    assert indices.nombre('persona', 'P1', api.cargar) == SIN_NOMBRE
+    for _ in range(20):
+        assert indices.nombre('persona', 'P1', api.cargar) == SIN_NOMBRE
+    assert api.cargas == 1
+    assert indices.estadisticas()['persona']['fallo'] is not None
+
+
+def test_reintento_en_segundo_plano():
+    api = _Api()
+    indices = IndicesNombres(DEFINICIONES, reintento=0.05)
+    assert indices.nombre('persona', 'P1', api.cargar) == SIN_NOMBRE
+
+    api.caida = False
+    time.sleep(0.06)
+    # Pasada la espera, la peticion no espera la descarga: se hace en segundo plano
+    assert indices.nombre('persona', 'P1', api.cargar) == SIN_NOMBRE
+    _esperar(lambda: indices.estadisticas()['persona']['construido'])
+    assert indices.nombre('persona', 'P1', api.cargar) == 'Ana Torres'
+    assert indices.estadisticas()['persona']['fallo'] is None
+    assert api.cargas == 2
@@ -0,0 +1,72 @@
+"""
+test_json_flujo.py - Lectura por partes de listados y resultados de SP.
+
+Cada documento se parte en trozos de bytes de tamano aleatorio (incluso
+en medio de un caracter UTF-8 o de un escape) y las filas leidas deben ser
+las mismas que con json.loads().
+"""
+
+import json
+import random
+
+import pytest
+
+from services.json_flujo import filas_listado, filas_sp
+
+
+def _filas(cantidad, semilla):
+    """Filas con tildes, emojis, escapes, numeros, null y objetos anidados."""
+    azar = random.Random(semilla)
+    textos = ['Ñandú', 'café "con" leche', 'línea\nnueva', 'barra \\ invertida',
+              '/home', 'emoji 😀', '', 'tab\tx', 'é́', 'x' * 300]
+    return [{
+        'codigo': f'PR{i:04d}',
+        'nombre': azar.choice(textos),
+        'valor': azar.choice([0, -1, 3.25, 1e21, 10 ** 20]),
+        'activo': azar.choice([True, False, None]),
+        'productos': [{'cantidad': azar.randint(1, 9), 'nota': azar.choice(textos)}
+                      for _ in range(azar.randint(0, 3))],
+    } for i in range(cantidad)]
+
+
+def _trozos(datos, semilla, maximo=64):
+    """Parte los bytes en trozos de 1 a 'maximo' bytes."""
+    azar = random.Random(semilla)
+    posicion = 0
+    while posicion < len(datos):
+        largo = azar.randint(1, maximo)
+        yield datos[posicion:posicion + largo]
+        posicion += largo
+
+
+@pytest.mark.parametrize('semilla', range(40))
+@pytest.mark.parametrize('ascii_', [True, False])
+def test_filas_listado_igual_a_json_loads(semilla, ascii_):
+    filas = _filas(semilla % 7 * 5, semilla)
+    documento = json.dumps({'datos': filas, 'mensaje': 'ok'}, ensure_ascii=ascii_).encode()
+    assert list(filas_listado(_trozos(documento, semilla))) == json.loads(documento)['datos']
+
+
+@pytest.mark.parametrize('semilla', range(40))
+def test_filas_sp_con_p_resultado_como_texto(semilla):
+    facturas = _filas(semilla % 5 * 4, semilla)
+    interno = json.dumps({'facturas': facturas}, ensure_ascii=semilla % 2 == 0)
+    documento = json.dumps({'resultados': [{'p_resultado': interno}]}).encode()
+    assert list(filas_sp(_trozos(documento, semilla), 'facturas')) == facturas
+
+
+def test_filas_sp_con_p_resultado_anidado():
+    facturas = _filas(6, 1)
+    documento = json.dumps({'resultados': [{'p_resultado': {'facturas': facturas}}]}).encode()
+    assert list(filas_sp(_trozos(documento, 1, 7), 'facturas')) == facturas
+
+
+def test_datos_null_no_entrega_filas():
+    assert list(filas_listado([b'{"datos": null, "mensaje": "sin datos"}'])) == []
+
+
+@pytest.mark.parametrize('corte', [1, 20, 45, -3])
+def test_documento_cortado_lanza_value_error(corte):
+    documento = json.dumps({'datos': _filas(3, 2)}).encode()
+    with pytest.raises(ValueError):
+        list(filas_listado([documento[:corte]]))
@@ -0,0 +1,56 @@
+"""
+test_paginacion.py - Paginas de los listados (ApiService.listar_pagina).
+
+Las tablas sin cache no se ordenan ni se recorren mas alla de
+PAGINA_FILAS_MAXIMAS: cada pagina se pide a la API solo hasta su final.
+"""
+
+import pytest
+
+from benchmarks.api_simulada import iniciar
+from services import api_service
+from services.api_service import ApiService
+from services.cache import CacheTablas
+
+
+@pytest.fixture
+def api():
+    servidor = iniciar(puerto=0, filas={'factura': 100})
+    servicio = ApiService()
+    servicio.base_url = servidor.url
+    # Cache propio: no quedan listados de respaldo para otras pruebas
+    servicio.cache = CacheTablas()
+    yield servidor, servicio
+    servidor.detener()
+
+
+def test_tabla_sin_cache_ignora_orden(api, monkeypatch):
+    _servidor, servicio = api
+    pedidos = []
+    listar = servicio.listar
+    monkeypatch.setattr(servicio, 'listar', lambda tabla, limite=None: (
+        pedidos.append(limite) or listar(tabla, limite)))
+
+    pagina = servicio.listar_pagina('factura', 'numero', orden='total', direccion='desc', tamano=5)
+    assert not pagina.ordenable
+    assert pagina.orden is None
+    assert len(pagina.registros) == 5 and pagina.hay_siguiente
+    # Solo se pidieron las filas de la pagina (+1), no la tabla completa
+    assert pedidos == [6]
+
+
+def test_tabla_con_cache_se_ordena(api):
+    _servidor, servicio = api
+    pagina = servicio.listar_pagina('producto', 'codigo', orden='stock', tamano=5)
+    assert pagina.ordenable
+    stocks = [fila['stock'] for fila in pagina.registros]
+    assert stocks == sorted(stocks)
+
+
+def test_pagina_profunda_se_acota(api, monkeypatch):
+    _servidor, servicio = api
+    monkeypatch.setattr(api_service, 'PAGINA_FILAS_MAXIMAS', 20)
+    pagina = servicio.listar_pagina('factura', 'numero', pagina=1000, tamano=5)
+    assert pagina.numero == 4
+    assert len(pagina.registros) == 5
+    assert pagina.hay_anterior and not pagina.hay_siguiente
@@ -0,0 +1,74 @@
+"""
+test_resiliencia.py - Circuit breaker por endpoint (services/resiliencia.py).
+"""
+
+import time
+
+import pytest
+
+from benchmarks.api_simulada import iniciar
+from services.api_service import ApiService
+from services.cache import CacheTablas
+from services.resiliencia import Circuito, Circuitos, ABIERTO, CERRADO, SEMIABIERTO
+
+
+def test_abre_despues_de_fallos_seguidos():
+    circuito = Circuito(fallos=3, espera=30)
+    for _ in range(2):
+        assert circuito.permitir()
+        circuito.registrar_fallo()
+    # Un exito reinicia la cuenta
+    circuito.registrar_exito()
+    for _ in range(3):
+        circuito.registrar_fallo()
+    assert circuito.estado()['estado'] == ABIERTO
+    assert not circuito.permitir()
+    assert circuito.estado()['rechazadas'] == 1
+
+
+def test_semiabierto_deja_pasar_una_sola_prueba():
+    circuito = Circuito(fallos=1, espera=0.05)
+    circuito.registrar_fallo()
+    assert not circuito.permitir()
+    time.sleep(0.06)
+    assert circuito.permitir()
+    assert circuito.estado()['estado'] == SEMIABIERTO
+    # Mientras la prueba esta en curso las demas se rechazan
+    assert not circuito.permitir()
+
+    # La prueba falla: vuelve a abrirse
+    circuito.registrar_fallo()
+    assert circuito.estado()['estado'] == ABIERTO
+    time.sleep(0.06)
+    assert circuito.permitir()
+    circuito.registrar_exito()
+    assert circuito.estado()['estado'] == CERRADO
+    assert circuito.permitir() and circuito.permitir()
+
+
+@pytest.fixture
+def api():
+    servidor = iniciar(puerto=0)
+    servicio = ApiService()
+    servicio.base_url = servidor.url
+    servicio.cache = CacheTablas(respaldo_todas=False)
+    servicio.circuitos = Circuitos(fallos=2, espera=30)
+    yield servidor, servicio
+    servidor.detener()
+
+
+def test_endpoint_caido_no_recibe_peticiones(api, monkeypatch):
+    servidor, servicio = api
+    # Sin esperas entre reintentos
+    monkeypatch.setattr('services.api_service.espera_reintento', lambda intento: 0)
+    servidor.api.configurar(errores=1.0, codigo_error=503)
+    assert servicio.listar('cliente') == []
+    assert servicio.estado_circuitos()['GET /api/cliente']['estado'] == ABIERTO
+
+    # Con el circuito abierto no se intenta la peticion
+    servidor.api.configurar(errores=0.0)
+    servidor.api.estadisticas(reiniciar=True)
+    assert servicio.listar('cliente') == []
+    assert servidor.api.estadisticas()['peticiones'] == 0
+    # Los demas endpoints siguen funcionando
+    assert servicio.listar('vendedor')
@@ -0,0 +1,150 @@
+"""
+test_single_flight.py - Lecturas agrupadas (services/single_flight.py).
+
+Las llamadas simultaneas iguales comparten una sola peticion, pero una
+lectura que empieza despues de una escritura propia no se une a un GET que
+empezo antes: la clave lleva la generacion del cache.
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.api_service import ApiService
+from services.cache import CacheTablas, CacheProcedimientos
+from services.indices import IndicesNombres
+from services.single_flight import SingleFlight
+
+SP_CONSULTA = 'sp_consultar_factura_y_productosporfactura'
+SP_ACTUALIZA = 'sp_actualizar_factura_y_productosporfactura'
+
+
+@pytest.fixture
+def servicio():
+    # Sin servidor: las descargas se reemplazan en cada prueba
+    servicio = ApiService()
+    servicio.base_url = 'http://api.prueba'
+    servicio.cache = CacheTablas()
+    servicio.cache_sp = CacheProcedimientos()
+    servicio.nombres = IndicesNombres()
+    servicio.single_flight = SingleFlight()
+    return servicio
+
+
+def _en_hilo(funcion, *args):
+    """Ejecuta funcion(*args) en un hilo; retorna (hilo, lista con el resultado)."""
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(funcion(*args)))
+    hilo.start()
+    return hilo, resultado
+
+
+def _esperar(condicion):
+    limite = time.monotonic() + 5
+    while not condicion():
+        assert time.monotonic() < limite, "la condicion no se cumplio"
+        time.sleep(0.005)
+
+
+def test_agrupa_llamadas_simultaneas():
+    grupo = SingleFlight()
+    liberar = threading.Event()
+    llamadas = []
+
+    def lento():
+        llamadas.append(1)
+        liberar.wait(5)
+        return 'dato'
+
+    lider, resultado_lider = _en_hilo(grupo.ejecutar, 'clave', lento)
+    _esperar(lambda: grupo.estadisticas()['en_curso'] == 1)
+    seguidor, resultado_seguidor = _en_hilo(grupo.ejecutar, 'clave', lento)
+    _esperar(lambda: grupo.estadisticas()['agrupadas'] == 1)
+    liberar.set()
+    lider.join(5)
+    seguidor.join(5)
+
+    assert llamadas == [1]
+    assert resultado_lider == resultado_seguidor == ['dato']
+    # Terminada la peticion, la siguiente llamada vuelve a ejecutarse
+    assert grupo.ejecutar('clave', lambda: 'otro') == 'otro'
+
+
+def test_error_llega_a_todo_el_grupo():
+    grupo = SingleFlight()
+    liberar = threading.Event()
+    errores = []
+
+    def falla():
+        liberar.wait(5)
+        raise ValueError('sin respuesta')
+
+    def llamar():
+        try:
+            grupo.ejecutar('clave', falla)
+        except ValueError as ex:
+            errores.append(str(ex))
+
+    hilos = [threading.Thread(target=llamar) for _ in range(3)]
+    for hilo in hilos:
+        hilo.start()
+    _esperar(lambda: grupo.estadisticas()['agrupadas'] == 2)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join(5)
+    assert errores == ['sin respuesta'] * 3
+
+
+def test_listar_despues_de_escribir_no_recibe_el_get_anterior(servicio, monkeypatch):
+    liberar = threading.Event()
+    respuestas = iter([[{'codigo': 'PR001', 'stock': 17}], [{'codigo': 'PR001', 'stock': 3}]])
+
+    def descargar(tabla, limite):
+        datos = next(respuestas)
+        if datos[0]['stock'] == 17:
+            # El GET anterior a la escritura tarda en volver
+            liberar.wait(5)
+        return datos
+
+    monkeypatch.setattr(servicio, '_descargar_listado', descargar)
+
+    antes, resultado_antes = _en_hilo(servicio.listar, 'producto')
+    _esperar(lambda: servicio.single_flight.estadisticas()['en_curso'] == 1)
+
+    servicio._registrar_actualizacion('producto', 'codigo', 'PR001', {'stock': 3})
+    despues, resultado_despues = _en_hilo(servicio.listar, 'producto')
+    despues.join(5)
+    liberar.set()
+    antes.join(5)
+
+    assert resultado_despues[0][0]['stock'] == 3
+    assert resultado_antes[0][0]['stock'] == 17
+
+
+def test_sp_despues_de_escribir_no_recibe_la_consulta_anterior(servicio, monkeypatch):
+    liberar = threading.Event()
+    respuestas = iter([(True, {'total': 100}), (True, {'total': 250})])
+
+    def llamar(nombre_sp, parametros):
+        exito, datos = next(respuestas)
+        if datos['total'] == 100:
+            liberar.wait(5)
+        return (exito, datos)
+
+    monkeypatch.setattr(servicio, '_llamar_sp', llamar)
+
+    parametros = {'p_numero': 5, 'p_resultado': None}
+    antes, resultado_antes = _en_hilo(servicio.ejecutar_sp, SP_CONSULTA, parametros)
+    _esperar(lambda: servicio.single_flight.estadisticas()['en_curso'] == 1)
+
+    servicio._invalidar_por_sp(SP_ACTUALIZA, {'p_numero': 5})
+    despues, resultado_despues = _en_hilo(servicio.ejecutar_sp, SP_CONSULTA, parametros)
+    despues.join(5)
+    liberar.set()
+    antes.join(5)
+
+    assert resultado_despues == [(True, {'total': 250})]
+    assert resultado_antes == [(True, {'total': 100})]
+    # El resultado anterior a la escritura no quedo en el cache
+    assert servicio.cache_sp.obtener(SP_CONSULTA, parametros) == {'total': 250}
@@ -0,0 +1,83 @@
+"""
+test_sugerencias.py - Busqueda mientras se escribe (GET /buscar/<tabla>).
+
+cliente y vendedor no tienen cache: se buscan en su indice de nombres, que
+se arma una vez y no se descarga la tabla en cada consulta. El indice de
+busqueda se reutiliza mientras no cambie la version del listado.
+"""
+
+import pytest
+
+from benchmarks.api_simulada import iniciar
+from services.api_service import ApiService
+from services.cache import CacheTablas
+from services.indices import IndicesNombres
+from services import sugerencias as sugerencias_modulo
+from services.sugerencias import Sugerencias
+
+
+@pytest.fixture
+def api():
+    servidor = iniciar(puerto=0)
+    servicio = ApiService()
+    servicio.base_url = servidor.url
+    # Cache e indices propios: no quedan listados de respaldo para otras pruebas
+    servicio.cache = CacheTablas()
+    servicio.nombres = IndicesNombres()
+    servicio.sugerencias = Sugerencias()
+    yield servidor, servicio
+    servidor.detener()
+
+
+def test_cliente_por_nombre_de_persona(api):
+    servidor, servicio = api
+    resultados = servicio.buscar('cliente', 'ana')
+    assert resultados == [{'valor': 1, 'texto': 'Ana Torres (ID: 1)'}]
+    assert servicio.buscar('vendedor', 'carlos')[0]['valor'] == 1
+
+    # Con los indices armados, las consultas siguientes no van a la API
+    servidor.api.estadisticas(reiniciar=True)
+    assert servicio.buscar('cliente', 'mar')[0]['valor'] == 2
+    assert servicio.buscar('vendedor', '1')[0]['valor'] == 1
+    assert servidor.api.estadisticas()['peticiones'] == 0
+
+
+def test_listado_se_rearma_solo_si_cambia(api):
+    _servidor, servicio = api
+    cargar = servicio._listado_completo
+    listado = servicio.nombres.listado('cliente', cargar)
+    assert servicio.nombres.listado('cliente', cargar) is listado
+
+    servicio.nombres.al_eliminar('cliente', 'id', 1)
+    nuevo = servicio.nombres.listado('cliente', cargar)
+    assert nuevo is not listado
+    assert 1 not in [fila['id'] for fila in nuevo]
+
+
+def test_indice_se_reutiliza_con_listas(monkeypatch):
+    # Filas con columnas distintas: el cache guarda una lista comun y
+    # entrega una copia nueva en cada consulta
+    servicio = ApiService()
+    servicio.cache = CacheTablas()
+    servicio.sugerencias = Sugerencias()
+    productos = [
+        {'codigo': 'PR001', 'nombre': 'Laptop Lenovo', 'stock': 17},
+        {'codigo': 'PR002', 'nombre': 'Laptop Dell', 'stock': 5, 'valorunitario': 10},
+    ]
+    servicio.cache.guardar('producto', None, productos, 100, servicio.cache.generacion('producto'))
+    assert servicio.listar('producto') is not servicio.listar('producto')
+
+    construidos = []
+    original = sugerencias_modulo.IndiceTexto
+    monkeypatch.setattr(sugerencias_modulo, 'IndiceTexto',
+                        lambda *args: construidos.append(1) or original(*args))
+    for consulta in ('l', 'la', 'lap', 'lapt'):
+        assert len(servicio.buscar('producto', consulta)) == 2
+    assert len(construidos) == 1
+
+    # Otro listado en el cache: se reconstruye una vez
+    servicio.cache.invalidar('producto')
+    servicio.cache.guardar('producto', None, productos[:1], 100, servicio.cache.generacion('producto'))
+    assert [s['valor'] for s in servicio.buscar('producto', 'lap')] == ['PR001']
+    assert [s['valor'] for s in servicio.buscar('producto', 'lapt')] == ['PR001']
+    assert len(construidos) == 2
@@ -0,0 +1,14 @@
+"""
+wsgi.py - Punto de entrada para servidores WSGI de produccion.
+
+El servidor de desarrollo de "python app.py" atiende de a pocas peticiones y
+no debe usarse en produccion. Con gunicorn:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py elige el modelo de workers (hilos o green threads), calienta
+los caches antes de recibir trafico y drena las peticiones al apagar.
+"""
+
+# app: aplicacion creada con crear_app() (ver app.py)
+from app import app